@@ -0,0 +1,236 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import collections
+import contextlib
+import cProfile
+import functools
+import glob
+import os
+import time
+
+from neutron_lib.utils import file as file_utils
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
+
+LOG = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the histogram buckets.
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PROFILE_FILE_PREFIX = 'iteration-'
+PROFILE_FILE_SUFFIX = '.prof'
+
+
+class Histogram:
+    """Distribution of durations in fixed buckets.
+
+    The buckets are cumulative, as in the Prometheus exposition format: the
+    bucket "le" counts all the observations lower or equal to "le".
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf', ), self._counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {'count': self.count,
+                'sum': round(self.sum, 6),
+                'max': round(self.max, 6),
+                'buckets': buckets}
+
+
+class LoopMetrics:
+    """Timing metrics of the iterations of an agent processing loop.
+
+    Each iteration is split in named phases. For each phase, the metrics
+    record a histogram of its duration and the number of ports processed.
+    The latency of the RPC methods wrapped by ``instrument_rpc`` is recorded
+    too.
+
+    If ``metrics_file`` is set, all the metrics are written in JSON to this
+    file at the end of every iteration. If ``profiling_dir`` is set, every
+    iteration is profiled with cProfile and the profiles of the iterations
+    lasting ``profiling_threshold`` seconds or more are saved in this
+    directory (only the last ``profiling_max_files`` files are kept).
+    """
+
+    def __init__(self, metrics_file=None, profiling_dir=None,
+                 profiling_threshold=0, profiling_max_files=0):
+        self.metrics_file = metrics_file
+        self.profiling_dir = profiling_dir
+        self.profiling_threshold = profiling_threshold
+        self.profiling_max_files = profiling_max_files
+        self.iterations = Histogram()
+        self.phases = collections.defaultdict(Histogram)
+        self.rpcs = collections.defaultdict(Histogram)
+        self.ports = collections.Counter()
+        self.last_iteration = {}
+        self._iteration = None
+        self._profiler = None
+
+    def start_iteration(self, iter_num):
+        self._iteration = {'iteration': iter_num,
+                           'started_at': timeutils.utcnow().isoformat(),
+                           'phases': collections.defaultdict(float),
+                           'ports': collections.Counter()}
+        if self.profiling_dir:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def end_iteration(self, elapsed):
+        """Record the end of the current iteration, lasting elapsed seconds.
+
+        The metrics are written to the metrics file, if any, and the profile
+        of the iteration is saved if it was too slow.
+        """
+        self.iterations.observe(elapsed)
+        iteration = self._iteration or {}
+        self._iteration = None
+        self.last_iteration = {
+            'iteration': iteration.get('iteration'),
+            'started_at': iteration.get('started_at'),
+            'elapsed': round(elapsed, 6),
+            'phases': {phase: round(duration, 6) for phase, duration in
+                       iteration.get('phases', {}).items()},
+            'ports': dict(iteration.get('ports', {}))}
+        if self._profiler:
+            self._profiler.disable()
+            if elapsed >= self.profiling_threshold:
+                self._save_profile(iteration.get('iteration'), elapsed)
+            self._profiler = None
+        if self.metrics_file:
+            self._write_metrics_file()
+
+    def observe_phase(self, phase, elapsed, ports=None):
+        self.phases[phase].observe(elapsed)
+        if ports is not None:
+            self.ports[phase] += ports
+        if self._iteration is not None:
+            self._iteration['phases'][phase] += elapsed
+            if ports is not None:
+                self._iteration['ports'][phase] += ports
+
+    @contextlib.contextmanager
+    def phase(self, phase, ports=None):
+        """Time a phase of the current iteration.
+
+        :param phase: name of the phase.
+        :param ports: number of ports processed in this phase, if relevant.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe_phase(phase, time.monotonic() - start, ports=ports)
+
+    def observe_rpc(self, method, elapsed):
+        self.rpcs[method].observe(elapsed)
+
+    def instrument_rpc(self, rpc_api, methods):
+        """Record the latency of the given methods of an RPC API instance.
+
+        The methods not implemented by the RPC API are ignored.
+        """
+        for method_name in methods:
+            method = getattr(rpc_api, method_name, None)
+            if method is None:
+                continue
+            setattr(rpc_api, method_name,
+                    self._timed_rpc(method_name, method))
+
+    def _timed_rpc(self, method_name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.observe_rpc(method_name, time.monotonic() - start)
+        return wrapper
+
+    def get_summary(self):
+        """Return a short summary of the metrics, to be logged."""
+        return {
+            'iterations': self.iterations.count,
+            'max_iteration_elapsed': round(self.iterations.max, 3),
+            'last_iteration': {
+                'elapsed': round(self.last_iteration.get('elapsed', 0), 3),
+                'phases': {phase: round(duration, 3) for phase, duration in
+                           self.last_iteration.get('phases', {}).items()}},
+            'rpc_max_latency': {method: round(histogram.max, 3)
+                                for method, histogram in self.rpcs.items()},
+        }
+
+    def to_dict(self):
+        return {
+            'iterations': self.iterations.to_dict(),
+            'last_iteration': self.last_iteration,
+            'phases': {phase: histogram.to_dict()
+                       for phase, histogram in self.phases.items()},
+            'ports': dict(self.ports),
+            'rpcs': {method: histogram.to_dict()
+                     for method, histogram in self.rpcs.items()},
+        }
+
+    def _write_metrics_file(self):
+        try:
+            file_utils.replace_file(self.metrics_file,
+                                    jsonutils.dumps(self.to_dict(),
+                                                    sort_keys=True))
+        except OSError as e:
+            LOG.warning("Unable to write the metrics file %(file)s: %(err)s",
+                        {'file': self.metrics_file, 'err': e})
+
+    def _save_profile(self, iter_num, elapsed):
+        file_name = os.path.join(
+            self.profiling_dir, '%s%s-%d%s' % (
+                PROFILE_FILE_PREFIX, timeutils.utcnow().strftime(
+                    '%Y%m%d%H%M%S'), iter_num or 0, PROFILE_FILE_SUFFIX))
+        try:
+            os.makedirs(self.profiling_dir, exist_ok=True)
+            self._profiler.dump_stats(file_name)
+        except OSError as e:
+            LOG.warning("Unable to save the profile of iteration "
+                        "%(iter_num)s: %(err)s",
+                        {'iter_num': iter_num, 'err': e})
+            return
+        LOG.info("Iteration %(iter_num)s lasted %(elapsed).3f seconds, "
+                 "profile saved in %(file)s",
+                 {'iter_num': iter_num, 'elapsed': elapsed,
+                  'file': file_name})
+        self._prune_profiles()
+
+    def _prune_profiles(self):
+        if not self.profiling_max_files:
+            return
+        profiles = sorted(glob.glob(os.path.join(
+            self.profiling_dir,
+            PROFILE_FILE_PREFIX + '*' + PROFILE_FILE_SUFFIX)))
+        for file_name in profiles[:-self.profiling_max_files]:
+            with contextlib.suppress(OSError):
+                os.remove(file_name)
@@ -262,6 +262,7 @@ class OVSBridge(BaseOVS):
             ovs_constants.OPENFLOW14}
         self.initial_protocols.add(self._highest_protocol_needed)
         self._flows_per_port = cfg.CONF.OVS.openflow_processed_per_port
+        self._max_flows_per_call = cfg.CONF.OVS.openflow_bundle_max_flows
 
     @property
     def default_cookie(self):
@@ -582,6 +583,10 @@ class OVSBridge(BaseOVS):
                 # No group ID defined (flows are not grouped per port). Use the
                 # default batch step value "openflow_number_processing_step".
                 step = common_constants.AGENT_RES_PROCESSING_STEP
+                if self._max_flows_per_call:
+                    # Bound the size of each bundle (or ovs-ofctl call) so a
+                    # big update does not hold the switch in one transaction.
+                    step = min(step, self._max_flows_per_call)
 
             for i in range(0, len(flow_strs), step):
                 self.run_ofctl('%s-flows' % action, extra_param + ['-'],
@@ -13,6 +13,7 @@
 #    under the License.
 #
 
+import collections
 import datetime
 import queue
 import time
@@ -44,7 +45,9 @@ class ResourceUpdate:
         # update_id will be used for tracking one resource processing
         # procedure.
         self.update_id = uuidutils.generate_uuid()
-        self.create_time = self.start_time = time.time()
+        self.create_time = self.start_time = self.queue_time = time.time()
+        # Set by the ResourceProcessingQueue, see "__lt__".
+        self.aging_interval = 0
 
     def set_start_time(self):
         # Set the start_time to 'now' - can be used by callers to help
@@ -60,6 +63,18 @@ class ResourceUpdate:
         # Time elapsed between processing start and end.
         return time.time() - self.start_time
 
+    @property
+    def aged_priority(self):
+        """The priority increased by one for each aging interval waited.
+
+        This is "priority - (now - create_time) / aging_interval"; "now" is
+        the same for all the updates, so it is left out and the order of
+        the queued updates does not change over time.
+        """
+        if not self.aging_interval:
+            return self.priority
+        return self.priority + self.create_time / self.aging_interval
+
     def __lt__(self, other):
         """Implements priority among updates
 
@@ -68,9 +83,14 @@ class ResourceUpdate:
         gets precedence.  In the unlikely event that the timestamps are also
         equal it falls back to a simple comparison of ids meaning the
         precedence is essentially random.
+
+        If an aging interval is set, the priority of an update is increased
+        by one each time it waits for that interval, so the low priority
+        updates are eventually processed even if higher priority ones keep
+        coming.
         """
-        if self.priority != other.priority:
-            return self.priority < other.priority
+        if self.aged_priority != other.aged_priority:
+            return self.aged_priority < other.aged_priority
         if self.timestamp != other.timestamp:
             return self.timestamp < other.timestamp
         return self.id < other.id
@@ -160,26 +180,93 @@ class ExclusiveResourceProcessor:
 
 
 class ResourceProcessingQueue:
-    """Manager of the queue of resources to process."""
-    def __init__(self):
-        self._queue = queue.PriorityQueue()
+    """Manager of the queue of resources to process.
+
+    The queue can be split in several shards, each one processed by its own
+    worker. All the updates of a resource are stored in the same shard, so
+    they are processed by a single worker, in order.
+    """
+    def __init__(self, num_shards=1, aging_interval=0):
+        self._queues = [queue.PriorityQueue()
+                        for idx in range(max(num_shards, 1))]
+        self._aging_interval = aging_interval
+        # {priority: {counter: value}}
+        self._stats = collections.defaultdict(collections.Counter)
+        # {resource_id: number of updates queued}
+        self._pending = collections.Counter()
+
+    @property
+    def num_shards(self):
+        return len(self._queues)
 
     @property
     def qsize(self):
         """Returns the number of elements stored in the PriorityQueue"""
-        return self._queue.qsize()
+        return sum(_queue.qsize() for _queue in self._queues)
+
+    def pending_updates(self, resource_id):
+        """Returns the number of queued updates of a resource"""
+        return self._pending[resource_id]
+
+    @property
+    def stats(self):
+        """Returns the queue depth, wait and processing times per priority
+
+        The wait time goes from the moment an update is added to the queue
+        until a worker takes it, the processing time is the time the worker
+        spends on it.
+        """
+        depths = collections.Counter(
+            update.priority for _queue in self._queues
+            for update in list(_queue.queue))
+        stats = {}
+        for priority in set(depths) | set(self._stats):
+            counters = self._stats[priority]
+            stats[priority] = {
+                'depth': depths[priority],
+                'processed': counters['processed'],
+                'wait_time_avg': round(
+                    counters['wait_time'] / counters['taken']
+                    if counters['taken'] else 0, 3),
+                'wait_time_max': round(counters['wait_time_max'], 3),
+                'processing_time_avg': round(
+                    counters['processing_time'] / counters['processed']
+                    if counters['processed'] else 0, 3),
+                'processing_time_max': round(
+                    counters['processing_time_max'], 3),
+            }
+        return stats
+
+    def _get_shard(self, resource_id):
+        return hash(resource_id) % len(self._queues)
 
     def add(self, update):
         update.tries -= 1
-        self._queue.put(update)
+        update.aging_interval = self._aging_interval
+        update.queue_time = time.time()
+        self._pending[update.id] += 1
+        self._queues[self._get_shard(update.id)].put(update)
 
-    def each_update_to_next_resource(self):
+    def _record_time(self, priority, name, elapsed):
+        counters = self._stats[priority]
+        counters[name] += elapsed
+        counters[name + '_max'] = max(counters[name + '_max'], elapsed)
+
+    def each_update_to_next_resource(self, shard=0):
         """Grabs the next resource from the queue and processes
 
         This method uses a for loop to process the resource repeatedly until
         updates stop bubbling to the front of the queue.
+
+        :param shard: the queue shard to take the resource from.
         """
-        next_update = self._queue.get()
+        next_update = self._queues[shard].get()
+        self._pending[next_update.id] -= 1
+        if self._pending[next_update.id] <= 0:
+            del self._pending[next_update.id]
+        self._stats[next_update.priority]['taken'] += 1
+        self._record_time(next_update.priority, 'wait_time',
+                          time.time() - next_update.queue_time)
 
         with ExclusiveResourceProcessor(next_update.id) as rp:
             # Queue the update whether this worker is the primary or not.
@@ -191,3 +278,6 @@ class ResourceProcessingQueue:
             for update in rp.updates():
                 update.set_start_time()
                 yield (rp, update)
+                self._stats[update.priority]['processed'] += 1
+                self._record_time(update.priority, 'processing_time',
+                                  update.time_elapsed_since_start)
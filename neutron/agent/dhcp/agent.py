@@ -39,6 +39,7 @@ from neutron.agent.common import base_agent_rpc
 from neutron.agent.common import resource_processing_queue as queue
 from neutron.agent.linux import dhcp
 from neutron.agent.linux import external_process
+from neutron.agent.linux import namespace_pool
 from neutron.agent.metadata import driver as metadata_driver
 from neutron.agent import rpc as agent_rpc
 from neutron.common import utils
@@ -53,6 +54,10 @@ DELETED_PORT_MAX_AGE = 86400
 
 DHCP_READY_PORTS_SYNC_MAX = 64
 
+# Maximum number of port updates of a network applied with a single reload
+# of its DHCP allocations.
+RELOAD_ALLOCATIONS_MAX_DEFERRED = 64
+
 
 def _sync_lock(f):
     """Decorator to block all operations for a global sync call."""
@@ -132,9 +137,19 @@ class DhcpAgent(manager.Manager):
         self._process_monitor = external_process.ProcessMonitor(
             config=self.conf,
             resource_type='dhcp')
+        if self.conf.AGENT.namespace_pool_size:
+            device_manager = dhcp.DeviceManager(self.conf, self.plugin_rpc)
+            namespace_pool.register(namespace_pool.NamespacePool(
+                dhcp.NS_PREFIX, dhcp.POOL_NS_PREFIX,
+                self.conf.AGENT.namespace_pool_size,
+                device_manager.setup_namespace))
         self._pool = eventlet.GreenPool(1)
-        self._queue = queue.ResourceProcessingQueue()
+        self._queue = queue.ResourceProcessingQueue(
+            num_shards=self.conf.AGENT.resource_processing_workers,
+            aging_interval=self.conf.AGENT.resource_update_aging_interval)
         self._network_bulk_allocations = {}
+        # {network_id: [(port_id, prio), ...]}
+        self._deferred_reloads = {}
         # Each dhcp-agent restart should trigger a restart of all
         # metadata-proxies too. This way we can ensure that changes in
         # the metadata-proxy config we generate will be applied soon
@@ -575,15 +590,75 @@ class DhcpAgent(manager.Manager):
     def _process_loop(self):
         LOG.debug("Starting _process_loop")
 
+        if self._queue.num_shards > 1:
+            # One worker per queue shard, each network is always processed
+            # by the same worker.
+            for shard in range(1, self._queue.num_shards):
+                eventlet.spawn_n(self._process_shard_loop, shard)
+            self._process_shard_loop(0)
+            return
         while True:
             self._pool.spawn_n(self._process_resource_update)
 
-    def _process_resource_update(self):
-        for tmp, update in self._queue.each_update_to_next_resource():
+    def _process_shard_loop(self, shard):
+        while True:
+            self._process_resource_update(shard)
+
+    def _process_resource_update(self, shard=0):
+        for tmp, update in self._queue.each_update_to_next_resource(shard):
             method = getattr(self, update.action)
-            method(update.resource)
+            try:
+                method(update.resource)
+            finally:
+                self._reload_deferred_allocations(update.id)
             LOG.debug('Pending events to be processed: %s', self._queue.qsize)
 
+    def _defer_reload_allocations(self, network_id, port_id=None,
+                                  prio=False):
+        """Defer the reload of the allocations of a network.
+
+        When other updates of the network are queued, the reload is left to
+        the last of them, so a burst of port updates results in a single
+        rewrite of the DHCP driver configuration. The ports are reported
+        ready once their allocations are reloaded.
+
+        :returns: True if the reload was deferred.
+        """
+        deferred = self._deferred_reloads.get(network_id, [])
+        if (not self._queue.pending_updates(network_id) or
+                len(deferred) >= RELOAD_ALLOCATIONS_MAX_DEFERRED):
+            return False
+        deferred.append((port_id, prio))
+        self._deferred_reloads[network_id] = deferred
+        return True
+
+    def _set_deferred_ports_ready(self, network_id):
+        for port_id, prio in self._deferred_reloads.pop(network_id, []):
+            if not port_id:
+                continue
+            if prio:
+                self.dhcp_prio_ready_ports.add(port_id)
+            else:
+                self.dhcp_ready_ports.add(port_id)
+
+    def _reload_deferred_allocations(self, network_id):
+        """Reload the deferred allocations of a network, if any.
+
+        The reload is done when no other update of the network is queued,
+        e.g. when the last update of the network did not reload its
+        allocations.
+        """
+        if (network_id not in self._deferred_reloads or
+                self._queue.pending_updates(network_id)):
+            return
+        network = self.cache.get_network_by_id(network_id)
+        if not network:
+            del self._deferred_reloads[network_id]
+            return
+        self.call_driver('reload_allocations', network)
+        self._set_deferred_ports_ready(network_id)
+        self.update_isolated_metadata_proxy(network)
+
     def port_update_end(self, context, payload):
         """Handle the port.update.end notification event."""
         updated_port = dhcp.DictModel(payload['port'])
@@ -638,7 +713,11 @@ class DhcpAgent(manager.Manager):
                           network.id, old_ips, new_ips)
                 driver_action = 'restart'
         self.cache.put_port(port)
+        if (driver_action == 'reload_allocations' and
+                self._defer_reload_allocations(network.id, port.id, prio)):
+            return
         self.call_driver(driver_action, network)
+        self._set_deferred_ports_ready(network.id)
         if prio:
             self.dhcp_prio_ready_ports.add(port.id)
         else:
@@ -720,8 +799,9 @@ class DhcpAgent(manager.Manager):
             self.call_driver('disable', network,
                              network_id=payload['network_id'])
             self.schedule_resync("Agent port was deleted", port.network_id)
-        else:
+        elif not self._defer_reload_allocations(payload['network_id']):
             self.call_driver('reload_allocations', network)
+            self._set_deferred_ports_ready(payload['network_id'])
             self.update_isolated_metadata_proxy(network)
 
     def update_isolated_metadata_proxy(self, network):
@@ -1072,6 +1152,8 @@ class DhcpAgentWithStateReport(DhcpAgent):
         try:
             self.agent_state.get('configurations').update(
                 self.cache.get_state())
+            LOG.debug("Network update queue statistics: %s",
+                      self._queue.stats)
             ctx = context.get_admin_context_without_session()
             agent_status = self.state_rpc.report_state(
                 ctx, self.agent_state, True)
@@ -34,6 +34,8 @@ def register_options(conf):
     config.register_interface_driver_opts_helper(conf)
     config.register_agent_state_opts_helper(conf)
     config.register_availability_zone_opts_helper(conf)
+    config.register_resource_processing_opts_helper(conf)
+    config.register_namespace_pool_opts_helper(conf)
     dhcp_config.register_agent_dhcp_opts(conf)
     meta_conf.register_meta_conf_opts(meta_conf.SHARED_OPTS, conf)
     config.register_interface_opts(conf)
@@ -163,6 +163,17 @@ class FirewallDriver(metaclass=abc.ABCMeta):
     def remove_trusted_ports(self, port_ids):
         pass
 
+    def get_flow_stats(self):
+        """Return and reset the counters of the rules added and deleted.
+
+        The deletions are counted as calls: a call can delete any number of
+        rules.
+
+        Firewall drivers that do not count the rules they apply return an
+        empty dictionary.
+        """
+        return {}
+
 
 class NoopFirewallDriver(FirewallDriver):
     """Noop Firewall Driver.
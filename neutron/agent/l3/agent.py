@@ -14,6 +14,7 @@
 #
 
 import functools
+import time
 
 import eventlet
 import netaddr
@@ -53,6 +54,7 @@ from neutron.agent.l3 import legacy_router
 from neutron.agent.l3 import namespace_manager
 from neutron.agent.l3 import namespaces as l3_namespaces
 from neutron.agent.linux import external_process
+from neutron.agent.linux import namespace_pool
 from neutron.agent.linux import pd
 from neutron.agent.metadata import driver as metadata_driver
 from neutron.agent import rpc as agent_rpc
@@ -71,6 +73,13 @@ PRIORITY_RELATED_ROUTER = 0
 PRIORITY_RPC = 1
 PRIORITY_SYNC_ROUTERS_TASK = 2
 PRIORITY_PD_UPDATE = 3
+# Priorities of the routers of a full sync, by data plane importance: the
+# routers forwarding traffic on this host (not HA or HA primary) with
+# floating IPs, then the other ones, and then the HA routers in backup
+# state.
+PRIORITY_SYNC_ROUTERS_FIP = PRIORITY_SYNC_ROUTERS_TASK
+PRIORITY_SYNC_ROUTERS_ACTIVE = PRIORITY_SYNC_ROUTERS_TASK + 0.25
+PRIORITY_SYNC_ROUTERS_BACKUP = PRIORITY_SYNC_ROUTERS_TASK + 0.5
 
 # Actions
 DELETE_ROUTER = 1
@@ -94,6 +103,56 @@ def log_verbose_exc(message, router_payload):
                                           router_payload, indent=5))
 
 
+def get_sync_router_priority(router):
+    """Return the priority of a router update of a full sync."""
+    if (router.get('ha') and router.get(lib_const.HA_ROUTER_STATE_KEY) !=
+            lib_const.HA_ROUTER_STATE_ACTIVE):
+        return PRIORITY_SYNC_ROUTERS_BACKUP
+    if router.get(lib_const.FLOATINGIP_KEY):
+        return PRIORITY_SYNC_ROUTERS_FIP
+    return PRIORITY_SYNC_ROUTERS_ACTIVE
+
+
+class RouterSyncProgress:
+    """Progress of the processing of the routers of a full sync
+
+    The progress, the processing rate and the estimated time to process the
+    remaining routers are logged every 5% of the routers processed. A router
+    is processed once its first update is processed, successfully or not.
+    """
+
+    def __init__(self, router_ids):
+        self._pending = set(router_ids)
+        self.total = len(self._pending)
+        self._log_step = max(self.total // 20, 1)
+        self._start = time.monotonic()
+
+    @property
+    def processed(self):
+        return self.total - len(self._pending)
+
+    def router_processed(self, router_id):
+        if router_id not in self._pending:
+            return
+        self._pending.remove(router_id)
+        elapsed = time.monotonic() - self._start
+        if not self._pending:
+            LOG.info("Full sync: %(total)d routers processed in %(elapsed).1f "
+                     "seconds", {'total': self.total, 'elapsed': elapsed})
+            return
+        processed = self.processed
+        if processed % self._log_step:
+            return
+        rate = processed / elapsed if elapsed else 0.0
+        LOG.info("Full sync: %(processed)d of %(total)d routers processed "
+                 "(%(percent)d%%) in %(elapsed).1f seconds, %(rate).1f "
+                 "routers/s, ETA %(eta).0f seconds",
+                 {'processed': processed, 'total': self.total,
+                  'percent': processed * 100 // self.total,
+                  'elapsed': elapsed, 'rate': rate,
+                  'eta': len(self._pending) / rate if rate else 0.0})
+
+
 class L3PluginApi:
     """Agent side of the l3 agent RPC API.
 
@@ -296,6 +355,8 @@ class L3NATAgent(ha.AgentMixin,
 
         self.fullsync = True
         self.sync_routers_chunk_size = SYNC_ROUTERS_MAX_CHUNK_SIZE
+        # RouterSyncProgress of the last full sync
+        self._sync_progress = None
         self._exiting = False
 
         # Get the HA router count from Neutron Server
@@ -329,12 +390,20 @@ class L3NATAgent(ha.AgentMixin,
         # L3 agent router processing green pool
         self._pool_size = ROUTER_PROCESS_GREENLET_MIN
         self._pool = eventlet.GreenPool(size=self._pool_size)
-        self._queue = queue.ResourceProcessingQueue()
+        self._queue = queue.ResourceProcessingQueue(
+            num_shards=self.conf.AGENT.resource_processing_workers,
+            aging_interval=self.conf.AGENT.resource_update_aging_interval)
         super().__init__(host=self.conf.host)
 
         self.target_ex_net_id = None
         self.use_ipv6 = netutils.is_ipv6_enabled()
 
+        if self.conf.AGENT.namespace_pool_size:
+            namespace_pool.register(namespace_pool.NamespacePool(
+                l3_namespaces.NS_PREFIX, l3_namespaces.POOL_NS_PREFIX,
+                self.conf.AGENT.namespace_pool_size,
+                self._create_pooled_namespace))
+
         self.pd = pd.PrefixDelegation(self.context, self.process_monitor,
                                       self.driver,
                                       self.plugin_rpc.process_prefix_update,
@@ -347,6 +416,10 @@ class L3NATAgent(ha.AgentMixin,
 
         self._check_ha_router_process_status()
 
+    def _create_pooled_namespace(self, name):
+        l3_namespaces.Namespace(name, self.conf, self.driver,
+                                self.use_ipv6).create()
+
     def check_config(self):
         if self.conf.cleanup_on_shutdown:
             LOG.warning("cleanup_on_shutdown is set to True, so L3 agent will "
@@ -739,11 +812,11 @@ class L3NATAgent(ha.AgentMixin,
         router_update.resource = None  # Force the agent to resync the router
         self._queue.add(router_update)
 
-    def _process_update(self):
+    def _process_update(self, shard=0):
         if self._exiting:
             return
 
-        for rp, update in self._queue.each_update_to_next_resource():
+        for rp, update in self._queue.each_update_to_next_resource(shard):
             LOG.info("Starting processing update %s, action %s, priority %s, "
                      "update_id %s. Wait time elapsed: %.3f",
                      update.id, update.action, update.priority,
@@ -755,6 +828,8 @@ class L3NATAgent(ha.AgentMixin,
                     network_id=update.resource)
             else:
                 self._process_router_update(rp, update)
+                if self._sync_progress:
+                    self._sync_progress.router_processed(update.id)
 
     def _process_router_update(self, rp, update):
         LOG.info("Starting router update for %s, action %s, priority %s, "
@@ -864,9 +939,20 @@ class L3NATAgent(ha.AgentMixin,
 
     def _process_routers_loop(self):
         LOG.debug("Starting _process_routers_loop")
+        if self._queue.num_shards > 1:
+            # One worker per queue shard, each router is always processed
+            # by the same worker.
+            for shard in range(1, self._queue.num_shards):
+                eventlet.spawn_n(self._process_routers_shard_loop, shard)
+            self._process_routers_shard_loop(0)
+            return
         while not self._exiting:
             self._pool.spawn_n(self._process_update)
 
+    def _process_routers_shard_loop(self, shard):
+        while not self._exiting:
+            self._process_update(shard)
+
     # NOTE(kevinbenton): this is set to 1 second because the actual interval
     # is controlled by a FixedIntervalLoopingCall in neutron/service.py that
     # is responsible for task execution.
@@ -901,11 +987,14 @@ class L3NATAgent(ha.AgentMixin,
                          lib_const.L3_AGENT_MODE_DVR_SNAT)
         try:
             router_ids = self.plugin_rpc.get_router_ids(context)
+            self._sync_progress = RouterSyncProgress(router_ids)
+            LOG.info("Full sync: fetching %d routers", len(router_ids))
             # fetch routers by chunks to reduce the load on server and to
             # start router processing earlier
-            for i in range(0, len(router_ids), self.sync_routers_chunk_size):
-                chunk = router_ids[i:i + self.sync_routers_chunk_size]
-                routers = self.plugin_rpc.get_routers(context, chunk)
+            for chunk, routers in self._fetch_routers_by_chunks(context,
+                                                                router_ids):
+                if isinstance(routers, Exception):
+                    raise routers
                 LOG.debug('Processing :%r', routers)
                 for r in routers:
                     curr_router_ids.add(r['id'])
@@ -920,12 +1009,13 @@ class L3NATAgent(ha.AgentMixin,
                             ns_manager.ensure_snat_cleanup(r['id'])
                     update = queue.ResourceUpdate(
                         r['id'],
-                        PRIORITY_SYNC_ROUTERS_TASK,
+                        get_sync_router_priority(r),
                         resource=r,
                         action=ADD_UPDATE_ROUTER,
                         timestamp=timestamp)
                     self._queue.add(update)
         except oslo_messaging.MessagingTimeout:
+            self._sync_progress = None
             if self.sync_routers_chunk_size > SYNC_ROUTERS_MIN_CHUNK_SIZE:
                 self.sync_routers_chunk_size = max(
                     self.sync_routers_chunk_size // 2,
@@ -941,11 +1031,16 @@ class L3NATAgent(ha.AgentMixin,
                           self.sync_routers_chunk_size)
             raise
         except oslo_messaging.MessagingException:
+            self._sync_progress = None
             failed_routers = chunk or router_ids
             LOG.exception("Failed synchronizing routers '%s' "
                           "due to RPC error", failed_routers)
             raise l3_exc.AbortSyncRouters()
 
+        # The routers deleted since their IDs were fetched are not processed
+        for router_id in set(router_ids) - curr_router_ids:
+            self._sync_progress.router_processed(router_id)
+
         self.fullsync = False
         LOG.debug("periodic_sync_routers_task successfully completed")
         # adjust chunk size after successful sync
@@ -963,6 +1058,29 @@ class L3NATAgent(ha.AgentMixin,
                                           action=DELETE_ROUTER)
             self._queue.add(update)
 
+    def _fetch_routers_by_chunks(self, context, router_ids):
+        """Fetch the routers from the server by chunks
+
+        Up to sync_routers_fetch_workers chunks are fetched concurrently, and
+        (chunk, routers) is yielded for each chunk, in order, as soon as its
+        routers are fetched, so that they are processed while the next chunks
+        are fetched. If the routers of a chunk could not be fetched, the RPC
+        exception is yielded instead of the routers.
+        """
+        def fetch(chunk):
+            try:
+                return chunk, self.plugin_rpc.get_routers(context, chunk)
+            except oslo_messaging.MessagingException as e:
+                return chunk, e
+
+        chunks = [router_ids[i:i + self.sync_routers_chunk_size]
+                  for i in range(0, len(router_ids),
+                                 self.sync_routers_chunk_size)]
+        workers = min(self.conf.sync_routers_fetch_workers, len(chunks))
+        if workers <= 1:
+            return map(fetch, chunks)
+        return eventlet.GreenPool(size=workers).imap(fetch, chunks)
+
     @property
     def context(self):
         # generate a new request-id on each call to make server side tracking
@@ -985,6 +1103,7 @@ class L3NATAgent(ha.AgentMixin,
             self._exiting = True
             for router in self.router_info.values():
                 router.delete()
+            namespace_pool.unregister(l3_namespaces.NS_PREFIX)
 
     def create_pd_router_update(self):
         router_id = None
@@ -1040,6 +1159,7 @@ class L3NATAgentWithStateReport(L3NATAgent):
         configurations['ex_gw_ports'] = num_ex_gw_ports
         configurations['interfaces'] = num_interfaces
         configurations['floating_ips'] = num_floating_ips
+        LOG.debug("Router update queue statistics: %s", self._queue.stats)
         try:
             agent_status = self.state_rpc.report_state(self.context,
                                                        self.agent_state,
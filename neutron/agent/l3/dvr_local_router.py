@@ -316,12 +316,21 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
 
     def _update_arp_entry(
             self, ip, mac, subnet_id, operation, device,
-            device_exists=True):
-        """Add or delete arp entry into router namespace for the subnet."""
+            device_exists=True, batch=None):
+        """Add or delete arp entry into router namespace for the subnet.
+
+        If an IpOperationBatch is given, the entry is queued in it instead of
+        being updated right away.
+        """
 
         try:
             if device_exists:
-                if operation == 'add':
+                if batch is not None:
+                    if operation == 'add':
+                        batch.add_neigh(ip, mac, device.name)
+                    elif operation == 'delete':
+                        batch.delete_neigh(ip, mac, device.name)
+                elif operation == 'add':
                     device.neigh.add(ip, mac)
                 elif operation == 'delete':
                     device.neigh.delete(ip, mac)
@@ -357,6 +366,9 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
             lib_constants.ROUTER_INTERFACE_OWNERS +
             tuple(common_utils.get_dvr_allowed_address_pair_device_owners()))
         device, device_exists = self.get_arp_related_dev(subnet['id'])
+        # The entries of all the ports are added with a single privileged
+        # call.
+        batch = ip_lib.IpOperationBatch(self.ns_name)
 
         subnet_ip_version = netaddr.IPNetwork(subnet['cidr']).version
         for p in subnet_ports:
@@ -368,7 +380,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                                subnet['id'],
                                                'add',
                                                device=device,
-                                               device_exists=device_exists)
+                                               device_exists=device_exists,
+                                               batch=batch)
                 for allowed_address_pair in p.get('allowed_address_pairs', []):
                     if ('/' not in str(allowed_address_pair['ip_address']) or
                             common_utils.is_cidr_host(
@@ -383,7 +396,8 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                 subnet['id'],
                                 'add',
                                 device=device,
-                                device_exists=device_exists)
+                                device_exists=device_exists,
+                                batch=batch)
 
         # subnet_ports does not have snat port if the port is still unbound
         # by the time this function is called. So ensure to add arp entry
@@ -396,7 +410,10 @@ class DvrLocalRouter(dvr_router_base.DvrRouterBase):
                                            subnet['id'],
                                            'add',
                                            device=device,
-                                           device_exists=device_exists)
+                                           device_exists=device_exists,
+                                           batch=batch)
+        for error in batch.apply().values():
+            LOG.error("DVR: Failed updating arp entry: %s", error)
         self._process_arp_cache_for_internal_port(subnet['id'])
 
     @staticmethod
@@ -19,6 +19,11 @@ LOG = logging.getLogger(__name__)
 
 
 class DvrRouterBase(router.RouterInfo):
+    # The external processing of DVR routers also configures the FIP
+    # namespace and the router to FIP namespace link, always fully process
+    # their updates.
+    DIFF_PROCESSING = False
+
     def __init__(self, host, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
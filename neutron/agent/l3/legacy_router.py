@@ -13,9 +13,13 @@
 #    under the License.
 
 from neutron_lib import constants as lib_constants
+from oslo_log import log as logging
 
 from neutron.agent.l3 import router_info as router
 from neutron.agent.linux import ip_lib
+from neutron.common import utils as common_utils
+
+LOG = logging.getLogger(__name__)
 
 
 class LegacyRouter(router.RouterInfo):
@@ -29,3 +33,41 @@ class LegacyRouter(router.RouterInfo):
                                       interface_name,
                                       fip['floating_ip_address'])
         return lib_constants.FLOATINGIP_STATUS_ACTIVE
+
+    def add_floating_ips(self, fips, interface_name, device):
+        # The addresses of all the floating IPs are configured with a single
+        # privileged call.
+        batch = ip_lib.IpOperationBatch(device.namespace)
+        indexes = {
+            fip['id']: batch.add_address(
+                common_utils.ip_to_cidr(fip['floating_ip_address']),
+                device.name)
+            for fip in fips}
+        errors = batch.apply()
+        fip_statuses = {}
+        for fip in fips:
+            error = errors.get(indexes[fip['id']])
+            if error:
+                LOG.warning("Unable to configure IP address for "
+                            "floating IP: %s, error: %s", fip['id'], error)
+                fip_statuses[fip['id']] = (
+                    lib_constants.FLOATINGIP_STATUS_ERROR)
+                continue
+            ip_lib.send_ip_addr_adv_notif(self.ns_name,
+                                          interface_name,
+                                          fip['floating_ip_address'])
+            fip_statuses[fip['id']] = lib_constants.FLOATINGIP_STATUS_ACTIVE
+        return fip_statuses
+
+    def remove_floating_ips(self, device, ip_cidrs):
+        batch = ip_lib.IpOperationBatch(device.namespace)
+        indexes = {ip_cidr: batch.delete_address(ip_cidr, device.name)
+                   for ip_cidr in ip_cidrs}
+        errors = batch.apply()
+        for ip_cidr in ip_cidrs:
+            error = errors.get(indexes[ip_cidr])
+            if error:
+                LOG.warning("Unable to remove floating IP address %s: %s",
+                            ip_cidr, error)
+                continue
+            device.delete_conntrack_state(ip_cidr)
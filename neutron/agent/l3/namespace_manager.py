@@ -17,6 +17,7 @@ from neutron.agent.l3 import dvr_snat_ns
 from neutron.agent.l3 import namespaces
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_pool
 
 LOG = logging.getLogger(__name__)
 
@@ -44,6 +45,7 @@ class NamespaceManager:
 
     ns_prefix_to_class_map = {
         namespaces.NS_PREFIX: namespaces.RouterNamespace,
+        namespaces.POOL_NS_PREFIX: namespaces.PooledNamespace,
         dvr_snat_ns.SNAT_NS_PREFIX: dvr_snat_ns.SnatNamespace,
         dvr_fip_ns.FIP_NS_PREFIX: dvr_fip_ns.FipNamespace,
     }
@@ -84,7 +86,9 @@ class NamespaceManager:
 
         for ns in self._all_namespaces:
             _ns_prefix, ns_id = self.get_prefix_and_id(ns)
-            if ns_id in self._ids_to_keep:
+            # The namespaces of the running namespace pool are kept, the
+            # ones left by a previous run are stale.
+            if ns_id in self._ids_to_keep or namespace_pool.is_pooled(ns):
                 continue
             self._cleanup(_ns_prefix, ns_id)
 
@@ -136,7 +140,8 @@ class NamespaceManager:
         ns_class = self.ns_prefix_to_class_map[ns_prefix]
         ns = ns_class(ns_id, self.agent_conf, self.driver, use_ipv6=False)
         try:
-            if self.metadata_driver:
+            if (self.metadata_driver and
+                    ns_prefix != namespaces.POOL_NS_PREFIX):
                 # cleanup stale metadata proxy processes first
                 self.metadata_driver.destroy_monitored_metadata_proxy(
                     self.process_monitor, ns_id, self.agent_conf, ns.name)
@@ -19,10 +19,12 @@ from oslo_log import log as logging
 from oslo_utils import excutils
 
 from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_pool
 
 LOG = logging.getLogger(__name__)
 
 NS_PREFIX = 'qrouter-'
+POOL_NS_PREFIX = 'qrpool-'
 INTERNAL_DEV_PREFIX = 'qr-'
 EXTERNAL_DEV_PREFIX = 'qg-'
 # TODO(Carl) It is odd that this file needs this.  It is a dvr detail.
@@ -89,6 +91,13 @@ class Namespace:
         self.use_ipv6 = use_ipv6
 
     def create(self, ipv6_forwarding=True):
+        if namespace_pool.claim_namespace(self.name):
+            # The pooled namespaces are created with the sysctl values below
+            # and IPv6 forwarding enabled.
+            if self.use_ipv6 and not ipv6_forwarding:
+                ip_lib.sysctl(['net.ipv6.conf.all.forwarding=0'],
+                              namespace=self.name)
+            return
         self.ip_wrapper_root.ensure_namespace(self.name)
         # See networking (netdev) tree, file
         # Documentation/networking/ip-sysctl.txt for an explanation of
@@ -121,6 +130,14 @@ class Namespace:
         return self.ip_wrapper_root.netns.exists(self.name)
 
 
+class PooledNamespace(Namespace):
+    """Namespace of the L3 agent namespace pool, not claimed yet"""
+
+    def __init__(self, pool_id, agent_conf, driver, use_ipv6):
+        super().__init__(build_ns_name(POOL_NS_PREFIX, pool_id),
+                         agent_conf, driver, use_ipv6)
+
+
 class RouterNamespace(Namespace):
 
     def __init__(self, router_id, agent_conf, driver, use_ipv6):
@@ -14,6 +14,9 @@
 
 import abc
 import collections
+import contextlib
+import copy
+import time
 
 import netaddr
 from neutron_lib import constants as lib_constants
@@ -42,6 +45,49 @@ ADDRESS_SCOPE_MARK_MASK = "0xffff0000"
 ADDRESS_SCOPE_MARK_ID_MIN = 1024
 ADDRESS_SCOPE_MARK_ID_MAX = 2048
 DEFAULT_ADDRESS_SCOPE = "noscope"
+# Keys of a router dict only used to configure its floating IPs.
+FLOATINGIP_ROUTER_KEYS = frozenset((lib_constants.FLOATINGIP_KEY,
+                                    '_pf_floatingips',
+                                    'port_forwardings_fip_set',
+                                    'fip_managed_by_port_forwardings'))
+# Keys of a router dict not used to configure the router.
+IGNORED_ROUTER_KEYS = frozenset(('revision_number', 'updated_at', 'name',
+                                 'description', 'tags'))
+
+
+class RouterUpdateDiff:
+    """Keys of a router dict changed since the router was last processed.
+
+    The update is a full one, reprocessing the whole router, if the router
+    was not processed yet, if something else than its floating IPs or its
+    static routes changed, or if nothing changed at all: the router is then
+    processed again for another reason than its own update, a resync for
+    instance.
+    """
+
+    def __init__(self, old_router, new_router):
+        if old_router is None:
+            self.changed_keys = None
+            return
+        self.changed_keys = {
+            key for key in set(old_router).union(new_router)
+            if old_router.get(key) != new_router.get(key)
+        } - IGNORED_ROUTER_KEYS
+
+    @property
+    def full(self):
+        return (not self.changed_keys or
+                not self.changed_keys.issubset(
+                    FLOATINGIP_ROUTER_KEYS.union(('routes', ))))
+
+    @property
+    def floating_ips_changed(self):
+        return self.full or bool(
+            self.changed_keys.intersection(FLOATINGIP_ROUTER_KEYS))
+
+    @property
+    def routes_changed(self):
+        return self.full or 'routes' in self.changed_keys
 
 
 class BaseRouterInfo(metaclass=abc.ABCMeta):
@@ -122,6 +168,9 @@ class BaseRouterInfo(metaclass=abc.ABCMeta):
 
 
 class RouterInfo(BaseRouterInfo):
+    # Whether the router updates changing only its floating IPs or static
+    # routes are processed from their diff with the last router processed.
+    DIFF_PROCESSING = True
 
     def __init__(self,
                  agent,
@@ -156,6 +205,13 @@ class RouterInfo(BaseRouterInfo):
         self.centralized_port_forwarding_fip_set = set()
         self.fip_managed_by_port_forwardings = None
         self.qos_gateway_ips = set()
+        # The router dict last processed successfully, when diff processing
+        # is enabled, and the diff of the update being processed.
+        self._processed_router = None
+        self._update_diff = None
+        # The IpOperationBatch of each namespace, while the routing table
+        # updates are batched.
+        self._route_batches = None
 
     def initialize(self, process_monitor):
         super().initialize(process_monitor)
@@ -175,7 +231,44 @@ class RouterInfo(BaseRouterInfo):
     def is_router_primary(self):
         return True
 
+    def _get_route_batch(self, namespace):
+        if self._route_batches is None:
+            return None
+        if namespace not in self._route_batches:
+            self._route_batches[namespace] = ip_lib.IpOperationBatch(
+                namespace)
+        return self._route_batches[namespace]
+
+    @contextlib.contextmanager
+    def _batch_routing_table_updates(self):
+        """Send the routing table updates in one call per namespace
+
+        The updates made in this context are queued, and applied when it is
+        exited. As for the single updates, their errors are ignored.
+        """
+        self._route_batches = {}
+        try:
+            yield
+        finally:
+            batches, self._route_batches = self._route_batches, None
+            for namespace, batch in batches.items():
+                try:
+                    errors = batch.apply()
+                except (RuntimeError, OSError, pyroute2_exc.NetlinkError):
+                    continue
+                for error in errors.values():
+                    LOG.debug('Failed to update the routing table of '
+                              'namespace %s: %s', namespace, error)
+
     def _update_routing_table(self, operation, route, namespace):
+        batch = self._get_route_batch(namespace)
+        if batch is not None:
+            if operation == 'replace':
+                batch.add_route(route['destination'], via=route['nexthop'])
+            else:
+                batch.delete_route(route['destination'],
+                                   via=route['nexthop'])
+            return
         method = (ip_lib.add_ip_route if operation == 'replace' else
                   ip_lib.delete_ip_route)
         try:
@@ -189,6 +282,10 @@ class RouterInfo(BaseRouterInfo):
     def _update_routing_table_ecmp(self, route_list, namespace):
         multipath = [dict(via=route['nexthop'])
                      for route in route_list]
+        batch = self._get_route_batch(namespace)
+        if batch is not None:
+            batch.add_route(route_list[0]['destination'], via=multipath)
+            return
         try:
             ip_lib.add_ip_route(namespace, route_list[0]['destination'],
                                 via=multipath)
@@ -239,6 +336,10 @@ class RouterInfo(BaseRouterInfo):
     def routes_updated(self, old_routes, new_routes):
         adds, removes = helpers.diff_list_of_dict(old_routes,
                                                   new_routes)
+        with self._batch_routing_table_updates():
+            self._routes_updated(old_routes, adds, removes)
+
+    def _routes_updated(self, old_routes, adds, removes):
         for route in removes:
             # Judge if modifying an ECMP route or not, if not,
             # just delete it, if it is, replace it
@@ -409,6 +510,12 @@ class RouterInfo(BaseRouterInfo):
     def add_floating_ip(self, fip, interface_name, device):
         raise NotImplementedError()
 
+    def add_floating_ips(self, fips, interface_name, device):
+        """Configure floating IPs, return their statuses by floating IP ID.
+        """
+        return {fip['id']: self.add_floating_ip(fip, interface_name, device)
+                for fip in fips}
+
     def migrate_centralized_floating_ip(self, fip, interface_name, device):
         """Implements centralized->distributed floating IP migration.
         Overridden in dvr_local_router.py
@@ -421,6 +528,10 @@ class RouterInfo(BaseRouterInfo):
     def remove_floating_ip(self, device, ip_cidr):
         device.delete_addr_and_conntrack_state(ip_cidr)
 
+    def remove_floating_ips(self, device, ip_cidrs):
+        for ip_cidr in ip_cidrs:
+            self.remove_floating_ip(device, ip_cidr)
+
     def move_floating_ip(self, fip):
         return lib_constants.FLOATINGIP_STATUS_ACTIVE
 
@@ -452,6 +563,7 @@ class RouterInfo(BaseRouterInfo):
         gw_cidrs = self._get_gw_ips_cidr()
         centralized_fip_cidrs = self.get_centralized_fip_cidr_set()
         floating_ips = self.get_floating_ips()
+        fips_to_add = []
         # Loop once to ensure that floating ips are configured.
         for fip in floating_ips:
             fip_ip = fip['floating_ip_address']
@@ -460,11 +572,7 @@ class RouterInfo(BaseRouterInfo):
             fip_statuses[fip['id']] = lib_constants.FLOATINGIP_STATUS_ACTIVE
 
             if ip_cidr not in existing_cidrs:
-                fip_statuses[fip['id']] = self.add_floating_ip(
-                    fip, interface_name, device)
-                LOG.debug('Floating ip %(id)s added, status %(status)s',
-                          {'id': fip['id'],
-                           'status': fip_statuses.get(fip['id'])})
+                fips_to_add.append(fip)
             elif (fip_ip in self.fip_map and
                   self.fip_map[fip_ip] != fip['fixed_ip_address']):
                 LOG.debug("Floating IP was moved from fixed IP "
@@ -482,15 +590,23 @@ class RouterInfo(BaseRouterInfo):
                 # mark the status as not changed. we can't remove it because
                 # that's how the caller determines that it was removed
                 fip_statuses[fip['id']] = FLOATINGIP_STATUS_NOCHANGE
-        fips_to_remove = (
+        if fips_to_add:
+            added_fip_statuses = self.add_floating_ips(
+                fips_to_add, interface_name, device)
+            for fip_id, status in added_fip_statuses.items():
+                LOG.debug('Floating ip %(id)s added, status %(status)s',
+                          {'id': fip_id, 'status': status})
+            fip_statuses.update(added_fip_statuses)
+        fips_to_remove = [
             ip_cidr
             for ip_cidr in (existing_cidrs - new_cidrs - gw_cidrs -
                             self.centralized_port_forwarding_fip_set)
-            if common_utils.is_cidr_host(ip_cidr))
+            if common_utils.is_cidr_host(ip_cidr)]
         for ip_cidr in fips_to_remove:
             LOG.debug("Removing floating ip %s from interface %s in "
                       "namespace %s", ip_cidr, interface_name, self.ns_name)
-            self.remove_floating_ip(device, ip_cidr)
+        if fips_to_remove:
+            self.remove_floating_ips(device, fips_to_remove)
 
         return fip_statuses
 
@@ -1039,7 +1155,8 @@ class RouterInfo(BaseRouterInfo):
         try:
             with self.iptables_manager.defer_apply():
                 ex_gw_port = self.get_ex_gw_port()
-                self._process_external_gateway(ex_gw_port)
+                if self._is_full_update():
+                    self._process_external_gateway(ex_gw_port)
                 if not ex_gw_port:
                     return
 
@@ -1275,7 +1392,8 @@ class RouterInfo(BaseRouterInfo):
     @coordination.synchronized('router-lock-ns-{self.ns_name}')
     def process_address_scope(self):
         with self.iptables_manager.defer_apply():
-            self.process_ports_address_scope_iptables()
+            if self._is_full_update():
+                self.process_ports_address_scope_iptables()
             self.process_floating_ip_address_scope_rules()
 
     @common_utils.exception_logger()
@@ -1298,18 +1416,56 @@ class RouterInfo(BaseRouterInfo):
             LOG.warning("Can't gracefully delete the router %s: "
                         "no router namespace found", self.router['id'])
 
+    def _is_full_update(self):
+        return self._update_diff is None or self._update_diff.full
+
+    def _get_update_diff(self):
+        if not (self.DIFF_PROCESSING and
+                self.agent_conf.router_update_diff_processing):
+            return None
+        return RouterUpdateDiff(self._processed_router, self.router)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _timed(timings, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            timings[name] = time.monotonic() - start
+
     @common_utils.exception_logger()
     def process(self):
         LOG.debug("Process updates, router %s", self.router['id'])
+        self._update_diff = self._get_update_diff()
+        # If this update fails, the next one is fully processed.
+        self._processed_router = None
+        full_update = self._is_full_update()
+        timings = {}
         self.centralized_port_forwarding_fip_set = set(self.router.get(
             'port_forwardings_fip_set', set()))
-        self._process_internal_ports()
-        self.agent.pd.sync_router(self.router['id'])
-        self.process_external()
-        self.process_address_scope()
+        if full_update:
+            with self._timed(timings, 'internal_ports'):
+                self._process_internal_ports()
+                self.agent.pd.sync_router(self.router['id'])
+        if full_update or self._update_diff.floating_ips_changed:
+            with self._timed(timings, 'external'):
+                self.process_external()
+            with self._timed(timings, 'address_scope'):
+                self.process_address_scope()
         # Process static routes for router
-        self.routes_updated(self.routes, self.router['routes'])
+        if full_update or self._update_diff.routes_changed:
+            with self._timed(timings, 'routes'):
+                self.routes_updated(self.routes, self.router['routes'])
         self.routes = self.router['routes']
+        changed_keys = self._update_diff and self._update_diff.changed_keys
+        LOG.debug("Processed %(type)s update of router %(router)s, changed "
+                  "keys: %(changes)s, timings: %(timings)s",
+                  {'type': 'full' if full_update else 'partial',
+                   'router': self.router['id'],
+                   'changes': sorted(changed_keys) if changed_keys else '-',
+                   'timings': ', '.join(
+                       '%s %.3fs' % timing for timing in timings.items())})
 
         # Update ex_gw_port on the router info cache
         self.ex_gw_port = self.get_ex_gw_port()
@@ -1318,3 +1474,6 @@ class RouterInfo(BaseRouterInfo):
                         for fip in self.get_floating_ips()}
         self.fip_managed_by_port_forwardings = self.router.get(
             'fip_managed_by_port_forwardings')
+        if self._update_diff is not None:
+            self._processed_router = copy.deepcopy(self.router)
+        self._update_diff = None
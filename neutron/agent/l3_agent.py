@@ -45,6 +45,8 @@ def register_opts(conf):
     config.register_pddriver_opts(conf)
     config.register_ra_opts(conf)
     config.register_availability_zone_opts_helper(conf)
+    config.register_resource_processing_opts_helper(conf)
+    config.register_namespace_pool_opts_helper(conf)
     ovs_conf.register_ovs_opts(conf)
 
 
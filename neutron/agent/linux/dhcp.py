@@ -40,6 +40,7 @@ from neutron.agent.common import utils as agent_common_utils
 from neutron.agent.linux import external_process
 from neutron.agent.linux import ip_lib
 from neutron.agent.linux import iptables_manager
+from neutron.agent.linux import namespace_pool
 from neutron.cmd import runtime_checks as checks
 from neutron.common.ovn import constants as ovn_constants
 from neutron.common.ovn import utils as ovn_utils
@@ -52,6 +53,7 @@ SIGTERM_TIMEOUT = 5
 
 WIN2k3_STATIC_DNS = 249
 NS_PREFIX = 'qdhcp-'
+POOL_NS_PREFIX = 'qdpool-'
 DNSMASQ_SERVICE_NAME = 'dnsmasq'
 DHCP_RELEASE_TRIES = 3
 DHCP_RELEASE_TRIES_SLEEP = 0.3
@@ -115,7 +117,7 @@ class DictModel(collections.abc.MutableMapping):
         try:
             if name == '_dictmodel_internal_storage':
                 return super().__getattr__(name)
-            return self.__getitem__(name)
+            return self._dictmodel_internal_storage[name]
         except KeyError as e:
             raise AttributeError(e)
 
@@ -438,6 +440,12 @@ class Dnsmasq(DhcpLocalProcess):
     _IS_DHCP_RELEASE6_SUPPORTED = None
     _IS_HOST_TAG_SUPPORTED = None
 
+    # Entries of the hosts and addn_hosts files rendered for each port,
+    # indexed by network configuration directory, for example,
+    # {conf_dir: (network, context,
+    #             {port_key: (host_entries, addn_host_entries)})}
+    _port_host_entries = {}
+
     @classmethod
     def check_version(cls):
         pass
@@ -582,12 +590,18 @@ class Dnsmasq(DhcpLocalProcess):
         or it's reloaded if the process is not running.
         """
 
-        self._output_config_files()
+        config_changed = self._output_config_files()
 
         pm = self._get_process_manager(
             cmd_callback=self._build_cmdline_callback)
 
-        pm.enable(reload_cfg=reload_with_HUP, ensure_active=True)
+        if reload_with_HUP and not config_changed and pm.active:
+            # dnsmasq only needs to read its config files again if they
+            # changed, e.g. not when a port not served by DHCP is updated.
+            LOG.debug('dnsmasq config files of network %s did not change, '
+                      'skipping reload', self.network.id)
+        else:
+            pm.enable(reload_cfg=reload_with_HUP, ensure_active=True)
 
         self.process_monitor.register(uuid=pm.uuid,
                                       service_name=DNSMASQ_SERVICE_NAME,
@@ -633,10 +647,31 @@ class Dnsmasq(DhcpLocalProcess):
             LOG.warning('DHCP release failed for params %(params)s. '
                         'Reason: %(e)s', {'params': params, 'e': e})
 
+    def disable(self, retain_port=False, block=False, **kwargs):
+        super().disable(retain_port=retain_port, block=block, **kwargs)
+        self._port_host_entries.pop(self.network_conf_dir, None)
+
     def _output_config_files(self):
+        """Write the dnsmasq config files.
+
+        :returns: True if the content of any of the files changed.
+        """
+        self._config_files_changed = False
         self._output_hosts_file()
         self._output_addn_hosts_file()
         self._output_opts_file()
+        return self._config_files_changed
+
+    def _replace_config_file(self, filename, contents):
+        """Write a config file, unless it already has this content."""
+        try:
+            with open(filename) as f:
+                if f.read() == contents:
+                    return
+        except OSError:
+            pass
+        file_utils.replace_file(filename, contents)
+        self._config_files_changed = True
 
     def reload_allocations(self):
         """Rebuild the dnsmasq config and signal the dnsmasq to reload."""
@@ -796,41 +831,110 @@ class Dnsmasq(DhcpLocalProcess):
             tag,    # A dhcp-host tag to add to the configuration if supported
         )
         """
-        v6_nets = {subnet.id: subnet for subnet in
-                   self._get_all_subnets(self.network)
-                   if subnet.ip_version == 6}
-
+        v6_nets = self._get_v6_subnets()
         for port in self.network.ports:
-            if not port_requires_dhcp_configuration(port):
-                continue
+            yield from self._iter_port_hosts(port, v6_nets, merge_addr6_list)
+
+    def _get_v6_subnets(self):
+        return {subnet.id: subnet for subnet in
+                self._get_all_subnets(self.network)
+                if subnet.ip_version == 6}
+
+    def _iter_port_hosts(self, port, v6_nets, merge_addr6_list=False):
+        """Iterate over the hosts of a port, see _iter_hosts."""
+        if not port_requires_dhcp_configuration(port):
+            return
 
-            fixed_ips = self._sort_fixed_ips_for_dnsmasq(port.fixed_ips,
-                                                         v6_nets)
-            # TODO(hjensas): Drop this conditional and option once distros
-            #  generally have dnsmasq supporting addr6 list and range.
-            if self.conf.dnsmasq_enable_addr6_list and merge_addr6_list:
-                fixed_ips = self._merge_alloc_addr6_list(fixed_ips, v6_nets)
-            # Confirm whether Neutron server supports dns_name attribute in the
-            # ports API
-            dns_assignment = getattr(port, 'dns_assignment', None)
-            for alloc in fixed_ips:
-                no_dhcp = False
-                no_opts = False
-                tag = ''
-                if alloc.subnet_id in v6_nets:
-                    addr_mode = v6_nets[alloc.subnet_id].ipv6_address_mode
-                    no_dhcp = addr_mode in (constants.IPV6_SLAAC,
-                                            constants.DHCPV6_STATELESS)
-                    if self._is_dnsmasq_host_tag_supported():
-                        tag = HOST_DHCPV6_TAG
-                    # we don't setup anything for SLAAC. It doesn't make sense
-                    # to provide options for a client that won't use DHCP
-                    no_opts = addr_mode == constants.IPV6_SLAAC
-
-                hostname, fqdn = self._get_dns_assignment(alloc.ip_address,
-                                                          dns_assignment)
-
-                yield (port, alloc, hostname, fqdn, no_dhcp, no_opts, tag)
+        fixed_ips = self._sort_fixed_ips_for_dnsmasq(port.fixed_ips, v6_nets)
+        # TODO(hjensas): Drop this conditional and option once distros
+        #  generally have dnsmasq supporting addr6 list and range.
+        if self.conf.dnsmasq_enable_addr6_list and merge_addr6_list:
+            fixed_ips = self._merge_alloc_addr6_list(fixed_ips, v6_nets)
+        # Confirm whether Neutron server supports dns_name attribute in the
+        # ports API
+        dns_assignment = getattr(port, 'dns_assignment', None)
+        for alloc in fixed_ips:
+            no_dhcp = False
+            no_opts = False
+            tag = ''
+            if alloc.subnet_id in v6_nets:
+                addr_mode = v6_nets[alloc.subnet_id].ipv6_address_mode
+                no_dhcp = addr_mode in (constants.IPV6_SLAAC,
+                                        constants.DHCPV6_STATELESS)
+                if self._is_dnsmasq_host_tag_supported():
+                    tag = HOST_DHCPV6_TAG
+                # we don't setup anything for SLAAC. It doesn't make sense
+                # to provide options for a client that won't use DHCP
+                no_opts = addr_mode == constants.IPV6_SLAAC
+
+            hostname, fqdn = self._get_dns_assignment(alloc.ip_address,
+                                                      dns_assignment)
+
+            yield (port, alloc, hostname, fqdn, no_dhcp, no_opts, tag)
+
+    @staticmethod
+    def _get_port_key(port):
+        """Return a key of the port attributes used in its host entries.
+
+        The revision number of a port is increased by any change of the port,
+        including its fixed IPs, extra DHCP options and DNS assignment.
+        """
+        revision_number = getattr(port, 'revision_number', None)
+        if revision_number is not None:
+            return port.id, revision_number
+        extra_dhcp_opts = getattr(port, edo_ext.EXTRADHCPOPTS, None) or ()
+        dns_assignment = getattr(port, 'dns_assignment', None) or ()
+        return (port.id, port.mac_address,
+                getattr(port, 'device_owner', None),
+                tuple((ip.subnet_id, ip.ip_address) for ip in port.fixed_ips),
+                tuple((opt.opt_name, opt.opt_value) for opt in
+                      extra_dhcp_opts),
+                tuple((dns.ip_address, dns.hostname, dns.fqdn) for dns in
+                      dns_assignment))
+
+    def _get_port_host_entries(self):
+        """Return the hosts and addn_hosts files entries of each port.
+
+        Rendering the entries of every port on each reload is expensive on
+        networks with thousands of ports, so the entries are kept between
+        reloads and only rendered again for the ports that changed. All the
+        entries are rendered again if a subnet or the configuration changed,
+        or if the network was fetched again from the server.
+
+        :returns: a list of (host_entries, addn_host_entries) strings, in the
+                  order of the network ports.
+        """
+        v6_nets = self._get_v6_subnets()
+        all_subnets = self._get_all_subnets(self.network)
+        dhcp_enabled_subnet_ids = [s.id for s in all_subnets
+                                   if s.enable_dhcp]
+        tag_supported = bool(v6_nets) and self._is_dnsmasq_host_tag_supported()
+        context = (tuple((s.id, s.ip_version, s.enable_dhcp,
+                          getattr(s, 'ipv6_address_mode', None))
+                         for s in all_subnets),
+                   self.conf.dns_domain, self.conf.dnsmasq_enable_addr6_list,
+                   tag_supported)
+        cached_network, cached_context, cached_entries = (
+            self._port_host_entries.get(self.network_conf_dir,
+                                        (None, None, {})))
+        if cached_network is not self.network or cached_context != context:
+            cached_entries = {}
+
+        port_entries = {}
+        entries = []
+        for port in self.network.ports:
+            port_key = self._get_port_key(port)
+            port_host_entries = cached_entries.get(port_key)
+            if port_host_entries is None:
+                port_host_entries = (
+                    self._format_host_entries(port, v6_nets,
+                                              dhcp_enabled_subnet_ids),
+                    self._format_addn_host_entries(port, v6_nets))
+            port_entries[port_key] = port_host_entries
+            entries.append(port_host_entries)
+        self._port_host_entries[self.network_conf_dir] = (
+            self.network, context, port_entries)
+        return entries
 
     def _get_port_extra_dhcp_opts(self, port):
         return getattr(port, edo_ext.EXTRADHCPOPTS, False)
@@ -938,16 +1042,22 @@ class Dnsmasq(DhcpLocalProcess):
         should receive a dhcp lease, the hosts resolution in itself is
         defined by the `_output_addn_hosts_file` method.
         """
-        buf = io.StringIO()
         filename = self.get_conf_file_name('host')
 
         LOG.debug('Building host file: %s', filename)
-        dhcp_enabled_subnet_ids = [s.id for s in
-                                   self._get_all_subnets(self.network)
-                                   if s.enable_dhcp]
         # NOTE(ihrachyshka): the loop should not log anything inside it, to
         # avoid potential performance drop when lots of hosts are dumped
-        for host_tuple in self._iter_hosts(merge_addr6_list=True):
+        self._replace_config_file(filename, ''.join(
+            host_entries for host_entries, _addn in
+            self._get_port_host_entries()))
+        LOG.debug('Done building host file %s', filename)
+        return filename
+
+    def _format_host_entries(self, port, v6_nets, dhcp_enabled_subnet_ids):
+        """Return the hosts file entries of a port."""
+        buf = io.StringIO()
+        for host_tuple in self._iter_port_hosts(port, v6_nets,
+                                                merge_addr6_list=True):
             port, alloc, hostname, name, no_dhcp, no_opts, tag = host_tuple
             if no_dhcp:
                 if not no_opts and self._get_port_extra_dhcp_opts(port):
@@ -980,10 +1090,7 @@ class Dnsmasq(DhcpLocalProcess):
             else:
                 buf.write('%s,%s%s,%s\n' %
                           (port.mac_address, tag, name, ip_address))
-
-        file_utils.replace_file(filename, buf.getvalue())
-        LOG.debug('Done building host file %s', filename)
-        return filename
+        return buf.getvalue()
 
     def _get_client_id(self, port):
         if self._get_port_extra_dhcp_opts(port):
@@ -1176,17 +1283,23 @@ class Dnsmasq(DhcpLocalProcess):
         Each line in this file is in the same form as a standard /etc/hosts
         file.
         """
+        addn_hosts = self.get_conf_file_name('addn_hosts')
+        self._replace_config_file(addn_hosts, ''.join(
+            addn_host_entries for _host, addn_host_entries in
+            self._get_port_host_entries()))
+        return addn_hosts
+
+    def _format_addn_host_entries(self, port, v6_nets):
+        """Return the additional hosts file entries of a port."""
         buf = io.StringIO()
-        for host_tuple in self._iter_hosts():
+        for host_tuple in self._iter_port_hosts(port, v6_nets):
             port, alloc, hostname, fqdn, no_dhcp, no_opts, tag = host_tuple
             # It is compulsory to write the `fqdn` before the `hostname` in
             # order to obtain it in PTR responses.
             if alloc:
                 buf.write('{}\t{} {}\n'.format(
                     alloc.ip_address, fqdn, hostname))
-        addn_hosts = self.get_conf_file_name('addn_hosts')
-        file_utils.replace_file(addn_hosts, buf.getvalue())
-        return addn_hosts
+        return buf.getvalue()
 
     def _output_opts_file(self):
         """Write a dnsmasq compatible options file."""
@@ -1194,7 +1307,7 @@ class Dnsmasq(DhcpLocalProcess):
         options += self._generate_opts_per_port(subnet_index_map)
 
         name = self.get_conf_file_name('opts')
-        file_utils.replace_file(name, '\n'.join(options))
+        self._replace_config_file(name, '\n'.join(options))
         return name
 
     def _get_ovn_metadata_port_ip(self, subnet):
@@ -1799,6 +1912,15 @@ class DeviceManager:
                          namespace=network.namespace,
                          mtu=network.get('mtu'))
 
+    def setup_namespace(self, namespace):
+        """Create and configure a namespace for a network's DHCP."""
+        ip_lib.IPWrapper().ensure_namespace(namespace)
+        ip_lib.set_ip_nonlocal_bind_for_namespace(namespace, 1,
+                                                  root_namespace=True)
+        if netutils.is_ipv6_enabled():
+            self.driver.configure_ipv6_ra(namespace, 'default',
+                                          constants.ACCEPT_RA_DISABLED)
+
     def setup(self, network, segment=None):
         """Create and initialize a device for network's DHCP on this host."""
         try:
@@ -1819,12 +1941,12 @@ class DeviceManager:
         # It must also be done in the case there is an existing IPv6
         # address here created via SLAAC, since it will be deleted
         # and added back statically in the call to init_l3() below.
+        # A namespace claimed from the namespace pool is already set up.
         if network.namespace:
-            ip_lib.IPWrapper().ensure_namespace(network.namespace)
-            ip_lib.set_ip_nonlocal_bind_for_namespace(network.namespace, 1,
-                                                      root_namespace=True)
-        if netutils.is_ipv6_enabled():
-            self.driver.configure_ipv6_ra(network.namespace, 'default',
+            if not namespace_pool.claim_namespace(network.namespace):
+                self.setup_namespace(network.namespace)
+        elif netutils.is_ipv6_enabled():
+            self.driver.configure_ipv6_ra(None, 'default',
                                           constants.ACCEPT_RA_DISABLED)
 
         if ip_lib.ensure_device_is_ready(interface_name,
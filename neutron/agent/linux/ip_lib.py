@@ -975,6 +975,16 @@ def delete_network_namespace(namespace, **kwargs):
     privileged.remove_netns(namespace, **kwargs)
 
 
+def rename_network_namespace(namespace, new_name, **kwargs):
+    """Rename a network namespace.
+
+    :param namespace: The name of the namespace to rename
+    :param new_name: The new name of the namespace
+    :param kwargs: Callers add any filters they use as kwargs
+    """
+    privileged.rename_netns(namespace, new_name, **kwargs)
+
+
 def list_network_namespaces(**kwargs):
     """List all network namespace entries.
 
@@ -1659,3 +1669,88 @@ def delete_ip_route(namespace, cidr, device=None, via=None, table=None,
     privileged.delete_ip_route(namespace, cidr, ip_version,
                                device=device, via=via, table=table,
                                scope=scope, **kwargs)
+
+
+class IpOperationBatch:
+    """A batch of IP address, route and neighbour operations of a namespace.
+
+    The operations are queued by the add_* and delete_* methods, which take
+    the same arguments as the functions of this module doing the same
+    operation and return the index of the operation in the batch. ``apply``
+    then sends all of them in a single privileged call, which applies them in
+    order over one netlink socket and reports the errors per operation.
+    """
+
+    def __init__(self, namespace=None):
+        self.namespace = namespace
+        self._operations = []
+
+    def __len__(self):
+        return len(self._operations)
+
+    def _add_operation(self, operation_type, command, **kwargs):
+        self._operations.append({'type': operation_type,
+                                 'command': command,
+                                 'args': kwargs})
+        return len(self._operations) - 1
+
+    def add_address(self, cidr, device, scope='global', add_broadcast=True):
+        net = netaddr.IPNetwork(cidr)
+        broadcast = None
+        if add_broadcast:
+            broadcast = common_utils.cidr_broadcast_address_alternative(cidr)
+        return self._add_operation(
+            privileged.IP_OPERATION_ADDRESS, privileged.IP_OPERATION_ADD,
+            device=device, ip_version=net.version, address=str(net.ip),
+            prefixlen=net.prefixlen, scope=scope, broadcast=broadcast)
+
+    def delete_address(self, cidr, device):
+        net = netaddr.IPNetwork(cidr)
+        return self._add_operation(
+            privileged.IP_OPERATION_ADDRESS, privileged.IP_OPERATION_DELETE,
+            device=device, ip_version=net.version, address=str(net.ip),
+            prefixlen=net.prefixlen)
+
+    def add_route(self, cidr, device=None, via=None, table=None, metric=None,
+                  scope=None, proto='static'):
+        if table:
+            table = IP_RULE_TABLES.get(table, table)
+        return self._add_operation(
+            privileged.IP_OPERATION_ROUTE, privileged.IP_OPERATION_ADD,
+            cidr=cidr, ip_version=common_utils.get_ip_version(cidr or via),
+            device=device, via=via, table=table, metric=metric, scope=scope,
+            proto=proto)
+
+    def delete_route(self, cidr, device=None, via=None, table=None,
+                     scope=None):
+        if table:
+            table = IP_RULE_TABLES.get(table, table)
+        return self._add_operation(
+            privileged.IP_OPERATION_ROUTE, privileged.IP_OPERATION_DELETE,
+            cidr=cidr, ip_version=common_utils.get_ip_version(cidr or via),
+            device=device, via=via, table=table, scope=scope)
+
+    def add_neigh(self, ip_address, mac_address, device, nud_state=None):
+        return self._add_operation(
+            privileged.IP_OPERATION_NEIGH, privileged.IP_OPERATION_ADD,
+            device=device, ip_version=common_utils.get_ip_version(ip_address),
+            ip_address=ip_address, mac_address=mac_address,
+            nud_state=nud_state or 'permanent')
+
+    def delete_neigh(self, ip_address, mac_address, device):
+        return self._add_operation(
+            privileged.IP_OPERATION_NEIGH, privileged.IP_OPERATION_DELETE,
+            device=device, ip_version=common_utils.get_ip_version(ip_address),
+            ip_address=ip_address, mac_address=mac_address)
+
+    def apply(self):
+        """Apply the queued operations and empty the batch.
+
+        :return: A dictionary with the error messages of the failed
+                 operations, by operation index
+        """
+        if not self._operations:
+            return {}
+        operations, self._operations = self._operations, []
+        errors = privileged.apply_ip_operations(self.namespace, operations)
+        return {index: message for index, message in errors}
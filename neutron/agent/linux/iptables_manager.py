@@ -68,6 +68,8 @@ XTABLES_RESOURCE_PROBLEM_CODE = 4
 # xlock wait interval, in microseconds
 XLOCK_WAIT_INTERVAL = 200000
 
+LOWERCASE_MAC_REGEX = re.compile(r"(?:[0-9a-f]{2}[:]){5}(?:[0-9a-f]{2})")
+
 
 def comment_rule(rule, comment):
     if not cfg.CONF.AGENT.comment_iptables_rules or not comment:
@@ -108,6 +110,7 @@ class IptablesRule:
         self.wrap_name = binary_name[:16]
         self.tag = tag
         self.comment = comment
+        self._str = None
 
     def __eq__(self, other):
         return ((self.chain == other.chain) and
@@ -119,14 +122,18 @@ class IptablesRule:
         return not self == other
 
     def __str__(self):
-        if self.wrap:
-            chain = '{}-{}'.format(self.wrap_name, self.chain)
-        else:
-            chain = self.chain
-        rule = '-A {} {}'.format(chain, self.rule)
-        # If self.rule is '' the above will cause a trailing space, which
-        # could cause us to not match on save/restore, so strip it now.
-        return comment_rule(rule.strip(), self.comment)
+        # The rule string is generated for every rule on each apply, so it is
+        # only built once.
+        if self._str is None:
+            if self.wrap:
+                chain = '{}-{}'.format(self.wrap_name, self.chain)
+            else:
+                chain = self.chain
+            rule = '-A {} {}'.format(chain, self.rule)
+            # If self.rule is '' the above will cause a trailing space, which
+            # could cause us to not match on save/restore, so strip it now.
+            self._str = comment_rule(rule.strip(), self.comment)
+        return self._str
 
 
 class IptablesTable:
@@ -312,6 +319,9 @@ class IptablesManager:
         self.iptables_apply_deferred = False
         self.wrap_name = binary_name[:16]
         self.external_lock = external_lock
+        # Model of the installed tables, indexed by command ("iptables" or
+        # "ip6tables") and table name, used by the incremental apply.
+        self._installed_rules = {}
 
         self.ipv4 = {'filter': IptablesTable(binary_name=self.wrap_name)}
         self.ipv6 = {'filter': IptablesTable(binary_name=self.wrap_name)}
@@ -468,7 +478,7 @@ class IptablesManager:
             if not cfg.CONF.AGENT.debug_iptables_rules:
                 return first
             LOG.debug('List of IPTables Rules applied: %s', '\n'.join(first))
-            second = self._apply_synchronized()
+            second = self._apply_synchronized(incremental=False)
             if second:
                 msg = (_("IPTables Rules did not converge. Diff: %s") %
                        '\n'.join(second))
@@ -564,77 +574,145 @@ class IptablesManager:
                   "following set of iptables rules:\n%s",
                   '\n'.join(log_lines))
 
-    def _apply_synchronized(self):
+    def _apply_synchronized(self, incremental=None):
         """Apply the current in-memory set of iptables rules.
 
         This will create a diff between the rules from the previous runs
         and replace them with the current set of rules.
         This happens atomically, thanks to iptables-restore.
 
+        With the incremental apply, a table is not read with iptables-save
+        if the rules installed by the previous run are known and only the
+        chains wrapped by this manager changed since then. If the changes
+        computed this way fail to apply, the tables are read with
+        iptables-save and the changes computed and applied again.
+
         Returns a list of the changes that were sent to iptables-save.
         """
+        track_rules = cfg.CONF.AGENT.iptables_incremental_apply
+        if incremental is None:
+            incremental = track_rules
         s = [('iptables', self.ipv4)]
         if self.use_ipv6:
             s += [('ip6tables', self.ipv6)]
         all_commands = []  # variable to keep track all commands for return val
         for cmd, tables in s:
-            args = ['{}-save'.format(cmd)]
-            if self.namespace:
-                args = ['ip', 'netns', 'exec', self.namespace] + args
-            try:
-                save_output = linux_utils.execute(args, run_as_root=True,
-                                                  privsep_exec=True)
-            except RuntimeError:
-                # We could be racing with a cron job deleting namespaces.
-                # It is useless to try to apply iptables rules over and
-                # over again in a endless loop if the namespace does not
-                # exist.
-                with excutils.save_and_reraise_exception() as ctx:
-                    if (self.namespace and not
-                            ip_lib.network_namespace_exists(self.namespace)):
-                        ctx.reraise = False
-                        LOG.error("Namespace %s was deleted during IPTables "
-                                  "operations.", self.namespace)
-                        return []
-            all_lines = save_output.split('\n')
-            commands = []
-            # Traverse tables in sorted order for predictable dump output
+            installed = (self._installed_rules.get(cmd, {}) if incremental
+                         else {})
+            table_rules = {}
+            table_changes = {}
+            tables_to_read = []
             for table_name in sorted(tables):
                 table = tables[table_name]
-                # isolate the lines of the table we are modifying
-                start, end = self._find_table(all_lines, table_name)
-                old_rules = all_lines[start:end]
-                # generate the new table state we want
+                old_rules = installed.get(table_name)
+                if (old_rules is None or table.remove_rules or
+                        table.remove_chains):
+                    tables_to_read.append(table_name)
+                    continue
                 new_rules = self._modify_rules(old_rules, table, table_name)
-                # generate the iptables commands to get between the old state
-                # and the new state
                 changes = _generate_path_between_rules(old_rules, new_rules)
+                if not self._only_wrapped_chains_changed(changes):
+                    tables_to_read.append(table_name)
+                    continue
+                table_rules[table_name] = new_rules
+                table_changes[table_name] = changes
+
+            if tables_to_read:
+                args = ['{}-save'.format(cmd)]
+                if len(tables_to_read) == 1 and len(tables) > 1:
+                    args += ['-t', tables_to_read[0]]
+                if self.namespace:
+                    args = ['ip', 'netns', 'exec', self.namespace] + args
+                try:
+                    save_output = linux_utils.execute(args, run_as_root=True,
+                                                      privsep_exec=True)
+                except RuntimeError:
+                    # We could be racing with a cron job deleting namespaces.
+                    # It is useless to try to apply iptables rules over and
+                    # over again in a endless loop if the namespace does not
+                    # exist.
+                    with excutils.save_and_reraise_exception() as ctx:
+                        if (self.namespace and not
+                                ip_lib.network_namespace_exists(
+                                    self.namespace)):
+                            ctx.reraise = False
+                            LOG.error("Namespace %s was deleted during "
+                                      "IPTables operations.", self.namespace)
+                            self._installed_rules.clear()
+                            return []
+                all_lines = save_output.split('\n')
+                for table_name in tables_to_read:
+                    table = tables[table_name]
+                    # isolate the lines of the table we are modifying
+                    start, end = self._find_table(all_lines, table_name)
+                    old_rules = all_lines[start:end]
+                    # generate the new table state we want
+                    new_rules = self._modify_rules(old_rules, table,
+                                                   table_name)
+                    table_rules[table_name] = new_rules
+                    # generate the iptables commands to get between the old
+                    # state and the new state
+                    table_changes[table_name] = _generate_path_between_rules(
+                        old_rules, new_rules)
+
+            commands = []
+            # Traverse tables in sorted order for predictable dump output
+            for table_name in sorted(table_changes):
+                changes = table_changes[table_name]
                 if changes:
                     # if there are changes to the table, we put on the header
                     # and footer that iptables-save needs
                     commands += (['# Generated by iptables_manager'] +
                                  ['*%s' % table_name] + changes +
                                  ['COMMIT', '# Completed by iptables_manager'])
-            if not commands:
-                continue
-            all_commands += commands
-
-            # always end with a new line
-            commands.append('')
-
-            args = ['{}-restore'.format(cmd), '-n']
-            if self.namespace:
-                args = ['ip', 'netns', 'exec', self.namespace] + args
-
-            err = self._run_restore(args, commands)
-            if err:
-                self._log_restore_err(err, commands)
-                raise err
+            if commands:
+                all_commands += commands
+
+                # always end with a new line
+                commands.append('')
+
+                args = ['{}-restore'.format(cmd), '-n']
+                if self.namespace:
+                    args = ['ip', 'netns', 'exec', self.namespace] + args
+
+                err = self._run_restore(args, commands)
+                if err:
+                    # The installed rules are unknown, read them next time.
+                    self._installed_rules.pop(cmd, None)
+                    if len(tables_to_read) < len(table_changes):
+                        # The changes were computed from the model, which
+                        # may be stale: compute them again from the rules
+                        # read with iptables-save.
+                        LOG.warning("Failed to apply the iptables changes "
+                                    "computed from the installed rules, "
+                                    "applying them again from %s-save: %s",
+                                    cmd, err)
+                        return self._apply_synchronized(incremental=False)
+                    self._log_restore_err(err, commands)
+                    raise err
+            if track_rules:
+                self._installed_rules[cmd] = table_rules
 
         LOG.debug("IPTablesManager.apply completed with success. %d iptables "
                   "commands were issued", len(all_commands))
         return all_commands
 
+    def _only_wrapped_chains_changed(self, changes):
+        """Check if the changes only concern the chains of this manager.
+
+        No other tool or manager is expected to modify these chains, so the
+        rules installed there are known without reading them back.
+        """
+        prefix = '%s-' % self.wrap_name
+        for change in changes:
+            if change.startswith(':'):
+                chain = change[1:].split(' ', 1)[0]
+            else:
+                chain = change.split(' ', 2)[1]
+            if not chain.startswith(prefix):
+                return False
+        return True
+
     def _find_table(self, lines, table_name):
         if len(lines) < 3:
             # length only <2 when fake iptables
@@ -835,6 +913,9 @@ def _generate_path_between_rules(old_rules, new_rules):
             other_chains.append(chain)
 
     for chain in other_chains + sg_chains:
+        if old_by_chain[chain] == new_by_chain[chain]:
+            # Most of the chains do not change between two applies.
+            continue
         statements += _generate_chain_diff_iptables_commands(
             chain, old_by_chain[chain], new_by_chain[chain])
     # unreferenced chains get the axe
@@ -864,11 +945,10 @@ def _ensure_all_mac_addresses_are_uppercase(rules):
     def _to_upper(pat):
         return pat.group(0).upper()
 
-    new_rules = []
-    lowercase_mac_regex = re.compile(r"(?:[0-9a-f]{2}[:]){5}(?:[0-9a-f]{2})")
-    for rule in rules:
-        new_rules.append(re.sub(lowercase_mac_regex, _to_upper, rule))
-    return new_rules
+    # A MAC address contains ':', skip the regular expression for the
+    # (many) rules without any.
+    return [LOWERCASE_MAC_REGEX.sub(_to_upper, rule) if ':' in rule else rule
+            for rule in rules]
 
 
 def _generate_chain_diff_iptables_commands(chain, old_chain_rules,
@@ -889,7 +969,9 @@ def _generate_chain_diff_iptables_commands(chain, old_chain_rules,
             # skip ? because that's a guide string for intraline differences
             continue
         if line.startswith('-'):  # line deleted
-            statements.append('-D %s %d' % (chain, old_index))
+            # delete the rule by its specification rather than its index,
+            # the latter is wrong if the chain is not as expected
+            statements.append('-D %s' % line[5:])
             # since we are removing a line from the old rules, we
             # backup the index by 1
             old_index -= 1
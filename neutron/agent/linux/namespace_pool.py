@@ -0,0 +1,174 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import threading
+
+import eventlet
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from neutron.agent.linux import ip_lib
+
+LOG = logging.getLogger(__name__)
+
+# The pools of the agent, by prefix of the namespaces they are claimed for
+_POOLS = {}
+
+
+class NamespacePool:
+    """Pool of pre-created and pre-configured network namespaces.
+
+    Creating a namespace and writing its sysctls is a large part of the time
+    needed to create a router or a DHCP server. The pool keeps ``size``
+    namespaces created in advance with ``prepare`` and named with
+    ``pool_prefix`` followed by a random UUID. A namespace named with
+    ``ns_prefix`` is claimed by renaming one of them, and the pool is then
+    replenished in the background.
+    """
+
+    def __init__(self, ns_prefix, pool_prefix, size, prepare):
+        """Initialize the NamespacePool.
+
+        :param ns_prefix: the prefix of the namespaces claimed from the pool
+        :param pool_prefix: the prefix of the pooled namespaces
+        :param size: the number of pooled namespaces
+        :param prepare: function called with the name of a namespace to
+                        create and configure it
+        """
+        self.ns_prefix = ns_prefix
+        self.pool_prefix = pool_prefix
+        self.size = size
+        self._prepare = prepare
+        self._lock = threading.Lock()
+        self._ready = collections.deque()
+        self._creating = set()
+        self._replenishing = False
+
+    def start(self):
+        """Delete the pooled namespaces of a previous run and fill the pool"""
+        for namespace in ip_lib.list_network_namespaces():
+            if (namespace.startswith(self.pool_prefix) and
+                    not self.owns(namespace)):
+                self._delete(namespace)
+        self.replenish()
+
+    def owns(self, namespace):
+        """Return True if the namespace is pooled or being created"""
+        with self._lock:
+            return namespace in self._ready or namespace in self._creating
+
+    def replenish(self):
+        """Fill the pool in the background, unless it is already filled"""
+        with self._lock:
+            if self._replenishing or len(self._ready) >= self.size:
+                return
+            self._replenishing = True
+        eventlet.spawn_n(self._replenish)
+
+    def _replenish(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._ready) >= self.size:
+                        return
+                    name = self.pool_prefix + uuidutils.generate_uuid()
+                    self._creating.add(name)
+                try:
+                    self._prepare(name)
+                except Exception:
+                    LOG.exception('Failed to create the pooled namespace %s',
+                                  name)
+                    with self._lock:
+                        self._creating.discard(name)
+                    self._delete(name)
+                    return
+                with self._lock:
+                    self._creating.discard(name)
+                    self._ready.append(name)
+        finally:
+            with self._lock:
+                self._replenishing = False
+
+    def claim(self, namespace):
+        """Rename a pooled namespace to the given name.
+
+        :returns: True if a pooled namespace was renamed. False if the
+                  namespace already exists, if the pool is empty or if the
+                  pooled namespace could not be renamed, the caller then
+                  creates the namespace itself.
+        """
+        if ip_lib.network_namespace_exists(namespace):
+            return False
+        with self._lock:
+            name = self._ready.popleft() if self._ready else None
+        self.replenish()
+        if name is None:
+            LOG.debug('No pooled namespace available for %s', namespace)
+            return False
+        try:
+            ip_lib.rename_network_namespace(name, namespace)
+        except OSError:
+            LOG.exception('Failed to rename the pooled namespace %(name)s '
+                          'to %(namespace)s',
+                          {'name': name, 'namespace': namespace})
+            self._delete(name)
+            return False
+        LOG.debug('Pooled namespace %(name)s claimed for %(namespace)s',
+                  {'name': name, 'namespace': namespace})
+        return True
+
+    def clear(self):
+        """Delete the pooled namespaces"""
+        with self._lock:
+            names = list(self._ready)
+            self._ready.clear()
+        for name in names:
+            self._delete(name)
+
+    @staticmethod
+    def _delete(name):
+        try:
+            ip_lib.delete_network_namespace(name)
+        except Exception:
+            LOG.exception('Failed to delete the pooled namespace %s', name)
+
+
+def register(pool):
+    """Register and start a pool, replacing the pool of its prefix"""
+    unregister(pool.ns_prefix)
+    _POOLS[pool.ns_prefix] = pool
+    pool.start()
+
+
+def unregister(ns_prefix):
+    """Unregister the pool of a prefix and delete its pooled namespaces"""
+    pool = _POOLS.pop(ns_prefix, None)
+    if pool:
+        pool.clear()
+
+
+def claim_namespace(namespace):
+    """Rename a pooled namespace to the given name, if a pool is registered
+
+    :returns: True if a pooled namespace was renamed, False if the caller
+              has to create the namespace.
+    """
+    for ns_prefix, pool in _POOLS.items():
+        if namespace.startswith(ns_prefix):
+            return pool.claim(namespace)
+    return False
+
+
+def is_pooled(namespace):
+    """Return True if the namespace is owned by a registered pool"""
+    return any(pool.owns(namespace) for pool in _POOLS.values())
@@ -16,6 +16,7 @@
 import collections
 import contextlib
 import copy
+import functools
 import itertools
 import re
 
@@ -44,6 +45,7 @@ from neutron.common import utils as n_utils
 
 LOG = logging.getLogger(__name__)
 CONJ_ID_REGEX = re.compile(r"conj_id=(\d+),")
+MAX_CACHED_IP_CIDRS = 4096
 
 
 def _replace_register(flow_params, register_number, register_value):
@@ -65,6 +67,16 @@ def _replace_register(flow_params, register_number, register_value):
         pass
 
 
+@functools.lru_cache(maxsize=MAX_CACHED_IP_CIDRS)
+def _get_ip_cidr(ip_address):
+    """Return the CIDR of an IP address or network, as a string.
+
+    The same addresses of the remote groups are converted again each time
+    the conjunction flows of a VLAN are computed.
+    """
+    return str(netaddr.IPNetwork(ip_address).cidr)
+
+
 def create_reg_numbers(flow_params):
     """Replace reg_(port|net) values with defined register numbers"""
     _replace_register(flow_params, ovsfw_consts.REG_PORT, 'reg_port')
@@ -389,6 +401,9 @@ class ConjIPFlowManager:
         self.conj_ids = collections.defaultdict(dict)
         self.flow_state = collections.defaultdict(
             lambda: collections.defaultdict(dict))
+        # VLANs whose flows must be updated when the deferred flows are
+        # applied, with the flow group ID (ofport) to use.
+        self.pending_vlans = {}
 
     def _build_addr_conj_id_map(self, ethertype, sg_ag_conj_id_map):
         """Build a map of addr -> list of conj_ids."""
@@ -424,17 +439,17 @@ class ConjIPFlowManager:
         # NOTE(hangyang): Handle add/delete overlapped IPs among
         # remote security groups and remote address groups
         removed_ips = {
-            str(netaddr.IPNetwork(addr).cidr)
+            _get_ip_cidr(addr)
             for addr, _ in set(flow_state) - set(addr_to_conj)
         }
         ip_to_conj = collections.defaultdict(set)
         for (addr, mac), conj_ids in addr_to_conj.items():
             # Addresses from remote security groups have mac addresses,
             # others from remote address groups have not.
-            ip_to_conj[str(netaddr.IPNetwork(addr).cidr)].update(conj_ids)
+            ip_to_conj[_get_ip_cidr(addr)].update(conj_ids)
 
         for addr, mac in addr_to_conj:
-            ip_cidr = str(netaddr.IPNetwork(addr).cidr)
+            ip_cidr = _get_ip_cidr(addr)
             # When the overlapped IP in remote security group and remote
             # address group have different conjunction ids but with the
             # same priority offset, we need to combine the conj_ids together
@@ -459,7 +474,15 @@ class ConjIPFlowManager:
         """Install action=conjunction(conj_id, 1/2) flows,
         which depend on IP addresses of remote_group_id or
         remote_address_group_id.
+
+        If the driver defers the flows application, the VLAN flows are
+        computed once, when the deferred flows are applied, instead of once
+        per updated port (see apply_pending_updates).
         """
+        if self.driver._deferred and conj_id_to_remove is None:
+            self.pending_vlans.setdefault(vlan_tag, ofport)
+            return
+        ofport = self.pending_vlans.pop(vlan_tag, None) or ofport
         for (direction, ethertype), sg_ag_conj_id_map in (
                 self.conj_ids[vlan_tag].items()):
             # TODO(toshii): optimize when remote_groups have
@@ -472,6 +495,17 @@ class ConjIPFlowManager:
                 addr_to_conj, conj_id_to_remove, ofport)
             self.flow_state[vlan_tag][(direction, ethertype)] = addr_to_conj
 
+    def apply_pending_updates(self):
+        """Update the flows of the VLANs updated in deferred mode.
+
+        The desired flows of each VLAN are compared to the installed ones
+        and only the difference is added or deleted.
+        """
+        pending_vlans, self.pending_vlans = self.pending_vlans, {}
+        for vlan_tag, ofport in pending_vlans.items():
+            self.update_flows_for_vlan(vlan_tag, ofport,
+                                       conj_id_to_remove=[])
+
     def add(self, vlan_tag, sg_id, remote_id, direction, ethertype,
             priority_offset):
         """Get conj_id specified by the arguments
@@ -553,6 +587,7 @@ class OVSFirewallDriver(firewall.FirewallDriver):
         self._initialize_sg()
         self._update_cookie = None
         self._deferred = False
+        self._flow_stats = collections.Counter()
         self.iptables_helper = iptables.Helper(self.int_br.br)
         self.iptables_helper.load_driver_if_needed()
         self.ipconntrack = ip_conntrack.OvsIpConntrackManager()
@@ -617,6 +652,7 @@ class OVSFirewallDriver(firewall.FirewallDriver):
             kwargs['dl_type'] = f"0x{dl_type:04x}"
         if self._update_cookie:
             kwargs['cookie'] = self._update_cookie
+        self._flow_stats['added'] += 1
         if self._deferred:
             self.int_br.add_flow(flow_group_id=flow_group_id, **kwargs)
         else:
@@ -625,6 +661,8 @@ class OVSFirewallDriver(firewall.FirewallDriver):
     def _delete_flows(self, **kwargs):
         create_reg_numbers(kwargs)
         deferred = kwargs.pop('deferred', self._deferred)
+        # A deletion matches any number of flows, the calls are counted
+        self._flow_stats['delete_calls'] += 1
         if deferred:
             self.int_br.delete_flows(**kwargs)
         else:
@@ -897,8 +935,19 @@ class OVSFirewallDriver(firewall.FirewallDriver):
     def filter_defer_apply_off(self):
         if self._deferred:
             self._cleanup_stale_sg()
+            self.conj_ip_manager.apply_pending_updates()
             self.int_br.apply_flows()
             self._deferred = False
+            LOG.debug("OpenFlow rules processed by the firewall so far: "
+                      "%(added)d added, %(delete_calls)d deletion calls",
+                      {'added': self._flow_stats['added'],
+                       'delete_calls': self._flow_stats['delete_calls']})
+
+    def get_flow_stats(self):
+        flow_stats = {'added': self._flow_stats['added'],
+                      'delete_calls': self._flow_stats['delete_calls']}
+        self._flow_stats.clear()
+        return flow_stats
 
     @property
     def ports(self):
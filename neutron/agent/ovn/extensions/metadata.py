@@ -83,6 +83,7 @@ class MetadataExtension(extension_manager.OVNAgentExtension,
         ovn_meta.register_meta_conf_opts(
             meta_conf.UNIX_DOMAIN_METADATA_PROXY_OPTS)
         ovn_meta.register_meta_conf_opts(meta_conf.METADATA_PROXY_HANDLER_OPTS)
+        ovn_meta.register_meta_conf_opts(ovn_meta.METADATA_PORT_CACHE_OPTS)
         ovn_meta.register_meta_conf_opts(meta_conf.METADATA_RATE_LIMITING_OPTS,
                                          group=meta_conf.RATE_LIMITING_GROUP)
 
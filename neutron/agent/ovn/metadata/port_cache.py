@@ -0,0 +1,185 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import threading
+import time
+
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+# Number of lookup durations kept to compute the latency percentiles.
+LATENCY_SAMPLES = 1000
+# The statistics are logged every STATS_LOG_INTERVAL lookups.
+STATS_LOG_INTERVAL = 1000
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class PortLookupCache:
+    """Size bounded LRU cache of the metadata requests port lookups.
+
+    The entries map a (network ID, IP address, MAC address) lookup key to
+    the (instance ID, project ID) of the port found, and remember the UUID
+    of its Port_Binding row. They are indexed by this UUID and by each
+    (network ID, address) of the key, so that the Port_Binding events can
+    invalidate all the entries a port is or could be the answer of.
+
+    The cache also records its hit rate and the latency of the lookups, see
+    ``get_stats``.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._keys_by_port = collections.defaultdict(set)
+        self._keys_by_address = collections.defaultdict(set)
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        # Incremented by each update_port call, so that a port looked up
+        # while an event is processed is not cached with a stale value.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key_addresses(key):
+        network_id, ip_address, mac = key
+        addresses = [(network_id, ip_address)]
+        if mac:
+            addresses.append((network_id, mac))
+        return addresses
+
+    def _add(self, key, port_uuid, value):
+        self._remove(key)
+        self._entries[key] = (port_uuid, value)
+        self._keys_by_port[port_uuid].add(key)
+        for address in self._key_addresses(key):
+            self._keys_by_address[address].add(key)
+        while len(self._entries) > self.size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        indexes = [(self._keys_by_port, entry[0])]
+        indexes += [(self._keys_by_address, address)
+                    for address in self._key_addresses(key)]
+        for index, index_key in indexes:
+            keys = index.get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[index_key]
+
+    def lookup(self, network_id, ip_address, mac, get_port):
+        """Return the (port UUID, (instance ID, project ID)) of a port.
+
+        On a cache miss, the port is looked up with ``get_port``, called with
+        the same arguments; it returns the port UUID and the (instance ID,
+        project ID) tuple, or (None, (None, None)) if no port was found. Only
+        the ports found are cached.
+        """
+        key = (network_id, ip_address, mac)
+        start = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            generation = self._generation
+        if entry is None:
+            entry = get_port(network_id, ip_address, mac)
+            with self._lock:
+                self.misses += 1
+                if (entry[0] is not None and self.size and
+                        generation == self._generation):
+                    self._add(key, *entry)
+        self._record_latency(time.perf_counter() - start)
+        return entry
+
+    def _record_latency(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            lookups = self.hits + self.misses
+        if lookups % STATS_LOG_INTERVAL == 0:
+            LOG.debug('Metadata port lookup cache statistics: %s',
+                      self.get_stats())
+
+    def update_port(self, port_uuid, network_id, addresses, value=None):
+        """Invalidate and, optionally, add the entries of a port.
+
+        All the entries of the port, and the entries looked up with one of
+        its addresses in its network, are removed. If ``value`` is set, an
+        entry is then added for each of the IP addresses of the port, unless
+        another port held one of them; the lookups for this IP address go to
+        the database so that the inconsistency is still reported.
+
+        :param addresses: the MAC address followed by the IP addresses of the
+                          port, as in the "mac" column of its Port_Binding.
+        :param value: the (instance ID, project ID) tuple of the port, None
+                      if it is deleted or not bound anymore.
+        """
+        with self._lock:
+            self._generation += 1
+            keys = set(self._keys_by_port.get(port_uuid, ()))
+            conflicts = set()
+            for address in addresses:
+                for key in self._keys_by_address.get((network_id, address),
+                                                     ()):
+                    keys.add(key)
+                    if self._entries[key][0] != port_uuid:
+                        conflicts.add(address)
+            for key in keys:
+                self._remove(key)
+            if value is None or not self.size:
+                return
+            for ip_address in addresses[1:]:
+                if ip_address not in conflicts:
+                    self._add((network_id, ip_address, None), port_uuid,
+                              value)
+
+    def remove(self, network_id, ip_address, mac=None):
+        """Remove the entry of a lookup key, if cached."""
+        with self._lock:
+            self._remove((network_id, ip_address, mac))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_port.clear()
+            self._keys_by_address.clear()
+
+    def get_stats(self):
+        """Return the cache size, its hit rate and the lookup latencies.
+
+        The latencies, in milliseconds, are computed over the last
+        LATENCY_SAMPLES lookups.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'p50_ms': _percentile(latencies, 50) * 1000,
+                'p99_ms': _percentile(latencies, 99) * 1000,
+            }
@@ -17,26 +17,84 @@ import threading
 from neutron.agent.linux import utils as agent_utils
 from neutron.agent.metadata import proxy_base
 from neutron.agent.ovn.metadata import ovsdb
+from neutron.agent.ovn.metadata import port_cache
 from neutron.common.ovn import constants as ovn_const
+from neutron.common.ovn import utils as ovn_utils
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib.callbacks import resources
 from oslo_config import cfg
 from oslo_log import log as logging
+from ovsdbapp.backend.ovs_idl import event as row_event
 
 
 LOG = logging.getLogger(__name__)
 
 
+def _get_port_addresses(mac):
+    # The "mac" column is ["MAC IP {IP2...IPN}"]
+    return mac[0].split(' ') if mac else []
+
+
+def _get_port_instance_and_project(row):
+    external_ids = row.external_ids
+    if (not row.chassis or
+            ovn_const.OVN_DEVID_EXT_ID_KEY not in external_ids or
+            ovn_const.OVN_PROJID_EXT_ID_KEY not in external_ids):
+        return None
+    return (external_ids[ovn_const.OVN_DEVID_EXT_ID_KEY],
+            external_ids[ovn_const.OVN_PROJID_EXT_ID_KEY])
+
+
+class PortBindingLookupCacheEvent(row_event.RowEvent):
+    """Keep the port lookup cache of a metadata proxy handler up to date.
+
+    The entries of a port are invalidated when it is deleted or when its
+    chassis, addresses, datapath or external IDs change, and added back
+    while it is bound to a chassis, so that the first metadata requests of
+    an instance do not need to search the Port_Binding table.
+    """
+    UPDATE_COLUMNS = ('chassis', 'mac', 'datapath', 'external_ids')
+
+    def __init__(self, cache):
+        events = (self.ROW_CREATE, self.ROW_UPDATE, self.ROW_DELETE)
+        super().__init__(events, 'Port_Binding', None)
+        self.event_name = self.__class__.__name__
+        self.cache = cache
+
+    def match_fn(self, event, row, old):
+        if event != self.ROW_UPDATE:
+            return True
+        return any(hasattr(old, column) for column in self.UPDATE_COLUMNS)
+
+    def run(self, event, row, old):
+        if event == self.ROW_UPDATE and (hasattr(old, 'mac') or
+                                         hasattr(old, 'datapath')):
+            self.cache.update_port(
+                row.uuid,
+                ovn_utils.get_network_name_from_datapath(
+                    getattr(old, 'datapath', row.datapath)),
+                _get_port_addresses(getattr(old, 'mac', row.mac)))
+        value = (None if event == self.ROW_DELETE else
+                 _get_port_instance_and_project(row))
+        self.cache.update_port(
+            row.uuid, ovn_utils.get_network_name_from_datapath(row.datapath),
+            _get_port_addresses(row.mac), value=value)
+
+
 class MetadataProxyHandler(proxy_base.MetadataProxyHandlerBase):
     NETWORK_ID_HEADER = 'X-OVN-Network-ID'
     ROUTER_ID_HEADER = ''
 
     def __init__(self, conf, chassis, sb_idl):
-        super().__init__(conf)
+        super().__init__(conf, has_cache=bool(conf.metadata_port_cache_size))
         self.chassis = chassis
         self._sb_idl = sb_idl
         self._post_fork_event = threading.Event()
+        self._port_cache = port_cache.PortLookupCache(
+            conf.metadata_port_cache_size)
+        if sb_idl:
+            self._watch_port_bindings(sb_idl)
         self.subscribe()
 
     @property
@@ -59,23 +117,42 @@ class MetadataProxyHandler(proxy_base.MetadataProxyHandlerBase):
         # We need to open a connection to OVN SouthBound database for
         # each worker so that we can process the metadata requests.
         self._post_fork_event.clear()
+        self._port_cache.clear()
         self.sb_idl = ovsdb.MetadataAgentOvnSbIdl(
             tables=('Port_Binding', 'Datapath_Binding', 'Chassis'),
-            chassis=self.chassis).start()
+            chassis=self.chassis,
+            events=self._get_port_cache_events()).start()
 
         # Now IDL connections can be safely used.
         self._post_fork_event.set()
 
+    def _get_port_cache_events(self):
+        if not self._port_cache.size:
+            return []
+        return [PortBindingLookupCacheEvent(self._port_cache)]
+
+    def _watch_port_bindings(self, sb_idl):
+        events = self._get_port_cache_events()
+        if events:
+            sb_idl.idl.notify_handler.watch_events(events)
+
     def get_port(self, remote_address, network_id=None, remote_mac=None,
                  router_id=None, skip_cache=False):
+        if skip_cache:
+            self._port_cache.remove(network_id, remote_address, remote_mac)
+        return self._port_cache.lookup(network_id, remote_address,
+                                       remote_mac, self._get_port)[1]
+
+    def _get_port(self, network_id, remote_address, remote_mac):
         ports = self.sb_idl.get_network_port_bindings_by_ip(network_id,
                                                             remote_address,
                                                             mac=remote_mac)
         num_ports = len(ports)
         if num_ports == 1:
             external_ids = ports[0].external_ids
-            return (external_ids[ovn_const.OVN_DEVID_EXT_ID_KEY],
-                    external_ids[ovn_const.OVN_PROJID_EXT_ID_KEY])
+            return (ports[0].uuid,
+                    (external_ids[ovn_const.OVN_DEVID_EXT_ID_KEY],
+                     external_ids[ovn_const.OVN_PROJID_EXT_ID_KEY]))
         if num_ports == 0:
             LOG.error("No port found in network %s with IP address %s",
                       network_id, remote_address)
@@ -86,7 +163,7 @@ class MetadataProxyHandler(proxy_base.MetadataProxyHandlerBase):
                       "there seems to be inconsistent data between Neutron "
                       "and OVN databases. OVN Port uuids: %s", network_id,
                       remote_address, port_uuids)
-        return None, None
+        return None, (None, None)
 
 
 class UnixDomainMetadataProxy(proxy_base.UnixDomainMetadataProxyBase):
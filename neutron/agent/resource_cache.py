@@ -12,6 +12,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import itertools
+
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib import context as n_ctx
@@ -21,25 +24,58 @@ from oslo_log import log as logging
 from neutron._i18n import _
 from neutron.api.rpc.callbacks.consumer import registry as registry_rpc
 from neutron.api.rpc.callbacks import events as events_rpc
+from neutron.api.rpc.callbacks import resources
 from neutron.api.rpc.handlers import resources_rpc
 from neutron import objects
 
 LOG = logging.getLogger(__name__)
 objects.register_objects()
 
+# Fields the agents filter the cached resources by. A secondary index
+# (field value -> resource IDs) is kept for each of them so these queries do
+# not need to scan all the cached resources of the type.
+INDEXED_FIELDS = {
+    resources.PORT: ('network_id', 'security_group_ids', 'device_owner'),
+    resources.SECURITYGROUPRULE: ('security_group_id', 'remote_group_id',
+                                  'remote_address_group_id'),
+}
+
 
 class RemoteResourceCache:
     """Retrieves and stashes logical resources in their OVO format.
 
     This is currently only compatible with OVO objects that have an ID.
     """
-    def __init__(self, resource_types):
+    def __init__(self, resource_types, indexed_fields=None):
         self.resource_types = resource_types
         self._cache_by_type_and_id = {rt: {} for rt in self.resource_types}
         self._deleted_ids_by_type = {rt: set() for rt in self.resource_types}
         # track everything we've asked the server so we don't ask again
         self._satisfied_server_queries = set()
         self._puller = resources_rpc.ResourcesPullRpcApi()
+        if indexed_fields is None:
+            indexed_fields = INDEXED_FIELDS
+        # {rtype: {field: {value: set(resource IDs)}}}
+        self._indexes = {
+            rt: {field: collections.defaultdict(set)
+                 for field in indexed_fields.get(rt, ())}
+            for rt in self.resource_types}
+        # insertion sequence of the cached resources, used to return the
+        # indexed query results in the same order as a full scan
+        self._positions = {rt: {} for rt in self.resource_types}
+        self._sequence = itertools.count()
+        self._stats = collections.Counter()
+
+    @property
+    def stats(self):
+        """Return the cache counters.
+
+        * hits/misses: lookups by ID found/not found in the cache.
+        * index_lookups: filtered queries resolved with a secondary index.
+        * scans: filtered queries that walked all the cached resources of a
+          type, and scanned_resources the number of resources walked.
+        """
+        return dict(self._stats)
 
     def _type_cache(self, rtype):
         if rtype not in self.resource_types:
@@ -58,7 +94,9 @@ class RemoteResourceCache:
             return None
         cached_item = self._type_cache(rtype).get(obj_id)
         if cached_item:
+            self._stats['hits'] += 1
             return cached_item
+        self._stats['misses'] += 1
         # try server in case object existed before agent start
         self._flood_cache_for_query(rtype, id=(obj_id, ),
                                     agent_restarted=agent_restarted)
@@ -125,7 +163,13 @@ class RemoteResourceCache:
         fashion.
         """
         self._flood_cache_for_query(rtype, **filters)
+        return self.get_cached_resources(rtype, filters)
+
+    def get_cached_resources(self, rtype, filters):
+        """Same as get_resources but without querying the server.
 
+        Only the resources already in the cache are returned.
+        """
         def match(obj):
             for key, values in filters.items():
                 for value in values:
@@ -141,13 +185,75 @@ class RemoteResourceCache:
                     # no match found for this key
                     return False
             return True
-        return self.match_resources_with_func(rtype, match)
+
+        resource_ids = self._get_indexed_ids(rtype, filters)
+        if resource_ids is None:
+            return self.match_resources_with_func(rtype, match)
+        self._stats['index_lookups'] += 1
+        type_cache = self._type_cache(rtype)
+        positions = self._positions[rtype]
+        # the filters on non indexed fields are checked on the candidates
+        return [type_cache[r_id]
+                for r_id in sorted(resource_ids, key=positions.__getitem__)
+                if match(type_cache[r_id])]
 
     def match_resources_with_func(self, rtype, matcher):
         """Returns a list of all resources satisfying func matcher."""
-        # TODO(kevinbenton): this is O(N), offer better lookup functions
-        return [r for r in self._type_cache(rtype).values()
-                if matcher(r)]
+        type_cache = self._type_cache(rtype)
+        self._stats['scans'] += 1
+        self._stats['scanned_resources'] += len(type_cache)
+        return [r for r in type_cache.values() if matcher(r)]
+
+    def _get_indexed_ids(self, rtype, filters):
+        """Return the IDs of the resources matching the indexed filters.
+
+        The values of a filter are matched in an OR fashion and the filters
+        in an AND fashion. None is returned if no filter is indexed or if a
+        filter value cannot be looked up in the index.
+        """
+        indexes = self._indexes[rtype]
+        resource_ids = None
+        # start with the most selective filter
+        for key, values in sorted(
+                ((k, v) for k, v in filters.items() if k in indexes),
+                key=lambda item: len(item[1])):
+            ids = set()
+            for value in values:
+                try:
+                    ids |= indexes[key].get(value, set())
+                except TypeError:
+                    # an unhashable value (a list, a dict...) is not in the
+                    # index, it can only be matched by a full scan
+                    return None
+            resource_ids = ids if resource_ids is None else resource_ids & ids
+            if not resource_ids:
+                break
+        return resource_ids
+
+    @staticmethod
+    def _get_index_values(resource, field):
+        value = getattr(resource, field, None)
+        if isinstance(value, (list, tuple, set)):
+            return set(value)
+        return {value}
+
+    def _index_resource(self, rtype, resource):
+        self._positions[rtype].setdefault(resource.id, next(self._sequence))
+        for field, index in self._indexes[rtype].items():
+            for value in self._get_index_values(resource, field):
+                index[value].add(resource.id)
+
+    def _unindex_resource(self, rtype, resource_id, resource, removed=True):
+        if removed:
+            self._positions[rtype].pop(resource_id, None)
+        for field, index in self._indexes[rtype].items():
+            for value in self._get_index_values(resource, field):
+                ids = index.get(value)
+                if ids is None:
+                    continue
+                ids.discard(resource_id)
+                if not ids:
+                    del index[value]
 
     def _is_stale(self, rtype, resource):
         """Determines if a given resource update is safe to ignore.
@@ -179,6 +285,10 @@ class RemoteResourceCache:
             return
         existing = self._type_cache(rtype).get(resource.id)
         self._type_cache(rtype)[resource.id] = resource
+        if existing:
+            self._unindex_resource(rtype, resource.id, existing,
+                                   removed=False)
+        self._index_resource(rtype, resource)
         changed_fields = self._get_changed_fields(existing, resource)
         if not changed_fields:
             LOG.debug("Received resource %s update without any changes: %s",
@@ -211,7 +321,9 @@ class RemoteResourceCache:
                 continue
         LOG.debug("Remove resource cache for resource %s: %s",
                   rtype, resource_id)
-        self._type_cache(rtype).pop(resource_id, None)
+        existing = self._type_cache(rtype).pop(resource_id, None)
+        if existing:
+            self._unindex_resource(rtype, resource_id, existing)
 
     def record_resource_delete(self, context, rtype, resource_id):
         # deletions are final, record them so we never
@@ -224,6 +336,8 @@ class RemoteResourceCache:
             return
         self._deleted_ids_by_type[rtype].add(resource_id)
         existing = self._type_cache(rtype).pop(resource_id, None)
+        if existing:
+            self._unindex_resource(rtype, resource_id, existing)
         # local notification for agent internals to subscribe to
         registry.publish(rtype, events.AFTER_DELETE, self,
                          payload=events.DBEventPayload(
@@ -303,17 +303,15 @@ class SecurityGroupServerAPIShim(sg_rpc_base.SecurityGroupInfoAPIMixin):
         # about the security group rules. so we need to emulate a rule deletion
         # when a security group is removed.
 
-        rules = self.rcache.match_resources_with_func(
-            'SecurityGroupRule',
-            lambda rule: rule.security_group_id == existing.id)
+        rules = self.rcache.get_cached_resources(
+            'SecurityGroupRule', {'security_group_id': (existing.id, )})
 
         for rule in rules:
             self.rcache.record_resource_delete(context, 'SecurityGroupRule',
                                                rule.id)
         # If there's a rule which remote is the deleted sg, remove that also.
-        rules = self.rcache.match_resources_with_func(
-            'SecurityGroupRule',
-            lambda sg_rule: sg_rule.remote_group_id == existing.id)
+        rules = self.rcache.get_cached_resources(
+            'SecurityGroupRule', {'remote_group_id': (existing.id, )})
         for rule in rules:
             self.rcache.record_resource_delete(context, 'SecurityGroupRule',
                                                rule.id)
@@ -311,15 +311,14 @@ class Controller:
             # FIXME(salvatore-orlando): obj_getter might return references to
             # other resources. Must check authZ on them too.
             # Omit items from list that should not be visible
-            tmp_list = []
             for obj in obj_list:
                 self._set_parent_id_into_ext_resources_request(
                     request, obj, parent_id, is_get=True)
-                if policy.check(
-                        request.context, self._plugin_handlers[self.SHOW],
-                        obj, plugin=self._plugin, pluralized=self._collection):
-                    tmp_list.append(obj)
-            obj_list = tmp_list
+            allowed = policy.check_items(
+                request.context, self._plugin_handlers[self.SHOW], obj_list,
+                pluralized=self._collection)
+            obj_list = [obj for obj, obj_allowed in zip(obj_list, allowed)
+                        if obj_allowed]
         # Use the first element in the list for discriminating which attributes
         # should be filtered out because of authZ policies
         # fields_to_add contains a list of attributes added for request policy
@@ -39,9 +39,9 @@ from neutron.privileged.agent.linux import utils as priv_utils
 
 LOG = logging.getLogger(__name__)
 NS_PREFIXES = {
-    'dhcp': [dhcp.NS_PREFIX],
+    'dhcp': [dhcp.NS_PREFIX, dhcp.POOL_NS_PREFIX],
     'l3': [namespaces.NS_PREFIX, dvr_snat_ns.SNAT_NS_PREFIX,
-           dvr_fip_ns.FIP_NS_PREFIX],
+           dvr_fip_ns.FIP_NS_PREFIX, namespaces.POOL_NS_PREFIX],
 }
 SIGTERM_WAITTIME = 10
 
@@ -56,6 +56,8 @@ OVN_PORT_BINDING_PROFILE = portbindings.PROFILE
 OVN_HOST_ID_EXT_ID_KEY = 'neutron:host_id'
 OVN_LRSR_EXT_ID_KEY = 'neutron:is_static_route'
 OVN_FIP_DISTRIBUTED_KEY = 'neutron:fip-distributed'
+OVN_DB_SYNC_CHECKPOINT_KEY = 'neutron:db-sync-checkpoint'
+OVN_DB_FULL_SYNC_CHECKPOINT_KEY = 'neutron:db-full-sync-checkpoint'
 OVN_ADDRESS_GROUP_ID_KEY = 'neutron:address_group_id'
 
 MIGRATING_ATTR = 'migrating_to'
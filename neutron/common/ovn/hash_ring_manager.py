@@ -13,11 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
 import datetime
+import hashlib
 
 from oslo_log import log
 from oslo_utils import timeutils
-from tooz import hashring
 
 from neutron.common.ovn import constants
 from neutron.common.ovn import exceptions
@@ -27,11 +28,128 @@ from neutron_lib import context
 
 LOG = log.getLogger(__name__)
 
+# Number of tokens (virtual nodes) per node in the ring. This value and the
+# token generation must not change between releases (they are the same as
+# the "tooz.hashring.HashRing" defaults used previously): all the API workers
+# must map an OVN row to the same node, even during a rolling upgrade.
+PARTITIONS_PER_NODE = 2 ** 5
+# The hash space of a MD5 digest.
+RING_SIZE = 2 ** 128
+
+
+def _hash(data):
+    return int(hashlib.md5(data, usedforsecurity=False).hexdigest(), 16)
+
+
+def _node_tokens(node):
+    key = node.encode('utf-8')
+    key_hash = hashlib.md5(key, usedforsecurity=False)
+    tokens = []
+    for idx in range(PARTITIONS_PER_NODE):
+        key_hash.update(key)
+        tokens.append(int(key_hash.hexdigest(), 16))
+    return tokens
+
+
+class HashRing:
+    """A consistent hash ring with precomputed lookup tables.
+
+    The ring is stored as two parallel lists, the sorted tokens and the node
+    owning each of them, so a lookup is a single binary search. The tokens of
+    each node are cached, adding or removing a node does not rehash the
+    other ones.
+
+    If a ``load_factor`` greater than 1 is given, the ring runs in bounded
+    load mode: no node owns more than ``load_factor`` times the average share
+    of the hash space; the ranges exceeding it are deterministically
+    reassigned to the next nodes in the ring with spare capacity.
+    """
+
+    def __init__(self, nodes=(), load_factor=None):
+        self._load_factor = (
+            load_factor if load_factor and load_factor > 1 else None)
+        self._node_tokens = {}
+        self._tokens = []
+        self._owners = []
+        self.add_nodes(nodes)
+
+    @property
+    def nodes(self):
+        return set(self._node_tokens)
+
+    def __len__(self):
+        return len(self._node_tokens)
+
+    def add_nodes(self, nodes):
+        nodes = set(nodes) - set(self._node_tokens)
+        for node in nodes:
+            self._node_tokens[node] = _node_tokens(node)
+        if nodes:
+            self._build()
+
+    def remove_nodes(self, nodes):
+        nodes = set(nodes) & set(self._node_tokens)
+        for node in nodes:
+            del self._node_tokens[node]
+        if nodes:
+            self._build()
+
+    def _build(self):
+        ring = {}
+        for node, tokens in self._node_tokens.items():
+            for token in tokens:
+                ring[token] = node
+        self._tokens = sorted(ring)
+        self._owners = [ring[token] for token in self._tokens]
+        if self._load_factor and len(self._node_tokens) > 1:
+            self._bound_loads()
+
+    def _bound_loads(self):
+        """Reassign the token ranges exceeding the capacity of a node.
+
+        The range owned by a token goes from the previous token (excluded)
+        to itself. The ranges are walked in ring order; a range whose owner
+        is already full is given to the first following owner with enough
+        spare capacity.
+        """
+        capacity = self._load_factor * RING_SIZE / len(self._node_tokens)
+        loads = dict.fromkeys(self._node_tokens, 0)
+        num_tokens = len(self._tokens)
+        owners = []
+        for idx, token in enumerate(self._tokens):
+            arc = (token - self._tokens[idx - 1]) % RING_SIZE
+            for offset in range(num_tokens):
+                owner = self._owners[(idx + offset) % num_tokens]
+                if loads[owner] + arc <= capacity:
+                    break
+            else:
+                owner = self._owners[idx]
+            loads[owner] += arc
+            owners.append(owner)
+        self._owners = owners
+
+    def _lookup(self, key_hash):
+        position = bisect.bisect(self._tokens, key_hash)
+        return self._owners[position if position < len(self._tokens) else 0]
+
+    def get_node(self, key):
+        """Return the node owning a key (bytes) or None if ring is empty."""
+        if not self._tokens:
+            return None
+        return self._lookup(_hash(key))
+
+    def get_nodes(self, keys):
+        """Return a dictionary with the node owning each key (bytes)."""
+        if not self._tokens:
+            return dict.fromkeys(keys)
+        return {key: self._lookup(_hash(key)) for key in keys}
+
 
 class HashRingManager:
 
-    def __init__(self, group_name):
+    def __init__(self, group_name, load_factor=None):
         self._hash_ring = None
+        self._load_factor = load_factor
         self._node_last_touch = {}
         self._last_time_loaded = None
         self._check_hashring_startup = True
@@ -91,8 +209,15 @@ class HashRingManager:
             nodes = db_hash_ring.get_active_nodes(
                 self.admin_ctx,
                 constants.HASH_RING_NODES_TIMEOUT, self._group)
-            self._hash_ring = hashring.HashRing({node.node_uuid
-                                                 for node in nodes})
+            node_uuids = {node.node_uuid for node in nodes}
+            if self._hash_ring is None:
+                self._hash_ring = HashRing(node_uuids,
+                                           load_factor=self._load_factor)
+            else:
+                # Only the nodes joining or leaving the ring are (un)hashed
+                self._hash_ring.remove_nodes(
+                    self._hash_ring.nodes - node_uuids)
+                self._hash_ring.add_nodes(node_uuids)
             self._node_last_touch = {node.node_uuid: node.updated_at
                                      for node in nodes}
             self._last_time_loaded = timeutils.utcnow()
@@ -108,15 +233,33 @@ class HashRingManager:
     def get_node(self, key):
         self._load_hash_ring()
 
-        # tooz expects a byte string for the hash
         if isinstance(key, str):
             key = key.encode('utf-8')
 
-        try:
-            # We need to pop the value from the set. If empty,
-            # KeyError is raised
-            node_uuid = self._hash_ring[key].pop()
-            return node_uuid, self._node_last_touch[node_uuid]
-        except KeyError:
+        node_uuid = self._hash_ring.get_node(key)
+        if node_uuid is None:
             raise exceptions.HashRingIsEmpty(
                 key=key, node_count=self._offline_node_count)
+        return node_uuid, self._node_last_touch[node_uuid]
+
+    def get_nodes(self, keys):
+        """Return the node and its last touch time for each key.
+
+        :param keys: an iterable of keys (bytes or str), e.g. row UUIDs.
+        :returns: a dictionary mapping each key to a (node_uuid,
+                  node_last_touch) tuple.
+        :raises: HashRingIsEmpty if there are no active nodes.
+        """
+        self._load_hash_ring()
+
+        keys = list(keys)
+        if not self._hash_ring.nodes:
+            raise exceptions.HashRingIsEmpty(
+                key=keys[0] if keys else None,
+                node_count=self._offline_node_count)
+        encoded_keys = [key.encode('utf-8') if isinstance(key, str) else key
+                        for key in keys]
+        nodes = self._hash_ring.get_nodes(encoded_keys)
+        return {key: (nodes[encoded_key],
+                      self._node_last_touch[nodes[encoded_key]])
+                for key, encoded_key in zip(keys, encoded_keys)}
@@ -132,6 +132,16 @@ IPTABLES_OPTS = [
     cfg.BoolOpt('use_random_fully',
                 default=True,
                 help=_("Use random-fully in SNAT masquerade rules.")),
+    cfg.BoolOpt('iptables_incremental_apply',
+                default=False,
+                help=_("Keep a model of the iptables rules installed by the "
+                       "agent and, when only the chains owned by the agent "
+                       "changed, apply the differences without reading the "
+                       "tables back with iptables-save first. The tables "
+                       "are still read when a shared or built-in chain "
+                       "changes, or after a failure. Only enable it if no "
+                       "other tool modifies the chains of the Neutron "
+                       "agents.")),
 ]
 
 PROCESS_MONITOR_OPTS = [
@@ -159,6 +169,34 @@ AVAILABILITY_ZONE_OPTS = [
                help=_("Availability zone of this node")),
 ]
 
+RESOURCE_PROCESSING_OPTS = [
+    cfg.IntOpt('resource_processing_workers', default=0, min=0,
+               help=_("Number of workers processing the resource (router or "
+                      "network) updates queue of the L3 and DHCP agents. "
+                      "The resources are sharded among the workers, all the "
+                      "updates of a resource are processed by the same "
+                      "worker, in order. If set to 0 or 1, the L3 agent "
+                      "uses a pool of workers sized according to the number "
+                      "of routers and the DHCP agent uses a single "
+                      "worker.")),
+    cfg.IntOpt('resource_update_aging_interval', default=0, min=0,
+               help=_("Seconds after which a queued resource update is "
+                      "promoted to the next priority level, so the low "
+                      "priority updates, such as the full resyncs, are "
+                      "eventually processed even if higher priority updates "
+                      "keep arriving. Set to 0 to disable the priority "
+                      "aging.")),
+]
+
+NAMESPACE_POOL_OPTS = [
+    cfg.IntOpt('namespace_pool_size', default=0, min=0,
+               help=_("Number of network namespaces created and configured "
+                      "in advance by the L3 and DHCP agents. The router and "
+                      "DHCP namespaces are then created by renaming one of "
+                      "them, which shortens the creation of the routers and "
+                      "DHCP servers, and the pool is replenished in the "
+                      "background. Set to 0 to disable the pool.")),
+]
 
 DHCP_PROTOCOL_OPTS = [
     cfg.IntOpt('dhcp_renewal_time', default=0,
@@ -214,6 +252,14 @@ def register_availability_zone_opts_helper(conf):
     conf.register_opts(AVAILABILITY_ZONE_OPTS, 'AGENT')
 
 
+def register_resource_processing_opts_helper(conf):
+    conf.register_opts(RESOURCE_PROCESSING_OPTS, 'AGENT')
+
+
+def register_namespace_pool_opts_helper(conf):
+    conf.register_opts(NAMESPACE_POOL_OPTS, 'AGENT')
+
+
 def get_root_helper(conf):
     return conf.AGENT.root_helper
 
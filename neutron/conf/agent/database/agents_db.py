@@ -25,6 +25,14 @@ AGENT_OPTS = [
                help=_("Seconds to regard the agent as down; should be at "
                       "least twice report_interval, to be sure the "
                       "agent is down for good.")),
+    cfg.IntOpt('agent_heartbeat_batch_interval', default=2, min=0,
+               help=_("Seconds during which the heartbeats of the agents "
+                      "whose state did not change are collected by a "
+                      "server worker, before being written to the "
+                      "database in a single update. Set it to 0 to write "
+                      "every heartbeat when it is received. It should be "
+                      "much lower than agent_down_time, as the agents "
+                      "heartbeat timestamps are updated that much later.")),
     cfg.StrOpt('dhcp_load_type', default='networks',
                choices=['networks', 'subnets', 'ports'],
                help=_('Representing the resource type whose load is being '
@@ -108,6 +108,20 @@ OPTS = [
                        'the state change monitor. NOTE: Setting to True '
                        'could affect the data plane when stopping or '
                        'restarting the L3 agent.')),
+    cfg.BoolOpt('router_update_diff_processing', default=True,
+                help=_('When a router update only changes its floating IPs '
+                       'or its static routes, only process these changes '
+                       'instead of reprocessing all its ports, gateway and '
+                       'address scope rules. Distributed routers are always '
+                       'fully processed.')),
+    cfg.IntOpt('sync_routers_fetch_workers', default=1, min=1,
+               help=_('Number of chunks of routers fetched concurrently from '
+                      'the server during a full synchronization of the '
+                      'routers, on startup for instance. The routers of a '
+                      'chunk are processed while the next chunks are '
+                      'fetched. A higher value speeds up the startup of the '
+                      'agents hosting many routers, at the cost of a higher '
+                      'load on the server.')),
 ]
 
 
@@ -34,6 +34,17 @@ OVS_OPTS = [
                       'connection transaction'))
 ]
 
+METADATA_PORT_CACHE_OPTS = [
+    cfg.IntOpt('metadata_port_cache_size',
+               default=10000,
+               min=0,
+               help=_('Maximum number of port lookups of the metadata '
+                      'requests cached by each metadata proxy worker. The '
+                      'cache is kept up to date with the Port_Binding events '
+                      'of the OVN Southbound database. Set to 0 to look up '
+                      'the port in the database for every request.')),
+]
+
 
 def register_meta_conf_opts(opts, cfg=cfg.CONF, group=None):
     cfg.register_opts(opts, group=group)
@@ -45,7 +56,8 @@ def list_metadata_agent_opts():
          itertools.chain(
              meta_conf.SHARED_OPTS,
              meta_conf.METADATA_PROXY_HANDLER_OPTS,
-             meta_conf.UNIX_DOMAIN_METADATA_PROXY_OPTS)
+             meta_conf.UNIX_DOMAIN_METADATA_PROXY_OPTS,
+             METADATA_PORT_CACHE_OPTS)
          ),
         ('ovs', OVS_OPTS),
         (meta_conf.RATE_LIMITING_GROUP,
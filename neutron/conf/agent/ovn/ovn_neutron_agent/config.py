@@ -17,6 +17,7 @@ import itertools
 import shlex
 
 from neutron.conf.agent.metadata import config as meta_conf
+from neutron.conf.agent.ovn.metadata import config as ovn_meta_conf
 from neutron.conf.agent import ovsdb_api
 from neutron.conf.plugins.ml2.drivers.ovn import ovn_conf
 from oslo_config import cfg
@@ -37,7 +38,8 @@ def list_ovn_neutron_agent_opts():
     return [
         ('DEFAULT', itertools.chain(meta_conf.SHARED_OPTS,
                                     meta_conf.UNIX_DOMAIN_METADATA_PROXY_OPTS,
-                                    meta_conf.METADATA_PROXY_HANDLER_OPTS
+                                    meta_conf.METADATA_PROXY_HANDLER_OPTS,
+                                    ovn_meta_conf.METADATA_PORT_CACHE_OPTS
                                     )),
         ('ovn', ovn_conf.ovn_opts),
         ('ovs', itertools.chain(OVS_OPTS,
@@ -215,6 +215,20 @@ placement_opts = [
                help=_('Type of the placement endpoint to use.  This endpoint '
                       'will be looked up in the Keystone catalog and should '
                       'be one of public, internal or admin.')),
+    cfg.IntOpt('sync_workers',
+               default=4,
+               min=1,
+               help=_('Number of agents whose resources are synchronized to '
+                      'placement concurrently by the placement report '
+                      'service plugin.')),
+    cfg.FloatOpt('sync_rate_limit',
+                 default=0,
+                 min=0,
+                 help=_('Maximum number of requests per second sent to '
+                        'placement by the placement report service plugin '
+                        'when it synchronizes the resources of the agents, '
+                        'for instance after many agents were restarted. 0 '
+                        'does not limit the rate of the requests.')),
 ]
 
 
@@ -84,6 +84,21 @@ ml2_opts = [
                       "Neutron server and the mechanism driver agents; it is "
                       "recommended not to change it once any resource "
                       "provider register has been created.")),
+    cfg.IntOpt('segment_allocation_shards',
+               default=0, min=0,
+               help=_("Number of shards the free segmentation IDs of the "
+                      "VLAN, GRE, VXLAN and Geneve tenant networks are "
+                      "partitioned into, by the modulo of the segmentation "
+                      "ID. Each Neutron server worker process allocates the "
+                      "segmentation IDs of its own shard, claimed in the "
+                      "database, so that concurrent network creations in "
+                      "different workers do not try to allocate the same "
+                      "segmentation ID. A worker falls back to the whole "
+                      "pool when its shard is exhausted or when no shard is "
+                      "left to claim. The number of shards should be at "
+                      "least the total number of workers of all the Neutron "
+                      "servers. 0 or 1 disables the sharding, a random free "
+                      "segmentation ID is then allocated.")),
 ]
 
 
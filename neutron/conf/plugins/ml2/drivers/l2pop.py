@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+from neutron._i18n import _
+
+
+l2pop_opts = [
+    cfg.FloatOpt('fdb_coalescing_interval',
+                 default=0,
+                 min=0,
+                 help=_("Interval, in seconds, during which the FDB entries "
+                        "added and removed by the L2 population mechanism "
+                        "driver are collected before being sent to the "
+                        "agents. The entries collected are sent in one "
+                        "message per agent (or one fanout message) and an "
+                        "entry added then removed, or removed then added, "
+                        "during the interval is only sent once, with its "
+                        "last operation. This reduces the number of "
+                        "messages, and of flow updates on the agents, when "
+                        "many ports change at once, for instance when a "
+                        "compute node restarts. 0 sends every update "
+                        "immediately.")),
+]
+
+
+def register_l2pop_opts(cfg=cfg.CONF):
+    cfg.register_opts(l2pop_opts, "l2pop")
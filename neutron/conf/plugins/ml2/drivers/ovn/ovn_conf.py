@@ -115,6 +115,64 @@ ovn_opts = [
                       ' will sync the DB just like repair mode but it will'
                       ' additionally fix the Neutron DB resource from OVS to'
                       ' OVN.') % {'migrate': MIGRATE_MODE}),
+    cfg.StrOpt('neutron_sync_type',
+               default='full',
+               choices=('full', 'incremental'),
+               help=_('The type of synchronization executed by the OVN '
+                      'Northbound DB synchronizer when "neutron_sync_mode" '
+                      'is not "off".\n'
+                      'full - read every resource from the Neutron and the '
+                      'OVN Northbound databases and compare them.\n'
+                      'incremental - compare only the resources created, '
+                      'updated or with an inconsistent OVN revision number '
+                      'since the last successful synchronization in '
+                      '"repair" mode. If no previous synchronization is '
+                      'recorded in the OVN Northbound database, a full '
+                      'synchronization is executed instead.')),
+    cfg.IntOpt('neutron_sync_chunk_size',
+               min=1,
+               default=500,
+               help=_('Number of resources of the same type read from the '
+                      'Neutron database and compared with the OVN Northbound '
+                      'database in each chunk of an incremental '
+                      'synchronization.')),
+    cfg.IntOpt('neutron_sync_workers',
+               min=1,
+               default=4,
+               help=_('Number of chunks of the same resource type processed '
+                      'concurrently during an incremental synchronization.')),
+    cfg.IntOpt('neutron_sync_full_interval',
+               min=0,
+               default=604800,
+               help=_('Maximum time, in seconds, since the last full '
+                      'synchronization in "repair" mode after which an '
+                      'incremental synchronization is replaced by a full '
+                      'one. An incremental synchronization only removes the '
+                      'OVN objects of the resources deleted with a pending '
+                      'OVN revision number, a full synchronization also '
+                      'removes the other orphaned OVN objects, like DHCP '
+                      'options or static routes. 0 disables the periodic '
+                      'full synchronizations.')),
+    cfg.IntOpt('maintenance_batch_size',
+               min=1,
+               default=100,
+               help=_('Maximum number of inconsistent resources of the same '
+                      'type fixed together by the OVN DB maintenance task. '
+                      'The resources of a batch are read from the Neutron '
+                      'database with a single query and, when only an update '
+                      'of the existing OVN Northbound objects is needed, '
+                      'written in a single OVN Northbound transaction.')),
+    cfg.FloatOpt('hash_ring_load_factor',
+                 min=0,
+                 default=0,
+                 help=_('If greater than 1.0, the hash ring distributing the '
+                        'OVN database events among the Neutron API workers '
+                        'runs in bounded load mode: no worker handles more '
+                        'than this factor times the average share of the '
+                        'events, e.g. 1.25. With the default value of 0 the '
+                        'events are distributed by the plain consistent hash '
+                        'ring. All the Neutron servers must use the same '
+                        'value.')),
     cfg.StrOpt("ovn_l3_scheduler",
                default='leastloaded',
                choices=('leastloaded', 'chance'),
@@ -326,6 +384,30 @@ def get_ovn_neutron_sync_mode():
     return cfg.CONF.ovn.neutron_sync_mode
 
 
+def get_ovn_neutron_sync_type():
+    return cfg.CONF.ovn.neutron_sync_type
+
+
+def get_ovn_neutron_sync_chunk_size():
+    return cfg.CONF.ovn.neutron_sync_chunk_size
+
+
+def get_ovn_neutron_sync_workers():
+    return cfg.CONF.ovn.neutron_sync_workers
+
+
+def get_ovn_neutron_sync_full_interval():
+    return cfg.CONF.ovn.neutron_sync_full_interval
+
+
+def get_ovn_maintenance_batch_size():
+    return cfg.CONF.ovn.maintenance_batch_size
+
+
+def get_ovn_hash_ring_load_factor():
+    return cfg.CONF.ovn.hash_ring_load_factor
+
+
 def get_ovn_l3_scheduler():
     return cfg.CONF.ovn.ovn_l3_scheduler
 
@@ -180,6 +180,15 @@ ovs_opts = [
                        'If disabled, the flows will be processed in batches '
                        'of ``_constants.AGENT_RES_PROCESSING_STEP`` number of '
                        'OpenFlow rules.')),
+    cfg.IntOpt('openflow_bundle_max_flows',
+               default=0, min=0,
+               help=_('Maximum number of OpenFlow rules sent to the switch '
+                      'in a single ovs-ofctl call, that is in a single '
+                      'bundle when bundles are used. It bounds the batches '
+                      'of ``_constants.AGENT_RES_PROCESSING_STEP`` rules. The '
+                      'rules of a port written atomically when '
+                      '``openflow_processed_per_port`` is enabled are never '
+                      'split. 0 means no additional limit.')),
 ]
 
 agent_opts = [
@@ -232,6 +241,25 @@ agent_opts = [
                        "traffic. This will aslo change the pipleline for "
                        "ingress traffic to ports without security, the final "
                        "output action will be hit in table 94. ")),
+    cfg.StrOpt('rpc_loop_metrics_file',
+               help=_("If set, the OVS agent writes the timing metrics of "
+                      "its rpc_loop (duration histograms of the iterations "
+                      "and of their phases, number of ports processed per "
+                      "phase and latency of the RPC calls to the server) in "
+                      "JSON to this file at the end of every iteration.")),
+    cfg.StrOpt('rpc_loop_profiling_dir',
+               help=_("If set, every rpc_loop iteration is profiled with "
+                      "cProfile and the profiles of the iterations lasting "
+                      "at least ``rpc_loop_profiling_threshold`` seconds are "
+                      "saved in this directory. Profiling slows down the "
+                      "agent, only enable it to debug slow iterations.")),
+    cfg.FloatOpt('rpc_loop_profiling_threshold', default=10.0, min=0,
+                 help=_("Minimum duration, in seconds, of the rpc_loop "
+                        "iterations whose profile is saved.")),
+    cfg.IntOpt('rpc_loop_profiling_max_files', default=10, min=0,
+               help=_("Maximum number of profiles kept in "
+                      "``rpc_loop_profiling_dir``, the oldest ones are "
+                      "deleted. 0 means no limit.")),
 ]
 
 dhcp_opts = [
@@ -45,6 +45,7 @@ from neutron.api.rpc.callbacks import version_manager
 from neutron.conf.agent.database import agents_db
 from neutron.extensions import agent as ext_agent
 from neutron.extensions import availability_zone as az_ext
+from neutron.notifiers import batch_notifier
 from neutron.objects import agent as agent_obj
 
 
@@ -57,6 +58,13 @@ agents_db.register_db_agents_opts()
 # version_manager callback
 DOWNTIME_VERSIONS_RATIO = 2
 
+# Keys of the agent configurations counting the resources handled by the
+# agent: they change with the resources, not with the agent setup, and are
+# written at most every agent_down_time seconds when nothing else changed.
+VOLATILE_CONFIGURATIONS = frozenset([
+    'devices', 'routers', 'ex_gw_ports', 'interfaces', 'floating_ips',
+    'networks', 'subnets', 'ports'])
+
 RESOURCE_AGENT_TYPE_MAP = {
     'network': constants.AGENT_TYPE_DHCP,
     'router': constants.AGENT_TYPE_L3,
@@ -359,6 +367,111 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
                       'delta': delta,
                       'agent_timestamp': agent_timestamp})
 
+    def _get_heartbeat_batch_notifier(self):
+        notifier = getattr(self, '_heartbeat_batch_notifier', None)
+        if notifier is None:
+            notifier = batch_notifier.BatchNotifier(
+                cfg.CONF.agent_heartbeat_batch_interval,
+                self._write_heartbeats)
+            self._heartbeat_batch_notifier = notifier
+        return notifier
+
+    def _write_heartbeats(self, heartbeats):
+        """Write the heartbeat timestamps of agents in a single update.
+
+        The oldest timestamp of the batch is written for all the agents, so
+        that none of them is considered alive for longer than it should be.
+
+        :param heartbeats: list of (agent_id, timestamp) tuples.
+        """
+        agent_ids = {agent_id for agent_id, _timestamp in heartbeats}
+        timestamp = min(timestamp for _agent_id, timestamp in heartbeats)
+        try:
+            updated = agent_obj.Agent.update_heartbeat_timestamps(
+                context.get_admin_context(), agent_ids, timestamp)
+        except Exception:
+            LOG.exception("Failed to write the heartbeats of agents %s",
+                          agent_ids)
+            return
+        LOG.debug("Heartbeats of %(updated)d agents written out of "
+                  "%(count)d received", {'updated': updated,
+                                         'count': len(heartbeats)})
+
+    def _get_agent_state_changes(self, agent, values):
+        """Return the fields and configurations keys changed in the state.
+
+        :returns: a (stable, volatile) tuple of booleans, whether fields or
+                  configurations keys changed, respectively out of and in
+                  VOLATILE_CONFIGURATIONS (and the load computed from them).
+        """
+        stable = volatile = False
+        for field, value in values.items():
+            if field == 'configurations':
+                stored = agent.configurations or {}
+                for key in set(stored) | set(value):
+                    if stored.get(key) == value.get(key):
+                        continue
+                    if key in VOLATILE_CONFIGURATIONS:
+                        volatile = True
+                    else:
+                        stable = True
+            elif agent[field] != value:
+                if field == 'load':
+                    volatile = True
+                else:
+                    stable = True
+        return stable, volatile
+
+    def _get_agent_states_written(self):
+        written = getattr(self, '_agent_states_written', None)
+        if written is None:
+            written = self._agent_states_written = {}
+        return written
+
+    def _update_agent_heartbeat(self, context, agent_state, res,
+                                current_time, agent_timestamp):
+        """Record the heartbeat of an alive agent whose state did not change.
+
+        Only the heartbeat timestamp of the agent is written, along with the
+        heartbeats received by this server worker during the last
+        agent_heartbeat_batch_interval seconds. The changes of the resource
+        counters of the agent configurations (VOLATILE_CONFIGURATIONS) are
+        only written if this server worker did not write the state of the
+        agent during the last agent_down_time seconds.
+
+        :returns: the agent, or None if the agent is new, (re)started or
+                  revived, or if its state changed.
+        """
+        if agent_state.get('start_flag'):
+            return
+        agent = agent_obj.Agent.get_object(
+            context, agent_type=agent_state['agent_type'],
+            host=agent_state['host'])
+        if not agent or not agent.is_active:
+            return
+        values = dict(res, configurations=agent_state.get(
+            'configurations', {}))
+        if 'resource_versions' in values:
+            values['resource_versions'] = agent_state['resource_versions']
+        stable, volatile = self._get_agent_state_changes(agent, values)
+        if stable:
+            return
+        if volatile:
+            written_at = self._get_agent_states_written().get(agent.id)
+            if (written_at is None or
+                    timeutils.is_older_than(written_at,
+                                            cfg.CONF.agent_down_time)):
+                return
+
+        self._log_heartbeat(agent_state, agent, values['configurations'],
+                            agent_timestamp)
+        if cfg.CONF.agent_heartbeat_batch_interval:
+            self._get_heartbeat_batch_notifier().queue_event(
+                (agent.id, current_time))
+        else:
+            self._write_heartbeats([(agent.id, current_time)])
+        return agent
+
     @db_api.retry_if_session_inactive()
     def create_or_update_agent(self, context, agent_state,
                                agent_timestamp=None):
@@ -369,54 +482,65 @@ class AgentDbMixin(ext_agent.AgentPluginBase, AgentAvailabilityZoneMixin):
         It could be used by agent to do some sync with the server if needed.
         """
         status = agent_consts.AGENT_ALIVE
-        with db_api.CONTEXT_WRITER.using(context):
-            res_keys = ['agent_type', 'binary', 'host', 'topic']
-            res = {k: agent_state[k] for k in res_keys}
-            if 'availability_zone' in agent_state:
-                res['availability_zone'] = agent_state['availability_zone']
-            configurations_dict = agent_state.get('configurations', {})
-            res['configurations'] = jsonutils.dumps(configurations_dict)
-            resource_versions_dict = agent_state.get('resource_versions')
-            if resource_versions_dict:
-                res['resource_versions'] = jsonutils.dumps(
-                    resource_versions_dict)
-            res['load'] = self._get_agent_load(agent_state)
-            current_time = timeutils.utcnow()
-            try:
-                agent = self._get_agent_by_type_and_host(
-                    context, agent_state['agent_type'], agent_state['host'])
-                agent_state_orig = copy.deepcopy(agent_state)
-                agent_state_previous = copy.deepcopy(agent)
-                if not agent.is_active:
-                    status = agent_consts.AGENT_REVIVED
-                    if 'resource_versions' not in agent_state:
-                        # updating agent_state with resource_versions taken
-                        # from db so that
-                        # _update_local_agent_resource_versions() will call
-                        # version_manager and bring it up to date
-                        agent_state['resource_versions'] = self._get_dict(
-                            agent, 'resource_versions', ignore_missing=True)
-                res['heartbeat_timestamp'] = current_time
-                if agent_state.get('start_flag'):
+        res_keys = ['agent_type', 'binary', 'host', 'topic']
+        res = {k: agent_state[k] for k in res_keys}
+        if 'availability_zone' in agent_state:
+            res['availability_zone'] = agent_state['availability_zone']
+        configurations_dict = agent_state.get('configurations', {})
+        res['configurations'] = jsonutils.dumps(configurations_dict)
+        resource_versions_dict = agent_state.get('resource_versions')
+        if resource_versions_dict:
+            res['resource_versions'] = jsonutils.dumps(
+                resource_versions_dict)
+        res['load'] = self._get_agent_load(agent_state)
+        current_time = timeutils.utcnow()
+        agent = self._update_agent_heartbeat(context, agent_state, res,
+                                             current_time, agent_timestamp)
+        if agent:
+            agent_state_orig = copy.deepcopy(agent_state)
+            agent_state_previous = agent
+            event_type = events.AFTER_UPDATE
+        else:
+            with db_api.CONTEXT_WRITER.using(context):
+                try:
+                    agent = self._get_agent_by_type_and_host(
+                        context, agent_state['agent_type'],
+                        agent_state['host'])
+                    agent_state_orig = copy.deepcopy(agent_state)
+                    agent_state_previous = copy.deepcopy(agent)
+                    if not agent.is_active:
+                        status = agent_consts.AGENT_REVIVED
+                        if 'resource_versions' not in agent_state:
+                            # updating agent_state with resource_versions
+                            # taken from db so that
+                            # _update_local_agent_resource_versions() will
+                            # call version_manager and bring it up to date
+                            agent_state['resource_versions'] = (
+                                self._get_dict(agent, 'resource_versions',
+                                               ignore_missing=True))
+                    res['heartbeat_timestamp'] = current_time
+                    if agent_state.get('start_flag'):
+                        res['started_at'] = current_time
+                    self._log_heartbeat(agent_state, agent,
+                                        configurations_dict, agent_timestamp)
+                    agent.update_fields(res)
+                    agent.update()
+                    event_type = events.AFTER_UPDATE
+                except agent_exc.AgentNotFoundByTypeHost:
+                    agent_state_orig = None
+                    agent_state_previous = None
+                    res['created_at'] = current_time
                     res['started_at'] = current_time
-                self._log_heartbeat(agent_state, agent, configurations_dict,
-                                    agent_timestamp)
-                agent.update_fields(res)
-                agent.update()
-                event_type = events.AFTER_UPDATE
-            except agent_exc.AgentNotFoundByTypeHost:
-                agent_state_orig = None
-                agent_state_previous = None
-                res['created_at'] = current_time
-                res['started_at'] = current_time
-                res['heartbeat_timestamp'] = current_time
-                res['admin_state_up'] = cfg.CONF.enable_new_agents
-                agent = agent_obj.Agent(context=context, **res)
-                agent.create()
-                event_type = events.AFTER_CREATE
-                self._log_heartbeat(agent_state, agent, configurations_dict,
-                                    agent_timestamp)
-                status = agent_consts.AGENT_NEW
+                    res['heartbeat_timestamp'] = current_time
+                    res['admin_state_up'] = cfg.CONF.enable_new_agents
+                    agent = agent_obj.Agent(context=context, **res)
+                    agent.create()
+                    event_type = events.AFTER_CREATE
+                    self._log_heartbeat(agent_state, agent,
+                                        configurations_dict, agent_timestamp)
+                    status = agent_consts.AGENT_NEW
+
+            self._get_agent_states_written()[agent.id] = current_time
 
         agent_state['agent_status'] = status
         agent_state['admin_state_up'] = agent.admin_state_up
@@ -134,9 +134,15 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
                                               resource_id_attr,
                                               resource_name,
                                               reschedule_resource,
-                                              rescheduling_failed):
+                                              rescheduling_failed,
+                                              reschedule_resources=None):
         """Reschedule resources from down neutron agents
         if admin state is up.
+
+        If reschedule_resources is specified, it is called once with the IDs
+        of all the resources to reschedule, instead of calling
+        reschedule_resource for each of them; it must handle the rescheduling
+        errors itself.
         """
         agent_dead_limit = self.agent_dead_limit_seconds()
         self.wait_down_agents(agent_type, agent_dead_limit)
@@ -146,19 +152,27 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
             down_bindings = get_down_bindings(context, agent_dead_limit)
 
             agents_back_online = set()
+            agents_down = set()
+            resource_ids = []
             for binding in down_bindings:
                 binding_agent_id = getattr(binding, agent_id_attr)
                 binding_resource_id = getattr(binding, resource_id_attr)
                 if binding_agent_id in agents_back_online:
                     continue
-                # we need new context to make sure we use different DB
-                # transaction - otherwise we may fetch same agent record
-                # each time due to REPEATABLE_READ isolation level
-                context = ncontext.get_admin_context()
-                agent = self._get_agent(context, binding_agent_id)
-                if agent.is_active:
-                    agents_back_online.add(binding_agent_id)
-                    continue
+                if binding_agent_id not in agents_down:
+                    # we need new context to make sure we use different DB
+                    # transaction - otherwise we may fetch same agent record
+                    # each time due to REPEATABLE_READ isolation level
+                    context = ncontext.get_admin_context()
+                    agent = self._get_agent(context, binding_agent_id)
+                    if agent.is_active:
+                        agents_back_online.add(binding_agent_id)
+                        continue
+                    if reschedule_resources:
+                        # the resources are rescheduled together once all
+                        # the bindings are checked, there is no need to check
+                        # this agent again
+                        agents_down.add(binding_agent_id)
 
                 LOG.warning(
                     "Rescheduling %(resource_name)s %(resource)s from agent "
@@ -168,6 +182,10 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
                      'resource': binding_resource_id,
                      'agent': binding_agent_id,
                      'dead_time': agent_dead_limit})
+                if reschedule_resources:
+                    if binding_resource_id not in resource_ids:
+                        resource_ids.append(binding_resource_id)
+                    continue
                 try:
                     reschedule_resource(context, binding_resource_id)
                 except (rescheduling_failed, oslo_messaging.RemoteError):
@@ -177,6 +195,9 @@ class AgentSchedulerDbMixin(agents_db.AgentDbMixin):
                                   "%(resource)s",
                                   {'resource_name': resource_name,
                                    'resource': binding_resource_id})
+            if resource_ids:
+                reschedule_resources(ncontext.get_admin_context(),
+                                     resource_ids)
         except Exception:
             # we want to be thorough and catch whatever is raised
             # to avoid loop abortion
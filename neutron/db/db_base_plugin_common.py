@@ -111,6 +111,13 @@ class DbBasePluginCommon:
         return port_obj.Port.objects_exist(context, network_id=network_id,
                                            mac_address=mac_address)
 
+    @db_api.CONTEXT_READER
+    def _get_macs_in_use(self, context, network_id, mac_addresses):
+        """Return the given MAC addresses already used in the network."""
+        return {str(mac) for mac in port_obj.Port.get_values(
+            context, 'mac_address', network_id=network_id,
+            mac_address=list(mac_addresses))}
+
     @staticmethod
     def _delete_ip_allocation(context, network_id, subnet_id, ip_address):
 
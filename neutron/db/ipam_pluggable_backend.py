@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 
 import netaddr
@@ -32,6 +33,7 @@ from neutron.common import ipv6_utils
 from neutron.db import ipam_backend_mixin
 from neutron.ipam import driver
 from neutron.ipam import exceptions as ipam_exc
+from neutron.ipam import requests as ipam_req
 from neutron.objects import ports as port_obj
 from neutron.objects import subnet as obj_subnet
 
@@ -225,6 +227,114 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
     def allocate_ips_for_port(self, context, port):
         return self._allocate_ips_for_port(context, port)
 
+    @db_api.retry_if_session_inactive()
+    @db_api.CONTEXT_WRITER
+    def allocate_ips_for_ports(self, context, ports):
+        """Allocate IP addresses for several ports in one transaction.
+
+        The eligible subnets of the ports without fixed IPs are retrieved
+        once per network, host and device owner, and the ports requesting
+        any address from the same subnets get their addresses with a
+        single bulk allocation per subnet when the IPAM driver supports it.
+
+        :returns: a list with the IP addresses allocated for each port, in
+                  the same order as the ports; None if the IP allocation of
+                  the port is deferred.
+        """
+        subnets_cache = {}
+        ipam_driver = driver.Pool.get_instance(None, context)
+        factory = ipam_driver.get_address_request_factory()
+        ports_ips = []
+        for port in ports:
+            try:
+                ips = self._get_ips_for_port(context, port,
+                                             subnets_cache=subnets_cache)
+            except ipam_exc.DeferIpam:
+                ips = None
+            else:
+                # Same processing order as _ipam_allocate_ips
+                ips.sort(key=lambda x: 'ip_address' not in x)
+            ports_ips.append(ips)
+
+        # (port index, IP index) of the requests of any address, per group
+        # of subnets
+        bulk_requests = collections.defaultdict(list)
+        for index, (port, ips) in enumerate(zip(ports, ports_ips)):
+            for ip_index, ip in enumerate(ips or []):
+                if not isinstance(ip, list):
+                    continue
+                request = factory.get_request(context, port['port'], ip[0])
+                if type(request) is ipam_req.AnyAddressRequest:
+                    subnet_ids = tuple(ip_dict['subnet_id']
+                                       for ip_dict in ip)
+                    bulk_requests[subnet_ids].append((index, ip_index))
+
+        # Addresses of the bulk allocations, per port and IP index
+        allocated = [{} for _port in ports]
+        allocations = []
+        try:
+            for subnet_ids, requests in bulk_requests.items():
+                if len(requests) < 2:
+                    continue
+                bulk_ips = self._ipam_bulk_allocate_ips(
+                    ipam_driver, subnet_ids, len(requests))
+                for (index, ip_index), ip in zip(requests, bulk_ips):
+                    allocated[index][ip_index] = ip
+
+            for port, ips, port_allocated in zip(ports, ports_ips,
+                                                 allocated):
+                if ips is None:
+                    allocations.append(None)
+                    continue
+                ips_left = [ip for ip_index, ip in enumerate(ips)
+                            if ip_index not in port_allocated]
+                ips_left = iter(self._ipam_allocate_ips(
+                    context, ipam_driver, port['port'], ips_left))
+                allocations.append(
+                    [port_allocated[ip_index] if ip_index in port_allocated
+                     else next(ips_left) for ip_index in range(len(ips))])
+                # The allocations of the port are now in "allocations"
+                port_allocated.clear()
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                if ipam_driver.needs_rollback():
+                    LOG.debug("An exception occurred during the IP "
+                              "allocation of a bulk of ports. Reverting "
+                              "the allocations already done")
+                    for index, port in enumerate(ports):
+                        ips = list(allocated[index].values())
+                        if index < len(allocations):
+                            ips.extend(allocations[index] or [])
+                        if ips:
+                            self._safe_rollback(
+                                self._ipam_deallocate_ips, context,
+                                ipam_driver, port['port'], ips,
+                                revert_on_fail=False)
+        return allocations
+
+    @staticmethod
+    def _ipam_bulk_allocate_ips(ipam_driver, subnet_ids, count):
+        """Allocate "count" addresses from one of the subnets.
+
+        :returns: a list of "count" IP address dictionaries, or an empty
+                  list if the IPAM driver does not support the bulk
+                  allocation or none of the subnets has enough free
+                  addresses; the addresses are then allocated per port.
+        """
+        for subnet_id in subnet_ids:
+            ipam_subnet = ipam_driver.get_subnet(subnet_id)
+            bulk_allocate = getattr(ipam_subnet, 'bulk_allocate', None)
+            if bulk_allocate is None:
+                return []
+            try:
+                ip_addresses = bulk_allocate(
+                    ipam_req.BulkAddressRequest(count))
+            except ipam_exc.IpAddressGenerationFailure:
+                continue
+            return [{'ip_address': ip_address, 'subnet_id': subnet_id}
+                    for ip_address in ip_addresses]
+        return []
+
     def store_ip_allocation_for_port(self, context, ips, network_id, port):
         try:
             for ip in ips:
@@ -252,17 +362,40 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
         addresses for the port. If port['fixed_ips'] contains an IP address or
         a subnet_id then allocate an IP address accordingly.
         """
+        ips = self._get_ips_for_port(context, port)
+        ipam_driver = driver.Pool.get_instance(None, context)
+        return self._ipam_allocate_ips(context, ipam_driver, port['port'],
+                                       ips)
+
+    def _get_ips_for_port(self, context, port, subnets_cache=None):
+        """Return the IP address requests of a port.
+
+        :param subnets_cache: optional dictionary, shared by the ports
+                              allocated in the same transaction, storing
+                              the eligible subnets of the ports without
+                              fixed IPs.
+        """
         p = port['port']
         fixed_configured = p['fixed_ips'] is not constants.ATTR_NOT_SPECIFIED
         fixed_ips = p['fixed_ips'] if fixed_configured else []
-        subnets = self._ipam_get_subnets(
-            context,
-            network_id=p['network_id'],
-            host=p.get(portbindings.HOST_ID),
-            service_type=p.get('device_owner'),
-            fixed_configured=fixed_configured,
-            fixed_ips=fixed_ips,
-            distributed_service=self._is_distributed_service(p))
+        host = p.get(portbindings.HOST_ID)
+        distributed_service = self._is_distributed_service(p)
+        subnets_key = (p['network_id'], host, p.get('device_owner'),
+                       distributed_service)
+        if (subnets_cache is not None and not fixed_configured and
+                subnets_key in subnets_cache):
+            subnets = subnets_cache[subnets_key]
+        else:
+            subnets = self._ipam_get_subnets(
+                context,
+                network_id=p['network_id'],
+                host=host,
+                service_type=p.get('device_owner'),
+                fixed_configured=fixed_configured,
+                fixed_ips=fixed_ips,
+                distributed_service=distributed_service)
+            if subnets_cache is not None and not fixed_configured:
+                subnets_cache[subnets_key] = subnets
 
         v4, v6_stateful, v6_stateless = self._classify_subnets(
             context, subnets)
@@ -283,9 +416,7 @@ class IpamPluggableBackend(ipam_backend_mixin.IpamBackendMixin):
                                 for s in subnets])
 
         ips.extend(self._get_auto_address_ips(v6_stateless, p))
-
-        ipam_driver = driver.Pool.get_instance(None, context)
-        return self._ipam_allocate_ips(context, ipam_driver, p, ips)
+        return ips
 
     def _get_auto_address_ips(self, v6_stateless_subnets, port,
                               exclude_subnet_ids=None):
@@ -13,10 +13,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from neutron_lib.api import extensions
 from neutron_lib import constants
 from neutron_lib.db import api as db_api
 from neutron_lib.exceptions import agent as agent_exc
+from neutron_lib.objects import exceptions as obj_exc
 from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
 from oslo_config import cfg
@@ -35,6 +38,7 @@ from neutron.objects import base as base_obj
 from neutron.objects import l3agent as rb_obj
 from neutron.objects import router as l3_objs
 from neutron.scheduler import base_scheduler
+from neutron.scheduler import l3_agent_scheduler
 
 
 LOG = logging.getLogger(__name__)
@@ -69,7 +73,8 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
             resource_id_attr='router_id',
             resource_name='router',
             reschedule_resource=self.reschedule_router,
-            rescheduling_failed=l3agentscheduler.RouterReschedulingFailed)
+            rescheduling_failed=l3agentscheduler.RouterReschedulingFailed,
+            reschedule_resources=self.reschedule_routers)
 
     def get_down_router_bindings(self, context, agent_dead_limit):
         cutoff = self.get_cutoff_time(agent_dead_limit)
@@ -254,6 +259,74 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
         self._notify_agents_router_rescheduled(context, router_id,
                                                cur_agents, new_agents)
 
+    def _get_l3_agents_by_router_ids(self, context, router_ids):
+        bindings = rb_obj.RouterL3AgentBinding.get_objects(
+            context, router_id=router_ids)
+        agents = {agent.id: agent for agent in ag_obj.Agent.get_objects(
+            context, id={binding.l3_agent_id for binding in bindings})}
+        agents_by_router_id = collections.defaultdict(list)
+        for binding in bindings:
+            agents_by_router_id[binding.router_id].append(
+                agents[binding.l3_agent_id])
+        return agents_by_router_id
+
+    def reschedule_routers(self, context, router_ids):
+        """Reschedule routers to new l3 agents, in bulk
+
+        Remove the routers from the agents currently hosting them and
+        schedule them again with the scheduler schedule_routers method, up to
+        BIND_ROUTERS_BATCH_SIZE routers at a time, in a single transaction.
+        If a router of a batch cannot be rescheduled, or was concurrently
+        bound or removed, the routers of this batch are rescheduled one at a
+        time with reschedule_router. Errors are logged, not raised.
+        """
+        if not self.router_scheduler:
+            for router_id in router_ids:
+                self._reschedule_router_and_log(context, router_id)
+            return
+        batch_size = l3_agent_scheduler.BIND_ROUTERS_BATCH_SIZE
+        for index in range(0, len(router_ids), batch_size):
+            batch = router_ids[index:index + batch_size]
+            cur_agents = self._get_l3_agents_by_router_ids(context, batch)
+            try:
+                with db_api.CONTEXT_WRITER.using(context):
+                    rb_obj.RouterL3AgentBinding.delete_objects(
+                        context, router_id=batch)
+                    self.router_scheduler.schedule_routers(
+                        self, context, batch)
+                    new_agents = self._get_l3_agents_by_router_ids(
+                        context, batch)
+                    for router_id in batch:
+                        if not new_agents[router_id]:
+                            raise l3agentscheduler.RouterReschedulingFailed(
+                                router_id=router_id)
+            except (l3agentscheduler.RouterReschedulingFailed,
+                    obj_exc.NeutronDbObjectDuplicateEntry,
+                    db_exc.DBDuplicateEntry, db_exc.DBReferenceError) as e:
+                LOG.debug('Failed to reschedule %(count)d routers at once '
+                          '(%(error)s), rescheduling them one at a time',
+                          {'count': len(batch), 'error': e})
+                for router_id in batch:
+                    self._reschedule_router_and_log(context, router_id)
+                continue
+
+            for router_id in batch:
+                try:
+                    self._notify_agents_router_rescheduled(
+                        context, router_id, cur_agents[router_id],
+                        new_agents[router_id])
+                except (l3agentscheduler.RouterReschedulingFailed,
+                        oslo_messaging.RemoteError):
+                    LOG.exception("Failed to reschedule router %s",
+                                  router_id)
+
+    def _reschedule_router_and_log(self, context, router_id):
+        try:
+            self.reschedule_router(context, router_id)
+        except (l3agentscheduler.RouterReschedulingFailed,
+                oslo_messaging.RemoteError):
+            LOG.exception("Failed to reschedule router %s", router_id)
+
     def _notify_agents_router_rescheduled(self, context, router_id,
                                           old_agents, new_agents):
         l3_notifier = self.agent_notifiers.get(constants.AGENT_TYPE_L3)
@@ -486,8 +559,8 @@ class L3AgentSchedulerDbMixin(l3agentscheduler.L3AgentSchedulerPluginBase,
 
     def schedule_routers(self, context, routers):
         """Schedule the routers to l3 agents."""
-        for router in routers:
-            self.schedule_router(context, router, candidates=None)
+        if self.router_scheduler:
+            self.router_scheduler.schedule_routers(self, context, routers)
 
     def get_l3_agent_with_min_routers(self, context, agent_ids):
         if not agent_ids:
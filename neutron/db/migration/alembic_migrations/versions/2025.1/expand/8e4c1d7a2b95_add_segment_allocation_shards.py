@@ -0,0 +1,42 @@
+# Copyright 2025 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+from alembic import op
+import sqlalchemy as sa
+
+from neutron.db import migration
+
+
+# Add the ml2_segment_allocation_shards table
+#
+# Revision ID: 8e4c1d7a2b95
+# Revises: 5bcb7b31ec7d
+# Create Date: 2025-01-20 10:12:43.518306
+
+# revision identifiers, used by Alembic.
+revision = '8e4c1d7a2b95'
+down_revision = '5bcb7b31ec7d'
+
+# milestone identifier, used by neutron-db-manage
+neutron_milestone = [migration.RELEASE_2025_1]
+
+
+def upgrade():
+    op.create_table(
+        'ml2_segment_allocation_shards',
+        sa.Column('shard', sa.Integer, nullable=False, primary_key=True,
+                  autoincrement=False),
+        sa.Column('owner', sa.String(length=255), nullable=False),
+        sa.Column('claimed_at', sa.DateTime, nullable=False))
@@ -0,0 +1,27 @@
+# Copyright 2025 OpenStack Foundation
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from neutron_lib.db import model_base
+import sqlalchemy as sa
+
+
+class SegmentAllocationShard(model_base.BASEV2):
+    """Shard of the free segmentation IDs claimed by a server worker."""
+
+    __tablename__ = 'ml2_segment_allocation_shards'
+
+    shard = sa.Column(sa.Integer, nullable=False, primary_key=True,
+                      autoincrement=False)
+    owner = sa.Column(sa.String(255), nullable=False)
+    claimed_at = sa.Column(sa.DateTime, nullable=False)
@@ -246,3 +246,38 @@ def get_deleted_resources(context):
     with db_api.CONTEXT_READER.using(context):
         return context.session.query(ovn_models.OVNRevisionNumbers).filter_by(
             standard_attr_id=None).order_by(sort_order).all()
+
+
+def get_resources_changed_since(context, resource_type, since, limit=None,
+                                marker=None):
+    """Get the resources of a given type modified after a checkpoint.
+
+    A resource is considered modified if its Neutron revision number differs
+    from the one stored in the ovn_revision_numbers table or if it has been
+    created or updated after ``since``. The rows are returned sorted by
+    ``resource_uuid`` so the caller can page through them using the last
+    returned UUID as ``marker``.
+
+    :param resource_type: the OVN revision resource type (``TYPE_*``).
+    :param since: a datetime; resources not modified after it are skipped
+                  unless their revision numbers are inconsistent.
+    :param limit: the maximum number of rows to return.
+    :param marker: return only the rows with a greater ``resource_uuid``.
+    :returns: a list of ``OVNRevisionNumbers`` rows.
+    """
+    std_attr = standard_attr.StandardAttribute
+    rev_num = ovn_models.OVNRevisionNumbers
+    with db_api.CONTEXT_READER.using(context):
+        query = context.session.query(rev_num).join(
+            std_attr, rev_num.standard_attr_id == std_attr.id)
+        query = query.filter(rev_num.resource_type == resource_type)
+        query = query.filter(sa.or_(
+            rev_num.revision_number != std_attr.revision_number,
+            sa.func.coalesce(std_attr.updated_at,
+                             std_attr.created_at) >= since))
+        if marker:
+            query = query.filter(rev_num.resource_uuid > marker)
+        query = query.order_by(rev_num.resource_uuid)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
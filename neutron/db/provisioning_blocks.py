@@ -145,6 +145,59 @@ def provisioning_complete(context, object_id, object_type, entity):
                          context, resource_id=object_id))
 
 
+@db_api.retry_if_session_inactive()
+def provisioning_complete_bulk(context, object_ids, object_type, entity):
+    """Mark that the provisioning for object_ids has been completed by entity.
+
+    Bulk version of provisioning_complete: the provisioning components of
+    all the objects are removed and checked in a single transaction, then
+    the callback is triggered for each object without remaining components.
+
+    :param context: neutron api request context
+    :param object_ids: IDs of the objects that have been provisioned
+    :param object_type: callback resource type of the objects
+    :param entity: The entity that has provisioned the objects
+    :returns: the set of the IDs of the objects whose provisioning complete
+              callback failed
+    """
+    # this can't be called in a transaction to avoid REPEATABLE READ
+    # tricking us into thinking there are remaining provisioning components
+    if db_api.is_session_active(context.session):
+        raise RuntimeError(_("Must not be called in a transaction"))
+    if not object_ids:
+        return set()
+    with db_api.CONTEXT_WRITER.using(context):
+        standard_attr_ids = _get_standard_attr_ids(context, object_ids,
+                                                   object_type)
+        if not standard_attr_ids:
+            return set()
+        pb_obj.ProvisioningBlock.delete_objects(
+            context, standard_attr_id=list(standard_attr_ids.values()),
+            entity=entity)
+        blocked = {block.standard_attr_id for block in
+                   pb_obj.ProvisioningBlock.get_objects(
+                       context,
+                       standard_attr_id=list(standard_attr_ids.values()))}
+
+    failed = set()
+    for object_id, standard_attr_id in standard_attr_ids.items():
+        if standard_attr_id in blocked:
+            continue
+        LOG.debug("Provisioning complete for %(otype)s %(oid)s triggered by "
+                  "entity %(entity)s.",
+                  {'oid': object_id, 'entity': entity, 'otype': object_type})
+        try:
+            registry.publish(object_type, PROVISIONING_COMPLETE, entity,
+                             payload=events.DBEventPayload(
+                                 context, resource_id=object_id))
+        except Exception:
+            LOG.exception("Provisioning complete callback failed for "
+                          "%(otype)s %(oid)s.",
+                          {'oid': object_id, 'otype': object_type})
+            failed.add(object_id)
+    return failed
+
+
 @db_api.retry_if_session_inactive()
 @db_api.CONTEXT_READER
 def is_object_blocked(context, object_id, object_type):
@@ -163,13 +216,18 @@ def is_object_blocked(context, object_id, object_type):
         context, standard_attr_id=standard_attr_id)
 
 
-def _get_standard_attr_id(context, object_id, object_type):
+def _get_model(object_type):
     model = _RESOURCE_TO_MODEL_MAP.get(object_type)
     if not model:
         raise RuntimeError(_("Could not find model for %s. If you are "
                              "adding provisioning blocks for a new resource "
                              "you must call add_model_for_resource during "
                              "initialization for your type.") % object_type)
+    return model
+
+
+def _get_standard_attr_id(context, object_id, object_type):
+    model = _get_model(object_type)
     obj = (context.session.query(model.standard_attr_id).
            enable_eagerloads(False).
            filter_by(id=object_id).first())
@@ -178,3 +236,15 @@ def _get_standard_attr_id(context, object_id, object_type):
         LOG.debug("Could not find standard attr ID for object %s.", object_id)
         return
     return obj.standard_attr_id
+
+
+def _get_standard_attr_ids(context, object_ids, object_type):
+    """Return a dict of the object IDs to their standard attr ID.
+
+    The objects not found, concurrently deleted, are omitted.
+    """
+    model = _get_model(object_type)
+    query = (context.session.query(model.id, model.standard_attr_id).
+             enable_eagerloads(False).
+             filter(model.id.in_(list(object_ids))))
+    return {obj.id: obj.standard_attr_id for obj in query}
@@ -1205,6 +1205,58 @@ class SecurityGroupDbMixin(
 
         return sg_objs
 
+    def _get_security_groups_on_ports(self, context, ports):
+        """Bulk version of "_get_security_groups_on_port".
+
+        The security groups of all the ports are retrieved with one query.
+
+        :returns: a list with the security groups of each port, in the same
+                  order as the ports.
+        """
+        def _get_port_sg_ids(port):
+            port = port['port']
+            if not validators.is_attr_set(port.get(ext_sg.SECURITYGROUPS)):
+                return
+            if port.get('device_owner') and net.is_port_trusted(port):
+                return
+            return port.get(ext_sg.SECURITYGROUPS, [])
+
+        ports_sg_ids = [_get_port_sg_ids(port) for port in ports]
+        requested_ids = {sg_id for sg_ids in ports_sg_ids if sg_ids
+                         for sg_id in sg_ids}
+        sg_objs = {}
+        if requested_ids:
+            sg_objs = {sg.id: sg for sg in sg_obj.SecurityGroup.get_objects(
+                context, id=list(requested_ids))}
+        shared = {}
+
+        def _is_valid(sg, tenant_id):
+            if (context.is_admin or not tenant_id or
+                    sg.tenant_id == tenant_id):
+                return True
+            if (sg.id, tenant_id) not in shared:
+                shared[(sg.id, tenant_id)] = (
+                    sg_obj.SecurityGroup.is_shared_with_project(
+                        context, sg.id, tenant_id))
+            return shared[(sg.id, tenant_id)]
+
+        result = []
+        for port, sg_ids in zip(ports, ports_sg_ids):
+            if sg_ids is None:
+                result.append(None)
+                continue
+            tenant_id = port['port'].get('tenant_id')
+            port_sgs = [sg_objs[sg_id] for sg_id in dict.fromkeys(sg_ids)
+                        if sg_id in sg_objs]
+            valid_groups = {sg.id for sg in port_sgs
+                            if _is_valid(sg, tenant_id)}
+            port_sg_missing = set(sg_ids) - valid_groups
+            if port_sg_missing:
+                raise ext_sg.SecurityGroupNotFound(
+                    id=', '.join(port_sg_missing))
+            result.append(port_sgs)
+        return result
+
     def _ensure_default_security_group_on_port(self, context, port):
         # we don't apply security groups for dhcp, router
         port = port['port']
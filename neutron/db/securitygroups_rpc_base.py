@@ -13,13 +13,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 import netaddr
 from neutron_lib.callbacks import events
 from neutron_lib.callbacks import registry
 from neutron_lib.callbacks import resources
 from neutron_lib import constants as const
 from neutron_lib.db import api as db_api
+from neutron_lib.db import standard_attr
+from neutron_lib.plugins import directory
 from neutron_lib.utils import helpers
+from oslo_log import log as logging
 
 from neutron._i18n import _
 from neutron.db.models import address_group as ag_models
@@ -30,12 +35,90 @@ from neutron.db import securitygroups_db as sg_db
 from neutron.extensions import securitygroup as ext_sg
 from neutron.objects import securitygroup as sg_obj
 
+LOG = logging.getLogger(__name__)
 
 DIRECTION_IP_PREFIX = {'ingress': 'source_ip_prefix',
                        'egress': 'dest_ip_prefix'}
 
 DHCP_RULE_PORT = {4: (67, 68, const.IPv4), 6: (547, 546, const.IPv6)}
 
+# Security group rule columns sent to the agents
+SG_RULE_COLUMNS = ('security_group_id', 'direction', 'ethertype', 'protocol',
+                   'port_range_min', 'port_range_max', 'remote_ip_prefix',
+                   'remote_group_id', 'remote_address_group_id')
+
+# Maximum number of security groups (or address groups) whose rules, member
+# IPs and addresses are kept in the cache, per kind of entry.
+SG_INFO_CACHE_SIZE = 4096
+
+
+class _LRUCache(collections.OrderedDict):
+    """Size bounded dict, the least recently used entry is evicted first."""
+
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.size:
+            self.popitem(last=False)
+
+
+class SecurityGroupInfoCache:
+    """Cache of the security group rules and remote group IPs.
+
+    The entries are validated against the database before being used, so
+    that the cache can be shared by all the RPC workers of a server:
+
+    * the rules of a security group and the addresses of an address group
+      are stored with the revision number of the group, bumped on any change
+      of its rules or addresses;
+    * the member IPs of a remote security group are stored with the port ID
+      and revision number of each member port, bumped on any change of the
+      port IPs, allowed address pairs or security groups.
+
+    The entries of the resources deleted through this worker are removed by
+    callbacks, the other ones when the resource is not found in the database
+    anymore. At most ``size`` entries of each kind are kept, the least
+    recently used ones are evicted first.
+    """
+
+    def __init__(self, size=SG_INFO_CACHE_SIZE):
+        # {sg_id: (revision_number, [rule])}
+        self.rules = _LRUCache(size)
+        # {sg_id: (frozenset([(port_id, revision_number)]), {(ip, mac)})}
+        self.member_ips = _LRUCache(size)
+        # {ag_id: (revision_number, {(ip, mac)})}
+        self.address_group_ips = _LRUCache(size)
+        self.stats = collections.Counter()
+
+    def clear(self):
+        self.rules.clear()
+        self.member_ips.clear()
+        self.address_group_ips.clear()
+
+    def record(self, kind, hits, misses):
+        self.stats[kind + '_hits'] += hits
+        self.stats[kind + '_db_fallbacks'] += misses
+        LOG.debug("Security group info cache: %(hits)d %(kind)s taken from "
+                  "cache, %(misses)d read from the database",
+                  {'hits': hits, 'kind': kind, 'misses': misses})
+
+    def get_stats(self):
+        """Return the number of cache hits and DB fallbacks per kind."""
+        return dict(self.stats)
+
+
+SG_INFO_CACHE = SecurityGroupInfoCache()
+
 
 class SecurityGroupServerNotifierRpcMixin(sg_db.SecurityGroupDbMixin):
     """Mixin class to add agent-based security group implementation."""
@@ -444,7 +527,42 @@ class SecurityGroupInfoAPIMixin:
 
 class SecurityGroupServerRpcMixin(SecurityGroupInfoAPIMixin,
                                   SecurityGroupServerNotifierRpcMixin):
-    """Server-side RPC mixin using DB for SG notifications and responses."""
+    """Server-side RPC mixin using DB for SG notifications and responses.
+
+    The rules of the security groups and the IPs of the remote groups are
+    kept in SG_INFO_CACHE, and only read from the DB when they changed.
+    """
+
+    def register_sg_notifier(self):
+        super().register_sg_notifier()
+        registry.subscribe(self._remove_sg_info_cache_entries,
+                           resources.SECURITY_GROUP, events.AFTER_DELETE)
+        registry.subscribe(self._remove_sg_info_cache_entries,
+                           resources.ADDRESS_GROUP, events.AFTER_DELETE)
+
+    def _remove_sg_info_cache_entries(self, resource, event, trigger,
+                                      payload):
+        if resource == resources.ADDRESS_GROUP:
+            SG_INFO_CACHE.address_group_ips.pop(payload.resource_id, None)
+            return
+        SG_INFO_CACHE.rules.pop(payload.resource_id, None)
+        SG_INFO_CACHE.member_ips.pop(payload.resource_id, None)
+
+    @staticmethod
+    def _is_sg_info_cache_enabled():
+        # The revision numbers of the groups are bumped on the changes of
+        # their rules, addresses and member ports by the revision plugin.
+        return directory.get_plugin('revision_plugin') is not None
+
+    @staticmethod
+    def _select_revision_numbers(context, model, ids):
+        query = context.session.query(
+            model.id, standard_attr.StandardAttribute.revision_number)
+        query = query.join(
+            standard_attr.StandardAttribute,
+            model.standard_attr_id == standard_attr.StandardAttribute.id)
+        query = query.filter(model.id.in_(list(ids)))
+        return dict(query.all())
 
     @db_api.retry_if_session_inactive()
     @db_api.CONTEXT_READER
@@ -465,14 +583,53 @@ class SecurityGroupServerRpcMixin(SecurityGroupInfoAPIMixin,
         sg_binding_port = sg_models.SecurityGroupPortBinding.port_id
         sg_binding_sgid = sg_models.SecurityGroupPortBinding.security_group_id
 
-        sgr_sgid = sg_models.SecurityGroupRule.security_group_id
-
-        query = context.session.query(sg_binding_port,
-                                      sg_models.SecurityGroupRule)
-        query = query.join(sg_models.SecurityGroupRule,
-                           sgr_sgid == sg_binding_sgid)
+        query = context.session.query(sg_binding_port, sg_binding_sgid)
         query = query.filter(sg_binding_port.in_(ports.keys()))
-        return query.all()
+        bindings = query.all()
+        rules_by_sg = self._select_rules_for_security_groups(
+            context, {sg_id for _port_id, sg_id in bindings})
+        rules = [(port_id, rule) for port_id, sg_id in bindings
+                 for rule in rules_by_sg[sg_id]]
+        # Return the rules in their creation order
+        rules.sort(key=lambda port_rule: port_rule[1]['standard_attr_id'])
+        return rules
+
+    def _select_rules_for_security_groups(self, context, sg_ids):
+        """Return the rules of the security groups, as dicts, by group ID."""
+        rules_by_sg = {}
+        revisions = {}
+        if self._is_sg_info_cache_enabled():
+            # Read the revision numbers before the rules, so that the rules
+            # cached are not older than their revision number.
+            revisions = self._select_revision_numbers(
+                context, sg_models.SecurityGroup, sg_ids)
+        for sg_id in sg_ids:
+            cached = SG_INFO_CACHE.rules.get(sg_id)
+            if cached and cached[0] == revisions.get(sg_id):
+                rules_by_sg[sg_id] = cached[1]
+        stale_sg_ids = [sg_id for sg_id in sg_ids
+                        if sg_id not in rules_by_sg]
+        SG_INFO_CACHE.record('rules', len(rules_by_sg), len(stale_sg_ids))
+        if not stale_sg_ids:
+            return rules_by_sg
+
+        for sg_id in stale_sg_ids:
+            rules_by_sg[sg_id] = []
+        sgr_model = sg_models.SecurityGroupRule
+        query = context.session.query(
+            sgr_model.standard_attr_id,
+            *[getattr(sgr_model, column) for column in SG_RULE_COLUMNS])
+        query = query.filter(sgr_model.security_group_id.in_(stale_sg_ids))
+        for rule in query:
+            rules_by_sg[rule.security_group_id].append(rule._asdict())
+        for sg_id in stale_sg_ids:
+            if sg_id in revisions:
+                SG_INFO_CACHE.rules[sg_id] = (revisions[sg_id],
+                                              rules_by_sg[sg_id])
+            else:
+                # The security group was deleted (or the cache is disabled)
+                SG_INFO_CACHE.rules.pop(sg_id, None)
+        return rules_by_sg
 
     @db_api.retry_if_session_inactive()
     @db_api.CONTEXT_READER
@@ -480,6 +637,57 @@ class SecurityGroupServerRpcMixin(SecurityGroupInfoAPIMixin,
         ips_by_group = {}
         if not remote_group_ids:
             return ips_by_group
+        if not self._is_sg_info_cache_enabled():
+            return self._select_ips_for_remote_group_from_db(
+                context, remote_group_ids)
+
+        # Read the member ports revision numbers before their IPs, so that
+        # the IPs cached are not older than the revision numbers.
+        sg_binding_port = sg_models.SecurityGroupPortBinding.port_id
+        sg_binding_sgid = sg_models.SecurityGroupPortBinding.security_group_id
+        query = context.session.query(
+            sg_binding_sgid, sg_binding_port,
+            standard_attr.StandardAttribute.revision_number)
+        query = query.join(models_v2.Port,
+                           models_v2.Port.id == sg_binding_port)
+        query = query.join(
+            standard_attr.StandardAttribute,
+            models_v2.Port.standard_attr_id ==
+            standard_attr.StandardAttribute.id)
+        query = query.filter(sg_binding_sgid.in_(remote_group_ids))
+        members = collections.defaultdict(set)
+        for security_group_id, port_id, revision_number in query:
+            members[security_group_id].add((port_id, revision_number))
+
+        stale_group_ids = []
+        for remote_group_id in remote_group_ids:
+            cached = SG_INFO_CACHE.member_ips.get(remote_group_id)
+            if cached and cached[0] == members[remote_group_id]:
+                ips_by_group[remote_group_id] = set(cached[1])
+            else:
+                stale_group_ids.append(remote_group_id)
+        SG_INFO_CACHE.record('member_ips', len(ips_by_group),
+                             len(stale_group_ids))
+        if not stale_group_ids:
+            return ips_by_group
+
+        ips = self._select_ips_for_remote_group_from_db(context,
+                                                        stale_group_ids)
+        for remote_group_id in stale_group_ids:
+            if members[remote_group_id]:
+                SG_INFO_CACHE.member_ips[remote_group_id] = (
+                    frozenset(members[remote_group_id]),
+                    ips[remote_group_id])
+            else:
+                # Nothing to cache for a group without members, which may
+                # have been deleted
+                SG_INFO_CACHE.member_ips.pop(remote_group_id, None)
+            ips_by_group[remote_group_id] = set(ips[remote_group_id])
+        return ips_by_group
+
+    def _select_ips_for_remote_group_from_db(self, context,
+                                             remote_group_ids):
+        ips_by_group = {}
         for remote_group_id in remote_group_ids:
             ips_by_group[remote_group_id] = set()
 
@@ -522,17 +730,37 @@ class SecurityGroupServerRpcMixin(SecurityGroupInfoAPIMixin,
         ips_by_group = {}
         if not remote_address_group_ids:
             return ips_by_group
+        revisions = {}
+        if self._is_sg_info_cache_enabled():
+            revisions = self._select_revision_numbers(
+                context, ag_models.AddressGroup, remote_address_group_ids)
         for remote_ag_id in remote_address_group_ids:
-            ips_by_group[remote_ag_id] = set()
+            cached = SG_INFO_CACHE.address_group_ips.get(remote_ag_id)
+            if cached and cached[0] == revisions.get(remote_ag_id):
+                ips_by_group[remote_ag_id] = set(cached[1])
+        stale_ag_ids = [ag_id for ag_id in remote_address_group_ids
+                        if ag_id not in ips_by_group]
+        SG_INFO_CACHE.record('address_group_ips', len(ips_by_group),
+                             len(stale_ag_ids))
+        if not stale_ag_ids:
+            return ips_by_group
 
+        ag_ips = {ag_id: set() for ag_id in stale_ag_ids}
         ag_assoc_ag_id = ag_models.AddressAssociation.address_group_id
         ag_assoc_addr = ag_models.AddressAssociation.address
         query = context.session.query(ag_assoc_ag_id, ag_assoc_addr)
-        query = query.filter(ag_assoc_ag_id.in_(remote_address_group_ids))
+        query = query.filter(ag_assoc_ag_id.in_(stale_ag_ids))
         for ag_id, addr in query:
             # In order to align the data structure expected on firewall,
             # we set the mac address as None
-            ips_by_group[ag_id].add((addr, None))
+            ag_ips[ag_id].add((addr, None))
+        for ag_id, ips in ag_ips.items():
+            if ag_id in revisions:
+                SG_INFO_CACHE.address_group_ips[ag_id] = (revisions[ag_id],
+                                                          ips)
+            else:
+                SG_INFO_CACHE.address_group_ips.pop(ag_id, None)
+            ips_by_group[ag_id] = set(ips)
         return ips_by_group
 
     @db_api.retry_if_session_inactive()
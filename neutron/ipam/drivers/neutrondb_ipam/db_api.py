@@ -14,8 +14,11 @@
 #    under the License.
 
 from neutron_lib import constants as const
+from neutron_lib.db import api as db_api
 from oslo_utils import uuidutils
+import sqlalchemy as sa
 
+from neutron.ipam.drivers.neutrondb_ipam import db_models
 from neutron.objects import ipam as ipam_objs
 
 # Database operations for Neutron's DB-backed IPAM driver
@@ -38,6 +41,10 @@ class IpamSubnetManager:
     def neutron_id(self):
         return self._neutron_subnet_id
 
+    @property
+    def ipam_subnet_id(self):
+        return self._ipam_subnet_id
+
     def create(self, context):
         """Create database models for an IPAM subnet.
 
@@ -114,6 +121,47 @@ class IpamSubnetManager:
         return ipam_objs.IpamAllocation.get_objects(
             context, ipam_subnet_id=self._ipam_subnet_id, status=status)
 
+    def list_allocated_ips(self, context):
+        """Return the IP addresses allocated in the subnet.
+
+        Cheaper than list_allocations, only the addresses are retrieved.
+
+        :param context: neutron api request context
+        :returns: a list of netaddr.IPAddress
+        """
+        return ipam_objs.IpamAllocation.get_values(
+            context, 'ip_address', ipam_subnet_id=self._ipam_subnet_id,
+            status=const.IPAM_ALLOCATION_STATUS_ALLOCATED)
+
+    def get_allocations_version(self, context):
+        """Return the number and the highest of the allocated addresses.
+
+        The allocations are not versioned; this pair, retrieved with a single
+        aggregate query, changes with most of the allocations and
+        deallocations of the subnet.
+
+        :param context: neutron api request context
+        :returns: a (count, highest IP address string) tuple
+        """
+        with db_api.CONTEXT_READER.using(context):
+            query = context.session.query(
+                sa.func.count(db_models.IpamAllocation.ip_address),
+                sa.func.max(db_models.IpamAllocation.ip_address)).filter_by(
+                    ipam_subnet_id=self._ipam_subnet_id,
+                    status=const.IPAM_ALLOCATION_STATUS_ALLOCATED)
+            return tuple(query.one())
+
+    def create_allocations(self, context, ip_addresses,
+                           status=const.IPAM_ALLOCATION_STATUS_ALLOCATED):
+        """Create several IP allocation entries.
+
+        :param context: neutron api request context
+        :param ip_addresses: the IP addresses to allocate
+        :param status: IP allocation status
+        """
+        for ip_address in ip_addresses:
+            self.create_allocation(context, ip_address, status=status)
+
     def create_allocation(self, context, ip_address,
                           status=const.IPAM_ALLOCATION_STATUS_ALLOCATED):
         """Create an IP allocation entry.
@@ -13,8 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
+import collections
 import itertools
 import random
+import time
 
 import netaddr
 from neutron_lib.db import api as db_api
@@ -23,6 +26,8 @@ from neutron_lib.plugins import directory
 from oslo_db import exception as db_exc
 from oslo_log import log
 from oslo_utils import uuidutils
+import sqlalchemy
+from sqlalchemy.orm import session as se
 
 from neutron._i18n import _
 from neutron.ipam import driver as ipam_base
@@ -37,6 +42,213 @@ LOG = log.getLogger(__name__)
 MAX_WIN = 1000
 MULTIPLIER = 100
 MAX_WIN_MULTI = MAX_WIN * MULTIPLIER
+# Number of IPAM subnets whose free ranges are cached by an API worker and
+# number of seconds after which the free ranges of a subnet are rebuilt.
+ALLOCATION_CACHE_SIZE = 512
+ALLOCATION_CACHE_TTL = 30
+# Session info key of the IPAM subnets whose free ranges were changed by the
+# current transaction.
+_SESSION_CACHED_SUBNETS = '_ipam_cached_subnets'
+
+
+class FreeIpRanges:
+    """Free addresses of the allocation pools of a subnet.
+
+    The free addresses are stored as a sorted list of disjoint integer
+    ranges, so the structure size depends on the fragmentation of the
+    allocations and not on the number of allocated addresses.
+    """
+
+    def __init__(self, pools, allocated_ips):
+        """Build the free ranges.
+
+        :param pools: list of (first, last) integer tuples, the allocation
+                      pools of the subnet.
+        :param allocated_ips: iterable of the integer value of the allocated
+                              IP addresses.
+        """
+        self._pools = sorted(pools)
+        self._starts = []
+        self._ends = []
+        self.size = 0
+        allocated_ips = sorted(allocated_ips)
+        for first, last in self._pools:
+            start = first
+            index = bisect.bisect_left(allocated_ips, first)
+            for ip in itertools.islice(allocated_ips, index, None):
+                if ip > last:
+                    break
+                if ip > start:
+                    self._append(start, ip - 1)
+                start = ip + 1
+            if start <= last:
+                self._append(start, last)
+
+    def _append(self, start, end):
+        self._starts.append(start)
+        self._ends.append(end)
+        self.size += end - start + 1
+
+    def __contains__(self, ip):
+        index = bisect.bisect_right(self._starts, ip) - 1
+        return index >= 0 and ip <= self._ends[index]
+
+    def first(self, count):
+        """Return the first "count" free addresses (or less)."""
+        ips = []
+        for start, end in zip(self._starts, self._ends):
+            if len(ips) >= count:
+                break
+            end = min(end, start + count - len(ips) - 1)
+            ips.extend(range(start, end + 1))
+        return ips
+
+    def remove(self, ip):
+        """Mark an address as allocated."""
+        index = bisect.bisect_right(self._starts, ip) - 1
+        if index < 0 or ip > self._ends[index]:
+            return
+        start, end = self._starts[index], self._ends[index]
+        del self._starts[index]
+        del self._ends[index]
+        if ip < end:
+            self._starts.insert(index, ip + 1)
+            self._ends.insert(index, end)
+        if start < ip:
+            self._starts.insert(index, start)
+            self._ends.insert(index, ip - 1)
+        self.size -= 1
+
+    def add(self, ip):
+        """Mark an address of the allocation pools as free."""
+        if ip in self:
+            return
+        pool = bisect.bisect_right(self._pools, (ip, float('inf'))) - 1
+        if pool < 0 or ip > self._pools[pool][1]:
+            return
+        first, last = self._pools[pool]
+        index = bisect.bisect_right(self._starts, ip)
+        start = end = ip
+        # Merge with the adjacent ranges of the same pool
+        if (index < len(self._starts) and self._starts[index] == ip + 1 and
+                ip + 1 <= last):
+            end = self._ends[index]
+            del self._starts[index]
+            del self._ends[index]
+        if index > 0 and self._ends[index - 1] == ip - 1 and ip - 1 >= first:
+            start = self._starts[index - 1]
+            del self._starts[index - 1]
+            del self._ends[index - 1]
+            index -= 1
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self.size += 1
+
+
+class _SubnetAllocationCache:
+    """Free ranges of an IPAM subnet and the pools they were built from."""
+
+    def __init__(self, pools, ip_version, free_ranges, version):
+        self.pools = pools
+        self.ip_version = ip_version
+        self.free_ranges = free_ranges
+        # IpamSubnetManager.get_allocations_version value matching the free
+        # ranges, None if unknown
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def update(self, ip_addresses, allocated=True):
+        """Mark the addresses as allocated or free and update the version."""
+        count, max_ip = self.version or (None, None)
+        for ip_address in ip_addresses:
+            ip = int(netaddr.IPAddress(ip_address))
+            if allocated:
+                self.free_ranges.remove(ip)
+                if count is not None:
+                    count += 1
+                    max_ip = max(max_ip or ip_address, ip_address)
+            else:
+                self.free_ranges.add(ip)
+                if count is not None:
+                    count -= 1
+                    if ip_address == max_ip:
+                        # The new highest address is not known
+                        count = None
+        self.version = (count, max_ip) if count is not None else None
+
+
+class _AllocationCache:
+    """Free ranges of the IPAM subnets, per IPAM subnet ID.
+
+    The free ranges of a subnet are rebuilt when the number or the highest
+    of its allocated addresses differ from the database, which detects most
+    of the changes done by the other API workers, and "ttl" seconds after
+    they were built. An address allocated by another worker can still be
+    returned: its insertion fails on the allocation primary key, the
+    transaction is rolled back, which drops the free ranges it changed, and
+    the request is retried. At most "size" subnets are kept, the least
+    recently used one is evicted first.
+    """
+
+    def __init__(self, size, ttl):
+        self._size = size
+        self._ttl = ttl
+        self._entries = collections.OrderedDict()
+
+    def __contains__(self, ipam_subnet_id):
+        return ipam_subnet_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, ipam_subnet_id):
+        cache = self._entries.get(ipam_subnet_id)
+        if cache is None:
+            return None
+        if time.monotonic() - cache.built_at > self._ttl:
+            del self._entries[ipam_subnet_id]
+            return None
+        self._entries.move_to_end(ipam_subnet_id)
+        return cache
+
+    def add(self, ipam_subnet_id, cache):
+        self._entries[ipam_subnet_id] = cache
+        self._entries.move_to_end(ipam_subnet_id)
+        while len(self._entries) > self._size:
+            self._entries.popitem(last=False)
+
+    def pop(self, ipam_subnet_id):
+        return self._entries.pop(ipam_subnet_id, None)
+
+
+# Shared by all the requests processed by this API worker.
+_ALLOCATION_CACHE = _AllocationCache(ALLOCATION_CACHE_SIZE,
+                                     ALLOCATION_CACHE_TTL)
+
+
+def _drop_rolled_back_caches(session):
+    """Drop the free ranges changed by a rolled back transaction."""
+    for ipam_subnet_id in session.info.pop(_SESSION_CACHED_SUBNETS, ()):
+        _ALLOCATION_CACHE.pop(ipam_subnet_id)
+
+
+def _clear_committed_caches(session):
+    session.info.pop(_SESSION_CACHED_SUBNETS, None)
+
+
+def _track_cache_changes(session, ipam_subnet_id):
+    """Drop the free ranges of the subnet if the transaction is rolled back.
+
+    The free ranges are updated before the allocations are committed.
+    """
+    if not sqlalchemy.event.contains(se.Session, 'after_rollback',
+                                     _drop_rolled_back_caches):
+        db_api.sqla_listen(se.Session, 'after_rollback',
+                           _drop_rolled_back_caches)
+        db_api.sqla_listen(se.Session, 'after_commit',
+                           _clear_committed_caches)
+    session.info.setdefault(_SESSION_CACHED_SUBNETS, set()).add(
+        ipam_subnet_id)
 
 
 class NeutronDbSubnet(ipam_base.Subnet):
@@ -158,75 +370,75 @@ class NeutronDbSubnet(ipam_base.Subnet):
         """Generate an IP address from the set of available addresses."""
         return self._generate_ips(context, prefer_next)[0]
 
-    def _generate_ips(self, context, prefer_next=False, num_addresses=1):
-        """Generate a set of IPs from the set of available addresses."""
-        allocated_ips = []
-        requested_num_addresses = num_addresses
-
-        allocations = self.subnet_manager.list_allocations(context)
-        # It is better not to use 'netaddr.IPSet.add',
-        # because _compact_single_network in 'IPSet.add'
-        # is quite time consuming.
-        ip_allocations = netaddr.IPSet(
-            [netaddr.IPAddress(allocation.ip_address)
-             for allocation in allocations])
-
-        for ip_pool in self.subnet_manager.list_pools(context):
-            ip_set = netaddr.IPSet()
-            ip_set.add(netaddr.IPRange(ip_pool.first_ip, ip_pool.last_ip))
-            av_set = ip_set.difference(ip_allocations)
-            if av_set.size == 0:
-                continue
-
-            if av_set.size < requested_num_addresses:
-                # All addresses of the address pool are allocated
-                # for the first time and the remaining addresses
-                # will be allocated in the next address pools.
-                allocated_num_addresses = av_set.size
-            else:
-                # All expected addresses can be assigned in this loop.
-                allocated_num_addresses = requested_num_addresses
-
-            if prefer_next:
-                allocated_ip_pool = list(itertools.islice(
-                    av_set, allocated_num_addresses))
-                allocated_ips.extend([str(allocated_ip)
-                                      for allocated_ip in allocated_ip_pool])
-
-                requested_num_addresses -= allocated_num_addresses
-                if requested_num_addresses:
-                    # More addresses need to be allocated in the next loop.
-                    continue
-                return allocated_ips
+    def _get_allocation_cache(self, context, refresh=False):
+        """Return the free ranges cache of the subnet.
 
-            window = min(av_set.size, MAX_WIN)
+        The cache is rebuilt from the allocations in the database when it
+        has expired or the allocation pools or the allocations version have
+        changed.
+        """
+        ipam_subnet_id = self.subnet_manager.ipam_subnet_id
+        db_pools = self.subnet_manager.list_pools(context)
+        pools = tuple(sorted(
+            (int(netaddr.IPAddress(pool.first_ip)),
+             int(netaddr.IPAddress(pool.last_ip)))
+            for pool in db_pools))
+        version = self.subnet_manager.get_allocations_version(context)
+        cache = _ALLOCATION_CACHE.get(ipam_subnet_id)
+        if (not refresh and cache and cache.pools == pools and
+                cache.version == version):
+            return cache
+
+        allocated_ips = [
+            int(netaddr.IPAddress(ip)) for ip in
+            self.subnet_manager.list_allocated_ips(context)]
+        ip_version = (netaddr.IPAddress(db_pools[0].first_ip).version
+                      if db_pools else None)
+        cache = _SubnetAllocationCache(
+            pools, ip_version, FreeIpRanges(pools, allocated_ips), version)
+        _ALLOCATION_CACHE.add(ipam_subnet_id, cache)
+        LOG.debug("Built the free IP ranges of IPAM subnet %(id)s: "
+                  "%(free)s free addresses",
+                  {'id': ipam_subnet_id, 'free': cache.free_ranges.size})
+        return cache
 
+    def _generate_ips(self, context, prefer_next=False, num_addresses=1):
+        """Generate a set of IPs from the set of available addresses."""
+        cache = self._get_allocation_cache(context)
+        if cache.free_ranges.size < num_addresses:
+            # The deallocations done by other API workers are not seen
+            # until the cache expires; check the database before failing.
+            cache = self._get_allocation_cache(context, refresh=True)
+        free_ranges = cache.free_ranges
+
+        if prefer_next:
+            window = num_addresses
+        elif num_addresses > 1:
             # NOTE(gryf): If there is more than one address, make the window
             # bigger, so that are chances to fulfill demanded amount of IPs.
-            if allocated_num_addresses > 1:
-                window = min(av_set.size,
-                             allocated_num_addresses * MULTIPLIER,
-                             MAX_WIN_MULTI)
+            window = min(free_ranges.size, num_addresses * MULTIPLIER,
+                         MAX_WIN_MULTI)
+        else:
+            window = min(free_ranges.size, MAX_WIN)
+        if free_ranges.size < num_addresses or window < num_addresses:
+            raise ipam_exc.IpAddressGenerationFailure(
+                subnet_id=self.subnet_manager.neutron_id)
 
-            if window < allocated_num_addresses:
-                continue
+        av_ips = free_ranges.first(window)
+        if not prefer_next:
             # Maximize randomness by using the random module's built in
             # sampling function
-            av_ips = list(itertools.islice(av_set, 0, window))
-            allocated_ip_pool = random.sample(av_ips,
-                                              allocated_num_addresses)
-            allocated_ips.extend([str(allocated_ip)
-                                  for allocated_ip in allocated_ip_pool])
-
-            requested_num_addresses -= allocated_num_addresses
-            if requested_num_addresses:
-                # More addresses need to be allocated in the next loop.
-                continue
-
-            return allocated_ips
-
-        raise ipam_exc.IpAddressGenerationFailure(
-            subnet_id=self.subnet_manager.neutron_id)
+            av_ips = random.sample(av_ips, num_addresses)
+        return [netaddr.IPAddress(ip, cache.ip_version).format()
+                for ip in av_ips]
+
+    def _update_allocation_cache(self, ip_addresses, allocated=True):
+        ipam_subnet_id = self.subnet_manager.ipam_subnet_id
+        cache = _ALLOCATION_CACHE.get(ipam_subnet_id)
+        if not cache:
+            return
+        _track_cache_changes(self._context.session, ipam_subnet_id)
+        cache.update(ip_addresses, allocated=allocated)
 
     def allocate(self, address_request):
         # NOTE(pbondar): Ipam driver is always called in context of already
@@ -256,6 +468,7 @@ class NeutronDbSubnet(ipam_base.Subnet):
         except db_exc.DBReferenceError:
             raise n_exc.SubnetNotFound(
                 subnet_id=self.subnet_manager.neutron_id)
+        self._update_allocation_cache([ip_address])
         return ip_address
 
     def bulk_allocate(self, address_request):
@@ -270,19 +483,20 @@ class NeutronDbSubnet(ipam_base.Subnet):
         # Create IP allocation request objects
         try:
             with db_api.CONTEXT_WRITER.using(self._context):
-                for ip_address in allocated_ip_pool:
-                    self.subnet_manager.create_allocation(self._context,
-                                                          ip_address)
+                self.subnet_manager.create_allocations(self._context,
+                                                       allocated_ip_pool)
         except db_exc.DBReferenceError:
             raise n_exc.SubnetNotFound(
                 subnet_id=self.subnet_manager.neutron_id)
+        self._update_allocation_cache(allocated_ip_pool)
         return allocated_ip_pool
 
     def deallocate(self, address):
         # This is almost a no-op because the Neutron DB IPAM driver does not
         # delete IPAllocation objects at every deallocation. The only
         # operation it performs is to delete an IPAMAllocation entry.
-        self.subnet_manager.delete_allocation(self._context, address)
+        if self.subnet_manager.delete_allocation(self._context, address):
+            self._update_allocation_cache([address], allocated=False)
 
     def _no_pool_changes(self, context, pools):
         """Check if pool updates in db are required."""
@@ -370,6 +584,10 @@ class NeutronDbPool(subnet_alloc.SubnetAllocator):
         IPAM-related data has no foreign key relationships to neutron subnet,
         so removing ipam subnet manually
         """
+        ipam_subnet = ipam_db_api.IpamSubnetManager.load_by_neutron_subnet_id(
+            self._context, subnet_id)
+        if ipam_subnet:
+            _ALLOCATION_CACHE.pop(ipam_subnet.id)
         count = ipam_db_api.IpamSubnetManager.delete(self._context,
                                                      subnet_id)
         if count < 1:
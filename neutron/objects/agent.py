@@ -164,6 +164,19 @@ class Agent(base.NeutronDbObject):
         agents = [cls._load_object(context, record) for record in query]
         return agents
 
+    @classmethod
+    @db_api.CONTEXT_WRITER
+    def update_heartbeat_timestamps(cls, context, agent_ids, timestamp):
+        """Set the heartbeat timestamp of the agents, unless more recent.
+
+        :returns: the number of agents updated.
+        """
+        query = context.session.query(agent_model.Agent).filter(
+            agent_model.Agent.id.in_(agent_ids),
+            agent_model.Agent.heartbeat_timestamp < timestamp)
+        return query.update({'heartbeat_timestamp': timestamp},
+                            synchronize_session=False)
+
     @classmethod
     def get_objects_by_agent_mode(cls, context, agent_mode=None, **kwargs):
         mode_filter = obj_utils.StringContains(agent_mode)
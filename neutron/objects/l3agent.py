@@ -13,6 +13,7 @@
 from neutron_lib.db import api as db_api
 from neutron_lib.objects import common_types
 from oslo_versionedobjects import fields as obj_fields
+from sqlalchemy import func
 
 from neutron.common import _constants as n_const
 from neutron.db.models import agent as agent_model
@@ -48,6 +49,21 @@ class RouterL3AgentBinding(base.NeutronDbObject):
             l3agent.RouterL3AgentBinding.router_id.in_(router_ids))
         return [db_obj.l3_agent for db_obj in query.all()]
 
+    @classmethod
+    @db_api.CONTEXT_READER
+    def get_router_count_by_l3_agent_ids(cls, context, l3_agent_ids):
+        """Return the number of routers bound to each of the L3 agents.
+
+        The L3 agents without routers are not in the dictionary returned.
+        """
+        query = context.session.query(
+            l3agent.RouterL3AgentBinding.l3_agent_id,
+            func.count(l3agent.RouterL3AgentBinding.router_id))
+        query = query.filter(
+            l3agent.RouterL3AgentBinding.l3_agent_id.in_(l3_agent_ids))
+        query = query.group_by(l3agent.RouterL3AgentBinding.l3_agent_id)
+        return dict(query.all())
+
     @classmethod
     @db_api.CONTEXT_READER
     def get_down_router_bindings(cls, context, cutoff):
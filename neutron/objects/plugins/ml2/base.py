@@ -55,6 +55,27 @@ class SegmentAllocation(metaclass=abc.ABCMeta):
                 query = query.order_by(rand_func())
             return query.first()
 
+    @classmethod
+    def get_shard_unallocated_segments(cls, context, num_shards, shard,
+                                       limit, **filters):
+        """Return up to limit unallocated segments of a shard, randomly.
+
+        The segments are partitioned in num_shards shards by the modulo of
+        their segmentation ID.
+        """
+        with cls.db_context_reader(context):
+            columns = set(dict(cls.db_model.__table__.columns))
+            model_filters = {k: filters[k]
+                             for k in columns & set(filters.keys())}
+            query = context.session.query(cls.db_model).filter_by(
+                allocated=False, **model_filters).filter(
+                cls.db_model.get_segmentation_id() % num_shards == shard)
+            rand_func = n_utils.get_sql_random_method(
+                context.session.bind.dialect.name)
+            if rand_func:
+                query = query.order_by(rand_func())
+            return query.limit(limit).all()
+
     @classmethod
     def get_all_unallocated_segments(cls, context, **filters):
         with cls.db_context_reader(context):
@@ -45,6 +45,7 @@ import neutron.conf.extensions.conntrack_helper
 import neutron.conf.plugins.ml2.config
 import neutron.conf.plugins.ml2.drivers.agent
 import neutron.conf.plugins.ml2.drivers.driver_type
+import neutron.conf.plugins.ml2.drivers.l2pop
 import neutron.conf.plugins.ml2.drivers.linuxbridge
 import neutron.conf.plugins.ml2.drivers.macvtap
 import neutron.conf.plugins.ml2.drivers.mech_sriov.agent_common
@@ -237,6 +238,11 @@ def list_dhcp_agent_opts():
              neutron.conf.agent.dhcp.DHCP_OPTS,
              neutron.conf.agent.dhcp.DNSMASQ_OPTS)
          ),
+        ('agent',
+         itertools.chain(
+             neutron.conf.agent.common.RESOURCE_PROCESSING_OPTS,
+             neutron.conf.agent.common.NAMESPACE_POOL_OPTS)
+         ),
         (meta_conf.RATE_LIMITING_GROUP,
          meta_conf.METADATA_RATE_LIMITING_OPTS)
     ]
@@ -274,7 +280,12 @@ def list_l3_agent_opts():
              neutron.conf.agent.common.RA_OPTS)
          ),
         ('agent',
-         neutron.conf.agent.agent_extensions_manager.AGENT_EXT_MANAGER_OPTS),
+         itertools.chain(
+             neutron.conf.agent.agent_extensions_manager.
+             AGENT_EXT_MANAGER_OPTS,
+             neutron.conf.agent.common.RESOURCE_PROCESSING_OPTS,
+             neutron.conf.agent.common.NAMESPACE_POOL_OPTS)
+         ),
         ('network_log',
          neutron.conf.services.logging.log_driver_opts),
         (meta_conf.RATE_LIMITING_GROUP,
@@ -328,6 +339,8 @@ def list_ml2_conf_opts():
          neutron.conf.plugins.ml2.drivers.driver_type.geneve_opts),
         ('securitygroup',
          neutron.conf.agent.securitygroups_rpc.security_group_opts),
+        ('l2pop',
+         neutron.conf.plugins.ml2.drivers.l2pop.l2pop_opts),
         ('ovs_driver',
          neutron.conf.plugins.ml2.drivers.openvswitch.mech_ovs_conf.
          ovs_driver_opts),
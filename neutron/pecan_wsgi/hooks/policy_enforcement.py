@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import itertools
+
 from neutron_lib import constants as const
 from oslo_log import log as logging
 from oslo_policy import policy as oslo_policy
@@ -173,18 +175,21 @@ class PolicyHook(hooks.PecanHook):
             action = controller.plugin_handlers[action_type]
         key = resource if is_single else collection
         to_process = [data[resource]] if is_single else data[collection]
-        # in the single case, we enforce which raises on violation
-        # in the plural case, we just check so violating items are hidden
-        policy_method = policy.enforce if is_single else policy.check
         plugin = manager.NeutronManager.get_plugin_for_resource(collection)
         try:
-            resp = [self._get_filtered_item(state.request, controller,
-                                            resource, collection, item)
-                    for item in to_process
-                    if (state.request.method != 'GET' or
-                        policy_method(neutron_context, action, item,
-                                      plugin=plugin,
-                                      pluralized=collection))]
+            # in the single case, we enforce which raises on violation
+            # in the plural case, we just check so violating items are hidden
+            if state.request.method == 'GET' and is_single:
+                policy.enforce(neutron_context, action, to_process[0],
+                               plugin=plugin, pluralized=collection)
+            elif state.request.method == 'GET':
+                allowed = policy.check_items(neutron_context, action,
+                                             to_process,
+                                             pluralized=collection)
+                to_process = [item for item, item_allowed in
+                              zip(to_process, allowed) if item_allowed]
+            resp = self._get_filtered_items(state.request, controller,
+                                            resource, collection, to_process)
         except (oslo_policy.PolicyNotAuthorized, oslo_policy.InvalidScope):
             # This exception must be explicitly caught as the exception
             # translation hook won't be called if an error occurs in the
@@ -198,12 +203,13 @@ class PolicyHook(hooks.PecanHook):
             resp = resp[0]
         state.response.json = {key: resp}
 
-    def _get_filtered_item(self, request, controller, resource, collection,
-                           data):
+    def _get_filtered_items(self, request, controller, resource, collection,
+                            items):
         neutron_context = request.context.get('neutron_context')
         to_exclude = self._exclude_attributes_by_policy(
-            neutron_context, controller, resource, collection, data)
-        return self._filter_attributes(request, data, to_exclude)
+            neutron_context, controller, resource, collection, items)
+        return [self._filter_attributes(request, data, fields_to_strip)
+                for data, fields_to_strip in zip(items, to_exclude)]
 
     def _filter_attributes(self, request, data, fields_to_strip):
         # This routine will remove the fields that were requested to the
@@ -213,15 +219,18 @@ class PolicyHook(hooks.PecanHook):
                     if item[0] not in fields_to_strip)
 
     def _exclude_attributes_by_policy(self, context, controller, resource,
-                                      collection, data):
+                                      collection, items):
         """Identifies attributes to exclude according to authZ policies.
 
-        Return a list of attribute names which should be stripped from the
-        response returned to the user because the user is not authorized
-        to see them.
+        Return, for each item, a list of attribute names which should be
+        stripped from the response returned to the user because the user is
+        not authorized to see them. The policy of each attribute is checked
+        for all the items at once.
         """
-        attributes_to_exclude = []
-        for attr_name in list(data):
+        attributes_to_exclude = [[] for data in items]
+        # The attributes of all the items, in order
+        attr_names = dict.fromkeys(itertools.chain.from_iterable(items))
+        for attr_name in attr_names:
             # TODO(amotoki): All attribute maps have tenant_id and
             # it determines excluded attributes based on tenant_id.
             # We need to migrate tenant_id to project_id later
@@ -229,27 +238,34 @@ class PolicyHook(hooks.PecanHook):
             # to check all logs carefully.
             if attr_name == 'project_id':
                 continue
+            indexes = [idx for idx, data in enumerate(items)
+                       if attr_name in data]
             attr_data = controller.resource_info.get(attr_name)
             if attr_data and attr_data['is_visible']:
-                if policy.check(
-                        context,
-                        # NOTE(kevinbenton): this used to reference a
-                        # _plugin_handlers dict, why?
-                        'get_{}:{}'.format(resource, attr_name),
-                        data,
-                        might_not_exist=True,
-                        pluralized=collection):
+                visible = policy.check_items(
+                    context,
+                    # NOTE(kevinbenton): this used to reference a
+                    # _plugin_handlers dict, why?
+                    'get_{}:{}'.format(resource, attr_name),
+                    [items[idx] for idx in indexes],
+                    might_not_exist=True,
+                    pluralized=collection)
+            else:
+                visible = [False] * len(indexes)
+            for idx, attr_visible in zip(indexes, visible):
+                if attr_visible:
                     # this attribute is visible, check next one
                     continue
-            # if the code reaches this point then either the policy check
-            # failed or the attribute was not visible in the first place
-            attributes_to_exclude.append(attr_name)
-            # TODO(amotoki): As mentioned in the above TODO,
-            # we treat project_id and tenant_id equivalently.
-            # This should be migrated to project_id later.
-            if attr_name == 'tenant_id':
-                attributes_to_exclude.append('project_id')
-        if attributes_to_exclude:
+                # if the code reaches this point then either the policy check
+                # failed or the attribute was not visible in the first place
+                attributes_to_exclude[idx].append(attr_name)
+                # TODO(amotoki): As mentioned in the above TODO,
+                # we treat project_id and tenant_id equivalently.
+                # This should be migrated to project_id later.
+                if attr_name == 'tenant_id':
+                    attributes_to_exclude[idx].append('project_id')
+        if any(attributes_to_exclude):
             LOG.debug("Attributes excluded by policy engine: %s",
-                      attributes_to_exclude)
+                      sorted(set(itertools.chain.from_iterable(
+                          attributes_to_exclude))))
         return attributes_to_exclude
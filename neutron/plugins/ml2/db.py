@@ -257,6 +257,20 @@ def get_distributed_port_binding_by_host(context, port_id, host):
     return binding
 
 
+def get_distributed_port_bindings_by_host(context, port_ids, host):
+    """Return a dictionary of port IDs to their distributed binding on host.
+
+    The ports without a distributed binding on the host are omitted.
+    """
+    if not port_ids:
+        return {}
+    with db_api.CONTEXT_READER.using(context):
+        query = (context.session.query(models.DistributedPortBinding).
+                 filter(models.DistributedPortBinding.port_id.in_(port_ids),
+                        models.DistributedPortBinding.host == host))
+        return {binding.port_id: binding for binding in query}
+
+
 def update_distributed_port_binding_by_host(context, port_id, host, router_id):
     with db_api.CONTEXT_WRITER.using(context):
         bindings = (
@@ -13,7 +13,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import datetime
 import functools
+import os
+import random
+import threading
 
 from neutron_lib import context
 from neutron_lib.db import api as db_api
@@ -25,12 +30,21 @@ from neutron_lib.plugins import utils as p_utils
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log
+from oslo_utils import timeutils
 
+from neutron.common import _constants as common_constants
+from neutron.db.models.plugins.ml2 import segmentallocationshard as shard_model
 from neutron.objects import network_segment_range as ns_range
 
 
 LOG = log.getLogger(__name__)
 
+# A shard claimed by a worker process is renewed every
+# SEGMENT_SHARD_CLAIM_RENEWAL seconds while it is used; a claim not renewed
+# for SEGMENT_SHARD_CLAIM_TIMEOUT seconds can be taken by another worker.
+SEGMENT_SHARD_CLAIM_RENEWAL = 60
+SEGMENT_SHARD_CLAIM_TIMEOUT = 600
+
 
 class BaseTypeDriver(api.ML2TypeDriver):
     """BaseTypeDriver for functions common to Segment and flat."""
@@ -42,6 +56,139 @@ class BaseTypeDriver(api.ML2TypeDriver):
         return p_utils.get_deployment_physnet_mtu()
 
 
+class SegmentShardClaim:
+    """Shard of the free segmentation IDs claimed by the worker process.
+
+    The workers of all the Neutron servers claim their shard with a row of
+    the ml2_segment_allocation_shards table, so that no two workers use the
+    same shard. The claim is renewed while it is used and can be taken over
+    once it expired, when the worker owning it is gone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._num_shards = None
+        self._shard = None
+        self._claimed_at = None
+
+    @staticmethod
+    def _get_owner():
+        return '%s:%s' % (cfg.CONF.host, os.getpid())
+
+    def get(self, context, num_shards):
+        """Return the shard claimed by the worker, None if none is free."""
+        with self._lock:
+            if self._pid != os.getpid() or self._num_shards != num_shards:
+                # The claim is not inherited by the forked workers
+                self._pid = os.getpid()
+                self._num_shards = num_shards
+                self._shard = None
+                self._claimed_at = None
+            if (self._claimed_at is None or timeutils.is_older_than(
+                    self._claimed_at, SEGMENT_SHARD_CLAIM_RENEWAL)):
+                self._shard = self._claim(context, num_shards)
+                self._claimed_at = timeutils.utcnow()
+            return self._shard
+
+    def _claim(self, context, num_shards):
+        owner = self._get_owner()
+        now = timeutils.utcnow()
+        expired = now - datetime.timedelta(seconds=SEGMENT_SHARD_CLAIM_TIMEOUT)
+        model = shard_model.SegmentAllocationShard
+        # The claims are committed whatever the outcome of the transaction
+        # of the allocation
+        writer = db_api.get_context_manager().independent.writer
+        with writer.using(context):
+            query = context.session.query(model)
+            if (self._shard is not None and query.filter_by(
+                    shard=self._shard, owner=owner).update(
+                        {'claimed_at': now})):
+                return self._shard
+            claims = {claim.shard: (claim.owner, claim.claimed_at)
+                      for claim in query.all()}
+        if self._shard is not None:
+            LOG.warning('Segment allocation shard %(shard)s claimed by '
+                        '%(owner)s was taken by another worker',
+                        {'shard': self._shard, 'owner': owner})
+        free = [shard for shard in range(num_shards)
+                if shard not in claims or claims[shard][1] < expired]
+        random.shuffle(free)
+        for shard in free:
+            try:
+                with writer.using(context):
+                    if shard not in claims:
+                        context.session.add(model(shard=shard, owner=owner,
+                                                  claimed_at=now))
+                    elif not context.session.query(model).filter_by(
+                            shard=shard, owner=claims[shard][0],
+                            claimed_at=claims[shard][1]).update(
+                                {'owner': owner, 'claimed_at': now}):
+                        # Taken over by another worker in the meantime
+                        continue
+            except db_exc.DBDuplicateEntry:
+                continue
+            LOG.debug('Segment allocation shard %(shard)s claimed by '
+                      '%(owner)s', {'shard': shard, 'owner': owner})
+            return shard
+        LOG.warning('No free segment allocation shard to claim for %s, the '
+                    'segments are allocated from the whole pool', owner)
+
+
+class SegmentShardPool:
+    """Free segments of the shard of the worker process.
+
+    The free segmentation IDs are partitioned in shards by their modulo, the
+    worker process takes the shard it claimed in the database. The free
+    segments of the shard are retrieved in batches and handed out from
+    memory, so that the concurrent allocations of the worker do not try the
+    same segment either. A segment handed out may have been allocated by
+    another worker in the meantime, the caller still allocates it with a
+    compare and swap update.
+    """
+
+    # Shared by the pools of all the type drivers of the worker
+    shard_claim = SegmentShardClaim()
+
+    def __init__(self, segmentation_obj, primary_keys):
+        self._segmentation_obj = segmentation_obj
+        self._primary_keys = primary_keys
+        self._lock = threading.Lock()
+        self._free = collections.defaultdict(collections.deque)
+        self._pid = None
+
+    @classmethod
+    def get_shard(cls, context, num_shards):
+        return cls.shard_claim.get(context, num_shards)
+
+    def get(self, context, num_shards, **filters):
+        """Return the primary keys of a free segment of the shard.
+
+        :returns: a dictionary of the primary keys of the segment, None if
+                  the shard is exhausted or the worker has no shard.
+        """
+        shard = self.get_shard(context, num_shards)
+        if shard is None:
+            return
+        key = (num_shards, shard) + tuple(sorted(filters.items()))
+        with self._lock:
+            if self._pid != os.getpid():
+                # The pool is inherited by the forked workers, each of them
+                # using its own shard
+                self._pid = os.getpid()
+                self._free.clear()
+            free = self._free[key]
+            if not free:
+                allocations = (
+                    self._segmentation_obj.get_shard_unallocated_segments(
+                        context, num_shards, shard,
+                        common_constants.IDPOOL_SELECT_SIZE, **filters))
+                free.extend({k: alloc[k] for k in self._primary_keys}
+                            for alloc in allocations)
+            if free:
+                return free.popleft()
+
+
 class SegmentTypeDriver(BaseTypeDriver):
     """SegmentTypeDriver for segment allocation.
 
@@ -55,6 +202,7 @@ class SegmentTypeDriver(BaseTypeDriver):
         self.segmentation_obj = model
         primary_keys_columns = self.model.__table__.primary_key.columns
         self.primary_keys = {col.name for col in primary_keys_columns}
+        self.shard_pool = SegmentShardPool(model, self.primary_keys)
 
     def allocate_fully_specified_segment(self, context, **raw_segment):
         """Allocate segment fully specified by raw_segment.
@@ -116,6 +264,13 @@ class SegmentTypeDriver(BaseTypeDriver):
         Return allocated db object or None.
         """
         network_type = self.get_type()
+        num_shards = cfg.CONF.ml2.segment_allocation_shards
+        if num_shards > 1:
+            alloc = self._allocate_segment_from_shard(context, num_shards,
+                                                      **filters)
+            if alloc:
+                return alloc
+
         if directory.get_plugin(plugin_constants.NETWORK_SEGMENT_RANGE):
             calls = [
                 functools.partial(
@@ -136,6 +291,14 @@ class SegmentTypeDriver(BaseTypeDriver):
             allocations = call()
             if not isinstance(allocations, list):
                 allocations = [allocations] if allocations else []
+            shard = (self.shard_pool.get_shard(context, num_shards)
+                     if num_shards > 1 else None)
+            if shard is not None:
+                # Try the segments of the shard of this worker first
+                segmentation_key = self.model_segmentation_id.key
+                allocations.sort(
+                    key=lambda alloc: (
+                        alloc[segmentation_key] % num_shards != shard))
             for alloc in allocations:
                 segment = {k: alloc[k] for k in self.primary_keys}
                 try_to_allocate = True
@@ -165,6 +328,30 @@ class SegmentTypeDriver(BaseTypeDriver):
                     context.elevated()):
                 LOG.debug('    - %s', srange)
 
+    def _allocate_segment_from_shard(self, context, num_shards, **filters):
+        """Allocate a segment of the shard of this worker.
+
+        Not used with the network segment range service plugin, as the
+        segments available then depend on the project of the network.
+        Return the allocated db object or None if the shard is exhausted.
+        """
+        if directory.get_plugin(plugin_constants.NETWORK_SEGMENT_RANGE):
+            return
+        while True:
+            segment = self.shard_pool.get(context, num_shards, **filters)
+            if not segment:
+                LOG.debug('%(type)s segment shard %(shard)s exhausted, '
+                          'falling back to the whole pool',
+                          {'type': self.get_type(),
+                           'shard': self.shard_pool.get_shard(context,
+                                                              num_shards)})
+                return
+            if self.segmentation_obj.allocate(context, **segment):
+                LOG.debug('%(type)s segment allocate from shard success '
+                          'with %(segment)s ', {'type': self.get_type(),
+                                                'segment': segment})
+                return self.model(allocated=True, **segment)
+
     @db_api.retry_db_errors
     def _delete_expired_default_network_segment_ranges(self):
         ctx = context.get_admin_context()
@@ -19,21 +19,26 @@ from neutron_lib import exceptions
 from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
 from neutron_lib.plugins.ml2 import api
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from neutron._i18n import _
+from neutron.conf.plugins.ml2.drivers import l2pop as l2pop_conf
 from neutron.db import l3_hamode_db
 from neutron.plugins.ml2.drivers.l2pop import db as l2pop_db
 from neutron.plugins.ml2.drivers.l2pop import rpc as l2pop_rpc
 
 LOG = logging.getLogger(__name__)
 
+l2pop_conf.register_l2pop_opts()
+
 
 class L2populationMechanismDriver(api.MechanismDriver):
 
     def __init__(self):
         super().__init__()
-        self.L2populationAgentNotify = l2pop_rpc.L2populationAgentNotifyAPI()
+        self.L2populationAgentNotify = l2pop_rpc.L2populationAgentNotifyAPI(
+            coalescing_interval=cfg.CONF.l2pop.fdb_coalescing_interval)
 
     def initialize(self):
         LOG.debug("Experimental L2 population driver")
@@ -20,22 +20,155 @@ from neutron_lib import rpc as n_rpc
 from oslo_log import log as logging
 import oslo_messaging
 
+from neutron.notifiers import batch_notifier
+
 
 LOG = logging.getLogger(__name__)
 
 
 PortInfo = collections.namedtuple("PortInfo", "mac_address ip_address")
 
+ADD_FDB_ENTRIES = 'add_fdb_entries'
+REMOVE_FDB_ENTRIES = 'remove_fdb_entries'
+UPDATE_FDB_ENTRIES = 'update_fdb_entries'
+
 
 class L2populationAgentNotifyAPI:
 
-    def __init__(self, topic=topics.AGENT):
+    def __init__(self, topic=topics.AGENT, coalescing_interval=0):
         self.topic = topic
         self.topic_l2pop_update = topics.get_topic_name(topic,
                                                         topics.L2POPULATION,
                                                         topics.UPDATE)
         target = oslo_messaging.Target(topic=topic, version='1.0')
         self.client = n_rpc.get_client(target)
+        # Number of messages not sent, and of FDB entries superseded by a
+        # later operation, thanks to the coalescing of the notifications
+        self.messages_saved = 0
+        self.entries_cancelled = 0
+        self._batch_notifier = None
+        if coalescing_interval:
+            self._batch_notifier = batch_notifier.BatchNotifier(
+                coalescing_interval, self._send_coalesced_notifications)
+
+    def _notify(self, context, method, fdb_entries, host):
+        if self._batch_notifier:
+            self._batch_notifier.queue_event(
+                (context, method, fdb_entries, host))
+        elif host:
+            self._notification_host(context, method, fdb_entries, host)
+        else:
+            self._notification_fanout(context, method, fdb_entries)
+
+    @staticmethod
+    def _coalesce(pending, method, fdb_entries):
+        """Merge the FDB entries of a notification in the pending ones.
+
+        The pending entries are indexed by network, segment, agent IP and
+        entry, with the last operation (add or remove) done on the entry.
+        An entry added then removed, or removed then added, is only sent
+        with its last operation as the agents state before the coalescing
+        interval is unknown, the agents handle both idempotently.
+
+        :returns: the number of entries superseded by this notification.
+        """
+        cancelled = 0
+        for network_id, network_fdb in fdb_entries.items():
+            segment = (network_id, network_fdb['segment_id'],
+                       network_fdb['network_type'])
+            segment_ports = pending.setdefault(segment, {})
+            for agent_ip, entries in network_fdb['ports'].items():
+                operations, methods = segment_ports.setdefault(
+                    agent_ip, ({}, set()))
+                if not entries:
+                    # The agent IP alone is notified (tunnel set up)
+                    methods.add(method)
+                for entry in entries:
+                    entry = PortInfo(*entry)
+                    if operations.pop(entry, method) != method:
+                        cancelled += 1
+                    operations[entry] = method
+        return cancelled
+
+    @staticmethod
+    def _build_notifications(pending):
+        """Build the messages to send for the pending FDB entries.
+
+        The removals are sent before the additions, a network is only sent
+        in several messages of an operation if its entries belong to several
+        segments.
+        """
+        notifications = []
+        for method in (REMOVE_FDB_ENTRIES, ADD_FDB_ENTRIES):
+            messages = []
+            for segment, segment_ports in pending.items():
+                network_id, segment_id, network_type = segment
+                ports = {}
+                for agent_ip, (operations, methods) in segment_ports.items():
+                    entries = [entry for entry, operation in operations.items()
+                               if operation == method]
+                    if entries or method in methods:
+                        ports[agent_ip] = entries
+                if not ports:
+                    continue
+                message = next((m for m in messages if network_id not in m),
+                               None)
+                if message is None:
+                    message = {}
+                    messages.append(message)
+                message[network_id] = {'segment_id': segment_id,
+                                       'network_type': network_type,
+                                       'ports': ports}
+            notifications.extend((method, message) for message in messages)
+        return notifications
+
+    def _send_coalesced_notifications(self, events):
+        # The notifications are sent to the hosts before being fanned out:
+        # the entries sent to a host are the whole FDB of its network read
+        # from the database, the fanout ones are the later changes.
+        received = len(events)
+        sent = 0
+        cancelled = 0
+        pending = {}
+        context = None
+
+        def flush():
+            count = 0
+            for host, host_pending in sorted(pending.items(),
+                                             key=lambda p: p[0] is None):
+                for method, fdb_entries in self._build_notifications(
+                        host_pending):
+                    if host:
+                        self._notification_host(context, method,
+                                                fdb_entries, host)
+                    else:
+                        self._notification_fanout(context, method,
+                                                  fdb_entries)
+                    count += 1
+            pending.clear()
+            return count
+
+        for context, method, fdb_entries, host in events:
+            if method == UPDATE_FDB_ENTRIES:
+                # Sent in order with the add and remove notifications
+                sent += flush()
+                if host:
+                    self._notification_host(context, method, fdb_entries,
+                                            host)
+                else:
+                    self._notification_fanout(context, method, fdb_entries)
+                sent += 1
+                continue
+            cancelled += self._coalesce(pending.setdefault(host, {}), method,
+                                        fdb_entries)
+        sent += flush()
+
+        self.messages_saved += received - sent
+        self.entries_cancelled += cancelled
+        LOG.debug('Coalesced %(received)d l2population notifications in '
+                  '%(sent)d messages, %(cancelled)d FDB entries cancelled',
+                  {'received': received, 'sent': sent,
+                   'cancelled': cancelled})
 
     def _notification_fanout(self, context, method, fdb_entries):
         LOG.debug('Fanout notify l2population agents at %(topic)s '
@@ -60,27 +193,12 @@ class L2populationAgentNotifyAPI:
 
     def add_fdb_entries(self, context, fdb_entries, host=None):
         if fdb_entries:
-            if host:
-                self._notification_host(context, 'add_fdb_entries',
-                                        fdb_entries, host)
-            else:
-                self._notification_fanout(context, 'add_fdb_entries',
-                                          fdb_entries)
+            self._notify(context, ADD_FDB_ENTRIES, fdb_entries, host)
 
     def remove_fdb_entries(self, context, fdb_entries, host=None):
         if fdb_entries:
-            if host:
-                self._notification_host(context, 'remove_fdb_entries',
-                                        fdb_entries, host)
-            else:
-                self._notification_fanout(context, 'remove_fdb_entries',
-                                          fdb_entries)
+            self._notify(context, REMOVE_FDB_ENTRIES, fdb_entries, host)
 
     def update_fdb_entries(self, context, fdb_entries, host=None):
         if fdb_entries:
-            if host:
-                self._notification_host(context, 'update_fdb_entries',
-                                        fdb_entries, host)
-            else:
-                self._notification_fanout(context, 'update_fdb_entries',
-                                          fdb_entries)
+            self._notify(context, UPDATE_FDB_ENTRIES, fdb_entries, host)
@@ -50,6 +50,7 @@ from ovsdbapp import exceptions as ovs_exceptions
 
 from neutron._i18n import _
 from neutron.agent.common import ip_lib
+from neutron.agent.common import loop_metrics
 from neutron.agent.common import ovs_lib
 from neutron.agent.common import polling
 from neutron.agent.common import utils
@@ -96,6 +97,16 @@ class OVSPluginApi(agent_rpc.CacheBackedPluginApi):
     pass
 
 
+# RPC calls to the server whose latency is recorded in the rpc_loop metrics.
+PLUGIN_RPC_METHODS = ('get_devices_details_list_and_failed_devices',
+                      'get_network_details',
+                      'get_ports_by_vnic_type_and_host',
+                      'tunnel_sync',
+                      'update_device_down',
+                      'update_device_list')
+STATE_RPC_METHODS = ('report_state', )
+
+
 class PortInfo(collections.UserDict):
     def __init__(self, current=None, added=None, removed=None, updated=None,
                  re_added=None):
@@ -167,6 +178,11 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
         self.enable_local_ips = 'local_ip' in self.ext_manager.names()
 
         self.fullsync = False
+        self.loop_metrics = loop_metrics.LoopMetrics(
+            metrics_file=agent_conf.rpc_loop_metrics_file,
+            profiling_dir=agent_conf.rpc_loop_profiling_dir,
+            profiling_threshold=agent_conf.rpc_loop_profiling_threshold,
+            profiling_max_files=agent_conf.rpc_loop_profiling_max_files)
         # init bridge classes with configured datapath type.
         self.br_int_cls, self.br_phys_cls, self.br_tun_cls = (
             functools.partial(bridge_classes[b],
@@ -550,6 +566,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             self.plugin_rpc.remote_resource_cache)
         self.dvr_plugin_rpc = dvr_rpc.DVRServerRpcApi(topics.PLUGIN)
         self.state_rpc = agent_rpc.PluginReportStateAPI(topics.REPORTS)
+        self.loop_metrics.instrument_rpc(self.plugin_rpc, PLUGIN_RPC_METHODS)
+        self.loop_metrics.instrument_rpc(self.state_rpc, STATE_RPC_METHODS)
 
         # RPC network init
         self.context = context.get_admin_context_without_session()
@@ -2237,11 +2255,14 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                       're_added': len(re_added),
                       'elapsed': time.time() - start})
         if devices_added_updated:
-            (skipped_devices, binding_no_activated_devices,
-             need_binding_devices, failed_devices['added'],
-             devices_not_in_datapath, migrating_devices) = (
-                 self.treat_devices_added_or_updated(
-                     devices_added_updated, provisioning_needed, re_added))
+            with self.loop_metrics.phase('treat_devices_added_or_updated',
+                                         ports=len(devices_added_updated)):
+                (skipped_devices, binding_no_activated_devices,
+                 need_binding_devices, failed_devices['added'],
+                 devices_not_in_datapath, migrating_devices) = (
+                     self.treat_devices_added_or_updated(
+                         devices_added_updated, provisioning_needed,
+                         re_added))
             LOG.info("process_network_ports - iteration:%(iter_num)d - "
                      "treat_devices_added_or_updated completed. "
                      "Skipped %(num_skipped)d and no activated binding "
@@ -2265,20 +2286,28 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                        binding_no_activated_devices - migrating_devices)
         self.process_install_ports_egress_flows(need_binding_devices)
         added_to_datapath = added_ports - devices_not_in_datapath
-        self.sg_agent.setup_port_filters(
-            added_to_datapath,
-            port_info.get('updated', set()) - binding_no_activated_devices)
+        updated_ports = (port_info.get('updated', set()) -
+                         binding_no_activated_devices)
+        with self.loop_metrics.phase(
+                'firewall', ports=len(added_to_datapath | updated_ports)):
+            self.sg_agent.setup_port_filters(added_to_datapath,
+                                             updated_ports)
 
         LOG.info("process_network_ports - iteration:%(iter_num)d - "
                  "agent port security group processed in %(elapsed).3f",
                  {'iter_num': self.iter_num,
                   'elapsed': time.time() - start})
-        failed_devices['added'] |= self._bind_devices(need_binding_devices)
+        with self.loop_metrics.phase('bind_devices',
+                                     ports=len(need_binding_devices)):
+            failed_devices['added'] |= self._bind_devices(
+                need_binding_devices)
 
         if 'removed' in port_info and port_info['removed']:
             start = time.time()
-            failed_devices['removed'] |= self.treat_devices_removed(
-                port_info['removed'])
+            with self.loop_metrics.phase('treat_devices_removed',
+                                         ports=len(port_info['removed'])):
+                failed_devices['removed'] |= self.treat_devices_removed(
+                    port_info['removed'])
             LOG.info("process_network_ports - iteration:%(iter_num)d - "
                      "treat_devices_removed completed in %(elapsed).3f",
                      {'iter_num': self.iter_num,
@@ -2539,12 +2568,17 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
     def loop_count_and_wait(self, start_time, port_stats):
         # sleep till end of polling interval
         elapsed = time.time() - start_time
+        self.loop_metrics.end_iteration(elapsed)
         LOG.info("Agent rpc_loop - iteration:%(iter_num)d "
                  "completed. Processed ports statistics: "
                  "%(port_stats)s. Elapsed:%(elapsed).3f",
                  {'iter_num': self.iter_num,
                   'port_stats': port_stats,
                   'elapsed': elapsed})
+        LOG.debug("Agent rpc_loop - iteration:%(iter_num)d metrics: "
+                  "%(metrics)s",
+                  {'iter_num': self.iter_num,
+                   'metrics': self.loop_metrics.get_summary()})
         if elapsed < self.polling_interval:
             time.sleep(self.polling_interval - elapsed)
         else:
@@ -2555,6 +2589,11 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                        'elapsed': elapsed})
         self.iter_num = self.iter_num + 1
 
+    @staticmethod
+    def _count_port_changes(port_info):
+        return sum(len(port_info.get(key, ()))
+                   for key in ('added', 'updated', 'removed'))
+
     def get_port_stats(self, port_info, ancillary_port_info):
         port_stats = {
             'regular': {
@@ -2565,6 +2604,9 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             port_stats['ancillary'] = {
                 'added': len(ancillary_port_info.get('added', [])),
                 'removed': len(ancillary_port_info.get('removed', []))}
+        flow_stats = self.sg_agent.firewall.get_flow_stats()
+        if flow_stats:
+            port_stats['firewall'] = flow_stats
         return port_stats
 
     def cleanup_stale_flows(self):
@@ -2757,6 +2799,7 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             port_info = {}
             ancillary_port_info = {}
             start = time.time()
+            self.loop_metrics.start_iteration(self.iter_num)
             LOG.info("Agent rpc_loop - iteration:%d started",
                      self.iter_num)
             self.ovs_status = self.check_ovs_status()
@@ -2785,7 +2828,8 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
             # Notify the plugin of tunnel IP
             if self.enable_tunneling and tunnel_sync:
                 try:
-                    tunnel_sync = self.tunnel_sync()
+                    with self.loop_metrics.phase('tunnel_sync'):
+                        tunnel_sync = self.tunnel_sync()
                 except Exception:
                     LOG.exception("Error while configuring tunnel endpoints")
                     tunnel_sync = True
@@ -2818,18 +2862,21 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                     self.updated_ports = set()
                     activated_bindings_copy = self.activated_bindings
                     self.activated_bindings = set()
-                    (port_info, ancillary_port_info, consecutive_resyncs,
-                     ports_not_ready_yet) = (self.process_port_info(
-                         start, polling_manager, sync,
-                         ports, ancillary_ports, updated_ports_copy,
-                         consecutive_resyncs, ports_not_ready_yet,
-                         failed_devices, failed_ancillary_devices))
+                    with self.loop_metrics.phase('scan_ports'):
+                        (port_info, ancillary_port_info, consecutive_resyncs,
+                         ports_not_ready_yet) = (self.process_port_info(
+                             start, polling_manager, sync,
+                             ports, ancillary_ports, updated_ports_copy,
+                             consecutive_resyncs, ports_not_ready_yet,
+                             failed_devices, failed_ancillary_devices))
                     sync = False
-                    self.process_deleted_ports(port_info)
-                    self.process_deactivated_bindings(port_info)
-                    self.process_activated_bindings(port_info,
-                                                    activated_bindings_copy)
-                    ofport_changed_ports = self.update_stale_ofport_rules()
+                    with self.loop_metrics.phase('process_deleted_ports'):
+                        self.process_deleted_ports(port_info)
+                        self.process_deactivated_bindings(port_info)
+                        self.process_activated_bindings(
+                            port_info, activated_bindings_copy)
+                        ofport_changed_ports = (
+                            self.update_stale_ofport_rules())
                     if ofport_changed_ports:
                         port_info.setdefault('updated', set()).update(
                             ofport_changed_ports)
@@ -2847,15 +2894,19 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                                   port_info)
                         provisioning_needed = (
                             self.ovs_restarted or bridges_recreated)
-                        failed_devices = self.process_network_ports(
-                            port_info, provisioning_needed)
+                        with self.loop_metrics.phase(
+                                'process_network_ports',
+                                ports=self._count_port_changes(port_info)):
+                            failed_devices = self.process_network_ports(
+                                port_info, provisioning_needed)
                         LOG.info("Agent rpc_loop - iteration:%(iter_num)d - "
                                  "ports processed. Elapsed:%(elapsed).3f",
                                  {'iter_num': self.iter_num,
                                   'elapsed': time.time() - start})
 
                     if need_clean_stale_flow:
-                        self.cleanup_stale_flows()
+                        with self.loop_metrics.phase('cleanup_stale_flows'):
+                            self.cleanup_stale_flows()
                         need_clean_stale_flow = False
                         LOG.info("Agent rpc_loop - iteration:%(iter_num)d - "
                                  "cleanup stale flows. Elapsed:%(elapsed).3f",
@@ -2865,9 +2916,13 @@ class OVSNeutronAgent(l2population_rpc.L2populationRpcCallBackTunnelMixin,
                     ports = port_info['current']
 
                     if self.ancillary_brs:
-                        failed_ancillary_devices = (
-                            self.process_ancillary_network_ports(
-                                ancillary_port_info))
+                        with self.loop_metrics.phase(
+                                'process_ancillary_network_ports',
+                                ports=self._count_port_changes(
+                                    ancillary_port_info)):
+                            failed_ancillary_devices = (
+                                self.process_ancillary_network_ports(
+                                    ancillary_port_info))
                         LOG.info("Agent rpc_loop - iteration: "
                                  "%(iter_num)d - ancillary ports "
                                  "processed. Elapsed:%(elapsed).3f",
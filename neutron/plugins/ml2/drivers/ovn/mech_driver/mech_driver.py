@@ -870,6 +870,26 @@ class OVNMechanismDriver(api.MechanismDriver):
         self._ovn_client.create_port(context.plugin_context, port)
         self._notify_dhcp_updated(port['id'])
 
+    def create_port_postcommit_bulk(self, contexts):
+        """Create several ports.
+
+        :param contexts: list of PortContext instances describing the ports
+        created in a bulk request.
+
+        Same as create_port_postcommit, but all the logical switch ports are
+        created in a single OVN NB transaction.
+        """
+        if not contexts:
+            return
+        ports = []
+        for context in contexts:
+            port = copy.deepcopy(context.current)
+            port['network'] = context.network.current
+            ports.append(port)
+        self._ovn_client.create_ports(contexts[0].plugin_context, ports)
+        for port in ports:
+            self._notify_dhcp_updated(port['id'])
+
     def update_port_precommit(self, context):
         """Update resources of a port.
 
@@ -14,8 +14,10 @@
 #    under the License.
 
 import abc
+import collections
 import functools
 import inspect
+import itertools
 import threading
 
 from futurist import periodics
@@ -24,6 +26,7 @@ from neutron_lib.api.definitions import portbindings
 from neutron_lib.api.definitions import provider_net as pnet
 from neutron_lib import constants as n_const
 from neutron_lib import context as n_context
+from neutron_lib.db import api as db_api
 from neutron_lib import exceptions as n_exc
 from neutron_lib.exceptions import l3 as l3_exc
 from oslo_config import cfg
@@ -51,6 +54,17 @@ LOG = log.getLogger(__name__)
 INCONSISTENCY_TYPE_CREATE_UPDATE = 'create/update'
 INCONSISTENCY_TYPE_DELETE = 'delete'
 
+# Resource types whose "ovn_update" method only bumps the revision number
+# once its own OVN transaction is committed. The updates of these resources
+# can be merged in a single (nested) OVN transaction, bumping the revision
+# numbers after it is committed.
+BATCH_UPDATE_TYPES = (
+    ovn_const.TYPE_NETWORKS,
+    ovn_const.TYPE_PORTS,
+    ovn_const.TYPE_ROUTER_PORTS,
+    ovn_const.TYPE_ADDRESS_GROUPS,
+)
+
 
 def has_lock_periodic(*args, periodic_run_limit=0, **kwargs):
     def wrapper(f):
@@ -173,11 +187,15 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         self._idl = self._nb_idl.idl
         self._idl.set_lock('ovn_db_inconsistencies_periodics')
         self._sync_timer = timeutils.StopWatch()
+        # Accumulated counters of the inconsistencies fixed (or not) by
+        # this maintenance worker, per resource type.
+        self._fix_stats = collections.defaultdict(collections.Counter)
         super().__init__(ovn_client)
 
         self._resources_func_map = {
             ovn_const.TYPE_NETWORKS: {
                 'neutron_get': self._ovn_client._plugin.get_network,
+                'neutron_list': self._ovn_client._plugin.get_networks,
                 'ovn_get': self._nb_idl.get_lswitch,
                 'ovn_create': self._ovn_client.create_network,
                 'ovn_update': self._ovn_client.update_network,
@@ -185,6 +203,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_PORTS: {
                 'neutron_get': self._ovn_client._plugin.get_port,
+                'neutron_list': self._ovn_client._plugin.get_ports,
                 'ovn_get': self._nb_idl.get_lswitch_port,
                 'ovn_create': self._ovn_client.create_port,
                 'ovn_update': self._ovn_client.update_port,
@@ -192,6 +211,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_FLOATINGIPS: {
                 'neutron_get': self._ovn_client._l3_plugin.get_floatingip,
+                'neutron_list': self._ovn_client._l3_plugin.get_floatingips,
                 'ovn_get': self._nb_idl.get_floatingip_in_nat_or_lb,
                 'ovn_create': self._create_floatingip_and_pf,
                 'ovn_update': self._update_floatingip_and_pf,
@@ -199,6 +219,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_ROUTERS: {
                 'neutron_get': self._ovn_client._l3_plugin.get_router,
+                'neutron_list': self._ovn_client._l3_plugin.get_routers,
                 'ovn_get': self._nb_idl.get_lrouter,
                 'ovn_create': self._ovn_client.create_router,
                 'ovn_update': self._ovn_client.update_router,
@@ -206,6 +227,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_ADDRESS_GROUPS: {
                 'neutron_get': self._ovn_client._plugin.get_address_group,
+                'neutron_list': self._ovn_client._plugin.get_address_groups,
                 'ovn_get': self._nb_idl.get_address_set,
                 'ovn_create': self._ovn_client.create_address_group,
                 'ovn_update': self._ovn_client.update_address_group,
@@ -213,6 +235,7 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             },
             ovn_const.TYPE_SECURITY_GROUPS: {
                 'neutron_get': self._ovn_client._plugin.get_security_group,
+                'neutron_list': self._ovn_client._plugin.get_security_groups,
                 'ovn_get': self._nb_idl.get_port_group,
                 'ovn_create': self._ovn_client.create_security_group,
                 'ovn_delete': self._ovn_client.delete_security_group,
@@ -220,6 +243,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             ovn_const.TYPE_SECURITY_GROUP_RULES: {
                 'neutron_get':
                     self._ovn_client._plugin.get_security_group_rule,
+                'neutron_list':
+                    self._ovn_client._plugin.get_security_group_rules,
                 'ovn_get': self._nb_idl.get_acl_by_id,
                 'ovn_create': self._ovn_client.create_security_group_rule,
                 'ovn_delete': self._ovn_client.delete_security_group_rule,
@@ -227,6 +252,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             ovn_const.TYPE_ROUTER_PORTS: {
                 'neutron_get':
                     self._ovn_client._plugin.get_port,
+                'neutron_list':
+                    self._ovn_client._plugin.get_ports,
                 'ovn_get': self._nb_idl.get_lrouter_port,
                 'ovn_create': self._create_lrouter_port,
                 'ovn_update': self._ovn_client.update_router_port,
@@ -253,17 +280,30 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
                 LOG.exception(
                     'Unknown error while executing "%s"', func.__name__)
 
-    def _fix_create_update(self, context, row):
+    @property
+    def fix_stats(self):
+        """Counters of the inconsistencies processed, per resource type.
+
+        Each resource type maps to a ``collections.Counter`` with the number
+        of ``batches`` processed and the number of resources ``fixed``,
+        ``failed`` and ``skipped`` (no longer present in the Neutron DB).
+        """
+        return {res_type: dict(counter)
+                for res_type, counter in self._fix_stats.items()}
+
+    def _fix_create_update(self, context, row, n_obj=None):
         res_map = self._resources_func_map[row.resource_type]
-        try:
-            # Get the latest version of the resource in Neutron DB
-            n_obj = res_map['neutron_get'](context, row.resource_uuid)
-        except n_exc.NotFound:
-            LOG.warning('Skip fixing resource %(res_uuid)s (type: '
-                        '%(res_type)s). Resource does not exist in Neutron '
-                        'database anymore', {'res_uuid': row.resource_uuid,
-                                             'res_type': row.resource_type})
-            return
+        if n_obj is None:
+            try:
+                # Get the latest version of the resource in Neutron DB
+                n_obj = res_map['neutron_get'](context, row.resource_uuid)
+            except n_exc.NotFound:
+                LOG.warning('Skip fixing resource %(res_uuid)s (type: '
+                            '%(res_type)s). Resource does not exist in '
+                            'Neutron database anymore',
+                            {'res_uuid': row.resource_uuid,
+                             'res_type': row.resource_type})
+                return
 
         ovn_obj = res_map['ovn_get'](row.resource_uuid)
         try:
@@ -321,6 +361,124 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
             LOG.error('Standard attribute ID not found for object ID %s',
                       n_obj['id'])
 
+    def _is_ovn_update_needed(self, resource_type, n_obj):
+        """Check if the resource exists in OVN with an older revision."""
+        ovn_objs = self._resources_func_map[resource_type]['ovn_get'](
+            n_obj['id'])
+        # NOTE(liushy): We create two Address_Sets for one Address_Group.
+        if resource_type != ovn_const.TYPE_ADDRESS_GROUPS:
+            ovn_objs = [ovn_objs]
+        if not all(ovn_objs):
+            return False
+        return any(int(getattr(ovn_obj, 'external_ids', {}).get(
+                       ovn_const.OVN_REV_NUM_EXT_ID_KEY, -1)) !=
+                   n_obj['revision_number'] for ovn_obj in ovn_objs)
+
+    def _fix_row(self, fix_func, context, row, *args):
+        """Fix a single inconsistency, returning True if it succeeded."""
+        LOG.debug('Maintenance task: Fixing resource %(res_uuid)s '
+                  '(type: %(res_type)s)', {'res_uuid': row.resource_uuid,
+                                           'res_type': row.resource_type})
+        try:
+            fix_func(context, row, *args)
+            return True
+        except Exception:
+            LOG.exception('Maintenance task: Failed to fix resource '
+                          '%(res_uuid)s (type: %(res_type)s)',
+                          {'res_uuid': row.resource_uuid,
+                           'res_type': row.resource_type})
+            return False
+
+    def _fix_update_batch(self, context, resource_type, rows_objs):
+        """Update the OVN objects of a batch in a single OVN transaction.
+
+        :returns: the number of resources fixed and failed.
+        """
+        ovn_update = self._resources_func_map[resource_type]['ovn_update']
+        try:
+            with self._nb_idl.transaction(check_error=True,
+                                          revision_mismatch_raise=True):
+                for _row, n_obj in rows_objs:
+                    ovn_update(context, n_obj)
+        except Exception:
+            LOG.warning('Maintenance task: Failed to update a batch of '
+                        '%(count)d resources (type: %(res_type)s) in a '
+                        'single transaction, fixing them one by one',
+                        {'count': len(rows_objs), 'res_type': resource_type})
+            fixed = sum(self._fix_row(self._fix_create_update, context, row,
+                                      n_obj) for row, n_obj in rows_objs)
+            return fixed, len(rows_objs) - fixed
+
+        # The nested "ovn_update" transactions are not committed when their
+        # revision check is evaluated so the revision numbers are bumped
+        # here, once the whole batch has been committed.
+        with db_api.CONTEXT_WRITER.using(context):
+            for _row, n_obj in rows_objs:
+                revision_numbers_db.bump_revision(context, n_obj,
+                                                  resource_type)
+        return len(rows_objs), 0
+
+    def _fix_create_update_batch(self, context, resource_type, rows):
+        """Fix a batch of create/update inconsistencies of the same type.
+
+        The Neutron resources are read with a single query. The resources
+        that only need an update of their existing OVN objects are written
+        in a single OVN transaction, if their type supports it, while the
+        rest are fixed one by one.
+        """
+        stats = self._fix_stats[resource_type]
+        timer = timeutils.StopWatch().start()
+        fixed = failed = skipped = 0
+        if resource_type == ovn_const.TYPE_SUBNETS:
+            # NOTE(lucasagomes): The way to fix subnets is bit
+            # different than other resources. A subnet in OVN language
+            # is just a DHCP rule but, this rule only exist if the
+            # subnet in Neutron has the "enable_dhcp" attribute set
+            # to True. So, it's possible to have a consistent subnet
+            # resource even when it does not exist in the OVN database.
+            for row in rows:
+                if self._fix_row(self._fix_create_update_subnet, context,
+                                 row):
+                    fixed += 1
+                else:
+                    failed += 1
+        else:
+            res_map = self._resources_func_map[resource_type]
+            n_objs = {n_obj['id']: n_obj for n_obj in res_map['neutron_list'](
+                context, filters={'id': [row.resource_uuid for row in rows]})}
+            batch_update = []
+            for row in rows:
+                n_obj = n_objs.get(row.resource_uuid)
+                if n_obj is None:
+                    LOG.warning('Skip fixing resource %(res_uuid)s (type: '
+                                '%(res_type)s). Resource does not exist in '
+                                'Neutron database anymore',
+                                {'res_uuid': row.resource_uuid,
+                                 'res_type': resource_type})
+                    skipped += 1
+                elif (resource_type in BATCH_UPDATE_TYPES and
+                        self._is_ovn_update_needed(resource_type, n_obj)):
+                    batch_update.append((row, n_obj))
+                elif self._fix_row(self._fix_create_update, context, row,
+                                   n_obj):
+                    fixed += 1
+                else:
+                    failed += 1
+            if batch_update:
+                batch_fixed, batch_failed = self._fix_update_batch(
+                    context, resource_type, batch_update)
+                fixed += batch_fixed
+                failed += batch_failed
+
+        timer.stop()
+        stats.update(batches=1, fixed=fixed, failed=failed, skipped=skipped)
+        LOG.debug('Maintenance task: Fixed a batch of %(count)d resources '
+                  '(type: %(res_type)s) in %(time).2f seconds: '
+                  '%(fixed)d fixed, %(failed)d failed, %(skipped)d skipped',
+                  {'count': len(rows), 'res_type': resource_type,
+                   'time': timer.elapsed(), 'fixed': fixed,
+                   'failed': failed, 'skipped': skipped})
+
     def _fix_delete(self, context, row):
         res_map = self._resources_func_map[row.resource_type]
         ovn_obj = res_map['ovn_get'](row.resource_uuid)
@@ -386,27 +544,22 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
 
         dbg_log_msg = ('Maintenance task: Fixing resource %(res_uuid)s '
                        '(type: %(res_type)s) at %(type_)s')
-        # Fix the create/update resources inconsistencies
-        for row in create_update_inconsistencies:
-            LOG.debug(dbg_log_msg, {'res_uuid': row.resource_uuid,
-                                    'res_type': row.resource_type,
-                                    'type_': INCONSISTENCY_TYPE_CREATE_UPDATE})
-            try:
-                # NOTE(lucasagomes): The way to fix subnets is bit
-                # different than other resources. A subnet in OVN language
-                # is just a DHCP rule but, this rule only exist if the
-                # subnet in Neutron has the "enable_dhcp" attribute set
-                # to True. So, it's possible to have a consistent subnet
-                # resource even when it does not exist in the OVN database.
-                if row.resource_type == ovn_const.TYPE_SUBNETS:
-                    self._fix_create_update_subnet(admin_context, row)
-                else:
-                    self._fix_create_update(admin_context, row)
-            except Exception:
-                LOG.exception('Maintenance task: Failed to fix resource '
-                              '%(res_uuid)s (type: %(res_type)s)',
-                              {'res_uuid': row.resource_uuid,
-                               'res_type': row.resource_type})
+        # Fix the create/update resources inconsistencies, grouped by
+        # resource type (the rows are sorted by type priority).
+        batch_size = ovn_conf.get_ovn_maintenance_batch_size()
+        for resource_type, rows in itertools.groupby(
+                create_update_inconsistencies,
+                key=lambda row: row.resource_type):
+            rows = list(rows)
+            for i in range(0, len(rows), batch_size):
+                try:
+                    self._fix_create_update_batch(
+                        admin_context, resource_type, rows[i:i + batch_size])
+                except Exception:
+                    LOG.exception('Maintenance task: Failed to fix a batch '
+                                  'of resources (type: %s)', resource_type)
+                    self._fix_stats[resource_type].update(
+                        batches=1, failed=len(rows[i:i + batch_size]))
 
         # Fix the deleted resources inconsistencies
         for row in delete_inconsistencies:
@@ -431,6 +584,8 @@ class DBInconsistenciesPeriodics(SchemaAwarePeriodicsBase):
         self._sync_timer.stop()
         LOG.info('Maintenance task: Synchronization completed '
                  '(took %.2f seconds)', self._sync_timer.elapsed())
+        LOG.info('Maintenance task: Inconsistencies processed since the '
+                 'worker started: %s', self.fix_stats)
 
     def _create_lrouter_port(self, context, port):
         router_id = port['device_id']
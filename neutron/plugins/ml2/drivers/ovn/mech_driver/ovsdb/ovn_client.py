@@ -565,11 +565,18 @@ class OVNClient:
         return port_info, external_ids
 
     def create_port(self, context, port):
-        if utils.is_lsp_ignored(port):
-            return
+        self.create_ports(context, [port])
 
-        port_info, external_ids = self.get_external_ids_from_port(port)
-        lswitch_name = utils.ovn_name(port['network_id'])
+    def create_ports(self, context, ports):
+        """Create the logical switch ports of several Neutron ports.
+
+        All the logical switch ports are created in a single OVN NB
+        transaction and the revision numbers are bumped once it is
+        committed.
+        """
+        ports = [port for port in ports if not utils.is_lsp_ignored(port)]
+        if not ports:
+            return
 
         # It's possible to have a network created on one controller and then a
         # port created on a different controller quickly enough that the second
@@ -577,75 +584,83 @@ class OVNClient:
         # OVN northbound database.  Check if the logical switch is present
         # or not in the idl's local copy of the database before creating
         # the lswitch port.
-        self._nb_idl.check_for_row_by_value_and_retry(
-            'Logical_Switch', 'name', lswitch_name)
+        for network_id in dict.fromkeys(port['network_id'] for port in ports):
+            self._nb_idl.check_for_row_by_value_and_retry(
+                'Logical_Switch', 'name', utils.ovn_name(network_id))
 
         with self._nb_idl.transaction(check_error=True) as txn:
-            dhcpv4_options, dhcpv6_options = self.update_port_dhcp_options(
-                port_info, txn=txn)
-            # The lport_name *must* be neutron port['id'].  It must match the
-            # iface-id set in the Interfaces table of the Open_vSwitch
-            # database which nova sets to be the port ID.
-
-            kwargs = {
-                'lport_name': port['id'],
-                'lswitch_name': lswitch_name,
-                'addresses': port_info.addresses,
-                'external_ids': external_ids,
-                'parent_name': port_info.parent_name,
-                'tag': port_info.tag,
-                'enabled': port.get('admin_state_up'),
-                'options': port_info.options,
-                'type': port_info.type,
-                'port_security': port_info.port_security,
-                'dhcpv4_options': dhcpv4_options,
-                'dhcpv6_options': dhcpv6_options
-            }
-
-            if (self.is_external_ports_supported() and
-                    port_info.type == ovn_const.LSP_TYPE_EXTERNAL):
-                kwargs['ha_chassis_group'], _ = (
-                    utils.sync_ha_chassis_group_network(
-                        context, self._nb_idl, self._sb_idl, port['id'],
-                        port['network_id'], txn))
+            for port in ports:
+                self._create_port_in_txn(context, txn, port)
 
-            # NOTE(mjozefcz): Do not set addresses if the port is not
-            # bound, has no device_owner and it is OVN LB VIP port.
-            # For more details check related bug #1789686.
-            if (port.get('name').startswith(ovn_const.LB_VIP_PORT_PREFIX) and
-                    not port.get('device_owner') and
-                    port.get(portbindings.VIF_TYPE) ==
-                    portbindings.VIF_TYPE_UNBOUND):
-                kwargs['addresses'] = []
-
-            # Check if the parent port was created with the
-            # allowed_address_pairs already set
-            allowed_address_pairs = port.get('allowed_address_pairs', [])
-            if (allowed_address_pairs and
-                    port_info.type != ovn_const.LSP_TYPE_VIRTUAL):
-                addrs = [addr['ip_address'] for addr in allowed_address_pairs]
-                self._set_unset_virtual_port_type(context, txn, port, addrs)
-
-            port_cmd = txn.add(self._nb_idl.create_lswitch_port(
-                **kwargs))
-
-            sg_ids = utils.get_lsp_security_groups(port)
-            # If this is not a trusted port and port security is enabled,
-            # add it to the default drop Port Group so that all traffic
-            # is dropped by default.
-            if not utils.is_lsp_trusted(port) and port_info.port_security:
-                self._add_port_to_drop_port_group(port_cmd, txn)
-            # Just add the port to its Port Group.
-            for sg in sg_ids:
-                txn.add(self._nb_idl.pg_add_ports(
-                    utils.ovn_port_group_name(sg), port_cmd))
-
-            if self.is_dns_required_for_port(port):
-                self.add_txns_to_sync_port_dns_records(txn, port)
+        for port in ports:
+            db_rev.bump_revision(context, port, ovn_const.TYPE_PORTS)
 
-            self._qos_driver.create_port(txn, port, port_cmd)
+    def _create_port_in_txn(self, context, txn, port):
+        port_info, external_ids = self.get_external_ids_from_port(port)
+        lswitch_name = utils.ovn_name(port['network_id'])
+        dhcpv4_options, dhcpv6_options = self.update_port_dhcp_options(
+            port_info, txn=txn)
+        # The lport_name *must* be neutron port['id'].  It must match the
+        # iface-id set in the Interfaces table of the Open_vSwitch
+        # database which nova sets to be the port ID.
+
+        kwargs = {
+            'lport_name': port['id'],
+            'lswitch_name': lswitch_name,
+            'addresses': port_info.addresses,
+            'external_ids': external_ids,
+            'parent_name': port_info.parent_name,
+            'tag': port_info.tag,
+            'enabled': port.get('admin_state_up'),
+            'options': port_info.options,
+            'type': port_info.type,
+            'port_security': port_info.port_security,
+            'dhcpv4_options': dhcpv4_options,
+            'dhcpv6_options': dhcpv6_options
+        }
 
-        db_rev.bump_revision(context, port, ovn_const.TYPE_PORTS)
+        if (self.is_external_ports_supported() and
+                port_info.type == ovn_const.LSP_TYPE_EXTERNAL):
+            kwargs['ha_chassis_group'], _ = (
+                utils.sync_ha_chassis_group_network(
+                    context, self._nb_idl, self._sb_idl, port['id'],
+                    port['network_id'], txn))
+
+        # NOTE(mjozefcz): Do not set addresses if the port is not
+        # bound, has no device_owner and it is OVN LB VIP port.
+        # For more details check related bug #1789686.
+        if (port.get('name').startswith(ovn_const.LB_VIP_PORT_PREFIX) and
+                not port.get('device_owner') and
+                port.get(portbindings.VIF_TYPE) ==
+                portbindings.VIF_TYPE_UNBOUND):
+            kwargs['addresses'] = []
+
+        # Check if the parent port was created with the
+        # allowed_address_pairs already set
+        allowed_address_pairs = port.get('allowed_address_pairs', [])
+        if (allowed_address_pairs and
+                port_info.type != ovn_const.LSP_TYPE_VIRTUAL):
+            addrs = [addr['ip_address'] for addr in allowed_address_pairs]
+            self._set_unset_virtual_port_type(context, txn, port, addrs)
+
+        port_cmd = txn.add(self._nb_idl.create_lswitch_port(
+            **kwargs))
+
+        sg_ids = utils.get_lsp_security_groups(port)
+        # If this is not a trusted port and port security is enabled,
+        # add it to the default drop Port Group so that all traffic
+        # is dropped by default.
+        if not utils.is_lsp_trusted(port) and port_info.port_security:
+            self._add_port_to_drop_port_group(port_cmd, txn)
+        # Just add the port to its Port Group.
+        for sg in sg_ids:
+            txn.add(self._nb_idl.pg_add_ports(
+                utils.ovn_port_group_name(sg), port_cmd))
+
+        if self.is_dns_required_for_port(port):
+            self.add_txns_to_sync_port_dns_records(txn, port)
+
+        self._qos_driver.create_port(txn, port, port_cmd)
 
     def _set_unset_virtual_port_type(self, context, txn, parent_port,
                                      addresses, unset=False):
@@ -11,9 +11,12 @@
 #    under the License.
 
 import abc
+import collections
 from datetime import datetime
+from datetime import timedelta
 import itertools
 
+import eventlet
 from eventlet import greenthread
 from neutron_lib.api.definitions import segment as segment_def
 from neutron_lib import constants
@@ -24,12 +27,14 @@ from neutron_lib.plugins import constants as plugin_constants
 from neutron_lib.plugins import directory
 from neutron_lib.utils import helpers
 from oslo_log import log
+from oslo_utils import timeutils
 from ovsdbapp.backend.ovs_idl import idlutils
 
 from neutron.common.ovn import acl as acl_utils
 from neutron.common.ovn import constants as ovn_const
 from neutron.common.ovn import utils
 from neutron.conf.plugins.ml2.drivers.ovn import ovn_conf
+from neutron.db import ovn_revision_numbers_db as revision_numbers_db
 from neutron import manager
 from neutron.objects.port_forwarding import PortForwarding
 from neutron.plugins.ml2.drivers.ovn.mech_driver.ovsdb.extensions import qos \
@@ -44,6 +49,14 @@ SYNC_MODE_OFF = 'off'
 SYNC_MODE_LOG = 'log'
 SYNC_MODE_REPAIR = 'repair'
 
+SYNC_TYPE_FULL = 'full'
+SYNC_TYPE_INCREMENTAL = 'incremental'
+
+# Time (in seconds) subtracted from the start time of a synchronization when
+# it is stored as checkpoint, to absorb the clock skew between the hosts
+# updating the Neutron resources.
+SYNC_CHECKPOINT_MARGIN = 60
+
 
 class OvnDbSynchronizer(metaclass=abc.ABCMeta):
 
@@ -86,6 +99,7 @@ class OvnNbSynchronizer(OvnDbSynchronizer):
             self.segments_plugin = (
                 manager.NeutronManager.load_class_for_provider(
                     'neutron.service_plugins', 'segments')())
+        self.sync_type = ovn_conf.get_ovn_neutron_sync_type()
 
     def stop(self):
         if utils.is_ovn_l3(self.l3_plugin):
@@ -103,17 +117,351 @@ class OvnNbSynchronizer(OvnDbSynchronizer):
                   str(datetime.now()))
 
         ctx = context.get_admin_context()
-        self.sync_port_groups(ctx)
-        self.sync_networks_ports_and_dhcp_opts(ctx)
-        self.sync_port_dns_records(ctx)
-        self.sync_acls(ctx)
-        self.sync_routers_and_rports(ctx)
-        self.sync_port_qos_policies(ctx)
-        self.sync_fip_qos_policies(ctx)
+        sync_start = timeutils.utcnow()
+        checkpoint = None
+        if self.sync_type == SYNC_TYPE_INCREMENTAL:
+            checkpoint = self._get_sync_checkpoint()
+            if not checkpoint:
+                LOG.info("No previous OVN-Northbound DB sync checkpoint "
+                         "found, executing a full sync")
+            elif self._is_full_sync_due():
+                # Only a full sync removes the OVN objects left without a
+                # revision number, like stale DHCP options or static routes.
+                LOG.info("No OVN-Northbound DB full sync executed in the "
+                         "last %d seconds, executing a full sync",
+                         ovn_conf.get_ovn_neutron_sync_full_interval())
+                checkpoint = None
+
+        if checkpoint:
+            self.sync_incremental(ctx, checkpoint)
+        else:
+            self.sync_port_groups(ctx)
+            self.sync_networks_ports_and_dhcp_opts(ctx)
+            self.sync_port_dns_records(ctx)
+            self.sync_acls(ctx)
+            self.sync_routers_and_rports(ctx)
+            self.sync_port_qos_policies(ctx)
+            self.sync_fip_qos_policies(ctx)
+
+        # Only a "repair" sync leaves both databases consistent; in "log"
+        # mode the next sync must consider the same resources again.
+        if self.mode == SYNC_MODE_REPAIR:
+            self._set_sync_checkpoint(
+                sync_start - timedelta(seconds=SYNC_CHECKPOINT_MARGIN),
+                full=not checkpoint)
 
         LOG.debug("OVN-Northbound DB sync process completed @ %s",
                   str(datetime.now()))
 
+    def _get_sync_checkpoint(self, key=ovn_const.OVN_DB_SYNC_CHECKPOINT_KEY):
+        """Return the time of the last successful repair sync, if any.
+
+        The checkpoint is stored in the OVN NB DB itself (NB_Global
+        external_ids) so that restoring an older NB DB backup also restores
+        the matching checkpoint.
+        """
+        nb_global = self.ovn_api.nb_global
+        value = nb_global.external_ids.get(key)
+        if not value:
+            return None
+        try:
+            return timeutils.normalize_time(timeutils.parse_isotime(value))
+        except ValueError:
+            LOG.warning("Invalid OVN-Northbound DB sync checkpoint %s, "
+                        "ignoring it", value)
+            return None
+
+    def _set_sync_checkpoint(self, checkpoint, full=False):
+        external_ids = {ovn_const.OVN_DB_SYNC_CHECKPOINT_KEY:
+                        checkpoint.isoformat()}
+        if full:
+            external_ids[ovn_const.OVN_DB_FULL_SYNC_CHECKPOINT_KEY] = (
+                checkpoint.isoformat())
+        self.ovn_api.db_set(
+            'NB_Global', '.',
+            external_ids=external_ids).execute(check_error=True)
+
+    def _is_full_sync_due(self):
+        interval = ovn_conf.get_ovn_neutron_sync_full_interval()
+        if not interval:
+            return False
+        last_full_sync = self._get_sync_checkpoint(
+            key=ovn_const.OVN_DB_FULL_SYNC_CHECKPOINT_KEY)
+        return (not last_full_sync or
+                timeutils.is_older_than(last_full_sync, interval))
+
+    def _get_incremental_sync_map(self):
+        return {
+            ovn_const.TYPE_NETWORKS: {
+                'neutron_list': self.core_plugin.get_networks,
+                'ovn_get': self.ovn_api.get_lswitch,
+                'ovn_create': self._ovn_client.create_network,
+                'ovn_update': self._ovn_client.update_network,
+                'ovn_delete': self._ovn_client.delete_network,
+            },
+            ovn_const.TYPE_SECURITY_GROUPS: {
+                'neutron_list': self.core_plugin.get_security_groups,
+                'ovn_get': self.ovn_api.get_port_group,
+                'ovn_create': self._ovn_client.create_security_group,
+                'ovn_delete': self._ovn_client.delete_security_group,
+            },
+            ovn_const.TYPE_SUBNETS: {
+                'neutron_list': self.core_plugin.get_subnets,
+                'ovn_create': self._create_subnet_in_ovn,
+                'ovn_update': self._update_subnet_in_ovn,
+                'ovn_delete': self._ovn_client.delete_subnet,
+            },
+            ovn_const.TYPE_ROUTERS: {
+                'neutron_list': self.l3_plugin.get_routers,
+                'ovn_get': self.ovn_api.get_lrouter,
+                'ovn_create': self._ovn_client.create_router,
+                'ovn_update': self._ovn_client.update_router,
+                'ovn_delete': self._ovn_client.delete_router,
+            },
+            ovn_const.TYPE_PORTS: {
+                'neutron_list': self.core_plugin.get_ports,
+                'ovn_get': self.ovn_api.get_lswitch_port,
+                'ovn_create': self._create_port_in_ovn,
+                'ovn_update': self._ovn_client.update_port,
+                'ovn_delete': self._ovn_client.delete_port,
+            },
+            ovn_const.TYPE_ROUTER_PORTS: {
+                'neutron_list': self.core_plugin.get_ports,
+                'ovn_get': self.ovn_api.get_lrouter_port,
+                'ovn_create': self._create_router_port_in_ovn,
+                'ovn_update': self._ovn_client.update_router_port,
+                'ovn_delete': self._ovn_client.delete_router_port,
+            },
+            ovn_const.TYPE_FLOATINGIPS: {
+                'neutron_list': self.l3_plugin.get_floatingips,
+                'ovn_get': self.ovn_api.get_floatingip_in_nat_or_lb,
+                'ovn_create': self._create_floatingip_in_ovn,
+                'ovn_update': self._update_floatingip_in_ovn,
+                'ovn_delete': self._delete_floatingip_in_ovn,
+            },
+            ovn_const.TYPE_ADDRESS_GROUPS: {
+                'neutron_list': self.core_plugin.get_address_groups,
+                'ovn_get': self.ovn_api.get_address_set,
+                'ovn_create': self._ovn_client.create_address_group,
+                'ovn_update': self._ovn_client.update_address_group,
+                'ovn_delete': self._ovn_client.delete_address_group,
+            },
+            ovn_const.TYPE_SECURITY_GROUP_RULES: {
+                'neutron_list': self.core_plugin.get_security_group_rules,
+                'ovn_get': self.ovn_api.get_acl_by_id,
+                'ovn_create': self._ovn_client.create_security_group_rule,
+            },
+        }
+
+    def _create_subnet_in_ovn(self, ctx, subnet):
+        network = self.core_plugin.get_network(ctx, subnet['network_id'])
+        self._ovn_client.create_subnet(ctx, subnet, network)
+
+    def _update_subnet_in_ovn(self, ctx, subnet):
+        network = self.core_plugin.get_network(ctx, subnet['network_id'])
+        self._ovn_client.update_subnet(ctx, subnet, network)
+
+    def _create_router_port_in_ovn(self, ctx, port):
+        router = self.l3_plugin.get_router(ctx, port['device_id'])
+        self._ovn_client._create_lrouter_port(ctx, router, port)
+
+    def _create_floatingip_in_ovn(self, ctx, floatingip):
+        self._ovn_client.create_floatingip(ctx, floatingip)
+        self.l3_plugin.port_forwarding.maintenance_create(ctx, floatingip)
+
+    def _update_floatingip_in_ovn(self, ctx, floatingip):
+        self._ovn_client.update_floatingip(ctx, floatingip)
+        self.l3_plugin.port_forwarding.maintenance_update(ctx, floatingip)
+
+    def _delete_floatingip_in_ovn(self, ctx, fip_id):
+        self.l3_plugin.port_forwarding.maintenance_delete(ctx, fip_id)
+        self._ovn_client.delete_floatingip(ctx, fip_id)
+
+    def _iter_changed_resources(self, ctx, resource_type, checkpoint):
+        """Yield chunks of the resources modified since the checkpoint."""
+        chunk_size = ovn_conf.get_ovn_neutron_sync_chunk_size()
+        marker = None
+        while True:
+            rows = revision_numbers_db.get_resources_changed_since(
+                ctx, resource_type, checkpoint, limit=chunk_size,
+                marker=marker)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            marker = rows[-1].resource_uuid
+
+    def sync_incremental(self, ctx, checkpoint):
+        """Sync only the resources modified since the given checkpoint.
+
+        The candidate resources are read from the ovn_revision_numbers
+        table in chunks of ``neutron_sync_chunk_size`` resources and each
+        chunk is compared with the OVN NB DB in a separate green thread. The
+        resource types are processed one after the other, root ones first,
+        so a child resource is never created before its parent.
+        """
+        LOG.debug('OVN-NB incremental sync of the resources modified since '
+                  '%(checkpoint)s started @ %(now)s',
+                  {'checkpoint': checkpoint, 'now': str(datetime.now())})
+        res_map = self._get_incremental_sync_map()
+        pool = eventlet.GreenPool(ovn_conf.get_ovn_neutron_sync_workers())
+        for resource_type in ovn_const.TYPES_PRIORITY_ORDER:
+            for rows in self._iter_changed_resources(ctx, resource_type,
+                                                     checkpoint):
+                pool.spawn_n(self._sync_resource_chunk,
+                             res_map[resource_type], resource_type, rows)
+            pool.waitall()
+
+        self._sync_deleted_resources(ctx, res_map)
+        LOG.debug('OVN-NB incremental sync completed @ %s',
+                  str(datetime.now()))
+
+    def _sync_resource_chunk(self, res_map, resource_type, rows):
+        # Each green thread needs its own DB session.
+        ctx = context.get_admin_context()
+        revision_rows = {row.resource_uuid: row for row in rows}
+        try:
+            n_objs = res_map['neutron_list'](
+                ctx, filters={'id': list(revision_rows)})
+        except Exception:
+            LOG.exception('Failed to read %(count)d resources of type '
+                          '%(res_type)s from the Neutron DB',
+                          {'count': len(rows), 'res_type': resource_type})
+            return
+
+        for n_obj in n_objs:
+            try:
+                self._sync_resource(ctx, res_map, resource_type, n_obj,
+                                    revision_rows[n_obj['id']])
+            except Exception:
+                LOG.exception('Failed to sync resource %(res_uuid)s (type: '
+                              '%(res_type)s) in OVN NB DB',
+                              {'res_uuid': n_obj['id'],
+                               'res_type': resource_type})
+
+    @staticmethod
+    def _get_ovn_objs(res_map, resource_type, resource_uuid):
+        ovn_objs = res_map['ovn_get'](resource_uuid)
+        # An address group is mapped to two Address_Sets, one per IP version.
+        if resource_type == ovn_const.TYPE_ADDRESS_GROUPS:
+            return list(ovn_objs)
+        return [ovn_objs]
+
+    def _get_ovn_revisions(self, res_map, resource_type, n_obj):
+        """Return the revision numbers stored in the OVN NB DB.
+
+        Returns None if (any of) the OVN object(s) mapping the resource does
+        not exist.
+        """
+        if resource_type == ovn_const.TYPE_SUBNETS:
+            # A subnet only exists in OVN as a DHCP_Options row if DHCP is
+            # enabled, its consistency is tracked by the revision table only.
+            return []
+        ovn_objs = self._get_ovn_objs(res_map, resource_type, n_obj['id'])
+        if not all(ovn_objs):
+            return None
+        return [int(getattr(ovn_obj, 'external_ids', {}).get(
+                    ovn_const.OVN_REV_NUM_EXT_ID_KEY, -1))
+                for ovn_obj in ovn_objs]
+
+    def _sync_resource(self, ctx, res_map, resource_type, n_obj, rev_row):
+        if (resource_type == ovn_const.TYPE_PORTS and
+                utils.is_lsp_ignored(n_obj)):
+            return
+        revision_number = n_obj['revision_number']
+        ovn_revisions = self._get_ovn_revisions(res_map, resource_type, n_obj)
+        if ovn_revisions is None or (
+                resource_type == ovn_const.TYPE_SUBNETS and
+                rev_row.revision_number == ovn_const.INITIAL_REV_NUM):
+            LOG.warning('Resource %(res_uuid)s (type: %(res_type)s) found in '
+                        'Neutron but not in OVN NB DB',
+                        {'res_uuid': n_obj['id'], 'res_type': resource_type})
+            if self.mode == SYNC_MODE_REPAIR:
+                res_map['ovn_create'](ctx, n_obj)
+            return
+
+        ovn_outdated = any(rev != revision_number for rev in ovn_revisions)
+        if resource_type == ovn_const.TYPE_SUBNETS:
+            ovn_outdated = rev_row.revision_number != revision_number
+        if ovn_outdated and 'ovn_update' in res_map:
+            LOG.warning('Resource %(res_uuid)s (type: %(res_type)s) is '
+                        'outdated in OVN NB DB',
+                        {'res_uuid': n_obj['id'], 'res_type': resource_type})
+            if self.mode == SYNC_MODE_REPAIR:
+                res_map['ovn_update'](ctx, n_obj)
+            return
+
+        # The OVN NB DB is in sync with Neutron (or does not track updates
+        # of this resource type), just fix the revision table if needed.
+        if (self.mode == SYNC_MODE_REPAIR and
+                rev_row.revision_number != revision_number):
+            revision_numbers_db.bump_revision(ctx, n_obj, resource_type)
+
+    def _sync_deleted_resources(self, ctx, res_map):
+        sg_rule_rows = []
+        for row in revision_numbers_db.get_deleted_resources(ctx):
+            LOG.warning('Resource %(res_uuid)s (type: %(res_type)s) deleted '
+                        'in Neutron but not in OVN NB DB',
+                        {'res_uuid': row.resource_uuid,
+                         'res_type': row.resource_type})
+            if self.mode != SYNC_MODE_REPAIR:
+                continue
+            if row.resource_type == ovn_const.TYPE_SECURITY_GROUP_RULES:
+                # Deleted once the security groups are, their port groups
+                # may have removed the ACLs already.
+                sg_rule_rows.append(row)
+                continue
+            type_map = res_map[row.resource_type]
+            try:
+                if ('ovn_get' in type_map and
+                        row.resource_type != ovn_const.TYPE_PORTS and
+                        not all(self._get_ovn_objs(
+                            type_map, row.resource_type,
+                            row.resource_uuid))):
+                    revision_numbers_db.delete_revision(
+                        ctx, row.resource_uuid, row.resource_type)
+                else:
+                    type_map['ovn_delete'](ctx, row.resource_uuid)
+            except Exception:
+                LOG.exception('Failed to delete resource %(res_uuid)s (type: '
+                              '%(res_type)s) from OVN NB DB',
+                              {'res_uuid': row.resource_uuid,
+                               'res_type': row.resource_type})
+        if sg_rule_rows:
+            self._delete_security_group_rules_in_ovn(ctx, sg_rule_rows)
+
+    def _delete_security_group_rules_in_ovn(self, ctx, rows):
+        """Delete the ACLs of the deleted security group rules.
+
+        The security group of a deleted rule is not known anymore, its ACLs
+        are found by the rule ID stored in their external_ids.
+        """
+        rule_acls = collections.defaultdict(list)
+        for pg in self.ovn_api._tables['Port_Group'].rows.values():
+            for acl in pg.acls:
+                rule_id = acl.external_ids.get(
+                    ovn_const.OVN_SG_RULE_EXT_ID_KEY)
+                if rule_id:
+                    rule_acls[rule_id].append((pg.name, acl))
+
+        for row in rows:
+            try:
+                acls = rule_acls.get(row.resource_uuid)
+                if acls:
+                    with self.ovn_api.transaction(check_error=True) as txn:
+                        for pg_name, acl in acls:
+                            txn.add(self.ovn_api.pg_acl_del(
+                                pg_name, acl.direction, acl.priority,
+                                acl.match, if_exists=True))
+                revision_numbers_db.delete_revision(
+                    ctx, row.resource_uuid, row.resource_type)
+            except Exception:
+                LOG.exception('Failed to delete resource %(res_uuid)s (type: '
+                              '%(res_type)s) from OVN NB DB',
+                              {'res_uuid': row.resource_uuid,
+                               'res_type': row.resource_type})
+
     def _create_port_in_ovn(self, ctx, port):
         # Remove any old ACLs for the port to avoid creating duplicate ACLs.
         self.ovn_api.delete_acl(
@@ -817,7 +817,8 @@ class OvnIdlDistributedLock(BaseOvnIdl):
         self.notify_handler = OvnDbNotifyHandler(driver)
         self._node_uuid = self.driver.node_uuid
         self._hash_ring = hash_ring_manager.HashRingManager(
-            self.driver.hash_ring_group)
+            self.driver.hash_ring_group,
+            load_factor=ovn_conf.get_ovn_hash_ring_load_factor())
         self._last_touch = None
 
     def notify(self, event, row, updates=None):
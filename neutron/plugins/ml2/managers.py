@@ -475,12 +475,29 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
             servers.extend(driver.obj.start_rpc_listeners())
         return servers
 
+    @staticmethod
+    def _call_bulk_method(driver, method_name, contexts):
+        """Call the bulk version of a method on a mechanism driver.
+
+        Drivers can implement "<method_name>_bulk", receiving the list of
+        contexts at once; otherwise "<method_name>" is called per context.
+        """
+        bulk_method = getattr(driver, method_name + '_bulk', None)
+        if bulk_method is not None:
+            bulk_method(contexts)
+            return
+        method = getattr(driver, method_name)
+        for context in contexts:
+            method(context)
+
     def _call_on_drivers(self, method_name, context,
-                         continue_on_failure=False, raise_db_retriable=False):
+                         continue_on_failure=False, raise_db_retriable=False,
+                         bulk=False):
         """Helper method for calling a method across all mechanism drivers.
 
         :param method_name: name of the method to call
-        :param context: context parameter to pass to each method call
+        :param context: context parameter to pass to each method call, or
+        list of contexts if bulk is True
         :param continue_on_failure: whether or not to continue to call
         all mechanism drivers once one has raised an exception
         :param raise_db_retriable: whether or not to treat retriable db
@@ -490,11 +507,16 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         if any mechanism driver call fails. or DB retriable error when
         raise_db_retriable=False. See neutron_lib.db.api.is_retriable for
         what db exception is retriable
+        :param bulk: whether or not the method is called for a list of
+        contexts, see _call_bulk_method
         """
         errors = []
         for driver in self.ordered_mech_drivers:
             try:
-                getattr(driver.obj, method_name)(context)
+                if bulk:
+                    self._call_bulk_method(driver.obj, method_name, context)
+                else:
+                    getattr(driver.obj, method_name)(context)
             except Exception as e:
                 if raise_db_retriable and db_api.is_retriable(e):
                     with excutils.save_and_reraise_exception():
@@ -734,6 +756,69 @@ class MechanismManager(stevedore.named.NamedExtensionManager):
         """
         self._call_on_drivers("create_port_postcommit", context)
 
+    def create_port_precommit_bulk(self, contexts):
+        """Notify all mechanism drivers during bulk port creation.
+
+        :raises: DB retriable error if create_port_precommit raises them
+        See neutron_lib.db.api.is_retriable for what db exception is retriable
+        or neutron.plugins.ml2.common.MechanismDriverError
+        if any mechanism driver create_port_precommit call fails.
+
+        Called within the database transaction with the contexts of all the
+        ports of the bulk request. Mechanism drivers implementing
+        create_port_precommit_bulk receive all the contexts at once, the
+        others get a create_port_precommit call per port. If a mechanism
+        driver raises an exception, then a MechanismDriverError is
+        propagated to the caller, triggering a rollback.
+        """
+        self._call_on_drivers("create_port_precommit", contexts,
+                              raise_db_retriable=True, bulk=True)
+
+    def create_port_postcommit_bulk(self, contexts):
+        """Notify all mechanism drivers of bulk port creation.
+
+        :returns: a dictionary with, per port ID, the exception raised by
+        the mechanism driver that failed in create_port_postcommit for the
+        port.
+
+        Called after the database transaction with the contexts of all the
+        ports of the bulk request. Mechanism drivers implementing
+        create_port_postcommit_bulk receive all the contexts at once, the
+        others get a create_port_postcommit call per port. If a bulk call
+        fails, create_port_postcommit is called for each port to find the
+        ports that fail, so a failed bulk call must not leave any port
+        partially created. The next mechanism drivers are not called for
+        the failed ports, which the caller deletes.
+        """
+        errors = {}
+        for driver in self.ordered_mech_drivers:
+            contexts = [context for context in contexts
+                        if context.current['id'] not in errors]
+            if not contexts:
+                break
+            bulk_method = getattr(driver.obj, 'create_port_postcommit_bulk',
+                                  None)
+            if bulk_method is not None:
+                try:
+                    bulk_method(contexts)
+                    continue
+                except Exception:
+                    LOG.exception(
+                        "Mechanism driver '%(name)s' failed in "
+                        "create_port_postcommit_bulk, calling "
+                        "create_port_postcommit for each port",
+                        {'name': driver.name})
+            for context in contexts:
+                try:
+                    driver.obj.create_port_postcommit(context)
+                except Exception as e:
+                    LOG.exception(
+                        "Mechanism driver '%(name)s' failed in %(method)s",
+                        {'name': driver.name,
+                         'method': 'create_port_postcommit'})
+                    errors[context.current['id']] = e
+        return errors
+
     def update_port_precommit(self, context):
         """Notify all mechanism drivers during port update.
 
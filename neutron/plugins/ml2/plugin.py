@@ -13,11 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 import time
 
-import netaddr
-from netaddr.strategy import eui48
 from neutron_lib.agent import constants as agent_consts
 from neutron_lib.agent import topics
 from neutron_lib.api import converters
@@ -138,7 +137,6 @@ from neutron.extensions import quota_check_limit_default
 from neutron.extensions import security_groups_default_rules as \
         sg_default_rules_ext
 from neutron.extensions import vlantransparent
-from neutron.ipam import exceptions as ipam_exc
 from neutron.objects import base as base_obj
 from neutron.objects import ports as ports_obj
 from neutron.plugins.ml2.common import constants as ml2_consts
@@ -1350,18 +1348,21 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
     def get_network_contexts(self, context, network_ids):
         """Return a map of network_id to NetworkContext for network_ids."""
         net_filters = {'id': list(set(network_ids))}
-        nets_by_netid = {
-            n['id']: n for n in self.get_networks(context,
-                                                  filters=net_filters)
-        }
-        segments_by_netid = segments_db.get_networks_segments(
-            context, list(nets_by_netid.keys()))
-        netctxs_by_netid = {
-            net_id: driver_context.NetworkContext(
-                self, context, nets_by_netid[net_id],
-                segments=segments_by_netid[net_id])
-            for net_id in nets_by_netid.keys()
-        }
+        with db_api.CONTEXT_READER.using(context):
+            nets = [self._make_network_dict(net, context=context)
+                    for net in super()._get_networks(context,
+                                                     filters=net_filters)]
+            segments_by_netid = segments_db.get_networks_segments(
+                context, [net['id'] for net in nets])
+        netctxs_by_netid = {}
+        for net in nets:
+            # The segments are retrieved once for both the provider
+            # attributes of the network and its context
+            segments = segments_by_netid[net['id']]
+            self.type_manager.extend_network_with_provider_segments(
+                net, segments)
+            netctxs_by_netid[net['id']] = driver_context.NetworkContext(
+                self, context, net, segments=segments)
         return netctxs_by_netid
 
     @utils.transaction_guard
@@ -1545,7 +1546,15 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         elif self._check_update_has_security_groups(port):
             raise psec_exc.PortSecurityAndIPRequiredForSecurityGroups()
 
-    def _setup_dhcp_agent_provisioning_component(self, context, port):
+    def _setup_dhcp_agent_provisioning_component(self, context, port,
+                                                 dhcp_provisioning=None):
+        """Add or remove the DHCP provisioning component of a port.
+
+        :param dhcp_provisioning: optional dictionary, shared by the ports of
+                                  a bulk request, caching if the DHCP
+                                  provisioning is needed per network and
+                                  subnets.
+        """
         if not cfg.CONF.enable_traditional_dhcp:
             return
 
@@ -1554,9 +1563,17 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
             return
 
         subnet_ids = [f['subnet_id'] for f in port['fixed_ips']]
-        if (db.is_dhcp_active_on_any_subnet(context, subnet_ids) and
+        key = (port['network_id'], frozenset(subnet_ids))
+        if dhcp_provisioning is None or key not in dhcp_provisioning:
+            needed = bool(
+                db.is_dhcp_active_on_any_subnet(context, subnet_ids) and
                 len(self.get_dhcp_agents_hosting_networks(
-                    context, [port['network_id']]))):
+                    context, [port['network_id']])))
+            if dhcp_provisioning is not None:
+                dhcp_provisioning[key] = needed
+        else:
+            needed = dhcp_provisioning[key]
+        if needed:
             # the agents will tell us when the dhcp config is ready so we setup
             # a provisioning component to prevent the port from going ACTIVE
             # until a dhcp_ready_on_port notification is received.
@@ -1636,6 +1653,9 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                 LOG.error("mechanism_manager.create_port_postcommit "
                           "failed, deleting port '%s'", result['id'])
                 self.delete_port(context, result['id'], l3_port_check=False)
+        return self._bind_created_port(context, result, mech_context)
+
+    def _bind_created_port(self, context, result, mech_context):
         try:
             bound_context = self._bind_port_if_needed(mech_context)
         except ml2_exc.MechanismDriverError:
@@ -1646,9 +1666,41 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
         return bound_context.current
 
+    def _after_create_ports(self, context, results, mech_contexts):
+        """Bulk version of "_after_create_port".
+
+        The mechanism drivers are notified of the creation of all the ports
+        together. The ports for which a mechanism driver failed are deleted
+        and the other ports are bound before raising the error.
+        """
+        for result, mech_context in zip(results, mech_contexts):
+            result['network'] = mech_context.network.current
+            registry.publish(resources.PORT, events.AFTER_CREATE, self,
+                             payload=events.DBEventPayload(
+                                 context, states=(result,),
+                                 resource_id=result['id']))
+
+        errors = self.mechanism_manager.create_port_postcommit_bulk(
+            mech_contexts)
+        for port_id in errors:
+            LOG.error("mechanism_manager.create_port_postcommit "
+                      "failed, deleting port '%s'", port_id)
+            self.delete_port(context, port_id, l3_port_check=False)
+
+        bound_ports = [
+            self._bind_created_port(context, result, mech_context)
+            for result, mech_context in zip(results, mech_contexts)
+            if result['id'] not in errors]
+        if errors:
+            raise ml2_exc.MechanismDriverError(
+                method='create_port_postcommit',
+                errors=list(errors.values()))
+        return bound_ports
+
     def allocate_macs_and_ips_for_ports(self, context, ports):
         macs = self._generate_macs(len(ports))
         network_cache = dict()
+        requested_macs = collections.defaultdict(set)
         for port in ports:
             port['port']['id'] = (
                 port['port'].get('id') or uuidutils.generate_uuid())
@@ -1660,13 +1712,17 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
 
             raw_mac_address = port['port'].get('mac_address',
                                                const.ATTR_NOT_SPECIFIED)
-            if raw_mac_address is const.ATTR_NOT_SPECIFIED:
+            mac_requested = raw_mac_address is not const.ATTR_NOT_SPECIFIED
+            if not mac_requested:
                 raw_mac_address = macs.pop()
-            elif self._is_mac_in_use(context, network_id, raw_mac_address):
-                raise exc.MacAddressInUse(net_id=network_id,
-                                          mac=raw_mac_address)
             eui_mac_address = converters.convert_to_sanitized_mac_address(
                 raw_mac_address)
+            if mac_requested:
+                if str(eui_mac_address) in requested_macs[network_id]:
+                    # The same MAC address is requested twice in the network
+                    raise exc.MacAddressInUse(net_id=network_id,
+                                              mac=raw_mac_address)
+                requested_macs[network_id].add(str(eui_mac_address))
             # Create the Port object
             # Note: netaddr has an issue with using the correct dialect when
             # the input for EUI is another EUI object, see:
@@ -1676,15 +1732,24 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
             # released.
             port['port']['mac_address'] = str(eui_mac_address)
 
-            # Call IPAM to allocate IP addresses
-            try:
-                port['ipams'] = self.ipam.allocate_ips_for_port(context, port)
-
-                port['ip_allocation'] = (ipalloc_apidef.
-                                         IP_ALLOCATION_IMMEDIATE)
-            except ipam_exc.DeferIpam:
-                port['ip_allocation'] = (ipalloc_apidef.
-                                         IP_ALLOCATION_DEFERRED)
+        # The requested MAC addresses are checked with one query per network
+        for network_id, mac_addresses in requested_macs.items():
+            macs_in_use = self._get_macs_in_use(context, network_id,
+                                                mac_addresses)
+            if macs_in_use:
+                raise exc.MacAddressInUse(net_id=network_id,
+                                          mac=sorted(macs_in_use)[0])
+
+        # Call IPAM to allocate IP addresses
+        ipams = self.ipam.allocate_ips_for_ports(context, ports)
+        for port, port_ipams in zip(ports, ipams):
+            if port_ipams is None:
+                port['ipams'] = []
+                port['ip_allocation'] = ipalloc_apidef.IP_ALLOCATION_DEFERRED
+            else:
+                port['ipams'] = port_ipams
+                port['ip_allocation'] = (
+                    ipalloc_apidef.IP_ALLOCATION_IMMEDIATE)
         return ports, network_cache
 
     @utils.transaction_guard
@@ -1705,66 +1770,91 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                     self.ipam.deallocate_ips_from_port(
                         context, port, port.get('ipams'))
 
+    def _create_port_bulk_db(self, context, port):
+        """Add the port, IP allocation and port binding records of a port.
+
+        The DB models are added to the session directly: creating the port
+        and IP allocation OVOs would flush the session once per record. The
+        caller flushes the records of all the ports of the request together.
+        """
+        pdata = port.get('port')
+        network_id = pdata.get('network_id')
+        db_port = models_v2.Port(
+            id=pdata['id'],
+            mac_address=pdata['mac_address'],
+            project_id=pdata.get('project_id') or pdata.get('tenant_id'),
+            name=pdata.get('name'),
+            network_id=network_id,
+            admin_state_up=pdata.get('admin_state_up'),
+            status=pdata.get('status', const.PORT_STATUS_ACTIVE),
+            device_id=pdata.get('device_id'),
+            device_owner=pdata.get('device_owner'),
+            description=pdata.get('description'))
+        context.session.add(db_port)
+
+        # Store the IP addresses allocated by IPAM
+        for ip in port['ipams']:
+            LOG.debug("Allocated IP %(ip_address)s "
+                      "(%(network_id)s/%(subnet_id)s/%(port_id)s)",
+                      {'ip_address': ip['ip_address'],
+                       'network_id': network_id,
+                       'subnet_id': ip['subnet_id'],
+                       'port_id': pdata['id']})
+            context.session.add(models_v2.IPAllocation(
+                port_id=pdata['id'], ip_address=str(ip['ip_address']),
+                subnet_id=ip['subnet_id'], network_id=network_id))
+
+        binding = db.add_port_binding(context, pdata['id'])
+        binding_host = pdata.get(portbindings.HOST_ID,
+                                 const.ATTR_NOT_SPECIFIED)
+        if binding_host != const.ATTR_NOT_SPECIFIED:
+            binding.host = binding_host
+        return db_port, binding
+
+    @staticmethod
+    def _make_port_bulk_obj(context, port, db_port):
+        """Return the Port OVO of a port record added by the bulk request."""
+        pdata = port.get('port')
+        network_id = pdata.get('network_id')
+        db_port_obj = ports_obj.Port(context)
+        db_port_obj.from_db_object(db_port)
+        ipams = port.pop('ipams')
+        db_port_obj['fixed_ips'] = [
+            ports_obj.IPAllocation(port_id=db_port_obj['id'],
+                                   subnet_id=ip['subnet_id'],
+                                   network_id=network_id,
+                                   ip_address=ip['ip_address'])
+            for ip in ipams]
+        db_port_obj['ip_allocation'] = port.pop('ip_allocation')
+
+        fixed_ips = pdata.get('fixed_ips')
+        if validators.is_attr_set(fixed_ips) and not fixed_ips:
+            # [] was passed explicitly as fixed_ips: unaddressed port.
+            db_port_obj['ip_allocation'] = ipalloc_apidef.IP_ALLOCATION_NONE
+        return db_port_obj
+
     @db_api.retry_if_session_inactive()
     def _create_port_bulk(self, context, port_list, network_cache):
-        # TODO(njohnston): Break this up into smaller functions.
         port_data = []
         with db_api.CONTEXT_WRITER.using(context):
+            # Validate all the requests before adding any record
             for port in port_list:
-                # Set up the port request dict
                 pdata = port.get('port')
-                project_id = pdata.get('project_id') or pdata.get('tenant_id')
-                security_group_ids = pdata.get('security_groups')
-                network_id = pdata.get('network_id')
-                if security_group_ids is const.ATTR_NOT_SPECIFIED:
-                    security_group_ids = None
-                else:
-                    security_group_ids = set(security_group_ids)
                 if pdata.get('device_owner'):
                     self._enforce_device_owner_not_router_intf_or_device_id(
                         context, pdata.get('device_owner'),
-                        pdata.get('device_id'), project_id)
-                bulk_port_data = dict(
-                    project_id=project_id,
-                    name=pdata.get('name'),
-                    network_id=network_id,
-                    admin_state_up=pdata.get('admin_state_up'),
-                    status=pdata.get('status', const.PORT_STATUS_ACTIVE),
-                    device_id=pdata.get('device_id'),
-                    device_owner=pdata.get('device_owner'),
-                    description=pdata.get('description'))
-
-                network = network_cache[network_id]
-
-                db_port_obj = ports_obj.Port(
-                    context,
-                    mac_address=netaddr.EUI(port['port']['mac_address'],
-                                            dialect=eui48.mac_unix_expanded),
-                    id=port['port']['id'], **bulk_port_data)
-                db_port_obj.create()
-
-                # Call IPAM to store allocated IP addresses
-                ipams = port.pop("ipams")
-                self.ipam.store_ip_allocation_for_port(
-                    context, ipams, network_id, port)
-                ipam_fixed_ips = []
-                for ip in ipams:
-                    fixed_ip = ports_obj.IPAllocation(
-                        port_id=db_port_obj['id'],
-                        subnet_id=ip['subnet_id'],
-                        network_id=network_id,
-                        ip_address=ip['ip_address'])
-                    ipam_fixed_ips.append(fixed_ip)
-
-                db_port_obj['fixed_ips'] = ipam_fixed_ips
-                db_port_obj['ip_allocation'] = port.pop('ip_allocation')
-
-                fixed_ips = pdata.get('fixed_ips')
-                if validators.is_attr_set(fixed_ips) and not fixed_ips:
-                    # [] was passed explicitly as fixed_ips: unaddressed port.
-                    db_port_obj['ip_allocation'] = (ipalloc_apidef.
-                                                    IP_ALLOCATION_NONE)
+                        pdata.get('device_id'),
+                        pdata.get('project_id') or pdata.get('tenant_id'))
+
+            # The records of all the ports are added to the session first and
+            # inserted together by a single flush.
+            db_records = [self._create_port_bulk_db(context, port)
+                          for port in port_list]
+            context.session.flush()
 
+            for port, (db_port, binding) in zip(port_list, db_records):
+                pdata = port.get('port')
+                db_port_obj = self._make_port_bulk_obj(context, port, db_port)
                 # Make port dict
                 port_dict = self._make_port_dict(db_port_obj,
                                                  process_extensions=False)
@@ -1780,21 +1870,29 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                                                            port_dict)
                 self._portsec_ext_port_create_processing(context, port_dict,
                                                          port)
+                port_data.append(
+                    {
+                        'id': db_port_obj['id'],
+                        'port_obj': db_port_obj,
+                        'binding': binding,
+                        'port_dict': port_dict
+                    })
 
-                sgs = self._get_security_groups_on_port(context, port)
+            ports_sgs = self._get_security_groups_on_ports(context, port_list)
+            for port, data, sgs in zip(port_list, port_data, ports_sgs):
+                pdata = port.get('port')
+                port_dict = data['port_dict']
                 self._process_port_create_security_group(context, port_dict,
                                                          sgs)
 
                 # process port binding
-                binding = db.add_port_binding(context, port_dict['id'])
-                binding_host = pdata.get(
-                    portbindings.HOST_ID, const.ATTR_NOT_SPECIFIED)
-                if binding_host != const.ATTR_NOT_SPECIFIED:
-                    binding.host = binding_host
+                network = network_cache[pdata.get('network_id')]
                 mech_context = driver_context.PortContext(self, context,
                                                           port_dict, network,
-                                                          binding, None)
+                                                          data['binding'],
+                                                          None)
                 self._process_port_binding(mech_context, port_dict)
+                data['mech_context'] = mech_context
 
                 # process allowed address pairs
                 port_dict[addr_apidef.ADDRESS_PAIRS] = (
@@ -1810,34 +1908,27 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                 registry.publish(resources.PORT, events.PRECOMMIT_CREATE, self,
                                  payload=events.DBEventPayload(
                                      context,
-                                     resource_id=db_port_obj['id'],
-                                     states=(db_port_obj,)))
+                                     resource_id=data['id'],
+                                     states=(data['port_obj'],)))
 
-                self.mechanism_manager.create_port_precommit(mech_context)
+            self.mechanism_manager.create_port_precommit_bulk(
+                [data['mech_context'] for data in port_data])
 
-                # handle DHCP agent provisioning
-                self._setup_dhcp_agent_provisioning_component(context,
-                                                              port_dict)
-
-                port_data.append(
-                    {
-                        'id': db_port_obj['id'],
-                        'port_obj': db_port_obj,
-                        'mech_context': mech_context,
-                        'port_dict': port_dict
-                    })
+            # handle DHCP agent provisioning
+            dhcp_provisioning = {}
+            for data in port_data:
+                self._setup_dhcp_agent_provisioning_component(
+                    context, data['port_dict'],
+                    dhcp_provisioning=dhcp_provisioning)
 
         # Perform actions after the transaction is committed
-        completed_ports = []
         for port in port_data:
             resource_extend.apply_funcs('ports',
                                         port['port_dict'],
                                         port['port_obj'].db_obj)
-            completed_ports.append(
-                self._after_create_port(context,
-                                        port['port_dict'],
-                                        port['mech_context']))
-        return completed_ports
+        return self._after_create_ports(
+            context, [port['port_dict'] for port in port_data],
+            [port['mech_context'] for port in port_data])
 
     # TODO(yalei) - will be simplified after security group and address pair be
     # converted to ext driver too.
@@ -2289,7 +2380,13 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
             network = (cached_networks or {}).get(port['network_id'])
 
             if not network:
-                network = self.get_network(plugin_context, port['network_id'])
+                # The network context, with its segments, is cached for the
+                # next ports of the network
+                network = driver_context.NetworkContext(
+                    self, plugin_context,
+                    self.get_network(plugin_context, port['network_id']))
+                if cached_networks is not None:
+                    cached_networks[port['network_id']] = network
 
             if port['device_owner'] == const.DEVICE_OWNER_DVR_INTERFACE:
                 binding = db.get_distributed_port_binding_by_host(
@@ -2334,7 +2431,13 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
             # get all networks for PortContext construction
             netctxs_by_netid = self.get_network_contexts(
                 plugin_context,
-                {p.network_id for p in port_dbs_by_id.values()})
+                {p.network_id for p in port_dbs_by_id.values() if p})
+            # get the distributed bindings of all the DVR ports on the host
+            dvr_bindings = db.get_distributed_port_bindings_by_host(
+                plugin_context,
+                [p.id for p in port_dbs_by_id.values() if p and
+                 p.device_owner == const.DEVICE_OWNER_DVR_INTERFACE],
+                host)
             for dev_id in dev_ids:
                 port_id = dev_to_full_pids.get(dev_id)
                 port_db = port_dbs_by_id.get(port_id)
@@ -2344,8 +2447,7 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
                     continue
                 port = self._make_port_dict(port_db)
                 if port['device_owner'] == const.DEVICE_OWNER_DVR_INTERFACE:
-                    binding = db.get_distributed_port_binding_by_host(
-                        plugin_context, port['id'], host)
+                    binding = dvr_bindings.get(port['id'])
                     bindlevelhost_match = host
                 else:
                     binding = p_utils.get_port_binding_by_status_and_host(
@@ -2512,6 +2614,37 @@ class Ml2Plugin(db_base_plugin_v2.NeutronDbPluginV2,
         LOG.debug('The host %s is not matching for port %s host %s!',
                   host, port_id, port_host)
 
+    @db_api.retry_if_session_inactive()
+    def ports_bound_to_host(self, context, port_ids, host):
+        """Bulk version of port_bound_to_host.
+
+        The ports and their bindings are retrieved with a single query.
+
+        :param port_ids: the IDs of the ports, possibly truncated
+        :returns: a dictionary of the port IDs to a (port, bound) tuple, with
+                  the port DB object and whether the port is bound to the
+                  host. The ports not found are omitted.
+        """
+        result = {}
+        if not port_ids:
+            return result
+        with db_api.CONTEXT_READER.using(context):
+            full_ids = db.partial_port_ids_to_full_ids(context, port_ids)
+            port_dbs = db.get_port_db_objects(context, full_ids.values())
+            for port_id, full_id in full_ids.items():
+                port = port_dbs.get(full_id)
+                if not port:
+                    continue
+                if port.device_owner == const.DEVICE_OWNER_DVR_INTERFACE:
+                    bound = any(binding.host == host for binding in
+                                port.distributed_port_binding)
+                else:
+                    binding = p_utils.get_port_binding_by_status_and_host(
+                        port.port_bindings, const.ACTIVE)
+                    bound = bool(binding) and binding.host == host
+                result[port_id] = (port, bool(host) and bound)
+        return result
+
     @db_api.retry_if_session_inactive()
     def get_ports_from_devices(self, context, devices):
         port_ids_to_devices = {
@@ -119,11 +119,10 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
             return {'device': mac_or_port_id}
 
         port = port_context.current
-        # caching information about networks for future use
+        # caching the network contexts, with their segments, for future use
         if cached_networks is not None:
             if port['network_id'] not in cached_networks:
-                cached_networks[port['network_id']] = (
-                    port_context.network.current)
+                cached_networks[port['network_id']] = port_context.network
         result = self._get_device_details(rpc_context, agent_id=agent_id,
                                           host=host, device=mac_or_port_id,
                                           port_context=port_context)
@@ -313,14 +312,7 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
             if not port:
                 LOG.debug("Port %s not found, will not notify nova.", port_id)
                 return
-            if port.device_owner.startswith(
-                    n_const.DEVICE_OWNER_COMPUTE_PREFIX):
-                # NOTE(haleyb): It is possible for a test to override a
-                # config option after the plugin has been initialized so
-                # the nova_notifier attribute is not set on the plugin.
-                if (cfg.CONF.notify_nova_on_port_status_changes and
-                        hasattr(plugin, 'nova_notifier')):
-                    plugin.nova_notifier.notify_port_active_direct(port)
+            if self._notify_nova_port_active(port):
                 return
         else:
             self.update_port_status_to_active(port, rpc_context, port_id, host)
@@ -328,6 +320,24 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
                                       n_const.PORT_STATUS_ACTIVE, host,
                                       refresh_tunnels)
 
+    @staticmethod
+    def _notify_nova_port_active(port):
+        """Notify nova that a compute port not bound to the host is active.
+
+        Returns True if the port is a compute port.
+        """
+        if not port.device_owner.startswith(
+                n_const.DEVICE_OWNER_COMPUTE_PREFIX):
+            return False
+        plugin = directory.get_plugin()
+        # NOTE(haleyb): It is possible for a test to override a
+        # config option after the plugin has been initialized so
+        # the nova_notifier attribute is not set on the plugin.
+        if (cfg.CONF.notify_nova_on_port_status_changes and
+                hasattr(plugin, 'nova_notifier')):
+            plugin.nova_notifier.notify_port_active_direct(port)
+        return True
+
     def update_port_status_to_active(self, port, rpc_context, port_id, host):
         plugin = directory.get_plugin()
         if port and port['device_owner'] == n_const.DEVICE_OWNER_DVR_INTERFACE:
@@ -369,6 +379,51 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
         if not port_context:
             # port deleted
             return
+        self._notify_l2pop_port_context(l2pop_driver, rpc_context,
+                                        port_context, status, host,
+                                        refresh_tunnels)
+
+    def _notify_l2pop_ports_wiring(self, rpc_context, port_ids, status, host,
+                                   refresh_tunnels=False):
+        """Bulk version of notify_l2pop_port_wiring.
+
+        The port contexts are retrieved at once and the ports are notified
+        network by network. Returns the set of the port IDs whose
+        notification failed.
+        """
+        plugin = directory.get_plugin()
+        l2pop_driver = plugin.mechanism_manager.mech_drivers.get(
+            'l2population')
+        if not l2pop_driver or not port_ids:
+            return set()
+        try:
+            port_contexts = plugin.get_bound_ports_contexts(
+                rpc_context, list(port_ids), host)
+        except Exception:
+            LOG.exception("Failed to get the contexts of ports %s", port_ids)
+            return set(port_ids)
+        # ports deleted are skipped
+        port_contexts = sorted(
+            ((port_id, port_context)
+             for port_id, port_context in port_contexts.items()
+             if port_context),
+            key=lambda item: item[1].current['network_id'])
+        failed = set()
+        for port_id, port_context in port_contexts:
+            try:
+                self._notify_l2pop_port_context(l2pop_driver, rpc_context,
+                                                port_context, status, host,
+                                                refresh_tunnels)
+            except Exception:
+                LOG.exception("Failed to notify the L2pop driver of port %s",
+                              port_id)
+                failed.add(port_id)
+        return failed
+
+    @staticmethod
+    def _notify_l2pop_port_context(l2pop_driver, rpc_context, port_context,
+                                   status, host, refresh_tunnels):
+        port = port_context.current
         # NOTE: DVR ports are already handled and updated through l2pop
         # and so we don't need to update it again here. But, l2pop did not
         # handle DVR ports while restart neutron-*-agent, we need to handle
@@ -376,7 +431,6 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
         if (port['device_owner'] == n_const.DEVICE_OWNER_DVR_INTERFACE and
                 not refresh_tunnels):
             return
-        port = port_context.current
         if (port['device_owner'] != n_const.DEVICE_OWNER_DVR_INTERFACE and
                 status == n_const.PORT_STATUS_ACTIVE and
                 port[portbindings.HOST_ID] != host and
@@ -396,42 +450,196 @@ class RpcCallbacks(type_tunnel.TunnelRpcCallbackMixin):
 
     @profiler.trace("rpc")
     def update_device_list(self, rpc_context, **kwargs):
-        devices_up = []
+        """Devices are up or no longer exist on agent.
+
+        Bulk version of update_device_up and update_device_down: the ports
+        and their bindings are retrieved at once, the port statuses and the
+        provisioning blocks are updated in bulk and the L2pop driver is
+        notified network by network. The devices whose update failed are
+        reported so that the agent retries them.
+        """
+        refresh_tunnels = kwargs.pop('refresh_tunnels', False)
+        if not refresh_tunnels:
+            # For backward compatibility with older agents
+            refresh_tunnels = kwargs.pop('agent_restarted', False)
+        agent_id = kwargs.get('agent_id')
+        host = kwargs.get('host')
+        devices_up = kwargs.get('devices_up') or []
+        devices_down = kwargs.get('devices_down') or []
+        LOG.debug("Devices %(up)s up and %(down)s down at agent "
+                  "%(agent_id)s",
+                  {'up': devices_up, 'down': devices_down,
+                   'agent_id': agent_id})
+        plugin = directory.get_plugin()
+        try:
+            up_port_ids = self._get_devices_port_ids(rpc_context, devices_up)
+            down_port_ids = self._get_devices_port_ids(rpc_context,
+                                                       devices_down)
+            ports = plugin.ports_bound_to_host(
+                rpc_context,
+                {port_id for _device, port_id in up_port_ids + down_port_ids},
+                host)
+        except Exception:
+            LOG.exception("Failed to get the ports of the devices, retrying "
+                          "all")
+            return {'devices_up': [],
+                    'failed_devices_up': list(devices_up),
+                    'devices_down': [],
+                    'failed_devices_down': list(devices_down)}
+
+        failed_up = self._update_ports_up(
+            rpc_context, {port_id for _device, port_id in up_port_ids},
+            ports, host, refresh_tunnels)
+        devices_up_ok = []
         failed_devices_up = []
-        devices_down = []
+        for device, (_mac_or_device, port_id) in zip(devices_up,
+                                                     up_port_ids):
+            if port_id in failed_up:
+                failed_devices_up.append(device)
+                LOG.error("Failed to update device %s up", device)
+            else:
+                devices_up_ok.append(device)
+
+        exists, failed_down = self._update_ports_down(
+            rpc_context, {port_id for _device, port_id in down_port_ids},
+            ports, host)
+        devices_down_ok = []
         failed_devices_down = []
-        devices = kwargs.get('devices_up')
-        if devices:
-            for device in devices:
-                try:
-                    self.update_device_up(
-                        rpc_context,
-                        device=device,
-                        **kwargs)
-                except Exception:
-                    failed_devices_up.append(device)
-                    LOG.error("Failed to update device %s up", device)
+        for device, (mac_or_device, port_id) in zip(devices_down,
+                                                    down_port_ids):
+            if port_id in failed_down:
+                failed_devices_down.append(device)
+                LOG.error("Failed to update device %s down", device)
+            else:
+                devices_down_ok.append({'device': mac_or_device,
+                                        'exists': exists[port_id]})
+
+        return {'devices_up': devices_up_ok,
+                'failed_devices_up': failed_devices_up,
+                'devices_down': devices_down_ok,
+                'failed_devices_down': failed_devices_down}
+
+    def _get_devices_port_ids(self, rpc_context, devices):
+        """Return the list of the (MAC or device, port ID) of devices."""
+        plugin = directory.get_plugin()
+        result = []
+        for device in devices:
+            mac_or_device, pci_slot = self._device_to_mac_pci_slot(device)
+            result.append((mac_or_device, plugin._device_to_port_id(
+                rpc_context, mac_or_device, pci_slot=pci_slot)))
+        return result
+
+    def _update_ports_up(self, rpc_context, port_ids, ports, host,
+                         refresh_tunnels):
+        """Bulk version of update_device_up.
+
+        :param ports: the ports_bound_to_host result of the port IDs
+        :returns: the set of the port IDs whose update failed
+        """
+        plugin = directory.get_plugin()
+        failed = set()
+        provisioned = {}
+        wired = set()
+        for port_id in port_ids:
+            port, bound = ports.get(port_id, (None, False))
+            if not port:
+                LOG.debug("Port %s not found, will not notify nova.", port_id)
+                continue
+            try:
+                if host and not bound:
+                    LOG.debug("Device %(device)s not bound to the"
+                              " agent host %(host)s",
+                              {'device': port_id, 'host': host})
+                    # this might mean that a VM is in the process of live
+                    # migration and vif was plugged on the destination
+                    # compute node; need to notify nova explicitly
+                    if self._notify_nova_port_active(port):
+                        continue
+                elif port.device_owner == n_const.DEVICE_OWNER_DVR_INTERFACE:
+                    # NOTE(kevinbenton): we have to special case DVR ports
+                    # because of the special multi-binding status update
+                    # logic they have that depends on the host
+                    plugin.update_port_status(rpc_context, port.id,
+                                              n_const.PORT_STATUS_ACTIVE,
+                                              host)
                 else:
-                    devices_up.append(device)
+                    provisioned[port.id] = port_id
+            except Exception:
+                LOG.exception("Failed to update port %s up", port_id)
+                failed.add(port_id)
+                continue
+            wired.add(port_id)
 
-        devices = kwargs.get('devices_down')
-        if devices:
-            for device in devices:
+        try:
+            failed_full_ids = provisioning_blocks.provisioning_complete_bulk(
+                rpc_context, list(provisioned), resources.PORT,
+                provisioning_blocks.L2_AGENT_ENTITY)
+        except Exception:
+            LOG.exception("Failed to complete the provisioning of ports %s",
+                          list(provisioned.values()))
+            failed_full_ids = provisioned.keys()
+        failed.update(provisioned[full_id] for full_id in failed_full_ids)
+
+        failed |= self._notify_l2pop_ports_wiring(
+            rpc_context, wired - failed, n_const.PORT_STATUS_ACTIVE, host,
+            refresh_tunnels)
+        return failed
+
+    def _update_ports_down(self, rpc_context, port_ids, ports, host):
+        """Bulk version of update_device_down.
+
+        :param ports: the ports_bound_to_host result of the port IDs
+        :returns: a dictionary of the port IDs to whether the port exists,
+                  and the set of the port IDs whose update failed
+        """
+        plugin = directory.get_plugin()
+        exists = {}
+        wired = set()
+        full_ids = {}
+        for port_id in port_ids:
+            port, bound = ports.get(port_id, (None, False))
+            if host and not bound:
+                LOG.debug("Device %(device)s not bound to the"
+                          " agent host %(host)s",
+                          {'device': port_id, 'host': host})
+                exists[port_id] = True
+                if port:
+                    wired.add(port_id)
+            elif not port:
+                exists[port_id] = False
+            else:
+                full_ids[port.id] = port_id
+
+        failed = set()
+        statuses = dict.fromkeys(full_ids, n_const.PORT_STATUS_DOWN)
+        try:
+            updated = plugin.update_port_statuses(rpc_context, statuses,
+                                                  host)
+        except Exception:
+            # Update the ports one by one to find the failing ones
+            LOG.debug("Failed to update the status of ports %s, updating "
+                      "them one by one", list(full_ids.values()))
+            updated = {}
+            for full_id, status in statuses.items():
                 try:
-                    dev = self.update_device_down(
-                        rpc_context,
-                        device=device,
-                        **kwargs)
+                    updated.update(plugin.update_port_statuses(
+                        rpc_context, {full_id: status}, host))
+                except exc.StaleDataError:
+                    LOG.debug("delete_port and update_device_down are being "
+                              "executed concurrently. Ignoring "
+                              "StaleDataError.")
+                    exists[full_ids[full_id]] = False
                 except Exception:
-                    failed_devices_down.append(device)
-                    LOG.error("Failed to update device %s down", device)
-                else:
-                    devices_down.append(dev)
-
-        return {'devices_up': devices_up,
-                'failed_devices_up': failed_devices_up,
-                'devices_down': devices_down,
-                'failed_devices_down': failed_devices_down}
+                    LOG.exception("Failed to update port %s down",
+                                  full_ids[full_id])
+                    failed.add(full_ids[full_id])
+        for full_id, port_id in updated.items():
+            exists[full_ids[full_id]] = bool(port_id)
+            wired.add(full_ids[full_id])
+
+        failed |= self._notify_l2pop_ports_wiring(
+            rpc_context, wired, n_const.PORT_STATUS_DOWN, host)
+        return exists, failed
 
     def get_ports_by_vnic_type_and_host(self, rpc_context, vnic_type, host):
         plugin = directory.get_plugin()
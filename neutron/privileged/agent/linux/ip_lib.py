@@ -10,6 +10,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import ctypes
 import errno
 import os
 import socket
@@ -40,6 +41,13 @@ NETNS_RUN_DIR = '/var/run/netns'
 
 NUD_STATES = {state[1]: state[0] for state in ndmsg.states.items()}
 
+# Operations of apply_ip_operations
+IP_OPERATION_ADDRESS = 'address'
+IP_OPERATION_ROUTE = 'route'
+IP_OPERATION_NEIGH = 'neigh'
+IP_OPERATION_ADD = 'add'
+IP_OPERATION_DELETE = 'delete'
+
 
 def get_scope_name(scope):
     """Return the name of the scope (given as a number), or the scope number
@@ -196,7 +204,12 @@ def _translate_ip_device_exception(e, device=None, namespace=None):
 
 def get_link_id(device, namespace, raise_exception=True):
     with get_iproute(namespace) as ip:
-        link_id = ip.link_lookup(ifname=device)
+        return _get_link_id(ip, device, namespace,
+                            raise_exception=raise_exception)
+
+
+def _get_link_id(ip, device, namespace, raise_exception=True):
+    link_id = ip.link_lookup(ifname=device)
     if not link_id or len(link_id) < 1:
         if raise_exception:
             raise NetworkInterfaceNotFound(device=device, namespace=namespace)
@@ -603,6 +616,29 @@ def remove_netns(name, **kwargs):
     LOG.debug("Namespace %s deleted.", name)
 
 
+@privileged.namespace_cmd.entrypoint
+def rename_netns(name, new_name, **kwargs):
+    """Rename a network namespace.
+
+    The namespace is bind mounted with its new name, as "ip netns attach"
+    does, before its old name is removed; its devices and settings are kept.
+
+    :param name: The name of the namespace to rename
+    :param new_name: The new name of the namespace
+    """
+    libc = priv_linux.get_cdll()
+    path = os.path.join(netns.NETNS_RUN_DIR, name)
+    new_path = os.path.join(netns.NETNS_RUN_DIR, new_name)
+    os.close(os.open(new_path, os.O_RDONLY | os.O_CREAT | os.O_EXCL, 0))
+    if libc.mount(path.encode('utf-8'), new_path.encode('utf-8'), b'none',
+                  netns.MS_BIND, None) < 0:
+        error = ctypes.get_errno()
+        os.unlink(new_path)
+        raise OSError(error, os.strerror(error), new_name)
+    netns.remove(name, libc=libc)
+    LOG.debug("Namespace %s renamed to %s.", name, new_name)
+
+
 @privileged.namespace_cmd.entrypoint
 def list_netns(**kwargs):
     """List network namespaces.
@@ -729,7 +765,7 @@ def delete_ip_rule(namespace, **kwargs):
 
 
 def _make_pyroute2_route_args(namespace, ip_version, cidr, device, via, table,
-                              metric, scope, protocol):
+                              metric, scope, protocol, get_link_index=None):
     """Returns a dictionary of arguments to be used in pyroute route commands
 
     :param namespace: (string) name of the namespace
@@ -742,8 +778,14 @@ def _make_pyroute2_route_args(namespace, ip_version, cidr, device, via, table,
     :param metric: (int) route metric
     :param scope: (int) route scope
     :param protocol: (string) protocol name (pyroute2.netlink.rtnl.rt_proto)
+    :param get_link_index: (callable) returns the index of a device name; by
+                           default, it is looked up in the namespace.
     :return: a dictionary with the kwargs needed in pyroute rule commands
     """
+    if get_link_index is None:
+        def get_link_index(device):
+            return get_link_id(device, namespace)
+
     args = {'family': _IP_VERSION_FAMILY_MAP[ip_version]}
     if not scope:
         scope = 'global' if via else 'link'
@@ -765,7 +807,7 @@ def _make_pyroute2_route_args(namespace, ip_version, cidr, device, via, table,
         for mp in via:
             multipath = {}
             if mp.get('device'):
-                multipath['oif'] = get_link_id(mp['device'], namespace)
+                multipath['oif'] = get_link_index(mp['device'])
             if mp.get('via'):
                 multipath['gateway'] = mp['via']
             if mp.get('weight'):
@@ -775,7 +817,7 @@ def _make_pyroute2_route_args(namespace, ip_version, cidr, device, via, table,
         if via:
             args['gateway'] = via
         if device:
-            args['oif'] = get_link_id(device, namespace)
+            args['oif'] = get_link_index(device)
 
     return args
 
@@ -838,6 +880,117 @@ def delete_ip_route(namespace, cidr, ip_version, device=None, via=None,
         raise
 
 
+def _apply_address_operation(ip, namespace, get_link_index, command, device,
+                             ip_version, address, prefixlen, scope=None,
+                             broadcast=None):
+    kwargs = {}
+    if command == IP_OPERATION_ADD:
+        kwargs = {'broadcast': broadcast, 'scope': get_scope_name(scope)}
+    try:
+        ip.addr(command,
+                index=get_link_index(device),
+                address=address,
+                mask=prefixlen,
+                family=_IP_VERSION_FAMILY_MAP[ip_version],
+                **kwargs)
+    except netlink_exceptions.NetlinkError as e:
+        if command == IP_OPERATION_ADD and e.code == errno.EEXIST:
+            raise IpAddressAlreadyExists(ip=address, device=device)
+        if command == IP_OPERATION_DELETE and e.code == errno.EADDRNOTAVAIL:
+            return
+        _translate_ip_device_exception(e, device, namespace)
+        raise
+
+
+def _apply_route_operation(ip, namespace, get_link_index, command, cidr,
+                           ip_version, device=None, via=None, table=None,
+                           metric=None, scope=None,
+                           proto=rtnl.rt_proto['static']):
+    if command == IP_OPERATION_ADD:
+        kwargs = _make_pyroute2_route_args(
+            namespace, ip_version, cidr, device, via, table, metric, scope,
+            proto, get_link_index=get_link_index)
+        ip.route('replace', **kwargs)
+        return
+    kwargs = _make_pyroute2_route_args(
+        namespace, ip_version, cidr, device, via, table, None, scope, None,
+        get_link_index=get_link_index)
+    try:
+        ip.route('del', **kwargs)
+    except netlink_exceptions.NetlinkError as e:
+        if e.code != errno.ESRCH:
+            raise
+
+
+def _apply_neigh_operation(ip, namespace, get_link_index, command, device,
+                           ip_version, ip_address, mac_address,
+                           nud_state=None):
+    kwargs = {}
+    if command == IP_OPERATION_ADD:
+        command = 'replace'
+        kwargs['state'] = ndmsg.states[nud_state]
+    try:
+        ip.neigh(command,
+                 ifindex=get_link_index(device),
+                 dst=ip_address,
+                 lladdr=mac_address,
+                 family=_IP_VERSION_FAMILY_MAP[ip_version],
+                 **kwargs)
+    except netlink_exceptions.NetlinkError as e:
+        if command == IP_OPERATION_DELETE and e.code == errno.ENOENT:
+            return
+        _translate_ip_device_exception(e, device, namespace)
+        raise
+
+
+_IP_OPERATIONS = {
+    IP_OPERATION_ADDRESS: _apply_address_operation,
+    IP_OPERATION_ROUTE: _apply_route_operation,
+    IP_OPERATION_NEIGH: _apply_neigh_operation,
+}
+
+
+@privileged.default.entrypoint
+def apply_ip_operations(namespace, operations):
+    """Apply a list of address, route and neighbour operations.
+
+    The operations are applied in order, over a single netlink socket of the
+    namespace; the device indexes are looked up once per device. A failed
+    operation does not stop the next ones. The errors ignored by the single
+    operation functions (deleting an address, a route or a neighbour entry
+    that does not exist) are ignored here too.
+
+    :param namespace: The name of the namespace of the operations
+    :param operations: A list of dictionaries, each with a "type"
+                       (IP_OPERATION_ADDRESS, IP_OPERATION_ROUTE or
+                       IP_OPERATION_NEIGH), a "command" (IP_OPERATION_ADD or
+                       IP_OPERATION_DELETE) and the "args" of the operation
+    :return: A list of [index, error message] of the failed operations
+    """
+    errors = []
+    try:
+        with get_iproute(namespace) as ip:
+            link_ids = {}
+
+            def get_link_index(device):
+                if device not in link_ids:
+                    link_ids[device] = _get_link_id(ip, device, namespace)
+                return link_ids[device]
+
+            for index, operation in enumerate(operations):
+                try:
+                    _IP_OPERATIONS[operation['type']](
+                        ip, namespace, get_link_index, operation['command'],
+                        **operation['args'])
+                except (netlink_exceptions.NetlinkError, RuntimeError) as e:
+                    errors.append([index, str(e)])
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            raise NetworkNamespaceNotFound(netns_name=namespace)
+        raise
+    return errors
+
+
 @tenacity.retry(
     retry=tenacity.retry_if_exception_type(
         netlink_exceptions.NetlinkDumpInterrupted),
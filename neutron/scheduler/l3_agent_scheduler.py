@@ -16,12 +16,14 @@
 import abc
 import collections
 import functools
+import heapq
 import itertools
 import secrets
 
 from neutron_lib import constants as lib_const
 from neutron_lib.db import api as lib_db_api
 from neutron_lib.exceptions import l3 as l3_exc
+from neutron_lib.objects import exceptions as obj_exc
 from oslo_config import cfg
 from oslo_db import exception as db_exc
 from oslo_log import log as logging
@@ -30,6 +32,7 @@ from neutron.common import _constants as n_const
 from neutron.common import utils
 from neutron.conf.db import l3_hamode_db
 from neutron.db.models import l3agent as rb_model
+from neutron.objects import agent as ag_obj
 from neutron.objects import l3_hamode as l3_hamode_obj
 from neutron.objects import l3agent as rb_obj
 
@@ -37,6 +40,51 @@ from neutron.objects import l3agent as rb_obj
 LOG = logging.getLogger(__name__)
 cfg.CONF.register_opts(l3_hamode_db.L3_HA_OPTS)
 
+# Number of router bindings created per transaction by schedule_routers.
+BIND_ROUTERS_BATCH_SIZE = 100
+
+
+class L3AgentsLoad:
+    """Number of routers bound to a set of L3 agents, tracked in memory.
+
+    The agents are kept in a heap ordered by their number of routers, so that
+    the least loaded of the candidates of a router is found without querying
+    the database again for each router scheduled.
+    """
+
+    def __init__(self, agent_ids, router_counts):
+        self._counts = {agent_id: router_counts.get(agent_id, 0)
+                        for agent_id in agent_ids}
+        self._heap = [(count, agent_id)
+                      for agent_id, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def get_router_count(self, agent_id):
+        return self._counts[agent_id]
+
+    def add_router(self, agent_id):
+        count = self._counts[agent_id] + 1
+        self._counts[agent_id] = count
+        # The previous entry of the agent is left in the heap; it is dropped
+        # when popped, as its count does not match the current one anymore.
+        heapq.heappush(self._heap, (count, agent_id))
+
+    def get_least_loaded(self, agent_ids, number=1):
+        """Return the IDs of the least loaded agents among agent_ids."""
+        agent_ids = set(agent_ids)
+        chosen = []
+        popped = []
+        while self._heap and len(chosen) < number:
+            count, agent_id = heapq.heappop(self._heap)
+            if self._counts[agent_id] != count:
+                continue
+            popped.append((count, agent_id))
+            if agent_id in agent_ids:
+                chosen.append(agent_id)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return chosen
+
 
 class L3Scheduler(metaclass=abc.ABCMeta):
 
@@ -96,8 +144,9 @@ class L3Scheduler(metaclass=abc.ABCMeta):
         target_routers = self._get_routers_can_schedule(
             plugin, context, underscheduled_routers, l3_agent)
 
-        for router in target_routers:
-            self.schedule(plugin, context, router['id'], candidates=[l3_agent])
+        self.schedule_routers(plugin, context,
+                              [router['id'] for router in target_routers],
+                              candidates=[l3_agent])
 
     def _get_underscheduled_routers(self, plugin, context):
         underscheduled_routers = []
@@ -141,15 +190,145 @@ class L3Scheduler(metaclass=abc.ABCMeta):
             if not active_l3_agents:
                 LOG.warning('No active L3 agents')
                 return []
-            candidates = plugin.get_l3_agent_candidates(context,
-                                                        sync_router,
-                                                        active_l3_agents)
+            candidates = self._get_router_candidates(
+                plugin, context, sync_router, active_l3_agents)
             if not candidates:
                 LOG.warning('No L3 agents can host the router %s',
                             sync_router['id'])
 
             return candidates
 
+    def _get_router_candidates(self, plugin, context, sync_router,
+                               l3_agents):
+        """Return the L3 agents among l3_agents that can host a router."""
+        return plugin.get_l3_agent_candidates(context, sync_router, l3_agents)
+
+    def schedule_routers(self, plugin, context, router_ids, candidates=None):
+        """Schedule the routers to active L3 agents, in bulk.
+
+        Schedule the routers which are not already hosted by an enabled L3
+        agent, as schedule does for one router. The routers, their bindings,
+        the active L3 agents and the number of routers of these agents are
+        read once, the agents are chosen in memory and the non HA routers
+        bindings are created BIND_ROUTERS_BATCH_SIZE at a time, in a single
+        transaction.
+
+        :param candidates: if specified, the L3 agents to schedule the routers
+                           to, instead of the active L3 agents which can host
+                           each of them.
+        :returns: a dictionary of the agent chosen for each router scheduled.
+        """
+        router_ids = [router_id for router_id in router_ids
+                      if plugin.router_supports_scheduling(context, router_id)]
+        if not router_ids:
+            return {}
+        routers = plugin.get_routers(context, filters={'id': router_ids})
+        l3_agents = candidates
+        if l3_agents is None:
+            l3_agents = plugin.get_l3_agents(context, active=True)
+            if not l3_agents:
+                LOG.warning('No active L3 agents')
+                return {}
+        agent_ids = [agent['id'] for agent in l3_agents]
+        agents_load = L3AgentsLoad(
+            agent_ids,
+            rb_obj.RouterL3AgentBinding.get_router_count_by_l3_agent_ids(
+                context, agent_ids))
+        # A router is hosted by one enabled L3 agent, the routers only bound
+        # to disabled agents are scheduled again
+        router_bindings = rb_obj.RouterL3AgentBinding.get_objects(
+            context, router_id=router_ids)
+        bound_router_ids = {binding.router_id for binding in router_bindings}
+        enabled_agent_ids = {agent.id for agent in ag_obj.Agent.get_objects(
+            context, id=[binding.l3_agent_id for binding in router_bindings],
+            admin_state_up=True)} if router_bindings else set()
+        hosted_router_ids = {binding.router_id for binding in router_bindings
+                             if binding.l3_agent_id in enabled_agent_ids}
+
+        chosen_agents = {}
+        bindings = []
+        ha_routers = []
+        for router in routers:
+            if router.get('ha', False):
+                ha_routers.append(router)
+                continue
+            if router['id'] in hosted_router_ids:
+                LOG.debug('Router %s has already been scheduled',
+                          router['id'])
+                continue
+            router_candidates = candidates or self._get_router_candidates(
+                plugin, context, router, l3_agents)
+            if not router_candidates:
+                LOG.warning('No L3 agents can host the router %s',
+                            router['id'])
+                continue
+            chosen_agent = self._choose_router_agent_by_load(
+                plugin, context, router_candidates, agents_load)
+            if router['id'] in bound_router_ids:
+                # bind_router checks the existing bindings of the router
+                if self.bind_router(plugin, context, router['id'],
+                                    chosen_agent['id']):
+                    agents_load.add_router(chosen_agent['id'])
+                    chosen_agents[router['id']] = chosen_agent
+                continue
+            agents_load.add_router(chosen_agent['id'])
+            chosen_agents[router['id']] = chosen_agent
+            bindings.append((router['id'], chosen_agent['id']))
+
+        for index in range(0, len(bindings), BIND_ROUTERS_BATCH_SIZE):
+            batch = bindings[index:index + BIND_ROUTERS_BATCH_SIZE]
+            bound_router_ids = self._bind_routers(plugin, context, batch)
+            for router_id, _agent_id in batch:
+                if router_id not in bound_router_ids:
+                    del chosen_agents[router_id]
+
+        # NOTE: the HA routers are bound with their HA ports, one at a time,
+        # once the non HA routers bindings are created so that the number of
+        # routers of the agents used to choose them is up to date.
+        for router in ha_routers:
+            router_candidates = candidates or self._get_router_candidates(
+                plugin, context, router, l3_agents)
+            if not router_candidates:
+                LOG.warning('No L3 agents can host the router %s',
+                            router['id'])
+                continue
+            ha_agents = self._bind_ha_router(
+                plugin, context, router['id'], router.get('tenant_id'),
+                router_candidates)
+            if ha_agents:
+                chosen_agents[router['id']] = ha_agents[-1]
+        return chosen_agents
+
+    def _bind_routers(self, plugin, context, bindings):
+        """Bind non HA routers to L3 agents, in a single transaction.
+
+        If one of the bindings conflicts with a binding created concurrently,
+        or if one of the routers was removed meanwhile, the routers are bound
+        one at a time with bind_router instead.
+
+        :param bindings: a list of (router ID, L3 agent ID) tuples.
+        :returns: the set of the IDs of the routers bound.
+        """
+        try:
+            with lib_db_api.CONTEXT_WRITER.using(context):
+                for router_id, agent_id in bindings:
+                    rb_obj.RouterL3AgentBinding(
+                        context, l3_agent_id=agent_id, router_id=router_id,
+                        binding_index=n_const.LOWEST_AGENT_BINDING_INDEX
+                    ).create()
+        except (obj_exc.NeutronDbObjectDuplicateEntry,
+                db_exc.DBDuplicateEntry, db_exc.DBReferenceError):
+            if lib_db_api.is_session_active(context.session):
+                # The transaction of the caller can't be used anymore.
+                raise
+            LOG.debug('Failed to schedule %d routers at once, scheduling '
+                      'them one at a time', len(bindings))
+            return {router_id for router_id, agent_id in bindings
+                    if self.bind_router(plugin, context, router_id, agent_id)}
+        LOG.debug('Routers %s are scheduled', [
+            '%s to L3 agent %s' % binding for binding in bindings])
+        return {router_id for router_id, _agent_id in bindings}
+
     @lib_db_api.retry_db_errors
     def bind_router(self, plugin, context, router_id, agent_id,
                     is_manual_scheduling=False, is_ha=False):
@@ -246,6 +425,11 @@ class L3Scheduler(metaclass=abc.ABCMeta):
         """Choose agents from candidates based on a specific policy."""
         pass
 
+    def _choose_router_agent_by_load(self, plugin, context, candidates,
+                                     agents_load):
+        """Choose an agent from candidates, knowing their L3AgentsLoad."""
+        return self._choose_router_agent(plugin, context, candidates)
+
     def _get_num_of_agents_for_ha(self, candidates_count):
         return (min(self.max_ha_agents, candidates_count) if self.max_ha_agents
                 else candidates_count)
@@ -349,6 +533,13 @@ class LeastRoutersScheduler(L3Scheduler):
             context, candidate_ids)
         return chosen_agent
 
+    def _choose_router_agent_by_load(self, plugin, context, candidates,
+                                     agents_load):
+        chosen_agent_id = agents_load.get_least_loaded(
+            [candidate['id'] for candidate in candidates])[0]
+        return next(candidate for candidate in candidates
+                    if candidate['id'] == chosen_agent_id)
+
     def _choose_router_agents_for_ha(self, plugin, context, candidates):
         num_agents = self._get_num_of_agents_for_ha(len(candidates))
         ordered_agents = plugin.get_l3_agents_ordered_by_num_routers(
@@ -379,11 +570,12 @@ class AZLeastRoutersScheduler(LeastRoutersScheduler):
         return super()._get_routers_can_schedule(
             plugin, context, target_routers, l3_agent)
 
-    def _get_candidates(self, plugin, context, sync_router):
+    def _get_router_candidates(self, plugin, context, sync_router,
+                               l3_agents):
         """Overwrite L3Scheduler's method to filter by availability zone."""
         all_candidates = (
-            super()._get_candidates(
-                plugin, context, sync_router))
+            super()._get_router_candidates(
+                plugin, context, sync_router, l3_agents))
 
         candidates = []
         az_hints = self._get_az_hints(sync_router)
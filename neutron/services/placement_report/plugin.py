@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import time
+
+import eventlet
 from keystoneauth1 import exceptions as ks_exc
 from neutron_lib.agent import constants as agent_const
 from neutron_lib.api.definitions import agent_resources_synced
@@ -59,10 +63,36 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
         self._agents = PlacementReporterAgents(self._core_plugin)
         self._batch_notifier = batch_notifier.BatchNotifier(
             cfg.CONF.send_events_interval, self._execute_deferred)
-
-    def _execute_deferred(self, deferred_batch):
-        for deferred in deferred_batch:
-            deferred()
+        # The latest sync queued per agent, an agent reporting several times
+        # before its resources are synced is synced once
+        self._pending_syncs = {}
+        # The hypervisor RPs and the placement client calls last synced
+        # successfully per agent, the calls already synced are not repeated
+        self._synced_states = {}
+        self._rate_limit_lock = threading.Lock()
+        self._next_request_time = 0
+
+    def _execute_deferred(self, agent_keys):
+        pool = eventlet.GreenPool(cfg.CONF.placement.sync_workers)
+        for agent_key in dict.fromkeys(agent_keys):
+            deferred = self._pending_syncs.pop(agent_key, None)
+            if deferred:
+                pool.spawn_n(deferred)
+        # The next batch, which may sync the same agents, starts once this
+        # one is over
+        pool.waitall()
+
+    def _rate_limit(self):
+        rate = cfg.CONF.placement.sync_rate_limit
+        if not rate:
+            return
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + (
+                1.0 / rate)
+        if wait > 0:
+            eventlet.sleep(wait)
 
     def _get_rp_by_name(self, name):
         rps = self._placement_client.list_resource_providers(
@@ -105,7 +135,8 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
 
         try:
             name2uuid = {}
-            for name in hypervisors.values():
+            # The devices of an agent are usually on the same hypervisor
+            for name in set(hypervisors.values()):
                 name2uuid[name] = self._get_rp_by_name(name=name)['uuid']
 
             hypervisor_rps = {}
@@ -150,6 +181,7 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
             client=self._placement_client)
 
         deferred_batch = state.deferred_sync()
+        agent_key = (agent['agent_type'], agent['host'])
 
         # NOTE(bence romsics): Some client calls depend on earlier
         # ones, but not all. There are calls in a batch that can succeed
@@ -168,11 +200,25 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
         # the performance should not be affected by the wrapping.
         def batch():
             errors = False
+            # Only the client calls which changed since the last sync are
+            # executed, unless the hypervisor RPs changed (they could have
+            # been recreated, without the RPs of the agent).
+            synced_hypervisor_rps, synced_calls = self._synced_states.pop(
+                agent_key, (None, set()))
+            if synced_hypervisor_rps != hypervisor_rps:
+                synced_calls = set()
+            calls = set()
 
             for deferred in deferred_batch:
+                call = str(deferred)
+                if call in synced_calls:
+                    calls.add(call)
+                    continue
                 try:
                     LOG.debug('placement client: %s', deferred)
+                    self._rate_limit()
                     deferred.execute()
+                    calls.add(call)
                 except Exception as e:
                     errors = True
                     placement_error_str = \
@@ -190,6 +236,8 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
             resources_synced = not errors
             agent_db.resources_synced = resources_synced
             agent_db.update()
+            # The failed calls are retried at the next sync
+            self._synced_states[agent_key] = (hypervisor_rps, calls)
 
             if resources_synced:
                 LOG.debug(
@@ -204,7 +252,8 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
                      'host': agent['host'],
                      'result': 'failed'})
 
-        self._batch_notifier.queue_event(batch)
+        self._pending_syncs[agent_key] = batch
+        self._batch_notifier.queue_event(agent_key)
 
     @registry.receives(resources.AGENT,
                        [events.AFTER_CREATE, events.AFTER_UPDATE])
@@ -230,6 +279,11 @@ class PlacementReportPlugin(service_base.ServicePluginBase):
         agent_db = self._core_plugin._get_agent_by_type_and_host(
             context, agent['agent_type'], agent['host'])
 
+        if status == agent_const.AGENT_NEW:
+            # The agent was deleted, its RPs may have been deleted too
+            self._synced_states.pop(
+                (agent['agent_type'], agent['host']), None)
+
         # sync the state known by us to placement
         if (
                 # agent object in API (re-)created
@@ -225,8 +225,9 @@ class L3AgentTestCase(framework.L3AgentTestFramework):
             self.agent.router_deleted(self.agent.context, r['id'])
 
         # make sure all events are processed
-        while not self.agent._queue._queue.empty():
-            self.agent._process_update()
+        while self.agent._queue.qsize:
+            for shard in range(self.agent._queue.num_shards):
+                self.agent._process_update(shard)
 
         for r in routers_to_keep:
             self.assertIn(r['id'], self.agent.router_info)
@@ -62,6 +62,26 @@ class GetDeviceNamesTestCase(functional_base.BaseSudoTestCase):
             self.assertNotIn(name, interfaces)
 
 
+class RenameNetnsTestCase(functional_base.BaseSudoTestCase):
+
+    def _remove_ns(self, namespace):
+        priv_ip_lib.remove_netns(namespace)
+
+    def test_rename_netns(self):
+        namespace = 'ns_test-' + uuidutils.generate_uuid()
+        new_namespace = 'ns_test-' + uuidutils.generate_uuid()
+        priv_ip_lib.create_netns(namespace)
+        self.addCleanup(self._remove_ns, namespace)
+        priv_ip_lib.create_interface('int_01', namespace, 'dummy')
+
+        priv_ip_lib.rename_netns(namespace, new_namespace)
+        self.addCleanup(self._remove_ns, new_namespace)
+        namespaces = priv_ip_lib.list_netns()
+        self.assertNotIn(namespace, namespaces)
+        self.assertIn(new_namespace, namespaces)
+        self.assertIn('int_01', priv_ip_lib.get_device_names(new_namespace))
+
+
 class GetLinkDevicesTestCase(functional_base.BaseSudoTestCase):
 
     def setUp(self):
@@ -0,0 +1,107 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+from unittest import mock
+
+from oslo_serialization import jsonutils
+
+from neutron.agent.common import loop_metrics
+from neutron.tests import base
+
+
+class TestHistogram(base.BaseTestCase):
+
+    def test_observe(self):
+        histogram = loop_metrics.Histogram(buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        self.assertEqual({'count': 4,
+                          'sum': 14.5,
+                          'max': 10,
+                          'buckets': {'1': 2, '5': 3, '+Inf': 4}},
+                         histogram.to_dict())
+
+
+class TestLoopMetrics(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.metrics = loop_metrics.LoopMetrics()
+
+    def test_phases(self):
+        self.metrics.start_iteration(3)
+        with self.metrics.phase('scan_ports', ports=2):
+            pass
+        self.metrics.observe_phase('firewall', 1.5, ports=4)
+        self.metrics.observe_phase('firewall', 0.5, ports=1)
+        self.metrics.end_iteration(4)
+
+        self.assertEqual(3, self.metrics.last_iteration['iteration'])
+        self.assertEqual(4, self.metrics.last_iteration['elapsed'])
+        self.assertEqual(2, self.metrics.last_iteration['phases']['firewall'])
+        self.assertEqual({'scan_ports': 2, 'firewall': 5},
+                         self.metrics.last_iteration['ports'])
+        self.assertEqual(2, self.metrics.phases['firewall'].count)
+        self.assertEqual(1, self.metrics.iterations.count)
+
+        # The phases of the previous iteration are not carried over.
+        self.metrics.start_iteration(4)
+        self.metrics.end_iteration(1)
+        self.assertEqual({}, self.metrics.last_iteration['phases'])
+        self.assertEqual({'scan_ports': 2, 'firewall': 5},
+                         self.metrics.ports)
+
+    def test_instrument_rpc(self):
+        rpc_api = mock.Mock(spec=['update_device_list'])
+        rpc_api.update_device_list.return_value = 'result'
+        self.metrics.instrument_rpc(rpc_api, ('update_device_list',
+                                              'tunnel_sync'))
+        self.assertEqual('result', rpc_api.update_device_list('ctx', x=1))
+        self.assertEqual(1, self.metrics.rpcs['update_device_list'].count)
+        self.assertNotIn('tunnel_sync', self.metrics.rpcs)
+        self.assertIn('update_device_list',
+                      self.metrics.get_summary()['rpc_max_latency'])
+
+    def test_instrument_rpc_exception(self):
+        rpc_api = mock.Mock(spec=['tunnel_sync'])
+        rpc_api.tunnel_sync.side_effect = ValueError
+        self.metrics.instrument_rpc(rpc_api, ('tunnel_sync', ))
+        self.assertRaises(ValueError, rpc_api.tunnel_sync)
+        self.assertEqual(1, self.metrics.rpcs['tunnel_sync'].count)
+
+    def test_metrics_file(self):
+        metrics_file = self.get_temp_file_path('metrics')
+        self.metrics.metrics_file = metrics_file
+        self.metrics.start_iteration(0)
+        self.metrics.observe_phase('scan_ports', 0.2, ports=3)
+        self.metrics.end_iteration(0.3)
+        with open(metrics_file) as f:
+            metrics = jsonutils.loads(f.read())
+        self.assertEqual(1, metrics['iterations']['count'])
+        self.assertEqual(3, metrics['ports']['scan_ports'])
+        self.assertEqual(1, metrics['phases']['scan_ports']['count'])
+
+    def test_profiling(self):
+        profiling_dir = self.get_temp_file_path('profiles')
+        self.metrics = loop_metrics.LoopMetrics(
+            profiling_dir=profiling_dir, profiling_threshold=1,
+            profiling_max_files=2)
+        for iter_num, elapsed in enumerate((0.5, 2, 3, 4)):
+            self.metrics.start_iteration(iter_num)
+            with mock.patch.object(loop_metrics.timeutils, 'utcnow') as now:
+                now.return_value.strftime.return_value = str(iter_num)
+                self.metrics.end_iteration(elapsed)
+        # The fast iteration is not saved and only the last two profiles
+        # are kept.
+        self.assertEqual(['iteration-2-2.prof', 'iteration-3-3.prof'],
+                         sorted(os.listdir(profiling_dir)))
@@ -413,6 +413,23 @@ class OVS_Lib_Test(base.BaseTestCase):
         ]
         self.execute.assert_has_calls(expected_calls)
 
+    def test_do_action_flows_max_flows_per_call(self):
+        self.br._max_flows_per_call = 2
+        self.br.do_action_flows('add', [{'in_port': port, 'actions': 'drop'}
+                                        for port in range(1, 6)],
+                                use_bundle=True)
+        self.assertEqual(3, self.execute.call_count)
+        for _call in self.execute.call_args_list:
+            self.assertIn('--bundle', _call[0][0])
+
+    def test_do_action_flows_max_flows_per_call_flow_group(self):
+        self.br._max_flows_per_call = 2
+        self.br.do_action_flows('add', [{'in_port': port, 'actions': 'drop'}
+                                        for port in range(1, 6)],
+                                use_bundle=True, flow_group_id=1)
+        # The flows of a group are written atomically, in a single bundle
+        self.assertEqual(1, self.execute.call_count)
+
     def test_delete_flows_any_cookie(self):
         self.br.delete_flows(in_port=5, cookie=ovs_lib.COOKIE_ANY)
         self.br.delete_flows(cookie=ovs_lib.COOKIE_ANY)
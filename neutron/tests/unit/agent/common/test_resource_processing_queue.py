@@ -14,6 +14,8 @@
 #
 
 import datetime
+import time
+from unittest import mock
 
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
@@ -118,5 +120,93 @@ class TestExclusiveResourceProcessor(base.BaseTestCase):
             rpqueue.add(queue.ResourceUpdate(FAKE_ID, PRIORITY_RPC))
             self.assertEqual(idx + 1, rpqueue.qsize)
         for idx in reversed(range(5)):
-            rpqueue._queue.get()
+            rpqueue._queues[0].get()
             self.assertEqual(idx, rpqueue.qsize)
+
+
+class TestResourceProcessingQueue(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.id_1 = _uuid()
+        self.id_2 = _uuid()
+
+    def _process(self, rpqueue, shard=0):
+        return [update for rp, update in
+                rpqueue.each_update_to_next_resource(shard)]
+
+    def test_shards(self):
+        rpqueue = queue.ResourceProcessingQueue(num_shards=4)
+        ids = [_uuid() for idx in range(20)]
+        for resource_id in ids:
+            rpqueue.add(queue.ResourceUpdate(resource_id, PRIORITY_RPC))
+            rpqueue.add(queue.ResourceUpdate(resource_id, PRIORITY_RPC))
+        self.assertEqual(4, rpqueue.num_shards)
+        self.assertEqual(40, rpqueue.qsize)
+        for shard in range(4):
+            while not rpqueue._queues[shard].empty():
+                update = self._process(rpqueue, shard)[0]
+                # all the updates of a resource are in the same shard
+                self.assertEqual(shard, rpqueue._get_shard(update.id))
+        self.assertEqual(0, rpqueue.qsize)
+
+    def test_pending_updates(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        rpqueue.add(queue.ResourceUpdate(self.id_1, PRIORITY_RPC))
+        rpqueue.add(queue.ResourceUpdate(self.id_1, PRIORITY_RPC))
+        rpqueue.add(queue.ResourceUpdate(self.id_2, PRIORITY_RPC))
+        self.assertEqual(2, rpqueue.pending_updates(self.id_1))
+        self.assertEqual(1, rpqueue.pending_updates(self.id_2))
+
+        for pending in (1, 0):
+            self._process(rpqueue)
+            self.assertEqual(pending, rpqueue.pending_updates(self.id_1))
+        self.assertEqual(1, rpqueue.pending_updates(self.id_2))
+        self._process(rpqueue)
+        self.assertEqual(0, rpqueue.pending_updates(self.id_2))
+
+    def test_no_aging(self):
+        rpqueue = queue.ResourceProcessingQueue()
+        with mock.patch.object(time, 'time', return_value=1000):
+            low = queue.ResourceUpdate(self.id_1, 1)
+        with mock.patch.object(time, 'time', return_value=2000):
+            high = queue.ResourceUpdate(self.id_2, 0)
+        rpqueue.add(low)
+        rpqueue.add(high)
+        self.assertEqual([high], self._process(rpqueue))
+
+    def test_aging(self):
+        rpqueue = queue.ResourceProcessingQueue(aging_interval=60)
+        with mock.patch.object(time, 'time', return_value=1000):
+            low = queue.ResourceUpdate(self.id_1, 1)
+        with mock.patch.object(time, 'time', return_value=1030):
+            high = queue.ResourceUpdate(self.id_2, 0)
+        rpqueue.add(low)
+        rpqueue.add(high)
+        # "low" has not waited long enough to be promoted
+        self.assertEqual([high], self._process(rpqueue))
+
+        with mock.patch.object(time, 'time', return_value=1061):
+            high = queue.ResourceUpdate(self.id_2, 0)
+        rpqueue.add(high)
+        self.assertEqual([low], self._process(rpqueue))
+
+    @mock.patch.object(time, 'time')
+    def test_stats(self, mock_time):
+        mock_time.return_value = 100
+        rpqueue = queue.ResourceProcessingQueue()
+        rpqueue.add(queue.ResourceUpdate(self.id_1, 0))
+        rpqueue.add(queue.ResourceUpdate(self.id_2, 1))
+        rpqueue.add(queue.ResourceUpdate(_uuid(), 1))
+        # taken from the queue after 2 seconds, processed in 0.5
+        mock_time.return_value = 102
+        for rp, update in rpqueue.each_update_to_next_resource():
+            mock_time.return_value = 102.5
+        self.assertEqual(
+            {0: {'depth': 0, 'processed': 1,
+                 'wait_time_avg': 2, 'wait_time_max': 2,
+                 'processing_time_avg': 0.5, 'processing_time_max': 0.5},
+             1: {'depth': 2, 'processed': 0,
+                 'wait_time_avg': 0, 'wait_time_max': 0,
+                 'processing_time_avg': 0, 'processing_time_max': 0}},
+            rpqueue.stats)
@@ -1439,6 +1439,46 @@ class TestDhcpAgentEventHandler(base.BaseTestCase):
                                                      fake_network)
             self.assertTrue(ump.called)
 
+    def test_reload_allocations_coalesced(self):
+        self.cache.get_network_by_id.return_value = fake_network
+        ports = [dhcp.DictModel(copy.deepcopy(fake_port2))
+                 for _i in range(3)]
+        for idx, port in enumerate(ports):
+            port['id'] = 'port-%d' % idx
+            self.dhcp.port_update_end(None, {'port': port})
+        with mock.patch.object(
+                self.dhcp, 'update_isolated_metadata_proxy') as ump:
+            self.dhcp._process_resource_update()
+            self.dhcp._process_resource_update()
+            # The reload is deferred while other updates of the network are
+            # queued and the ports are not ready yet.
+            self.call_driver.assert_not_called()
+            self.assertEqual(set(), self.dhcp.dhcp_prio_ready_ports)
+
+            self.dhcp._process_resource_update()
+            self.call_driver.assert_called_once_with('reload_allocations',
+                                                     fake_network)
+            ump.assert_called_once_with(fake_network)
+        self.assertEqual({'port-0', 'port-1', 'port-2'},
+                         self.dhcp.dhcp_prio_ready_ports)
+        self.assertEqual({}, self.dhcp._deferred_reloads)
+
+    def test_reload_allocations_deferred_last_update_stale(self):
+        self.cache.get_network_by_id.return_value = fake_network
+        port = dhcp.DictModel(copy.deepcopy(fake_port2))
+        self.dhcp.port_update_end(None, {'port': port})
+        self.dhcp.port_update_end(None, {'port': port})
+        with mock.patch.object(self.dhcp, 'update_isolated_metadata_proxy'):
+            self.dhcp._process_resource_update()
+            self.call_driver.assert_not_called()
+            self.cache.is_port_message_stale.return_value = True
+            self.dhcp._process_resource_update()
+        # The last update did not reload the allocations, the deferred
+        # reload is done after it.
+        self.call_driver.assert_called_once_with('reload_allocations',
+                                                 fake_network)
+        self.assertEqual({port.id}, self.dhcp.dhcp_prio_ready_ports)
+
     def test_port_create_end(self):
         self.reload_allocations_p = mock.patch.object(self.dhcp,
                                                       'reload_allocations')
@@ -89,6 +89,8 @@ class BasicRouterOperationsFramework(base.BaseTestCase):
         agent_config.register_interface_driver_opts_helper(self.conf)
         agent_config.register_process_monitor_opts(self.conf)
         agent_config.register_availability_zone_opts_helper(self.conf)
+        agent_config.register_resource_processing_opts_helper(self.conf)
+        agent_config.register_namespace_pool_opts_helper(self.conf)
         agent_config.register_interface_opts(self.conf)
         agent_config.register_external_process_opts(self.conf)
         agent_config.register_pd_opts(self.conf)
@@ -155,6 +157,9 @@ class BasicRouterOperationsFramework(base.BaseTestCase):
         ip_dev = mock.patch('neutron.agent.linux.ip_lib.IPDevice').start()
         self.mock_ip_dev = mock.MagicMock()
         ip_dev.return_value = self.mock_ip_dev
+        self.apply_ip_operations = mock.patch(
+            'neutron.privileged.agent.linux.ip_lib.apply_ip_operations',
+            return_value=[]).start()
         self.lladdr = "fe80::f816:3eff:fe5f:9d67"
         get_ipv6_lladdr = mock.patch("neutron.agent.linux.ip_lib."
                                      "get_ipv6_lladdr").start()
@@ -434,6 +439,113 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
                           agent.context)
         self.assertTrue(agent.fullsync)
 
+    def test_get_sync_router_priority(self):
+        fips = [{'id': _uuid()}]
+        active = lib_constants.HA_ROUTER_STATE_ACTIVE
+        standby = lib_constants.HA_ROUTER_STATE_STANDBY
+        for router, priority in (
+                ({}, l3_agent.PRIORITY_SYNC_ROUTERS_ACTIVE),
+                ({lib_constants.FLOATINGIP_KEY: fips},
+                 l3_agent.PRIORITY_SYNC_ROUTERS_FIP),
+                ({'ha': True, lib_constants.HA_ROUTER_STATE_KEY: active,
+                  lib_constants.FLOATINGIP_KEY: fips},
+                 l3_agent.PRIORITY_SYNC_ROUTERS_FIP),
+                ({'ha': True, lib_constants.HA_ROUTER_STATE_KEY: active},
+                 l3_agent.PRIORITY_SYNC_ROUTERS_ACTIVE),
+                ({'ha': True, lib_constants.HA_ROUTER_STATE_KEY: standby,
+                  lib_constants.FLOATINGIP_KEY: fips},
+                 l3_agent.PRIORITY_SYNC_ROUTERS_BACKUP),
+                ({'ha': True}, l3_agent.PRIORITY_SYNC_ROUTERS_BACKUP)):
+            self.assertEqual(priority,
+                             l3_agent.get_sync_router_priority(router))
+        self.assertLess(l3_agent.PRIORITY_RPC,
+                        l3_agent.PRIORITY_SYNC_ROUTERS_FIP)
+        self.assertLess(l3_agent.PRIORITY_SYNC_ROUTERS_BACKUP,
+                        l3_agent.PRIORITY_PD_UPDATE)
+
+    def test_periodic_sync_routers_task_priorities(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        routers = [{'id': _uuid(), 'ha': True},
+                   {'id': _uuid(), lib_constants.FLOATINGIP_KEY: [{}]},
+                   {'id': _uuid()}]
+        self.plugin_api.get_router_ids.return_value = [r['id'] for r
+                                                       in routers]
+        self.plugin_api.get_routers.return_value = routers
+        agent.periodic_sync_routers_task(agent.context)
+        updates = []
+        while not agent._queue._queues[0].empty():
+            updates.append(agent._queue._queues[0].get())
+        self.assertEqual([routers[1]['id'], routers[2]['id'],
+                          routers[0]['id']],
+                         [update.id for update in sorted(updates)])
+
+    def test_periodic_sync_routers_task_fetch_workers(self):
+        self.conf.set_override('sync_routers_fetch_workers', 3)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router_ids = [_uuid() for _i in range(100)]
+        agent.sync_routers_chunk_size = 32
+        self.plugin_api.get_router_ids.return_value = router_ids
+        self.plugin_api.get_routers.side_effect = (
+            lambda context, chunk: [{'id': r_id} for r_id in chunk])
+        # The routers are fetched by a green pool of 3 threads
+        with mock.patch.object(eventlet, 'spawn', eventlet.greenthread.spawn),\
+                mock.patch.object(agent._queue, 'add') as queue_add:
+            agent.periodic_sync_routers_task(agent.context)
+        self.assertEqual(4, self.plugin_api.get_routers.call_count)
+        self.assertEqual(router_ids,
+                         [c[0][0].id for c in queue_add.call_args_list])
+        self.assertFalse(agent.fullsync)
+
+    def test_periodic_sync_routers_task_fetch_workers_rpc_error(self):
+        self.conf.set_override('sync_routers_fetch_workers', 2)
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router_ids = [_uuid() for _i in range(64)]
+        agent.sync_routers_chunk_size = 32
+
+        def get_routers(context, chunk):
+            if chunk[0] == router_ids[32]:
+                raise oslo_messaging.MessagingException()
+            return [{'id': r_id} for r_id in chunk]
+
+        self.plugin_api.get_router_ids.return_value = router_ids
+        self.plugin_api.get_routers.side_effect = get_routers
+        with mock.patch.object(eventlet, 'spawn', eventlet.greenthread.spawn),\
+                mock.patch.object(l3_agent.LOG, 'exception') as log_exc:
+            agent.periodic_sync_routers_task(agent.context)
+        log_exc.assert_called_once_with(mock.ANY, router_ids[32:])
+        self.assertTrue(agent.fullsync)
+        self.assertIsNone(agent._sync_progress)
+
+    def test_router_sync_progress(self):
+        router_ids = [_uuid() for _i in range(40)]
+        progress = l3_agent.RouterSyncProgress(router_ids)
+        with mock.patch.object(l3_agent.LOG, 'info') as log_info:
+            for router_id in router_ids[:3]:
+                progress.router_processed(router_id)
+                progress.router_processed(router_id)
+            progress.router_processed(_uuid())
+            self.assertEqual(3, progress.processed)
+            # Logged every 2 routers (5%)
+            self.assertEqual(1, log_info.call_count)
+            self.assertEqual(2, log_info.call_args[0][1]['processed'])
+            for router_id in router_ids[3:]:
+                progress.router_processed(router_id)
+        self.assertEqual(40, progress.processed)
+        self.assertEqual(20, log_info.call_count)
+        self.assertEqual({'total': 40, 'elapsed': mock.ANY},
+                         log_info.call_args[0][1])
+
+    def test_process_update_sync_progress(self):
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        router = {'id': _uuid()}
+        agent._sync_progress = l3_agent.RouterSyncProgress([router['id']])
+        agent._queue.add(resource_processing_queue.ResourceUpdate(
+            router['id'], l3_agent.PRIORITY_SYNC_ROUTERS_TASK,
+            resource=router, action=l3_agent.ADD_UPDATE_ROUTER))
+        with mock.patch.object(agent, '_process_router_if_compatible'):
+            agent._process_update()
+        self.assertEqual(1, agent._sync_progress.processed)
+
     def test_l3_initial_report_state_done(self):
         with mock.patch.object(l3_agent.L3NATAgentWithStateReport,
                                'periodic_sync_routers_task'),\
@@ -465,6 +577,44 @@ class TestBasicRouterOperations(BasicRouterOperationsFramework):
             agent._report_state()
             self.assertFalse(agent.fullsync)
 
+    def test_report_state_without_update_queue_stats(self):
+        with mock.patch.object(agent_rpc.PluginReportStateAPI,
+                               'report_state'):
+            agent = l3_agent.L3NATAgentWithStateReport(host=HOSTNAME,
+                                                       conf=self.conf)
+            agent._queue.add(resource_processing_queue.ResourceUpdate(
+                _uuid(), l3_agent.PRIORITY_SYNC_ROUTERS_TASK))
+            with mock.patch.object(l3_agent.LOG, 'debug') as m_debug:
+                agent._report_state()
+            # The queue statistics change constantly, they are logged and
+            # not reported to the server with the agent state
+            self.assertNotIn('update_queue',
+                             agent.agent_state['configurations'])
+            stats = m_debug.call_args_list[-1][0][1]
+            self.assertEqual(
+                1, stats[l3_agent.PRIORITY_SYNC_ROUTERS_TASK]['depth'])
+
+    def test_process_routers_loop_workers(self):
+        self.conf.set_override('resource_processing_workers', 3, 'AGENT')
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        self.assertEqual(3, agent._queue.num_shards)
+        with mock.patch.object(eventlet, 'spawn_n') as spawn_n, \
+                mock.patch.object(agent,
+                                  '_process_routers_shard_loop') as loop:
+            agent._process_routers_loop()
+        spawn_n.assert_has_calls([mock.call(loop, 1), mock.call(loop, 2)])
+        loop.assert_called_once_with(0)
+
+    def test_process_routers_loop_single_worker(self):
+        self.conf.set_override('resource_processing_workers', 1, 'AGENT')
+        agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
+        self.assertEqual(1, agent._queue.num_shards)
+        agent._exiting = True
+        with mock.patch.object(agent,
+                               '_process_routers_shard_loop') as loop:
+            agent._process_routers_loop()
+        loop.assert_not_called()
+
     def test_periodic_sync_routers_task_call_clean_stale_namespaces(self):
         agent = l3_agent.L3NATAgent(HOSTNAME, self.conf)
         self.plugin_api.get_routers.return_value = []
@@ -58,6 +58,8 @@ class TestDvrRouterOperations(base.BaseTestCase):
         ha_conf.register_l3_agent_ha_opts(self.conf)
         agent_config.register_interface_driver_opts_helper(self.conf)
         agent_config.register_process_monitor_opts(self.conf)
+        agent_config.register_resource_processing_opts_helper(self.conf)
+        agent_config.register_namespace_pool_opts_helper(self.conf)
         agent_config.register_interface_opts(self.conf)
         agent_config.register_external_process_opts(self.conf)
         self.conf.set_override('interface_driver',
@@ -110,6 +112,9 @@ class TestDvrRouterOperations(base.BaseTestCase):
         ip_dev = mock.patch('neutron.agent.linux.ip_lib.IPDevice').start()
         self.mock_ip_dev = mock.MagicMock()
         ip_dev.return_value = self.mock_ip_dev
+        self.apply_ip_operations = mock.patch(
+            'neutron.privileged.agent.linux.ip_lib.apply_ip_operations',
+            return_value=[]).start()
 
         self.l3pluginApi_cls_p = mock.patch(
             'neutron.agent.l3.agent.L3PluginApi')
@@ -606,10 +611,17 @@ class TestDvrRouterOperations(base.BaseTestCase):
                                '_process_arp_cache_for_internal_port') as parp:
             ri._set_subnet_arp_info(subnet)
         self.assertEqual(1, parp.call_count)
-        self.mock_ip_dev.neigh.add.assert_has_calls([
-            mock.call('1.2.3.4', '00:11:22:33:44:55'),
-            mock.call('10.20.30.40', '00:11:22:33:44:55'),
-            mock.call('1.2.3.10', 'fa:16:3e:80:8d:80')])
+        # All the entries are added with a single privileged call
+        self.apply_ip_operations.assert_called_once_with(ri.ns_name,
+                                                         mock.ANY)
+        operations = self.apply_ip_operations.call_args[0][1]
+        self.assertEqual(
+            [('add', '1.2.3.4', '00:11:22:33:44:55'),
+             ('add', '10.20.30.40', '00:11:22:33:44:55'),
+             ('add', '1.2.3.10', 'fa:16:3e:80:8d:80')],
+            [(op['command'], op['args']['ip_address'],
+              op['args']['mac_address']) for op in operations])
+        self.assertFalse(self.mock_ip_dev.neigh.add.called)
 
         # Test negative case
         router['distributed'] = False
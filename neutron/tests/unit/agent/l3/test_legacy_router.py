@@ -112,3 +112,53 @@ class TestAddFloatingIpWithMockGarp(BasicRouterTestCaseFramework):
                                     mock.sentinel.device)
         self.assertFalse(ip_lib.send_ip_addr_adv_notif.called)
         self.assertEqual(lib_constants.FLOATINGIP_STATUS_ERROR, result)
+
+
+@mock.patch.object(ip_lib, 'send_ip_addr_adv_notif')
+class TestFloatingIpBatch(BasicRouterTestCaseFramework):
+
+    def setUp(self):
+        super().setUp()
+        self.ri = self._create_router()
+        self.device = mock.Mock()
+        self.device.name = 'qg-device'
+        self.device.namespace = self.ri.ns_name
+        self.mock_apply = mock.patch.object(
+            ip_lib.privileged, 'apply_ip_operations').start()
+
+    def test_add_floating_ips(self, send_ip_addr_adv_notif):
+        fips = [{'id': _uuid(), 'floating_ip_address': '15.1.2.3'},
+                {'id': _uuid(), 'floating_ip_address': '15.1.2.4'}]
+        self.mock_apply.return_value = [[1, 'IP address already exists']]
+
+        result = self.ri.add_floating_ips(fips, 'qg-device', self.device)
+
+        self.assertEqual(
+            {fips[0]['id']: lib_constants.FLOATINGIP_STATUS_ACTIVE,
+             fips[1]['id']: lib_constants.FLOATINGIP_STATUS_ERROR},
+            result)
+        self.mock_apply.assert_called_once_with(self.ri.ns_name, mock.ANY)
+        operations = self.mock_apply.call_args[0][1]
+        self.assertEqual(
+            [('add', 'qg-device', '15.1.2.3', 32),
+             ('add', 'qg-device', '15.1.2.4', 32)],
+            [(op['command'], op['args']['device'], op['args']['address'],
+              op['args']['prefixlen']) for op in operations])
+        send_ip_addr_adv_notif.assert_called_once_with(
+            self.ri.ns_name, 'qg-device', '15.1.2.3')
+        self.assertFalse(self.device.addr.add.called)
+
+    def test_remove_floating_ips(self, send_ip_addr_adv_notif):
+        self.mock_apply.return_value = [[0, 'error']]
+
+        self.ri.remove_floating_ips(self.device,
+                                    ['15.1.2.3/32', '15.1.2.4/32'])
+
+        self.mock_apply.assert_called_once_with(self.ri.ns_name, mock.ANY)
+        operations = self.mock_apply.call_args[0][1]
+        self.assertEqual(
+            [('delete', '15.1.2.3'), ('delete', '15.1.2.4')],
+            [(op['command'], op['args']['address']) for op in operations])
+        self.device.delete_conntrack_state.assert_called_once_with(
+            '15.1.2.4/32')
+        self.assertFalse(self.device.delete_addr_and_conntrack_state.called)
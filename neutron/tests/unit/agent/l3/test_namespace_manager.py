@@ -22,6 +22,7 @@ from neutron.agent.l3 import dvr_snat_ns
 from neutron.agent.l3 import namespace_manager
 from neutron.agent.l3 import namespaces
 from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_pool
 from neutron.tests import base
 
 _uuid = uuidutils.generate_uuid
@@ -113,3 +114,29 @@ class TestNamespaceManager(NamespaceManagerTestCaseFramework):
                         mock.call(dvr_snat_ns.SNAT_NS_PREFIX, router_id)]
             mock_cleanup.assert_has_calls(expected, any_order=True)
             self.assertEqual(2, mock_cleanup.call_count)
+
+    def test_cleanup_stale_pooled_namespaces(self):
+        pooled_id, stale_id = _uuid(), _uuid()
+        ns_names = [namespaces.POOL_NS_PREFIX + pooled_id,
+                    namespaces.POOL_NS_PREFIX + stale_id]
+        self.assertTrue(self.ns_manager.is_managed(ns_names[1]))
+        with mock.patch.object(ip_lib, 'list_network_namespaces',
+                               return_value=ns_names), \
+                mock.patch.object(namespace_pool, 'is_pooled',
+                                  side_effect=lambda ns: ns == ns_names[0]), \
+                mock.patch.object(self.ns_manager, '_cleanup') as mock_cleanup:
+            with self.ns_manager:
+                pass
+        mock_cleanup.assert_called_once_with(namespaces.POOL_NS_PREFIX,
+                                             stale_id)
+
+    def test_cleanup_pooled_namespace(self):
+        metadata_driver = mock.Mock()
+        ns_manager = namespace_manager.NamespaceManager(
+            self.agent_conf, self.driver, metadata_driver)
+        pool_id = _uuid()
+        with mock.patch.object(ip_lib, 'IPWrapper') as ip_wrapper:
+            ns_manager._cleanup(namespaces.POOL_NS_PREFIX, pool_id)
+        ip_wrapper.return_value.netns.delete.assert_called_once_with(
+            namespaces.POOL_NS_PREFIX + pool_id)
+        metadata_driver.destroy_monitored_metadata_proxy.assert_not_called()
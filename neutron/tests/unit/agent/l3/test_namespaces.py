@@ -0,0 +1,64 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslo_utils import uuidutils
+
+from neutron.agent.l3 import namespaces
+from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_pool
+from neutron.tests import base
+
+_uuid = uuidutils.generate_uuid
+
+
+class TestRouterNamespace(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.router_id = _uuid()
+        self.claim = mock.patch.object(namespace_pool, 'claim_namespace',
+                                       return_value=False).start()
+        self.sysctl = mock.patch.object(ip_lib, 'sysctl').start()
+        self.ensure_ns = mock.patch.object(ip_lib.IPWrapper,
+                                           'ensure_namespace').start()
+
+    def _create(self, ipv6_forwarding=True):
+        ns = namespaces.RouterNamespace(self.router_id, mock.Mock(),
+                                        mock.Mock(), use_ipv6=True)
+        ns.create(ipv6_forwarding=ipv6_forwarding)
+        self.claim.assert_called_once_with(ns.name)
+        return ns
+
+    def test_create(self):
+        ns = self._create()
+        self.ensure_ns.assert_called_once_with(ns.name)
+        self.sysctl.assert_called_once_with(
+            ['net.netfilter.nf_conntrack_tcp_be_liberal=1',
+             'net.ipv4.ip_forward=1',
+             'net.ipv4.conf.all.arp_ignore=1',
+             'net.ipv4.conf.all.arp_announce=2',
+             'net.ipv6.conf.all.forwarding=1'], namespace=ns.name)
+
+    def test_create_pooled(self):
+        self.claim.return_value = True
+        self._create()
+        self.ensure_ns.assert_not_called()
+        self.sysctl.assert_not_called()
+
+    def test_create_pooled_ipv6_forwarding_disabled(self):
+        self.claim.return_value = True
+        ns = self._create(ipv6_forwarding=False)
+        self.ensure_ns.assert_not_called()
+        self.sysctl.assert_called_once_with(
+            ['net.ipv6.conf.all.forwarding=0'], namespace=ns.name)
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 from unittest import mock
 
 from neutron_lib import constants as lib_constants
@@ -41,6 +42,9 @@ class TestRouterInfo(base.BaseTestCase):
             ip_lib, 'add_ip_route').start()
         self.mock_delete_ip_route = mock.patch.object(
             ip_lib, 'delete_ip_route').start()
+        self.mock_apply_ip_operations = mock.patch.object(
+            ip_lib.privileged, 'apply_ip_operations',
+            return_value=[]).start()
         self.ri_kwargs = {'agent_conf': conf,
                           'interface_driver': mock.sentinel.interface_driver}
 
@@ -52,6 +56,15 @@ class TestRouterInfo(base.BaseTestCase):
                            self.mock_delete_ip_route)
             mock_method.assert_has_calls(mock_calls, any_order=True)
 
+    def _check_route_operations(self, router, operations):
+        self.mock_apply_ip_operations.assert_called_once_with(router.ns_name,
+                                                              mock.ANY)
+        self.assertCountEqual(
+            operations,
+            [(op['command'], op['args']['cidr'], op['args']['via'])
+             for op in self.mock_apply_ip_operations.call_args[0][1]])
+        self.mock_apply_ip_operations.reset_mock()
+
     def _check_ip_wrapper_method_called(self, calls):
         self.mock_ip.netns.execute.assert_has_calls(
             [mock.call(call, check_exit_code=False) for call in calls],
@@ -174,22 +187,49 @@ class TestRouterInfo(base.BaseTestCase):
         ri.router['routes'] = fake_new_routes
         ri.routes_updated(fake_old_routes, fake_new_routes)
 
-        expected = {'replace': [('110.100.30.0/24', '10.100.10.30'),
-                                ('110.100.31.0/24', '10.100.10.30')]}
-        self._check_agent_method_called(ri, expected)
+        self._check_route_operations(
+            ri, [('add', '110.100.30.0/24', '10.100.10.30'),
+                 ('add', '110.100.31.0/24', '10.100.10.30')])
         ri.routes = fake_new_routes
         fake_new_routes = [{'destination': "110.100.30.0/24",
                             'nexthop': "10.100.10.30"}]
         ri.router['routes'] = fake_new_routes
         ri.routes_updated(ri.routes, fake_new_routes)
-        expected = {'delete': [('110.100.31.0/24', '10.100.10.30')]}
-        self._check_agent_method_called(ri, expected)
+        self._check_route_operations(
+            ri, [('delete', '110.100.31.0/24', '10.100.10.30')])
         fake_new_routes = []
         ri.router['routes'] = fake_new_routes
         ri.routes_updated(ri.routes, fake_new_routes)
 
-        expected = {'delete': [('110.100.30.0/24', '10.100.10.30')]}
-        self._check_agent_method_called(ri, expected)
+        self._check_route_operations(
+            ri, [('delete', '110.100.30.0/24', '10.100.10.30')])
+        self.assertFalse(self.mock_add_ip_route.called)
+        self.assertFalse(self.mock_delete_ip_route.called)
+
+    def test_routes_updated_ecmp(self):
+        ri = router_info.RouterInfo(mock.Mock(), _uuid(), {}, **self.ri_kwargs)
+        ri.router = {}
+        old_routes = [{'destination': '110.100.31.0/24',
+                       'nexthop': '10.100.10.30'}]
+        new_routes = old_routes + [{'destination': '110.100.31.0/24',
+                                    'nexthop': '10.100.10.31'}]
+
+        ri.routes_updated(copy.deepcopy(old_routes), new_routes)
+
+        self._check_route_operations(
+            ri, [('add', '110.100.31.0/24', [{'via': '10.100.10.30'},
+                                             {'via': '10.100.10.31'}])])
+
+    def test_routes_updated_apply_error(self):
+        ri = router_info.RouterInfo(mock.Mock(), _uuid(), {}, **self.ri_kwargs)
+        ri.router = {}
+        self.mock_apply_ip_operations.side_effect = OSError
+        new_routes = [{'destination': '110.100.31.0/24',
+                       'nexthop': '10.100.10.30'}]
+
+        # As for the single route updates, the errors are ignored
+        ri.routes_updated([], new_routes)
+        self.assertIsNone(ri._route_batches)
 
     def test__process_pd_iptables_rules(self):
         subnet_id = _uuid()
@@ -276,6 +316,101 @@ class TestRouterInfo(base.BaseTestCase):
             p_i_p.assert_called_once_with()
             p_e_o_d.assert_called_once_with()
 
+    @staticmethod
+    def _get_fip():
+        return {'id': _uuid(), 'floating_ip_address': '172.24.4.10',
+                'fixed_ip_address': '10.0.0.10'}
+
+    def _test_process_update(self, ri, router, expected_calls):
+        ri.router = router
+        with mock.patch.object(ri, '_process_internal_ports') as p_i_p, \
+                mock.patch.object(ri, 'process_external') as p_e, \
+                mock.patch.object(ri, 'process_address_scope') as p_a_s, \
+                mock.patch.object(ri, 'routes_updated') as r_u:
+            ri.process()
+            self.assertEqual(
+                expected_calls,
+                [p_i_p.called, p_e.called, p_a_s.called, r_u.called])
+
+    def test_process_update_diff(self):
+        router = {'id': _uuid(), 'routes': [], 'revision_number': 1,
+                  lib_constants.INTERFACE_KEY: [{'id': _uuid()}],
+                  lib_constants.FLOATINGIP_KEY: []}
+        ri = router_info.RouterInfo(mock.Mock(), router['id'],
+                                    copy.deepcopy(router), **self.ri_kwargs)
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+
+        # Only the floating IPs changed
+        router[lib_constants.FLOATINGIP_KEY] = [self._get_fip()]
+        router['revision_number'] = 2
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [False, True, True, False])
+
+        # Only the static routes changed
+        router['routes'] = [{'destination': '10.0.0.0/24',
+                             'nexthop': '192.168.0.1'}]
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [False, False, False, True])
+
+        # Nothing changed, the router is processed again for another reason
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+
+        # The interfaces changed
+        router[lib_constants.INTERFACE_KEY] = []
+        router[lib_constants.FLOATINGIP_KEY] = []
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+
+    def test_process_update_diff_after_failure(self):
+        router = {'id': _uuid(), 'routes': [],
+                  lib_constants.FLOATINGIP_KEY: []}
+        ri = router_info.RouterInfo(mock.Mock(), router['id'],
+                                    copy.deepcopy(router), **self.ri_kwargs)
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+        router[lib_constants.FLOATINGIP_KEY] = [self._get_fip()]
+        ri.router = copy.deepcopy(router)
+        with mock.patch.object(ri, 'process_external',
+                               side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, ri.process)
+
+        # The update is retried in full
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+
+    def test_process_update_diff_disabled(self):
+        self.ri_kwargs['agent_conf'].set_override(
+            'router_update_diff_processing', False)
+        router = {'id': _uuid(), 'routes': [],
+                  lib_constants.FLOATINGIP_KEY: []}
+        ri = router_info.RouterInfo(mock.Mock(), router['id'],
+                                    copy.deepcopy(router), **self.ri_kwargs)
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+        router[lib_constants.FLOATINGIP_KEY] = [self._get_fip()]
+        self._test_process_update(ri, copy.deepcopy(router),
+                                  [True, True, True, True])
+
+    def test_process_external_floating_ips_update(self):
+        router = {'id': _uuid(), 'routes': [],
+                  lib_constants.FLOATINGIP_KEY: []}
+        ri = router_info.RouterInfo(mock.Mock(), router['id'], router,
+                                    **self.ri_kwargs)
+        ri.iptables_manager = mock.MagicMock()
+        ri._update_diff = router_info.RouterUpdateDiff(
+            router, dict(router, **{lib_constants.FLOATINGIP_KEY: [
+                {'id': _uuid()}]}))
+        with mock.patch.object(ri, '_process_external_gateway') as p_e_g, \
+                mock.patch.object(ri, 'update_fip_statuses'):
+            ri.process_external()
+            self.assertFalse(p_e_g.called)
+
+            ri._update_diff = None
+            ri.process_external()
+            p_e_g.assert_called_once_with(None)
+
     def test__update_internal_ports_cache(self):
         ri = router_info.RouterInfo(mock.Mock(), _uuid(), {}, **self.ri_kwargs)
         ri.internal_ports = [
@@ -598,3 +733,48 @@ class TestFloatingIpWithMockDevice(BasicRouterTestCaseFramework):
 
         ri.process_floating_ip_addresses("qg-fake-device")
         ri.remove_floating_ip.assert_called_once_with(device, '4.4.4.4/32')
+
+
+class TestRouterUpdateDiff(base.BaseTestCase):
+
+    def _get_diff(self, old_router, **changes):
+        new_router = dict(old_router, **changes)
+        return router_info.RouterUpdateDiff(old_router, new_router)
+
+    def test_not_processed(self):
+        diff = router_info.RouterUpdateDiff(None, {'id': _uuid()})
+        self.assertTrue(diff.full)
+        self.assertTrue(diff.floating_ips_changed)
+        self.assertTrue(diff.routes_changed)
+
+    def test_no_change(self):
+        diff = self._get_diff({'id': _uuid(), 'revision_number': 1},
+                              revision_number=2)
+        self.assertEqual(set(), diff.changed_keys)
+        self.assertTrue(diff.full)
+
+    def test_floating_ips_changed(self):
+        diff = self._get_diff(
+            {'id': _uuid(), 'routes': []},
+            **{lib_constants.FLOATINGIP_KEY: [{'id': _uuid()}],
+               'fip_managed_by_port_forwardings': [_uuid()]})
+        self.assertFalse(diff.full)
+        self.assertTrue(diff.floating_ips_changed)
+        self.assertFalse(diff.routes_changed)
+
+    def test_routes_changed(self):
+        diff = self._get_diff({'id': _uuid(), 'routes': []},
+                              routes=[{'destination': '10.0.0.0/24',
+                                       'nexthop': '192.168.0.1'}])
+        self.assertFalse(diff.full)
+        self.assertFalse(diff.floating_ips_changed)
+        self.assertTrue(diff.routes_changed)
+
+    def test_gateway_changed(self):
+        diff = self._get_diff(
+            {'id': _uuid(), 'gw_port': None},
+            gw_port={'id': _uuid()},
+            **{lib_constants.FLOATINGIP_KEY: [{'id': _uuid()}]})
+        self.assertTrue(diff.full)
+        self.assertTrue(diff.floating_ips_changed)
+        self.assertTrue(diff.routes_changed)
@@ -410,6 +410,7 @@ class TestConjIPFlowManager(base.BaseTestCase):
     def setUp(self):
         super().setUp()
         self.driver = mock.Mock()
+        self.driver._deferred = False
         self.driver.int_br.br.dump_flows.return_value = INIT_OF_RULES
         self.manager = ovsfw.ConjIPFlowManager(self.driver)
         self.vlan_tag = 100
@@ -474,6 +475,30 @@ class TestConjIPFlowManager(base.BaseTestCase):
                       flow_group_id='ofport1')]
         self.assertEqual(self.driver._add_flow.call_args_list, calls)
 
+    def test_update_flows_for_vlan_deferred(self):
+        self.driver._deferred = True
+        remote_group = self.driver.sg_port_map.get_sg.return_value
+        remote_group.get_ethertype_filtered_addresses.return_value = [
+            ('10.22.3.4', 'fa:16:3e:aa:bb:cc'), ]
+        with mock.patch.object(self.manager.conj_id_map,
+                               'get_conj_id') as get_conj_id_mock:
+            get_conj_id_mock.return_value = self.conj_id
+            self.manager.add(self.vlan_tag, 'sg', 'remote_id',
+                             constants.INGRESS_DIRECTION, constants.IPv4, 0)
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+            self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport2')
+        self.driver._add_flow.assert_not_called()
+        self.assertEqual({self.vlan_tag: 'ofport1'},
+                         self.manager.pending_vlans)
+
+        self.manager.apply_pending_updates()
+        self.assertEqual(2, self.driver._add_flow.call_count)
+        self.assertEqual({}, self.manager.pending_vlans)
+        # The flows are already installed, nothing else is added.
+        self.manager.update_flows_for_vlan(self.vlan_tag, 'ofport1')
+        self.manager.apply_pending_updates()
+        self.assertEqual(2, self.driver._add_flow.call_count)
+
     def _sg_removed(self, sg_name):
         with mock.patch.object(self.manager.conj_id_map,
                                'get_conj_id') as get_id_mock, \
@@ -599,6 +624,25 @@ class TestOVSFirewallDriver(base.BaseTestCase):
         self.mock_bridge.br.add_flow.assert_called_once_with(
             **expected_calls)
 
+    def test_get_flow_stats(self):
+        self.firewall.get_flow_stats()
+        self.firewall._add_flow(in_port=1, actions='drop')
+        self.firewall._add_flow(in_port=2, actions='drop')
+        self.firewall._delete_flows(in_port=1)
+        self.assertEqual({'added': 2, 'delete_calls': 1},
+                         self.firewall.get_flow_stats())
+        self.assertEqual({'added': 0, 'delete_calls': 0},
+                         self.firewall.get_flow_stats())
+
+    def test_filter_defer_apply_off_applies_pending_vlans(self):
+        self.firewall.filter_defer_apply_on()
+        with mock.patch.object(self.firewall.conj_ip_manager,
+                               'apply_pending_updates') as m_apply:
+            self.firewall.filter_defer_apply_off()
+        m_apply.assert_called_once_with()
+        self.mock_bridge.apply_flows.assert_called_once_with()
+        self.assertFalse(self.firewall._deferred)
+
     def test__drop_all_unmatched_flows(self):
         self.firewall._drop_all_unmatched_flows()
         expected_calls = [
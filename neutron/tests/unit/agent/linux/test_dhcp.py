@@ -2421,6 +2421,70 @@ class TestDnsmasq(TestBase):
             mock.call(exp_opt_name, exp_opt_data),
         ])
 
+    @mock.patch.object(checks, 'dnsmasq_host_tag_support', autospec=True)
+    def test_reload_allocations_config_not_changed(self, mock_tag_support):
+        mock_tag_support.return_value = False
+        (exp_host_name, exp_host_data,
+         exp_addn_name, exp_addn_data,
+         exp_opt_name, exp_opt_data,) = self._test_reload_allocation_data()
+        net = FakeDualNetwork()
+        for path, contents in ((exp_host_name, exp_host_data),
+                               (exp_addn_name, exp_addn_data),
+                               (exp_opt_name, exp_opt_data),
+                               ('/dhcp/%s/interface' % net.id,
+                                'tapdancingmice')):
+            self.useFixture(lib_fixtures.OpenFixture(path, contents))
+        test_pm = mock.Mock()
+        dm = self._get_dnsmasq(net, test_pm)
+        dm.reload_allocations()
+
+        self.assertTrue(test_pm.register.called)
+        self.external_process().enable.assert_not_called()
+        self.safe.assert_not_called()
+
+    def test_output_hosts_file_renders_changed_ports(self):
+        net = FakeDualNetwork()
+        dm = self._get_dnsmasq(net)
+        dm.disable(retain_port=True)
+        with mock.patch.object(dm, '_format_host_entries',
+                               wraps=dm._format_host_entries) as fmt:
+            dm._output_hosts_file()
+            self.assertEqual(len(net.ports), fmt.call_count)
+
+            fmt.reset_mock()
+            net.ports[0].mac_address = '00:00:80:aa:bb:dd'
+            dm._output_addn_hosts_file()
+            dm._output_hosts_file()
+            fmt.assert_called_once_with(net.ports[0], mock.ANY, mock.ANY)
+        self.assertIn('00:00:80:aa:bb:dd,host-192-168-0-2',
+                      self.safe.call_args[0][1])
+
+        # All the ports are rendered again when a subnet changes.
+        net.subnets[0].enable_dhcp = False
+        with mock.patch.object(dm, '_format_host_entries') as fmt:
+            fmt.return_value = ''
+            dm._output_hosts_file()
+            self.assertEqual(len(net.ports), fmt.call_count)
+
+    def test_output_hosts_file_port_revision_number(self):
+        net = FakeDualNetwork()
+        for port in net.ports:
+            port.revision_number = 1
+        dm = self._get_dnsmasq(net)
+        dm.disable(retain_port=True)
+        dm._output_hosts_file()
+        with mock.patch.object(dm, '_format_host_entries',
+                               return_value='') as fmt:
+            net.ports[0].revision_number = 2
+            dm._output_hosts_file()
+            fmt.assert_called_once_with(net.ports[0], mock.ANY, mock.ANY)
+
+            # A network fetched again from the server is rendered again.
+            fmt.reset_mock()
+            dm.network = copy.copy(net)
+            dm._output_hosts_file()
+            self.assertEqual(len(net.ports), fmt.call_count)
+
     def test_release_unused_leases(self):
         dnsmasq = self._get_dnsmasq(FakeDualNetwork())
 
@@ -3369,6 +3433,42 @@ class TestDeviceManager(TestConfBase):
         self._test_setup(self.mock_load_interface_driver,
                          self.mock_ip_lib, use_gateway_ips=True)
 
+    def test_setup_namespace(self):
+        mgr = dhcp.DeviceManager(self.conf, mock.Mock())
+        mgr.setup_namespace('qdhcp-ns')
+        self.mock_ip_lib.IPWrapper().ensure_namespace.assert_called_once_with(
+            'qdhcp-ns')
+        self.mock_ip_lib.set_ip_nonlocal_bind_for_namespace.\
+            assert_called_once_with('qdhcp-ns', 1, root_namespace=True)
+        mgr.driver.configure_ipv6_ra.assert_called_once_with(
+            'qdhcp-ns', 'default', constants.ACCEPT_RA_DISABLED)
+
+    def _test_setup_namespace_pool(self, claimed):
+        self.conf.register_opt(cfg.BoolOpt('enable_isolated_metadata',
+                                           default=False))
+        self.conf.register_opt(cfg.BoolOpt('force_metadata', default=False))
+        mgr = dhcp.DeviceManager(self.conf, mock.Mock())
+        network = FakeDeviceManagerNetwork()
+        with mock.patch.object(dhcp.namespace_pool, 'claim_namespace',
+                               return_value=claimed) as claim, \
+                mock.patch.object(mgr, 'setup_namespace') as setup_ns, \
+                mock.patch.object(mgr, 'setup_dhcp_port',
+                                  return_value=mock.Mock(fixed_ips=[])), \
+                mock.patch.object(mgr, '_update_dhcp_port'), \
+                mock.patch.object(mgr, '_set_default_route'), \
+                mock.patch.object(mgr, 'cleanup_stale_devices'):
+            mgr.setup(network)
+        claim.assert_called_once_with(network.namespace)
+        return setup_ns
+
+    def test_setup_namespace_pool_claimed(self):
+        setup_ns = self._test_setup_namespace_pool(claimed=True)
+        setup_ns.assert_not_called()
+
+    def test_setup_namespace_pool_not_claimed(self):
+        setup_ns = self._test_setup_namespace_pool(claimed=False)
+        setup_ns.assert_called_once_with('qdhcp-ns')
+
     def _test_setup_reserved(self, enable_isolated_metadata=False,
                              force_metadata=False):
         with mock.patch.object(dhcp.ip_lib, 'IPDevice') as mock_IPDevice:
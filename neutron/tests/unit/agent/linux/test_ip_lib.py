@@ -930,6 +930,11 @@ class TestIpNetnsCommand(TestIPCmdBase):
         self.netns_cmd.delete('ns')
         remove.assert_called_once_with('ns')
 
+    @mock.patch.object(priv_lib, 'rename_netns')
+    def test_rename_namespace(self, rename):
+        ip_lib.rename_network_namespace('ns', 'new-ns')
+        rename.assert_called_once_with('ns', 'new-ns')
+
     def test_execute(self):
         self.parent.namespace = 'ns'
         with mock.patch('neutron.agent.common.utils.execute') as execute:
@@ -1499,3 +1504,64 @@ class GetDevicesInfoTestCase(base.BaseTestCase):
             break
         else:
             self.fail('No VETH device found')
+
+
+class TestIpOperationBatch(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.batch = ip_lib.IpOperationBatch('namespace')
+        self.mock_apply = mock.patch.object(priv_lib,
+                                            'apply_ip_operations').start()
+        self.mock_apply.return_value = []
+
+    def test_apply(self):
+        self.assertEqual(0, self.batch.add_address('192.168.0.1/24', 'eth0'))
+        self.assertEqual(1, self.batch.delete_address('2001:db8::1/64',
+                                                      'eth0'))
+        self.assertEqual(2, self.batch.add_route('10.0.0.0/24',
+                                                 via='192.168.0.254',
+                                                 table='main'))
+        self.assertEqual(3, self.batch.delete_route('10.0.0.0/24',
+                                                    via='192.168.0.254'))
+        self.assertEqual(4, self.batch.add_neigh('10.0.0.1',
+                                                 'fa:16:3e:00:00:01', 'eth1'))
+        self.assertEqual(5, self.batch.delete_neigh('10.0.0.2',
+                                                    'fa:16:3e:00:00:02',
+                                                    'eth1'))
+        self.assertEqual(6, len(self.batch))
+        self.mock_apply.return_value = [[4, 'error']]
+
+        self.assertEqual({4: 'error'}, self.batch.apply())
+
+        self.assertEqual(0, len(self.batch))
+        self.mock_apply.assert_called_once_with('namespace', [
+            {'type': 'address', 'command': 'add',
+             'args': {'device': 'eth0', 'ip_version': 4,
+                      'address': '192.168.0.1', 'prefixlen': 24,
+                      'scope': 'global', 'broadcast': '192.168.0.255'}},
+            {'type': 'address', 'command': 'delete',
+             'args': {'device': 'eth0', 'ip_version': 6,
+                      'address': '2001:db8::1', 'prefixlen': 64}},
+            {'type': 'route', 'command': 'add',
+             'args': {'cidr': '10.0.0.0/24', 'ip_version': 4,
+                      'device': None, 'via': '192.168.0.254',
+                      'table': 254, 'metric': None, 'scope': None,
+                      'proto': 'static'}},
+            {'type': 'route', 'command': 'delete',
+             'args': {'cidr': '10.0.0.0/24', 'ip_version': 4,
+                      'device': None, 'via': '192.168.0.254',
+                      'table': None, 'scope': None}},
+            {'type': 'neigh', 'command': 'add',
+             'args': {'device': 'eth1', 'ip_version': 4,
+                      'ip_address': '10.0.0.1',
+                      'mac_address': 'fa:16:3e:00:00:01',
+                      'nud_state': 'permanent'}},
+            {'type': 'neigh', 'command': 'delete',
+             'args': {'device': 'eth1', 'ip_version': 4,
+                      'ip_address': '10.0.0.2',
+                      'mac_address': 'fa:16:3e:00:00:02'}}])
+
+    def test_apply_empty(self):
+        self.assertEqual({}, self.batch.apply())
+        self.mock_apply.assert_not_called()
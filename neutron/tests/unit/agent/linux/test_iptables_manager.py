@@ -1176,7 +1176,8 @@ class IptablesManagerStateFulTestCase(IptablesManagerBaseTestCase):
 
         RESTORE_INPUT = ('# Generated by iptables_manager\n'
                          '*filter\n'
-                         '-D run.py-test-filter 1\n'
+                         '-D run.py-test-filter -d 192.168.0.2 -i tap-xxx '
+                         '-j ACCEPT\n'
                          '-I run.py-test-filter 1 '
                          '-i tap-xxx -d 192.168.0.2 -j ACCEPT\n'
                          'COMMIT\n'
@@ -1349,6 +1350,82 @@ class IptablesManagerStateFulTestCaseEmptyCustomBinaryNameIPv6(
     use_ipv6 = True
 
 
+class IptablesManagerIncrementalApplyTestCase(IptablesManagerBaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cfg.CONF.set_override('iptables_incremental_apply', True, 'AGENT')
+        self.execute.return_value = ''
+        self.iptables = iptables_manager.IptablesManager()
+        self.iptables.apply()
+        self.execute.reset_mock()
+
+    def _executed_commands(self):
+        return [_call[0][0] for _call in self.execute.call_args_list]
+
+    def test_apply_wrapped_chain_change_without_save(self):
+        self.iptables.ipv4['nat'].add_rule(
+            'float-snat', '-s 10.0.0.3/32 -j SNAT --to-source 172.24.4.3')
+        commands = self.iptables.apply()
+        self.assertEqual([['iptables-restore', '-n']],
+                         self._executed_commands())
+        self.assertEqual(
+            ['# Generated by iptables_manager', '*nat',
+             '-I %s-float-snat 1 -s 10.0.0.3/32 -j SNAT --to-source '
+             '172.24.4.3' % iptables_manager.binary_name,
+             'COMMIT', '# Completed by iptables_manager'], commands)
+
+    def test_apply_no_change(self):
+        self.assertEqual([], self.iptables.apply())
+        self.execute.assert_not_called()
+
+    def test_apply_shared_chain_change_reads_table(self):
+        self.iptables.ipv4['filter'].add_rule('neutron-filter-top', '-j DROP',
+                                              wrap=False)
+        self.iptables.apply()
+        self.assertEqual([['iptables-save', '-t', 'filter'],
+                          ['iptables-restore', '-n']],
+                         self._executed_commands())
+
+    def test_apply_failure_resets_model(self):
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        self.execute.side_effect = RuntimeError
+        self.assertRaises(RuntimeError, self.iptables.apply)
+        self.execute.side_effect = None
+        self.execute.reset_mock()
+        self.iptables.apply()
+        self.assertEqual([['iptables-save'], ['iptables-restore', '-n']],
+                         self._executed_commands())
+
+    def test_apply_failure_reads_tables(self):
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        errors = [RuntimeError(), None]
+        with mock.patch.object(self.iptables, '_run_restore',
+                               side_effect=lambda *args: errors.pop(0)
+                               ) as run_restore:
+            self.iptables.apply()
+        self.assertEqual(2, run_restore.call_count)
+        self.assertEqual([['iptables-save']], self._executed_commands())
+
+    def test_apply_delete_rule_by_specification(self):
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j ACCEPT')
+        self.iptables.apply()
+        self.iptables.ipv4['filter'].remove_rule('INPUT', '-j DROP')
+        commands = self.iptables.apply()
+        self.assertIn('-D %s-INPUT -j DROP' % iptables_manager.binary_name,
+                      commands)
+
+    def test_debug_iptables_rules_reads_tables(self):
+        cfg.CONF.set_override('debug_iptables_rules', True, 'AGENT')
+        self.iptables.ipv4['filter'].add_rule('INPUT', '-j DROP')
+        with mock.patch.object(self.iptables, '_apply_synchronized',
+                               return_value=[]) as apply_sync:
+            self.iptables.apply()
+        apply_sync.assert_has_calls([mock.call(),
+                                     mock.call(incremental=False)])
+
+
 class IptablesManagerStateLessTestCase(base.BaseTestCase):
 
     def setUp(self):
@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from neutron.agent.linux import ip_lib
+from neutron.agent.linux import namespace_pool
+from neutron.tests import base
+
+
+class TestNamespacePool(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prepare = mock.Mock()
+        self.pool = namespace_pool.NamespacePool('qtest-', 'qpool-', 2,
+                                                 self.prepare)
+        # Replenish the pool synchronously
+        mock.patch.object(namespace_pool.eventlet, 'spawn_n',
+                          side_effect=lambda f: f()).start()
+        self.list_ns = mock.patch.object(
+            ip_lib, 'list_network_namespaces', return_value=[]).start()
+        self.ns_exists = mock.patch.object(
+            ip_lib, 'network_namespace_exists', return_value=False).start()
+        self.rename_ns = mock.patch.object(
+            ip_lib, 'rename_network_namespace').start()
+        self.delete_ns = mock.patch.object(
+            ip_lib, 'delete_network_namespace').start()
+        self.addCleanup(namespace_pool._POOLS.clear)
+
+    def _pooled(self):
+        return [c[0][0] for c in self.prepare.call_args_list]
+
+    def test_start(self):
+        self.list_ns.return_value = ['qpool-old', 'qtest-1', 'qrouter-1']
+        self.pool.start()
+        self.delete_ns.assert_called_once_with('qpool-old')
+        pooled = self._pooled()
+        self.assertEqual(2, len(pooled))
+        for name in pooled:
+            self.assertTrue(name.startswith('qpool-'))
+            self.assertTrue(self.pool.owns(name))
+        self.assertFalse(self.pool.owns('qpool-old'))
+
+    def test_claim(self):
+        self.pool.start()
+        pooled = self._pooled()
+        self.assertTrue(self.pool.claim('qtest-1'))
+        self.rename_ns.assert_called_once_with(pooled[0], 'qtest-1')
+        self.assertFalse(self.pool.owns(pooled[0]))
+        # The pool was replenished
+        self.assertEqual(3, self.prepare.call_count)
+        self.assertTrue(self.pool.owns(self._pooled()[2]))
+
+    def test_claim_existing_namespace(self):
+        self.pool.start()
+        self.ns_exists.return_value = True
+        self.assertFalse(self.pool.claim('qtest-1'))
+        self.rename_ns.assert_not_called()
+
+    def test_claim_empty_pool(self):
+        self.assertFalse(self.pool.claim('qtest-1'))
+        self.rename_ns.assert_not_called()
+
+    def test_claim_rename_error(self):
+        self.pool.start()
+        pooled = self._pooled()
+        self.rename_ns.side_effect = OSError()
+        self.assertFalse(self.pool.claim('qtest-1'))
+        self.delete_ns.assert_called_once_with(pooled[0])
+
+    def test_replenish_prepare_error(self):
+        self.prepare.side_effect = [None, RuntimeError()]
+        self.pool.start()
+        pooled = self._pooled()
+        self.assertTrue(self.pool.owns(pooled[0]))
+        self.assertFalse(self.pool.owns(pooled[1]))
+        self.delete_ns.assert_called_once_with(pooled[1])
+        # The next replenishment is not blocked
+        self.prepare.side_effect = None
+        self.pool.replenish()
+        self.assertTrue(self.pool.owns(self._pooled()[2]))
+
+    def test_clear(self):
+        self.pool.start()
+        self.pool.clear()
+        self.delete_ns.assert_has_calls(
+            [mock.call(name) for name in self._pooled()])
+        self.assertFalse(self.pool.claim('qtest-1'))
+
+    def test_claim_namespace(self):
+        self.assertFalse(namespace_pool.claim_namespace('qtest-1'))
+        namespace_pool.register(self.pool)
+        self.assertFalse(namespace_pool.claim_namespace('qother-1'))
+        self.assertTrue(namespace_pool.claim_namespace('qtest-1'))
+        self.assertTrue(namespace_pool.is_pooled(self._pooled()[1]))
+        namespace_pool.unregister('qtest-')
+        self.assertFalse(namespace_pool.is_pooled(self._pooled()[1]))
+        self.assertFalse(namespace_pool.claim_namespace('qtest-2'))
@@ -0,0 +1,118 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from neutron.agent.ovn.metadata import port_cache
+from neutron.tests import base
+
+PORT1 = ('port1', ('instance1', 'project1'))
+PORT2 = ('port2', ('instance2', 'project2'))
+NOT_FOUND = (None, (None, None))
+
+
+class TestPortLookupCache(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = port_cache.PortLookupCache(3)
+        self.get_port = mock.Mock(return_value=PORT1)
+
+    def _lookup(self, ip_address, network_id='net1', mac=None):
+        return self.cache.lookup(network_id, ip_address, mac, self.get_port)
+
+    def test_lookup(self):
+        self.assertEqual(PORT1, self._lookup('10.0.0.1'))
+        self.assertEqual(PORT1, self._lookup('10.0.0.1'))
+        self.get_port.assert_called_once_with('net1', '10.0.0.1', None)
+        stats = self.cache.get_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.5, stats['hit_rate'])
+        self.assertEqual(1, stats['entries'])
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_lookup_not_found_not_cached(self):
+        self.get_port.return_value = NOT_FOUND
+        self.assertEqual(NOT_FOUND, self._lookup('10.0.0.1'))
+        self.assertEqual(NOT_FOUND, self._lookup('10.0.0.1'))
+        self.assertEqual(2, self.get_port.call_count)
+
+    def test_lookup_disabled(self):
+        self.cache = port_cache.PortLookupCache(0)
+        self._lookup('10.0.0.1')
+        self._lookup('10.0.0.1')
+        self.assertEqual(2, self.get_port.call_count)
+        self.assertEqual(0, self.cache.get_stats()['entries'])
+
+    def test_lookup_lru_eviction(self):
+        for ip_address in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            self._lookup(ip_address)
+        # 10.0.0.1 is now the most recently used entry
+        self._lookup('10.0.0.1')
+        self._lookup('10.0.0.4')
+        self.get_port.reset_mock()
+        self._lookup('10.0.0.1')
+        self.assertFalse(self.get_port.called)
+        self._lookup('10.0.0.2')
+        self.get_port.assert_called_once_with('net1', '10.0.0.2', None)
+        self.assertEqual(3, self.cache.get_stats()['entries'])
+
+    def test_lookup_during_update_not_cached(self):
+        def get_port(*args):
+            self.cache.update_port('port2', 'net1', ['fa:16:3e:00:00:02'])
+            return PORT1
+
+        self.cache.lookup('net1', '10.0.0.1', None, get_port)
+        self.assertEqual(0, self.cache.get_stats()['entries'])
+
+    def test_update_port_invalidates_port(self):
+        self._lookup('10.0.0.1')
+        self._lookup('fe80::1', mac='fa:16:3e:00:00:01')
+        self.cache.update_port('port1', 'net1', [])
+        self.assertEqual(0, self.cache.get_stats()['entries'])
+
+    def test_update_port_invalidates_addresses(self):
+        self._lookup('10.0.0.1')
+        self._lookup('fe80::1', mac='fa:16:3e:00:00:01')
+        self._lookup('10.0.0.1', network_id='net2')
+        self.cache.update_port('port2', 'net1',
+                               ['fa:16:3e:00:00:01', '10.0.0.1'])
+        self.get_port.reset_mock()
+        self._lookup('10.0.0.1')
+        self._lookup('fe80::1', mac='fa:16:3e:00:00:01')
+        self._lookup('10.0.0.1', network_id='net2')
+        self.assertEqual(2, self.get_port.call_count)
+
+    def test_update_port_adds_entries(self):
+        self.cache.update_port('port1', 'net1',
+                               ['fa:16:3e:00:00:01', '10.0.0.1', '10.0.0.2'],
+                               value=PORT1[1])
+        self.assertEqual(PORT1, self._lookup('10.0.0.1'))
+        self.assertEqual(PORT1, self._lookup('10.0.0.2'))
+        self.assertFalse(self.get_port.called)
+
+    def test_update_port_conflict_not_added(self):
+        self._lookup('10.0.0.1')
+        self.cache.update_port('port2', 'net1',
+                               ['fa:16:3e:00:00:02', '10.0.0.1', '10.0.0.2'],
+                               value=PORT2[1])
+        self.get_port.reset_mock()
+        self.assertEqual(PORT2, self._lookup('10.0.0.2'))
+        self._lookup('10.0.0.1')
+        self.get_port.assert_called_once_with('net1', '10.0.0.1', None)
+
+    def test_remove(self):
+        self._lookup('10.0.0.1')
+        self.cache.remove('net1', '10.0.0.1')
+        self._lookup('10.0.0.1')
+        self.assertEqual(2, self.get_port.call_count)
@@ -25,6 +25,7 @@ from neutron.agent.linux import utils as agent_utils
 from neutron.agent.metadata import proxy_base
 from neutron.agent.ovn.metadata import server as agent
 from neutron.conf.agent.metadata import config as meta_conf
+from neutron.conf.agent.ovn.metadata import config as ovn_meta_conf
 from neutron.tests import base
 
 OvnPortInfo = collections.namedtuple(
@@ -42,6 +43,8 @@ class TestMetadataProxyHandler(base.BaseTestCase):
     def setUp(self):
         super().setUp()
         self.useFixture(self.fake_conf_fixture)
+        self.fake_conf_fixture.register_opts(
+            ovn_meta_conf.METADATA_PORT_CACHE_OPTS)
         self.log_p = mock.patch.object(proxy_base, 'LOG')
         self.log = self.log_p.start()
         self.agent_log_p = mock.patch.object(agent, 'LOG')
@@ -189,6 +192,110 @@ class TestMetadataProxyHandler(base.BaseTestCase):
         self.assertEqual(expected, observed)
         self.assertEqual(len(self.agent_log.mock_calls), 1)
 
+    def test_get_port_cached(self):
+        ovn_port = OvnPortInfo(
+            external_ids={'neutron:device_id': 'device_id',
+                          'neutron:project_id': 'project_id'},
+            chassis=['chassis1'],
+            mac='fa:16:3e:12:34:56 192.168.1.1',
+            uuid=1)
+        get_ports = self.handler.sb_idl.get_network_port_bindings_by_ip
+        get_ports.return_value = [ovn_port]
+
+        for _i in range(2):
+            self.assertEqual(
+                ('device_id', 'project_id'),
+                self.handler.get_port('192.168.1.1', network_id='net1'))
+        get_ports.assert_called_once_with('net1', '192.168.1.1', mac=None)
+
+        self.assertEqual(
+            ('device_id', 'project_id'),
+            self.handler.get_port('192.168.1.1', network_id='net1',
+                                  skip_cache=True))
+        self.assertEqual(2, get_ports.call_count)
+
+    def test_get_port_cache_disabled(self):
+        self.fake_conf_fixture.config(metadata_port_cache_size=0)
+        handler = agent.MetadataProxyHandler(self.fake_conf, 'chassis1',
+                                             mock.Mock())
+        handler._post_fork_event.set()
+        get_ports = handler.sb_idl.get_network_port_bindings_by_ip
+        get_ports.return_value = []
+
+        for _i in range(2):
+            self.assertEqual((None, None),
+                             handler.get_port('192.168.1.1',
+                                              network_id='net1'))
+        self.assertEqual(2, get_ports.call_count)
+        self.assertFalse(handler._has_cache)
+        self.assertFalse(
+            handler.sb_idl.idl.notify_handler.watch_events.called)
+
+    def test_post_fork_initialize_watches_port_bindings(self):
+        with mock.patch.object(agent.ovsdb,
+                               'MetadataAgentOvnSbIdl') as sb_idl:
+            self.handler.post_fork_initialize(mock.ANY, mock.ANY, mock.ANY)
+        events = sb_idl.call_args[1]['events']
+        self.assertEqual(1, len(events))
+        self.assertIsInstance(events[0], agent.PortBindingLookupCacheEvent)
+        self.assertIs(self.handler._port_cache, events[0].cache)
+
+
+class TestPortBindingLookupCacheEvent(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = mock.Mock()
+        self.event = agent.PortBindingLookupCacheEvent(self.cache)
+
+    def _make_row(self, **kwargs):
+        attrs = {'uuid': 'port-uuid',
+                 'datapath': mock.Mock(
+                     external_ids={'name': 'neutron-net1'}),
+                 'mac': ['fa:16:3e:12:34:56 10.0.0.5'],
+                 'chassis': [mock.Mock()],
+                 'external_ids': {'neutron:device_id': 'device_id',
+                                  'neutron:project_id': 'project_id'}}
+        attrs.update(kwargs)
+        return mock.Mock(**attrs)
+
+    def test_match_fn(self):
+        row = self._make_row()
+        self.assertTrue(self.event.match_fn(self.event.ROW_CREATE, row, None))
+        self.assertTrue(self.event.match_fn(self.event.ROW_DELETE, row, None))
+        self.assertTrue(self.event.match_fn(
+            self.event.ROW_UPDATE, row, mock.Mock(spec=['chassis'])))
+        self.assertFalse(self.event.match_fn(
+            self.event.ROW_UPDATE, row, mock.Mock(spec=['up'])))
+
+    def test_run_bound(self):
+        self.event.run(self.event.ROW_CREATE, self._make_row(), None)
+        self.cache.update_port.assert_called_once_with(
+            'port-uuid', 'net1', ['fa:16:3e:12:34:56', '10.0.0.5'],
+            value=('device_id', 'project_id'))
+
+    def test_run_unbound(self):
+        old = mock.Mock(spec=['chassis'], chassis=[mock.Mock()])
+        self.event.run(self.event.ROW_UPDATE, self._make_row(chassis=[]),
+                       old)
+        self.cache.update_port.assert_called_once_with(
+            'port-uuid', 'net1', ['fa:16:3e:12:34:56', '10.0.0.5'],
+            value=None)
+
+    def test_run_deleted(self):
+        self.event.run(self.event.ROW_DELETE, self._make_row(), None)
+        self.cache.update_port.assert_called_once_with(
+            'port-uuid', 'net1', ['fa:16:3e:12:34:56', '10.0.0.5'],
+            value=None)
+
+    def test_run_addresses_changed(self):
+        old = mock.Mock(spec=['mac'], mac=['fa:16:3e:12:34:56 10.0.0.4'])
+        self.event.run(self.event.ROW_UPDATE, self._make_row(), old)
+        self.cache.update_port.assert_has_calls([
+            mock.call('port-uuid', 'net1', ['fa:16:3e:12:34:56', '10.0.0.4']),
+            mock.call('port-uuid', 'net1', ['fa:16:3e:12:34:56', '10.0.0.5'],
+                      value=('device_id', 'project_id'))])
+
 
 class TestUnixDomainMetadataProxy(base.BaseTestCase):
     def setUp(self):
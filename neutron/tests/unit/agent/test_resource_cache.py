@@ -122,6 +122,14 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
                               self.rcache.match_resources_with_func('goose',
                                                                     has_large))
 
+    def test_get_cached_resources_does_not_pull(self):
+        goose = OVOLikeThing(3, size='large')
+        self.rcache.record_resource_update(self.ctx, 'goose', goose)
+        self.assertEqual(
+            [goose],
+            self.rcache.get_cached_resources('goose', {'size': ('large', )}))
+        self.assertFalse(self._pullmock.bulk_pull.called)
+
     def test__is_stale(self):
         goose = OVOLikeThing(3, size='large')
         self.rcache.record_resource_update(self.ctx, 'goose', goose)
@@ -204,3 +212,80 @@ class RemoteResourceCacheTestCase(base.BaseTestCase):
         for goose in geese:
             self.assertIsNone(
                 self.rcache.get_resource_by_id('goose', goose.id))
+
+
+class RemoteResourceCacheIndexesTestCase(base.BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ctx = context.get_admin_context()
+        self.rcache = resource_cache.RemoteResourceCache(
+            ['goose'], indexed_fields={'goose': ('size', 'flocks')})
+        mock.patch.object(self.rcache, '_puller').start()
+        self.geese = [
+            OVOLikeThing(3, size='large', flocks=['a', 'b'], color='white'),
+            OVOLikeThing(4, size='large', flocks=['b'], color='grey'),
+            OVOLikeThing(5, size='small', flocks=[], color='white')]
+        for goose in self.geese:
+            self.rcache.record_resource_update(self.ctx, 'goose', goose)
+
+    def _get(self, filters):
+        return self.rcache.get_resources('goose', filters)
+
+    def test_get_resources_indexed(self):
+        self.assertCountEqual(self.geese[:2], self._get({'size': ('large', )}))
+        self.assertCountEqual(self.geese[:2], self._get({'flocks': ('b', )}))
+        self.assertCountEqual(self.geese,
+                              self._get({'size': ('large', 'small')}))
+        self.assertCountEqual([self.geese[0]],
+                              self._get({'size': ('large', ),
+                                         'flocks': ('a', )}))
+        self.assertEqual([], self._get({'size': ('medium', )}))
+        self.assertEqual({'index_lookups': 5}, self.rcache.stats)
+
+    def test_get_resources_indexed_and_not_indexed(self):
+        self.assertCountEqual([self.geese[0]],
+                              self._get({'size': ('large', ),
+                                         'color': ('white', )}))
+        self.assertEqual({'index_lookups': 1}, self.rcache.stats)
+
+    def test_get_resources_not_indexed(self):
+        self.assertCountEqual([self.geese[0], self.geese[2]],
+                              self._get({'color': ('white', )}))
+        self.assertEqual({'scans': 1, 'scanned_resources': 3},
+                         self.rcache.stats)
+
+    def test_get_resources_unhashable_value(self):
+        self.assertCountEqual(
+            self.geese[:2],
+            self.rcache.get_cached_resources(
+                'goose', {'size': ('large', {'name': 'large'})}))
+        self.assertEqual({'scans': 1, 'scanned_resources': 3},
+                         self.rcache.stats)
+
+    def test_index_updated(self):
+        self.rcache.record_resource_update(
+            self.ctx, 'goose',
+            OVOLikeThing(3, revision_number=11, size='small', flocks=['c'],
+                         color='white'))
+        self.assertEqual([self.geese[1]], self._get({'size': ('large', )}))
+        self.assertEqual([], self._get({'flocks': ('a', )}))
+        self.assertEqual([3], [g.id for g in self._get({'flocks': ('c', )})])
+
+    def test_index_deleted_and_removed(self):
+        self.rcache.record_resource_delete(self.ctx, 'goose', 3)
+        self.rcache.record_resource_remove('goose', 4)
+        self.assertEqual([], self._get({'size': ('large', )}))
+        self.assertEqual({'small': {5}}, self.rcache._indexes['goose']['size'])
+        self.assertEqual({}, self.rcache._indexes['goose']['flocks'])
+
+    def test_get_resource_by_id_stats(self):
+        self.rcache.get_resource_by_id('goose', 3)
+        self.rcache.get_resource_by_id('goose', 6)
+        self.assertEqual({'hits': 1, 'misses': 1}, self.rcache.stats)
+
+    def test_default_indexed_fields(self):
+        rcache = resource_cache.RemoteResourceCache(['Port', 'Network'])
+        self.assertEqual(
+            {'network_id', 'security_group_ids', 'device_owner'},
+            set(rcache._indexes['Port']))
+        self.assertEqual({}, rcache._indexes['Network'])
@@ -15,17 +15,20 @@
 
 import collections
 import contextlib
+import copy
 from unittest import mock
 
 import netaddr
 from neutron_lib.api.definitions import allowedaddresspairs as addr_apidef
 from neutron_lib import constants as const
 from neutron_lib import context
+from neutron_lib.db import api as db_api
 from neutron_lib.plugins import directory
 from neutron_lib import rpc as n_rpc
 from neutron_lib.tests import tools
 from oslo_config import cfg
 import oslo_messaging
+from oslo_utils import uuidutils
 from testtools import matchers
 import webob.exc
 
@@ -37,6 +40,7 @@ from neutron.agent import securitygroups_rpc as sg_rpc
 from neutron.api.rpc.handlers import securitygroups_rpc
 from neutron.db import securitygroups_rpc_base as sg_db_rpc
 from neutron.extensions import securitygroup as ext_sg
+from neutron.services.revisions import revision_plugin
 from neutron.tests import base
 from neutron.tests.unit.extensions import test_securitygroup as test_sg
 
@@ -610,6 +614,128 @@ class SGServerRpcCallBackTestCase(test_sg.SecurityGroupDBTestCase):
             self._delete('ports', port_id1)
             self._delete('ports', port_id2)
 
+    def _enable_sg_info_cache(self):
+        # The cache relies on the revision numbers bumped by this plugin.
+        directory.add_plugin('revision_plugin',
+                             revision_plugin.RevisionPlugin())
+        directory.get_plugin().register_sg_notifier()
+
+    def test_security_group_info_for_devices_cache(self):
+        self._enable_sg_info_cache()
+        sg_info_cache = sg_db_rpc.SG_INFO_CACHE
+        with self.network() as n,\
+                self.subnet(n),\
+                self.security_group() as sg1,\
+                self.security_group() as sg2,\
+                self.address_group(addresses=['10.0.1.0/24']) as ag1:
+            sg1_id = sg1['security_group']['id']
+            sg2_id = sg2['security_group']['id']
+            ag1_id = ag1['address_group']['id']
+            rule1 = self._build_security_group_rule(
+                sg1_id, 'ingress', const.PROTO_NAME_TCP, '24', '25',
+                remote_group_id=sg2_id)
+            rule2 = self._build_security_group_rule(
+                sg1_id, 'ingress', const.PROTO_NAME_TCP, '26', '27',
+                remote_address_group_id=ag1_id)
+            self._create_security_group_rule(
+                self.fmt, {'security_group_rules': [
+                    rule1['security_group_rule'],
+                    rule2['security_group_rule']]})
+            port1 = self.deserialize(self.fmt, self._create_port(
+                self.fmt, n['network']['id'], security_groups=[sg1_id]))
+            port_id1 = port1['port']['id']
+            self.rpc.devices = {port_id1: port1['port']}
+            port2 = self.deserialize(self.fmt, self._create_port(
+                self.fmt, n['network']['id'], security_groups=[sg2_id]))
+            port_ip2 = port2['port']['fixed_ips'][0]['ip_address']
+            ctx = context.get_admin_context()
+            plugin = directory.get_plugin()
+            # The test plugin updates its devices when returning them
+            device = copy.deepcopy(getattr(plugin, 'devices', {}).get(
+                port_id1))
+
+            def get_sg_info():
+                if device:
+                    plugin.devices[port_id1] = copy.deepcopy(device)
+                return self.rpc.security_group_info_for_devices(
+                    ctx, devices=[port_id1], call_version='1.3')
+
+            expected = get_sg_info()
+            stats = sg_info_cache.get_stats()
+            self.assertEqual(expected, get_sg_info())
+            new_stats = sg_info_cache.get_stats()
+            for kind in ('rules', 'member_ips', 'address_group_ips'):
+                self.assertEqual(1, new_stats[kind + '_hits'] -
+                                 stats.get(kind + '_hits', 0))
+                self.assertEqual(stats[kind + '_db_fallbacks'],
+                                 new_stats[kind + '_db_fallbacks'])
+
+            # A new rule bumps the security group revision number.
+            rule3 = self._build_security_group_rule(
+                sg1_id, 'ingress', const.PROTO_NAME_TCP, '28', '28')
+            self._create_security_group_rule(self.fmt, rule3)
+            sg_info = get_sg_info()
+            self.assertEqual(
+                len(expected['security_groups'][sg1_id]) + 1,
+                len(sg_info['security_groups'][sg1_id]))
+
+            # A new member port bumps its own revision number.
+            self.assertEqual({(port_ip2, None)},
+                             sg_info['sg_member_ips'][sg2_id]['IPv4'])
+            port3 = self.deserialize(self.fmt, self._create_port(
+                self.fmt, n['network']['id'], security_groups=[sg2_id]))
+            port_ip3 = port3['port']['fixed_ips'][0]['ip_address']
+            sg_info = get_sg_info()
+            self.assertEqual({(port_ip2, None), (port_ip3, None)},
+                             sg_info['sg_member_ips'][sg2_id]['IPv4'])
+
+            # So does a member port leaving the security group.
+            self._update('ports', port3['port']['id'],
+                         {'port': {'security_groups': [sg1_id]}})
+            sg_info = get_sg_info()
+            self.assertEqual({(port_ip2, None)},
+                             sg_info['sg_member_ips'][sg2_id]['IPv4'])
+
+            self._delete('ports', port_id1)
+            self._delete('ports', port2['port']['id'])
+            self._delete('ports', port3['port']['id'])
+
+    def test_security_group_info_cache_removed_on_delete(self):
+        self._enable_sg_info_cache()
+        sg_info_cache = sg_db_rpc.SG_INFO_CACHE
+        with self.security_group() as sg1:
+            sg1_id = sg1['security_group']['id']
+            plugin = directory.get_plugin()
+            ctx = context.get_admin_context()
+            with db_api.CONTEXT_READER.using(ctx):
+                plugin._select_rules_for_security_groups(ctx, [sg1_id])
+            self.assertIn(sg1_id, sg_info_cache.rules)
+            self._delete('security-groups', sg1_id)
+            self.assertNotIn(sg1_id, sg_info_cache.rules)
+
+    def test_security_group_info_cache_removed_when_not_found(self):
+        self._enable_sg_info_cache()
+        sg_info_cache = sg_db_rpc.SG_INFO_CACHE
+        # The security group was deleted through another server
+        sg_id = uuidutils.generate_uuid()
+        sg_info_cache.rules[sg_id] = (1, [])
+        plugin = directory.get_plugin()
+        ctx = context.get_admin_context()
+        with db_api.CONTEXT_READER.using(ctx):
+            self.assertEqual(
+                {sg_id: []},
+                plugin._select_rules_for_security_groups(ctx, [sg_id]))
+        self.assertNotIn(sg_id, sg_info_cache.rules)
+
+    def test_security_group_info_cache_size(self):
+        sg_info_cache = sg_db_rpc.SecurityGroupInfoCache(size=2)
+        sg_info_cache.rules['sg1'] = (1, [])
+        sg_info_cache.rules['sg2'] = (1, [])
+        self.assertEqual((1, []), sg_info_cache.rules.get('sg1'))
+        sg_info_cache.rules['sg3'] = (1, [])
+        # The least recently used entry was evicted
+        self.assertEqual(['sg1', 'sg3'], list(sg_info_cache.rules))
+
     def test_security_group_rules_for_devices_ipv6_ingress(self):
         fake_prefix = FAKE_PREFIX[const.IPv6]
         fake_gateway = FAKE_IP[const.IPv6]
@@ -13,17 +13,21 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
 from unittest import mock
 
 from neutron_lib import context
 from oslo_utils import timeutils
+from oslo_utils import uuidutils
+from tooz import hashring
 
 from neutron.common.ovn import constants
 from neutron.common.ovn import exceptions
 from neutron.common.ovn import hash_ring_manager
 from neutron.db import ovn_hash_ring_db as db_hash_ring
 from neutron import service
+from neutron.tests import base
 from neutron.tests.unit import testlib_api
 
 HASH_RING_TEST_GROUP = 'test_group'
@@ -62,6 +66,37 @@ class TestHashRingManager(testlib_api.SqlTestCaseLight):
             exceptions.HashRingIsEmpty, self.hash_ring_manager.get_node,
             'fake-uuid')
 
+    def test_get_nodes(self):
+        db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-1')
+        node1 = db_hash_ring.get_node(self.admin_ctx, HASH_RING_TEST_GROUP,
+                                      'node-1')
+        db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-2')
+        node2 = db_hash_ring.get_node(self.admin_ctx, HASH_RING_TEST_GROUP,
+                                      'node-2')
+
+        self.assertEqual(
+            {'fake-uuid': (node1.node_uuid, node1.updated_at),
+             b'fake-uuid-0': (node2.node_uuid, node2.updated_at)},
+            self.hash_ring_manager.get_nodes(['fake-uuid', b'fake-uuid-0']))
+
+    def test_get_nodes_no_active_nodes(self):
+        self.assertRaises(
+            exceptions.HashRingIsEmpty, self.hash_ring_manager.get_nodes,
+            ['fake-uuid'])
+
+    def test_refresh_incremental(self):
+        db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-1')
+        self.hash_ring_manager.refresh()
+        hash_ring = self.hash_ring_manager._hash_ring
+        db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-2')
+        with mock.patch.object(hash_ring_manager, '_node_tokens',
+                               wraps=hash_ring_manager._node_tokens) as m_tok:
+            self.hash_ring_manager.refresh()
+        # The same ring is updated and only the new node has been hashed
+        self.assertIs(hash_ring, self.hash_ring_manager._hash_ring)
+        self.assertEqual(2, len(hash_ring.nodes))
+        m_tok.assert_called_once_with(mock.ANY)
+
     def test_ring_rebalance(self):
         # Use pre-defined UUIDs to make the hashes predictable
         db_hash_ring.add_node(self.admin_ctx, HASH_RING_TEST_GROUP, 'node-1')
@@ -101,8 +136,8 @@ class TestHashRingManager(testlib_api.SqlTestCaseLight):
         # Now assert that the ring was re-balanced and only the node from
         # another host is marked as alive
         self.hash_ring_manager.refresh()
-        self.assertEqual([node_other.node_uuid],
-                         list(self.hash_ring_manager._hash_ring.nodes.keys()))
+        self.assertEqual({node_other.node_uuid},
+                         self.hash_ring_manager._hash_ring.nodes)
 
         # Now only "another_host_node" is alive, all values should hash to it
         hash_dict_after_rebalance = {'fake-uuid': node_other,
@@ -155,3 +190,72 @@ class TestHashRingManager(testlib_api.SqlTestCaseLight):
             self.assertFalse(
                 self.hash_ring_manager._wait_startup_before_caching)
             self.assertFalse(get_nodes_mock.called)
+
+
+class TestHashRing(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.nodes = [uuidutils.generate_uuid() for _i in range(20)]
+        self.keys = [uuidutils.generate_uuid().encode('utf-8')
+                     for _i in range(2000)]
+
+    def test_tooz_compatible(self):
+        # All the API workers must agree on the node owning a row, even if
+        # some of them still run a version using the tooz hash ring.
+        tooz_ring = hashring.HashRing(self.nodes)
+        ring = hash_ring_manager.HashRing(self.nodes)
+        nodes = ring.get_nodes(self.keys)
+        for key in self.keys:
+            self.assertEqual(tooz_ring[key].pop(), nodes[key])
+            self.assertEqual(nodes[key], ring.get_node(key))
+
+    def test_add_remove_nodes(self):
+        ring = hash_ring_manager.HashRing(self.nodes[:-1])
+        ring.add_nodes(self.nodes[-1:])
+        tooz_ring = hashring.HashRing(self.nodes)
+        for key in self.keys:
+            self.assertEqual(tooz_ring[key].pop(), ring.get_node(key))
+
+        ring.remove_nodes(self.nodes[:1])
+        tooz_ring.remove_node(self.nodes[0])
+        for key in self.keys:
+            self.assertEqual(tooz_ring[key].pop(), ring.get_node(key))
+
+    def test_empty_ring(self):
+        ring = hash_ring_manager.HashRing()
+        self.assertIsNone(ring.get_node(b'fake-uuid'))
+        self.assertEqual({b'fake-uuid': None}, ring.get_nodes([b'fake-uuid']))
+
+    def _get_max_share(self, ring):
+        counter = collections.Counter(ring.get_nodes(self.keys).values())
+        return max(counter.values()) / (len(self.keys) / len(self.nodes))
+
+    def test_bounded_load(self):
+        load_factor = 1.25
+        ring = hash_ring_manager.HashRing(self.nodes, load_factor=load_factor)
+        self.assertEqual(set(self.nodes), ring.nodes)
+        # Each node owns at most "load_factor" times the average share of
+        # the hash space.
+        loads = collections.Counter()
+        for idx, token in enumerate(ring._tokens):
+            loads[ring._owners[idx]] += (
+                (token - ring._tokens[idx - 1]) % hash_ring_manager.RING_SIZE)
+        capacity = load_factor * hash_ring_manager.RING_SIZE / len(self.nodes)
+        self.assertLessEqual(max(loads.values()), capacity)
+        self.assertLessEqual(
+            self._get_max_share(ring),
+            self._get_max_share(hash_ring_manager.HashRing(self.nodes)))
+
+    def test_bounded_load_deterministic(self):
+        ring1 = hash_ring_manager.HashRing(self.nodes, load_factor=1.1)
+        ring2 = hash_ring_manager.HashRing(reversed(self.nodes),
+                                           load_factor=1.1)
+        self.assertEqual(ring1.get_nodes(self.keys),
+                         ring2.get_nodes(self.keys))
+
+    def test_bounded_load_disabled(self):
+        ring = hash_ring_manager.HashRing(self.nodes, load_factor=1)
+        tooz_ring = hashring.HashRing(self.nodes)
+        for key in self.keys:
+            self.assertEqual(tooz_ring[key].pop(), ring.get_node(key))
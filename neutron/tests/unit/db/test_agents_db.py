@@ -18,6 +18,7 @@ import copy
 import datetime
 from unittest import mock
 
+from neutron_lib.agent import constants as agent_consts
 from neutron_lib import constants
 from neutron_lib import context
 from neutron_lib.db import api as db_api
@@ -191,6 +192,135 @@ class TestAgentsDbMixin(TestAgentsDbBase):
         agent = self.plugin.get_agents(self.context)[0]
         self.assertFalse(agent['admin_state_up'])
 
+    def _set_heartbeat_timestamp(self, seconds_ago):
+        heartbeat_timestamp = timeutils.utcnow() - datetime.timedelta(
+            seconds=seconds_ago)
+        with db_api.CONTEXT_WRITER.using(self.context):
+            agent = self.plugin._get_agent_by_type_and_host(
+                self.context, self.agent_status['agent_type'],
+                self.agent_status['host'])
+            agent.heartbeat_timestamp = heartbeat_timestamp
+            agent.update()
+        return heartbeat_timestamp
+
+    def test_create_or_update_agent_heartbeat_only(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 0)
+        self.plugin.create_or_update_agent(self.context, self.agent_status,
+                                           timeutils.utcnow())
+        heartbeat_timestamp = self._set_heartbeat_timestamp(10)
+        with mock.patch.object(agent_obj.Agent, 'update') as update:
+            status, _state = self.plugin.create_or_update_agent(
+                self.context, dict(self.agent_status), timeutils.utcnow())
+        self.assertEqual(agent_consts.AGENT_ALIVE, status)
+        update.assert_not_called()
+        agent = self.plugin.get_agents(self.context)[0]
+        self.assertGreater(agent['heartbeat_timestamp'], heartbeat_timestamp)
+
+    def test_create_or_update_agent_configurations_changed(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 0)
+        self.plugin.create_or_update_agent(self.context, self.agent_status,
+                                           timeutils.utcnow())
+        status = dict(self.agent_status, configurations={'foo': 'bar'})
+        with mock.patch.object(self.plugin, '_write_heartbeats') as write:
+            self.plugin.create_or_update_agent(self.context, status,
+                                               timeutils.utcnow())
+        write.assert_not_called()
+        agent = self.plugin.get_agents(self.context)[0]
+        self.assertEqual({'foo': 'bar'}, agent['configurations'])
+
+    def test_create_or_update_agent_l3_agent_resource_counters(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 0)
+        # State reported by the L3 agent
+        l3_state = {
+            'binary': constants.AGENT_PROCESS_L3,
+            'host': 'l3-host',
+            'availability_zone': 'nova',
+            'topic': 'l3_agent',
+            'configurations': {
+                'agent_mode': constants.L3_AGENT_MODE_LEGACY,
+                'handle_internal_only_routers': True,
+                'interface_driver': 'openvswitch',
+                'log_agent_heartbeats': False,
+                'extensions': [],
+                'routers': 1,
+                'ex_gw_ports': 1,
+                'interfaces': 2,
+                'floating_ips': 0},
+            'start_flag': True,
+            'agent_type': constants.AGENT_TYPE_L3}
+        _status, state = self.plugin.create_or_update_agent(
+            self.context, copy.deepcopy(l3_state), timeutils.utcnow())
+        del l3_state['start_flag']
+        l3_state['configurations'].update(routers=2, interfaces=4)
+
+        # The resource counters changed: only the heartbeat is written
+        with mock.patch.object(agent_obj.Agent, 'update') as update:
+            status, _state = self.plugin.create_or_update_agent(
+                self.context, copy.deepcopy(l3_state), timeutils.utcnow())
+        self.assertEqual(agent_consts.AGENT_ALIVE, status)
+        update.assert_not_called()
+        agent = self.plugin.get_agent(self.context, state['id'])
+        self.assertEqual(1, agent['configurations']['routers'])
+
+        # The counters are written once the stored state is old enough
+        self.plugin._agent_states_written[state['id']] = (
+            timeutils.utcnow() - datetime.timedelta(
+                seconds=cfg.CONF.agent_down_time + 1))
+        self.plugin.create_or_update_agent(
+            self.context, copy.deepcopy(l3_state), timeutils.utcnow())
+        agent = self.plugin.get_agent(self.context, state['id'])
+        self.assertEqual(2, agent['configurations']['routers'])
+        self.assertEqual(4, agent['configurations']['interfaces'])
+
+        # Any other change of the configurations is written immediately
+        l3_state['configurations'].update(
+            agent_mode=constants.L3_AGENT_MODE_DVR_SNAT, routers=3)
+        self.plugin.create_or_update_agent(
+            self.context, copy.deepcopy(l3_state), timeutils.utcnow())
+        agent = self.plugin.get_agent(self.context, state['id'])
+        self.assertEqual(constants.L3_AGENT_MODE_DVR_SNAT,
+                         agent['configurations']['agent_mode'])
+        self.assertEqual(3, agent['configurations']['routers'])
+
+    def test_create_or_update_agent_revived(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 0)
+        self.plugin.create_or_update_agent(self.context, self.agent_status,
+                                           timeutils.utcnow())
+        self._set_heartbeat_timestamp(cfg.CONF.agent_down_time + 1)
+        status, _state = self.plugin.create_or_update_agent(
+            self.context, dict(self.agent_status), timeutils.utcnow())
+        self.assertEqual(agent_consts.AGENT_REVIVED, status)
+
+    def test_create_or_update_agent_heartbeat_batched(self):
+        cfg.CONF.set_override('agent_heartbeat_batch_interval', 2)
+        _status, state = self.plugin.create_or_update_agent(
+            self.context, self.agent_status, timeutils.utcnow())
+        with mock.patch.object(
+                self.plugin, '_get_heartbeat_batch_notifier') as notifier:
+            status, _state = self.plugin.create_or_update_agent(
+                self.context, dict(self.agent_status), timeutils.utcnow())
+        self.assertEqual(agent_consts.AGENT_ALIVE, status)
+        notifier.return_value.queue_event.assert_called_once_with(
+            (state['id'], mock.ANY))
+
+    def test__write_heartbeats(self):
+        agents = self._create_and_save_agents(
+            ['host-1', 'host-2', 'host-3'], constants.AGENT_TYPE_L3)
+        now = timeutils.utcnow() + datetime.timedelta(seconds=10)
+        older = now - datetime.timedelta(seconds=1)
+        agents[2].heartbeat_timestamp = now + datetime.timedelta(seconds=1)
+        agents[2].update()
+        self.plugin._write_heartbeats([(agents[0].id, now),
+                                       (agents[1].id, older),
+                                       (agents[2].id, now)])
+        heartbeats = {agent['host']: agent['heartbeat_timestamp']
+                      for agent in self.plugin.get_agents(self.context)}
+        # The oldest heartbeat of the batch is written, unless more recent
+        # heartbeats were already written.
+        self.assertEqual(older, heartbeats['host-1'])
+        self.assertEqual(older, heartbeats['host-2'])
+        self.assertEqual(agents[2].heartbeat_timestamp, heartbeats['host-3'])
+
     def test_agent_health_check(self):
         agents = [{'agent_type': "DHCP Agent",
                    'heartbeat_timestamp': '2015-05-06 22:40:40.432295',
@@ -48,6 +48,7 @@ from neutron.extensions import l3agentscheduler
 from neutron.objects import agent as ag_obj
 from neutron.objects import l3agent as rb_obj
 from neutron import policy
+from neutron.scheduler import l3_agent_scheduler
 from neutron.tests.common import helpers
 from neutron.tests.common import test_db_base_plugin_v2 as test_plugin
 from neutron.tests.unit.api import test_extensions
@@ -744,6 +745,10 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             # schedule the routers to host A
             l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
 
+            # make the bulk rescheduling fail so that the routers are
+            # rescheduled one at a time
+            mock.patch.object(plugin.router_scheduler, 'schedule_routers',
+                              return_value={}).start()
             rs_mock = mock.patch.object(
                 plugin, 'reschedule_router',
                 side_effect=l3agentscheduler.RouterReschedulingFailed(
@@ -800,6 +805,60 @@ class OvsAgentSchedulerTestCase(OvsAgentSchedulerTestCaseBase):
             ret_b = l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTB)
         self.assertEqual(ret_b, ret_a)
 
+    def test_routers_rescheduled_from_dead_agent_in_bulk(self):
+        plugin = directory.get_plugin(plugin_constants.L3)
+        with self.router(), self.router():
+            l3_rpc_cb = l3_rpc.L3RpcCallback()
+            self._register_agent_states()
+
+            # schedule the routers to host A
+            ret_a = l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+            self.assertEqual(2, len(ret_a))
+            with mock.patch.object(
+                    plugin.router_scheduler, 'schedule_routers',
+                    wraps=plugin.router_scheduler.schedule_routers) as sr, \
+                    mock.patch.object(plugin, 'reschedule_router') as rr:
+                self._take_down_agent_and_run_reschedule(L3_HOSTA)
+            sr.assert_called_once_with(plugin, mock.ANY, mock.ANY)
+            self.assertEqual(set(ret_a), set(sr.call_args[0][2]))
+            self.assertFalse(rr.called)
+
+            # B should now pick up both routers
+            ret_b = l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTB)
+        self.assertEqual(set(ret_a), set(ret_b))
+
+    def test_routers_rescheduled_from_dead_agent_duplicate_entry(self):
+        plugin = directory.get_plugin(plugin_constants.L3)
+        with self.router(), self.router():
+            l3_rpc_cb = l3_rpc.L3RpcCallback()
+            self._register_agent_states()
+
+            # schedule the routers to host A
+            ret_a = l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTA)
+            self.assertEqual(2, len(ret_a))
+            schedule_routers = plugin.router_scheduler.schedule_routers
+
+            def schedule_routers_conflict(plugin, context, router_ids):
+                # the router of the first batch is concurrently bound
+                if sr.call_count == 1:
+                    raise db_exc.DBDuplicateEntry()
+                return schedule_routers(plugin, context, router_ids)
+
+            with mock.patch.object(l3_agent_scheduler,
+                                   'BIND_ROUTERS_BATCH_SIZE', 1), \
+                    mock.patch.object(
+                        plugin.router_scheduler, 'schedule_routers',
+                        side_effect=schedule_routers_conflict) as sr, \
+                    mock.patch.object(plugin, 'reschedule_router') as rr:
+                self._take_down_agent_and_run_reschedule(L3_HOSTA)
+
+            # the next batch is rescheduled in bulk
+            self.assertEqual(2, sr.call_count)
+            first_router_id = sr.call_args_list[0][0][2][0]
+            rr.assert_called_once_with(mock.ANY, first_router_id)
+            ret_b = l3_rpc_cb.get_router_ids(self.adminContext, host=L3_HOSTB)
+        self.assertEqual(set(ret_a) - {first_router_id}, set(ret_b))
+
     def test_router_no_reschedule_from_dead_admin_down_agent(self):
         with self.router() as r:
             l3_rpc_cb = l3_rpc.L3RpcCallback()
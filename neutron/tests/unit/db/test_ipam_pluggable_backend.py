@@ -370,6 +370,43 @@ class TestDbBasePluginIpam(test_db_base.NeutronDbPluginV2TestCase):
                           ips)
         mocks['subnets'].allocate.assert_called_once_with(mock.ANY)
 
+    def test_allocate_ips_for_ports(self):
+        pluggable_backend = ipam_pluggable_backend.IpamPluggableBackend()
+        with self.subnet(cidr='10.0.0.0/24') as subnet:
+            subnet = subnet['subnet']
+            ports = [{'port': {'id': uuidutils.generate_uuid(),
+                               'network_id': subnet['network_id'],
+                               'tenant_id': subnet['tenant_id'],
+                               'mac_address': 'fa:16:3e:00:00:0%s' % i,
+                               'device_owner': '',
+                               'fixed_ips': constants.ATTR_NOT_SPECIFIED}}
+                     for i in range(3)]
+            with mock.patch.object(
+                    pluggable_backend, '_ipam_get_subnets',
+                    wraps=pluggable_backend._ipam_get_subnets) as m_subnets, \
+                    mock.patch.object(
+                        pluggable_backend, '_ipam_bulk_allocate_ips',
+                        wraps=pluggable_backend._ipam_bulk_allocate_ips
+                    ) as m_bulk, \
+                    mock.patch.object(
+                        pluggable_backend, '_ipam_allocate_ips',
+                        wraps=pluggable_backend._ipam_allocate_ips
+                    ) as m_allocate:
+                allocations = pluggable_backend.allocate_ips_for_ports(
+                    self.admin_context, ports)
+
+        # The eligible subnets are retrieved once for all the ports and the
+        # IP addresses are allocated by a single IPAM bulk request
+        m_subnets.assert_called_once()
+        m_bulk.assert_called_once_with(mock.ANY, (subnet['id'],), 3)
+        for call in m_allocate.call_args_list:
+            self.assertEqual([], call[0][3])
+        self.assertEqual(3, len(allocations))
+        ips = {ips[0]['ip_address'] for ips in allocations}
+        self.assertEqual(3, len(ips))
+        for ips in allocations:
+            self.assertEqual(subnet['id'], ips[0]['subnet_id'])
+
     def test_test_fixed_ips_for_port_pd_gateway(self):
         context = mock.Mock()
         pluggable_backend = ipam_pluggable_backend.IpamPluggableBackend()
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 from unittest import mock
 
 from neutron_lib.api.definitions import security_groups_remote_address_group \
@@ -21,6 +22,7 @@ from neutron_lib import constants as n_const
 from neutron_lib import context
 from neutron_lib.db import api as db_api
 from oslo_db import exception as db_exc
+from oslo_utils import timeutils
 
 from neutron.api import extensions
 from neutron.common import config
@@ -252,6 +254,56 @@ class TestRevisionNumberMaintenance(test_securitygroup.SecurityGroupsTestCase,
         self.assertEqual(self.net['id'], res[0].resource_uuid)
         self.assertIsNone(res[0].standard_attr_id)
 
+    def test_get_resources_changed_since(self):
+        self._create_initial_revision(
+            self.net['id'], ovn_const.TYPE_NETWORKS, revision_number=0)
+        since = timeutils.utcnow() - datetime.timedelta(seconds=60)
+        res = ovn_rn_db.get_resources_changed_since(
+            self.ctx, ovn_const.TYPE_NETWORKS, since)
+        self.assertEqual([self.net['id']], [r.resource_uuid for r in res])
+
+        # Not modified since the checkpoint and consistent
+        since = timeutils.utcnow() + datetime.timedelta(seconds=60)
+        res = ovn_rn_db.get_resources_changed_since(
+            self.ctx, ovn_const.TYPE_NETWORKS, since)
+        self.assertEqual([], res)
+
+        # Other resource types are not returned
+        res = ovn_rn_db.get_resources_changed_since(
+            self.ctx, ovn_const.TYPE_PORTS, since)
+        self.assertEqual([], res)
+
+    def test_get_resources_changed_since_inconsistent(self):
+        self._create_initial_revision(
+            self.net['id'], ovn_const.TYPE_NETWORKS, revision_number=-1)
+        since = timeutils.utcnow() + datetime.timedelta(seconds=60)
+        res = ovn_rn_db.get_resources_changed_since(
+            self.ctx, ovn_const.TYPE_NETWORKS, since)
+        self.assertEqual([self.net['id']], [r.resource_uuid for r in res])
+
+    def test_get_resources_changed_since_paginated(self):
+        net_ids = [self.net['id']]
+        for idx in range(4):
+            net_ids.append(self._make_network(
+                self.fmt, 'net%d' % idx, True)['network']['id'])
+        for net_id in net_ids:
+            self._create_initial_revision(
+                net_id, ovn_const.TYPE_NETWORKS, revision_number=-1)
+        since = timeutils.utcnow()
+
+        res_ids = []
+        marker = None
+        while True:
+            res = ovn_rn_db.get_resources_changed_since(
+                self.ctx, ovn_const.TYPE_NETWORKS, since, limit=2,
+                marker=marker)
+            if not res:
+                break
+            self.assertLessEqual(len(res), 2)
+            res_ids += [r.resource_uuid for r in res]
+            marker = res[-1].resource_uuid
+        self.assertEqual(sorted(net_ids), res_ids)
+
     def _prepare_resources_for_ordering_test(self, delete=False):
         subnet = self._make_subnet(self.fmt, {'network': self.net}, '10.0.0.1',
                                    '10.0.0.0/24')['subnet']
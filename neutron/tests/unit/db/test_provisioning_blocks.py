@@ -152,3 +152,43 @@ class TestStatusBarriers(testlib_api.SqlTestCase):
         pb.add_provisioning_component(self.ctx, net.id, 'NETWORK', 'ent')
         pb.provisioning_complete(self.ctx, net.id, 'NETWORK', 'ent')
         self.assertTrue(provisioned.called)
+
+    def test_provisioning_complete_bulk(self):
+        port2 = self._make_port()
+        port3 = self._make_port()
+        pb.add_provisioning_component(self.ctx, self.port.id, resources.PORT,
+                                      'entity1')
+        pb.add_provisioning_component(self.ctx, port2.id, resources.PORT,
+                                      'entity1')
+        pb.add_provisioning_component(self.ctx, port2.id, resources.PORT,
+                                      'entity2')
+        failed = pb.provisioning_complete_bulk(
+            self.ctx, [self.port.id, port2.id, port3.id, 'someid'],
+            resources.PORT, 'entity1')
+        self.assertEqual(set(), failed)
+        self.assertCountEqual(
+            [self.port.id, port3.id],
+            [c[2]['payload'].resource_id
+             for c in self.provisioned.mock_calls])
+        self.assertTrue(pb.is_object_blocked(self.ctx, port2.id,
+                                             resources.PORT))
+
+    def test_provisioning_complete_bulk_callback_failure(self):
+        port2 = self._make_port()
+
+        def publish(*args, **kwargs):
+            if kwargs['payload'].resource_id == port2.id:
+                raise Exception()
+
+        with mock.patch.object(pb.registry, 'publish',
+                               side_effect=publish) as publish_mock:
+            failed = pb.provisioning_complete_bulk(
+                self.ctx, [self.port.id, port2.id], resources.PORT,
+                'entity1')
+        self.assertEqual({port2.id}, failed)
+        self.assertEqual(2, publish_mock.call_count)
+
+    def test_provisioning_complete_bulk_no_objects(self):
+        self.assertEqual(set(), pb.provisioning_complete_bulk(
+            self.ctx, [], resources.PORT, 'entity1'))
+        self.assertFalse(self.provisioned.called)
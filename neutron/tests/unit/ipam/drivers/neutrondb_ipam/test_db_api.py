@@ -112,3 +112,20 @@ class TestIpamSubnetManager(testlib_api.SqlTestCase):
         alloc_exists = ipam_obj.IpamAllocation.objects_exist(
             self.ctx, ipam_subnet_id=self.ipam_subnet_id)
         self.assertFalse(alloc_exists)
+
+    def test_list_allocated_ips(self):
+        ips = ['1.2.3.4', '1.2.3.6', '1.2.3.7']
+        self.subnet_manager.create_allocations(self.ctx, ips)
+        self.assertEqual(
+            sorted(ips),
+            sorted(str(ip) for ip in
+                   self.subnet_manager.list_allocated_ips(self.ctx)))
+
+    def test_get_allocations_version(self):
+        self.assertEqual(
+            (0, None), self.subnet_manager.get_allocations_version(self.ctx))
+        self.subnet_manager.create_allocations(
+            self.ctx, ['1.2.3.4', '1.2.3.6', '1.2.3.5'])
+        self.assertEqual(
+            (3, '1.2.3.6'),
+            self.subnet_manager.get_allocations_version(self.ctx))
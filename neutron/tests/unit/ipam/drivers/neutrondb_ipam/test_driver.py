@@ -18,6 +18,7 @@ from unittest import mock
 import netaddr
 from neutron_lib import constants
 from neutron_lib import context
+from neutron_lib.db import api as db_api
 from neutron_lib import exceptions as n_exc
 from neutron_lib.plugins import directory
 from oslo_utils import uuidutils
@@ -26,6 +27,7 @@ from neutron.ipam.drivers.neutrondb_ipam import driver
 from neutron.ipam import exceptions as ipam_exc
 from neutron.ipam import requests as ipam_req
 from neutron.objects import ipam as ipam_obj
+from neutron.tests import base
 from neutron.tests.common import test_db_base_plugin_v2 as test_db_plugin
 from neutron.tests.unit import testlib_api
 
@@ -423,6 +425,101 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
         # future proofing in case v6-specific logic will be added.
         self._test_deallocate_address('fde3:abcd:4321:1::/64', 6)
 
+    def test_allocate_uses_allocation_cache(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/24', ip_version=constants.IP_VERSION_4)[0]
+        manager = ipam_subnet.subnet_manager
+        with mock.patch.object(manager, 'list_allocated_ips',
+                               wraps=manager.list_allocated_ips) as m_list:
+            ips = {ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+                   for _i in range(5)}
+            ips.update(ipam_subnet.bulk_allocate(
+                ipam_req.BulkAddressRequest(5)))
+            # Not the highest allocated address, the cache version is kept
+            ip_address = min(ips)
+            ips.remove(ip_address)
+            ipam_subnet.deallocate(ip_address)
+            ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+        # The allocations are only listed to build the cache
+        m_list.assert_called_once_with(self.ctx)
+        self.assertEqual(9, len(ips))
+        cache = driver._ALLOCATION_CACHE.get(manager.ipam_subnet_id)
+        self.assertEqual(253 - 10, cache.free_ranges.size)
+
+    def test_allocation_cache_rebuilt_on_allocations_change(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/28', ip_version=constants.IP_VERSION_4)[0]
+        manager = ipam_subnet.subnet_manager
+        self.assertEqual('192.168.0.2', ipam_subnet.allocate(
+            ipam_req.PreferNextAddressRequest()))
+        # Allocation done by another API worker
+        manager.create_allocation(self.ctx, '192.168.0.3')
+        with mock.patch.object(manager, 'list_allocated_ips',
+                               wraps=manager.list_allocated_ips) as m_list:
+            self.assertEqual('192.168.0.4', ipam_subnet.allocate(
+                ipam_req.PreferNextAddressRequest()))
+            # The local allocations and the deallocation of an address
+            # which is not the highest keep the cache version up to date
+            ipam_subnet.bulk_allocate(ipam_req.BulkAddressRequest(3))
+            ipam_subnet.deallocate('192.168.0.2')
+            ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+        m_list.assert_called_once_with(self.ctx)
+
+    def test_allocation_cache_dropped_on_rollback(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/28', ip_version=constants.IP_VERSION_4)[0]
+        ipam_subnet_id = ipam_subnet.subnet_manager.ipam_subnet_id
+        ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+        self.assertIn(ipam_subnet_id, driver._ALLOCATION_CACHE)
+        try:
+            with db_api.CONTEXT_WRITER.using(self.ctx):
+                ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+        self.assertNotIn(ipam_subnet_id, driver._ALLOCATION_CACHE)
+
+    def test_allocation_cache_rebuilt_when_expired(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/28', ip_version=constants.IP_VERSION_4)[0]
+        manager = ipam_subnet.subnet_manager
+        self.assertEqual(['192.168.0.2', '192.168.0.3'], [
+            ipam_subnet.allocate(ipam_req.PreferNextAddressRequest())
+            for _i in range(2)])
+        # Another API worker deallocates an address and allocates the
+        # gateway address, the number and the highest of the allocated
+        # addresses do not change.
+        manager.delete_allocation(self.ctx, '192.168.0.2')
+        manager.create_allocation(self.ctx, '192.168.0.1')
+        self.assertEqual('192.168.0.4', ipam_subnet.allocate(
+            ipam_req.PreferNextAddressRequest()))
+        cache = driver._ALLOCATION_CACHE.get(manager.ipam_subnet_id)
+        cache.built_at -= driver.ALLOCATION_CACHE_TTL + 1
+        self.assertEqual('192.168.0.2', ipam_subnet.allocate(
+            ipam_req.PreferNextAddressRequest()))
+
+    def test_allocation_cache_refreshed_before_failing(self):
+        ipam_subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/29', ip_version=constants.IP_VERSION_4)[0]
+        manager = ipam_subnet.subnet_manager
+        ips = ipam_subnet.bulk_allocate(ipam_req.BulkAddressRequest(5))
+        # Another API worker deallocates an address of the pool and
+        # allocates the gateway address, the cache has not expired.
+        manager.delete_allocation(self.ctx, '192.168.0.4')
+        manager.create_allocation(self.ctx, '192.168.0.1')
+        self.assertIn('192.168.0.4', ips)
+        self.assertEqual('192.168.0.4', ipam_subnet.allocate(
+            ipam_req.AnyAddressRequest))
+
+    def test_remove_subnet_clears_allocation_cache(self):
+        ipam_subnet, subnet = self._create_and_allocate_ipam_subnet(
+            '192.168.0.0/24', ip_version=constants.IP_VERSION_4)
+        ipam_subnet.allocate(ipam_req.AnyAddressRequest)
+        ipam_subnet_id = ipam_subnet.subnet_manager.ipam_subnet_id
+        self.assertIn(ipam_subnet_id, driver._ALLOCATION_CACHE)
+        self.ipam_pool.remove_subnet(subnet['id'])
+        self.assertNotIn(ipam_subnet_id, driver._ALLOCATION_CACHE)
+
     def test_allocate_all_pool_addresses_triggers_range_recalculation(self):
         # This test instead might be made to pass, but for the wrong reasons!
         pass
@@ -478,3 +575,75 @@ class TestNeutronDbIpamSubnet(testlib_api.SqlTestCase,
         pools = [netaddr.IPRange('192.168.10.20', '192.168.10.41'),
                  netaddr.IPRange('192.168.10.50', '192.168.10.60')]
         self.assertTrue(self._test__no_pool_changes(pools))
+
+
+class TestFreeIpRanges(testlib_api.SqlTestCase):
+
+    def _ranges(self, free_ranges):
+        return list(zip(free_ranges._starts, free_ranges._ends))
+
+    def test_init(self):
+        free_ranges = driver.FreeIpRanges([(20, 30), (1, 10)],
+                                          [1, 5, 6, 10, 15, 21])
+        self.assertEqual([(2, 4), (7, 9), (20, 20), (22, 30)],
+                         self._ranges(free_ranges))
+        self.assertEqual(3 + 3 + 1 + 9, free_ranges.size)
+        self.assertIn(8, free_ranges)
+        self.assertNotIn(5, free_ranges)
+        self.assertNotIn(15, free_ranges)
+
+    def test_first(self):
+        free_ranges = driver.FreeIpRanges([(1, 10), (20, 30)], [2, 3, 4])
+        self.assertEqual([1, 5, 6], free_ranges.first(3))
+        self.assertEqual([1, 5, 6, 7, 8, 9, 10, 20], free_ranges.first(8))
+        self.assertEqual(18, len(free_ranges.first(100)))
+
+    def test_remove_and_add(self):
+        free_ranges = driver.FreeIpRanges([(1, 10), (11, 20)], [])
+        self.assertEqual([(1, 10), (11, 20)], self._ranges(free_ranges))
+        for ip in (1, 5, 10, 11, 30):
+            free_ranges.remove(ip)
+        self.assertEqual([(2, 4), (6, 9), (12, 20)],
+                         self._ranges(free_ranges))
+        self.assertEqual(16, free_ranges.size)
+        for ip in (5, 10, 11, 1, 0, 21, 12):
+            free_ranges.add(ip)
+        # The ranges of different pools are not merged
+        self.assertEqual([(1, 10), (11, 20)], self._ranges(free_ranges))
+        self.assertEqual(20, free_ranges.size)
+
+
+class TestAllocationCache(base.BaseTestCase):
+
+    def _entry(self):
+        return driver._SubnetAllocationCache((), constants.IP_VERSION_4,
+                                             driver.FreeIpRanges([], []),
+                                             (0, None))
+
+    def test_least_recently_used_evicted(self):
+        cache = driver._AllocationCache(2, 30)
+        entries = [self._entry() for _i in range(3)]
+        cache.add('subnet0', entries[0])
+        cache.add('subnet1', entries[1])
+        self.assertIs(entries[0], cache.get('subnet0'))
+        cache.add('subnet2', entries[2])
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('subnet1'))
+        self.assertIs(entries[0], cache.get('subnet0'))
+        self.assertIs(entries[2], cache.get('subnet2'))
+
+    def test_expired(self):
+        cache = driver._AllocationCache(2, 30)
+        entry = self._entry()
+        cache.add('subnet0', entry)
+        entry.built_at -= 31
+        self.assertIsNone(cache.get('subnet0'))
+        self.assertNotIn('subnet0', cache)
+
+    def test_pop(self):
+        cache = driver._AllocationCache(2, 30)
+        entry = self._entry()
+        cache.add('subnet0', entry)
+        self.assertIs(entry, cache.pop('subnet0'))
+        self.assertIsNone(cache.pop('subnet0'))
+        self.assertEqual(0, len(cache))
@@ -32,3 +32,19 @@ class SegmentAllocationDbObjTestCase:
         allocations = self._test_class.get_random_unallocated_segment(
             self.context)
         self.assertEqual(obj.segmentation_id, allocations.segmentation_id)
+
+    def test_get_shard_unallocated_segments(self):
+        for obj in self.objs:
+            obj.allocated = False
+            obj.create()
+        segmentation_ids = [obj.segmentation_id for obj in self.objs]
+        for shard in range(2):
+            allocations = self._test_class.get_shard_unallocated_segments(
+                self.context, 2, shard, len(self.objs))
+            self.assertEqual(
+                sorted(segmentation_id for segmentation_id in
+                       segmentation_ids if segmentation_id % 2 == shard),
+                sorted(alloc.segmentation_id for alloc in allocations))
+        self.assertEqual(1, len(
+            self._test_class.get_shard_unallocated_segments(
+                self.context, 1, 0, 1)))
@@ -0,0 +1,164 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from neutron_lib import constants
+
+from neutron.plugins.ml2.drivers.l2pop import rpc as l2pop_rpc
+from neutron.tests import base
+
+HOST = 'my_l2_host'
+AGENT_IP_1 = '20.0.0.1'
+AGENT_IP_2 = '20.0.0.2'
+PORT_1 = l2pop_rpc.PortInfo('00:00:00:00:00:01', '10.0.0.1')
+PORT_2 = l2pop_rpc.PortInfo('00:00:00:00:00:02', '10.0.0.2')
+
+
+def _fdb_entries(ports, network_id='net1', segment_id=1):
+    return {network_id: {'segment_id': segment_id,
+                         'network_type': 'vxlan',
+                         'ports': ports}}
+
+
+class TestL2populationAgentNotifyAPI(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        mock.patch('neutron_lib.rpc.get_client').start()
+        self.context = mock.Mock()
+        self.notifier = l2pop_rpc.L2populationAgentNotifyAPI(
+            coalescing_interval=1)
+        self.fanout = mock.patch.object(
+            self.notifier, '_notification_fanout').start()
+        self.host = mock.patch.object(
+            self.notifier, '_notification_host').start()
+        self.queue_event = mock.patch.object(
+            self.notifier._batch_notifier, 'queue_event').start()
+
+    def _send(self, *notifications):
+        events = [(self.context,) + notification
+                  for notification in notifications]
+        self.notifier._send_coalesced_notifications(events)
+
+    def test_not_coalesced(self):
+        notifier = l2pop_rpc.L2populationAgentNotifyAPI()
+        fdb_entries = _fdb_entries({AGENT_IP_1: [PORT_1]})
+        with mock.patch.object(notifier, '_notification_fanout') as fanout:
+            notifier.add_fdb_entries(self.context, fdb_entries)
+        fanout.assert_called_once_with(self.context, 'add_fdb_entries',
+                                       fdb_entries)
+        self.assertIsNone(notifier._batch_notifier)
+
+    def test_notifications_queued(self):
+        fdb_entries = _fdb_entries({AGENT_IP_1: [PORT_1]})
+        self.notifier.add_fdb_entries(self.context, fdb_entries, HOST)
+        self.notifier.remove_fdb_entries(self.context, fdb_entries)
+        self.notifier.update_fdb_entries(self.context, {})
+        self.queue_event.assert_has_calls([
+            mock.call((self.context, 'add_fdb_entries', fdb_entries, HOST)),
+            mock.call((self.context, 'remove_fdb_entries', fdb_entries,
+                       None))])
+        self.assertEqual(2, self.queue_event.call_count)
+        self.fanout.assert_not_called()
+        self.host.assert_not_called()
+
+    def test_coalesce_networks(self):
+        self._send(
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_1]}), None),
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_2]}), None),
+            ('add_fdb_entries',
+             _fdb_entries({AGENT_IP_2: [constants.FLOODING_ENTRY]}, 'net2',
+                          2), None))
+        expected = _fdb_entries({AGENT_IP_1: [PORT_1, PORT_2]})
+        expected.update(_fdb_entries(
+            {AGENT_IP_2: [constants.FLOODING_ENTRY]}, 'net2', 2))
+        self.fanout.assert_called_once_with(self.context, 'add_fdb_entries',
+                                            expected)
+        self.assertEqual(2, self.notifier.messages_saved)
+        self.assertEqual(0, self.notifier.entries_cancelled)
+
+    def test_coalesce_cancel_add_remove(self):
+        self._send(
+            ('add_fdb_entries',
+             _fdb_entries({AGENT_IP_1: [constants.FLOODING_ENTRY, PORT_1]}),
+             None),
+            ('remove_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_1]}),
+             None),
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_2]}), None),
+            ('remove_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_2]}),
+             None),
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_2]}), None))
+        self.fanout.assert_has_calls([
+            mock.call(self.context, 'remove_fdb_entries',
+                      _fdb_entries({AGENT_IP_1: [PORT_1]})),
+            mock.call(self.context, 'add_fdb_entries',
+                      _fdb_entries({AGENT_IP_1: [constants.FLOODING_ENTRY,
+                                                 PORT_2]}))])
+        self.assertEqual(2, self.fanout.call_count)
+        self.assertEqual(3, self.notifier.messages_saved)
+        self.assertEqual(3, self.notifier.entries_cancelled)
+
+    def test_coalesce_empty_agent_ports(self):
+        self._send(
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_1: []}), None),
+            ('remove_fdb_entries', _fdb_entries({AGENT_IP_2: [PORT_1]}),
+             None))
+        self.fanout.assert_has_calls([
+            mock.call(self.context, 'remove_fdb_entries',
+                      _fdb_entries({AGENT_IP_2: [PORT_1]})),
+            mock.call(self.context, 'add_fdb_entries',
+                      _fdb_entries({AGENT_IP_1: []}))])
+
+    def test_coalesce_network_segments(self):
+        self._send(
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_1: [PORT_1]}), None),
+            ('add_fdb_entries',
+             _fdb_entries({AGENT_IP_2: [PORT_2]}, segment_id=2), None))
+        self.fanout.assert_has_calls([
+            mock.call(self.context, 'add_fdb_entries',
+                      _fdb_entries({AGENT_IP_1: [PORT_1]})),
+            mock.call(self.context, 'add_fdb_entries',
+                      _fdb_entries({AGENT_IP_2: [PORT_2]}, segment_id=2))])
+        self.assertEqual(0, self.notifier.messages_saved)
+
+    def test_coalesce_hosts_before_fanout(self):
+        fdb_entries = _fdb_entries({AGENT_IP_1: [PORT_1]})
+        manager = mock.Mock()
+        manager.attach_mock(self.host, 'host')
+        manager.attach_mock(self.fanout, 'fanout')
+        self._send(
+            ('add_fdb_entries', fdb_entries, None),
+            ('add_fdb_entries', fdb_entries, HOST),
+            ('remove_fdb_entries', fdb_entries, None))
+        self.assertEqual(
+            [mock.call.host(self.context, 'add_fdb_entries', fdb_entries,
+                            HOST),
+             mock.call.fanout(self.context, 'remove_fdb_entries',
+                              fdb_entries)],
+            manager.mock_calls)
+
+    def test_coalesce_update_in_order(self):
+        add_entries = _fdb_entries({AGENT_IP_1: [PORT_1]})
+        update_entries = {'chg_ip': {'net1': {AGENT_IP_1: {
+            'before': [PORT_1], 'after': [PORT_2]}}}}
+        self._send(
+            ('add_fdb_entries', add_entries, None),
+            ('update_fdb_entries', update_entries, None),
+            ('add_fdb_entries', _fdb_entries({AGENT_IP_2: [PORT_2]}), None))
+        self.fanout.assert_has_calls([
+            mock.call(self.context, 'add_fdb_entries', add_entries),
+            mock.call(self.context, 'update_fdb_entries', update_entries),
+            mock.call(self.context, 'add_fdb_entries',
+                      _fdb_entries({AGENT_IP_2: [PORT_2]}))])
+        self.assertEqual(3, self.fanout.call_count)
+        self.assertEqual(0, self.notifier.messages_saved)
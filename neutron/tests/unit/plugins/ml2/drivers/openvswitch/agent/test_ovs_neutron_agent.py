@@ -1256,6 +1256,19 @@ class TestOvsNeutronAgent:
              'removed': {'eth0'},
              'added': {'eth1'}})
 
+    def test_process_network_ports_loop_metrics(self):
+        self._test_process_network_ports(
+            {'current': {'tap0', 'tap1'},
+             'updated': {'tap1'},
+             'removed': {'eth0'},
+             'added': {'eth1'}})
+        self.assertEqual({'treat_devices_added_or_updated': 2,
+                          'firewall': 2,
+                          'bind_devices': 0,
+                          'treat_devices_removed': 1},
+                         self.agent.loop_metrics.ports)
+        self.assertEqual(1, self.agent.loop_metrics.phases['firewall'].count)
+
     def test_process_network_port_with_updated_ports(self):
         self._test_process_network_ports(
             {'current': {'tap0', 'tap1'},
@@ -1361,6 +1374,23 @@ class TestOvsNeutronAgent:
             self.agent._report_state()
             self.assertTrue(self.agent.fullsync)
 
+    def test_loop_count_and_wait_logs_rpc_loop_metrics(self):
+        self.agent.loop_metrics.start_iteration(0)
+        self.agent.loop_metrics.observe_phase('scan_ports', 1.5)
+        with mock.patch.object(ovs_agent.LOG, 'debug') as m_debug, \
+                mock.patch('time.sleep'):
+            self.agent.loop_count_and_wait(time.time() - 2, {})
+        metrics = m_debug.call_args_list[0][0][1]['metrics']
+        self.assertEqual(1, metrics['iterations'])
+        self.assertEqual({'scan_ports': 1.5},
+                         metrics['last_iteration']['phases'])
+        # The metrics change at every iteration, they are not reported to
+        # the server with the agent state
+        with mock.patch.object(self.agent.state_rpc, "report_state"):
+            self.agent._report_state()
+        self.assertNotIn('rpc_loop_metrics',
+                         self.agent.agent_state['configurations'])
+
     def test_port_update(self):
         port_arg = {"id": TEST_PORT_ID1}
         with mock.patch.object(self.agent.plugin_rpc.remote_resource_cache,
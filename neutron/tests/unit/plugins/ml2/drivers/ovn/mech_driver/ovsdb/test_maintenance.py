@@ -162,10 +162,103 @@ class TestDBInconsistenciesPeriodics(testlib_api.SqlTestCaseLight,
                        '_fix_create_update')
     @mock.patch.object(ovn_revision_numbers_db, 'get_inconsistent_resources')
     def test_check_for_inconsistencies(self, mock_get_incon_res, mock_fix_net):
-        fake_row = mock.Mock(resource_type=constants.TYPE_NETWORKS)
+        fake_row = mock.Mock(resource_type=constants.TYPE_NETWORKS,
+                             resource_uuid=self.net['id'])
         mock_get_incon_res.return_value = [fake_row, ]
+        self.fake_ovn_client._plugin.get_networks.return_value = [self.net]
+        self.fake_ovn_client._nb_idl.get_lswitch.return_value = None
         self.periodic.check_for_inconsistencies()
-        mock_fix_net.assert_called_once_with(mock.ANY, fake_row)
+        self.fake_ovn_client._plugin.get_networks.assert_called_once_with(
+            mock.ANY, filters={'id': [self.net['id']]})
+        mock_fix_net.assert_called_once_with(mock.ANY, fake_row, self.net)
+        self.assertEqual(
+            {constants.TYPE_NETWORKS: {
+                'batches': 1, 'fixed': 1, 'failed': 0, 'skipped': 0}},
+            self.periodic.fix_stats)
+
+    @mock.patch.object(ovn_revision_numbers_db, 'get_inconsistent_resources')
+    def test_check_for_inconsistencies_batches(self, mock_get_incon_res):
+        cfg.CONF.set_override('maintenance_batch_size', 2, group='ovn')
+        nets = [{'id': 'net%d' % idx, 'revision_number': 2}
+                for idx in range(3)]
+        mock_get_incon_res.return_value = [
+            mock.Mock(resource_type=constants.TYPE_NETWORKS,
+                      resource_uuid=net['id']) for net in nets]
+        self.fake_ovn_client._plugin.get_networks.side_effect = [
+            nets[:2], nets[2:]]
+        self.fake_ovn_client._nb_idl.get_lswitch.return_value = None
+        self.periodic.check_for_inconsistencies()
+        self.fake_ovn_client._plugin.get_networks.assert_has_calls([
+            mock.call(mock.ANY, filters={'id': ['net0', 'net1']}),
+            mock.call(mock.ANY, filters={'id': ['net2']})])
+        self.fake_ovn_client.create_network.assert_has_calls(
+            [mock.call(mock.ANY, net) for net in nets])
+        self.assertEqual(
+            {constants.TYPE_NETWORKS: {
+                'batches': 2, 'fixed': 3, 'failed': 0, 'skipped': 0}},
+            self.periodic.fix_stats)
+
+    @mock.patch.object(ovn_revision_numbers_db, 'bump_revision')
+    def test__fix_create_update_batch_update(self, mock_bump):
+        ports = [{'id': 'port%d' % idx, 'revision_number': 7}
+                 for idx in range(2)]
+        rows = [mock.Mock(resource_type=constants.TYPE_PORTS,
+                          resource_uuid=port['id']) for port in ports]
+        self.fake_ovn_client._plugin.get_ports.return_value = ports
+        self.fake_ovn_client._nb_idl.get_lswitch_port.return_value = (
+            mock.Mock(external_ids={constants.OVN_REV_NUM_EXT_ID_KEY: '5'}))
+        self.periodic._fix_create_update_batch(
+            self.ctx, constants.TYPE_PORTS, rows)
+
+        # Both updates are executed inside a single OVN transaction and the
+        # revision numbers are bumped once it has been committed.
+        self.fake_ovn_client._nb_idl.transaction.assert_called_once_with(
+            check_error=True, revision_mismatch_raise=True)
+        self.fake_ovn_client.update_port.assert_has_calls(
+            [mock.call(self.ctx, port) for port in ports])
+        mock_bump.assert_has_calls(
+            [mock.call(self.ctx, port, constants.TYPE_PORTS)
+             for port in ports])
+        self.assertEqual(
+            {constants.TYPE_PORTS: {
+                'batches': 1, 'fixed': 2, 'failed': 0, 'skipped': 0}},
+            self.periodic.fix_stats)
+
+    @mock.patch.object(ovn_revision_numbers_db, 'bump_revision')
+    def test__fix_create_update_batch_update_failed(self, mock_bump):
+        ports = [{'id': 'port%d' % idx, 'revision_number': 7}
+                 for idx in range(2)]
+        rows = [mock.Mock(resource_type=constants.TYPE_PORTS,
+                          resource_uuid=port['id']) for port in ports]
+        self.fake_ovn_client._plugin.get_ports.return_value = ports
+        self.fake_ovn_client._nb_idl.get_lswitch_port.return_value = (
+            mock.Mock(external_ids={constants.OVN_REV_NUM_EXT_ID_KEY: '5'}))
+        # The batch transaction fails, then the first port is fixed
+        # individually and the second one fails again.
+        self.fake_ovn_client.update_port.side_effect = [
+            None, RuntimeError, None, RuntimeError]
+        self.periodic._fix_create_update_batch(
+            self.ctx, constants.TYPE_PORTS, rows)
+
+        self.assertEqual(4, self.fake_ovn_client.update_port.call_count)
+        mock_bump.assert_not_called()
+        self.assertEqual(
+            {constants.TYPE_PORTS: {
+                'batches': 1, 'fixed': 1, 'failed': 1, 'skipped': 0}},
+            self.periodic.fix_stats)
+
+    def test__fix_create_update_batch_deleted_resource(self):
+        row = mock.Mock(resource_type=constants.TYPE_NETWORKS,
+                        resource_uuid='deleted-net')
+        self.fake_ovn_client._plugin.get_networks.return_value = []
+        self.periodic._fix_create_update_batch(
+            self.ctx, constants.TYPE_NETWORKS, [row])
+        self.fake_ovn_client.create_network.assert_not_called()
+        self.fake_ovn_client.update_network.assert_not_called()
+        self.assertEqual(
+            {constants.TYPE_NETWORKS: {
+                'batches': 1, 'fixed': 0, 'failed': 0, 'skipped': 1}},
+            self.periodic.fix_stats)
 
     def _test_fix_create_update_network(self, ovn_rev, neutron_rev):
         with db_api.CONTEXT_WRITER.using(self.ctx):
@@ -13,9 +13,12 @@
 #    under the License.
 
 import collections
+import datetime
 from unittest import mock
 
 from neutron_lib import constants as const
+from oslo_config import cfg
+from oslo_utils import timeutils
 
 from neutron.common.ovn import acl
 from neutron.common.ovn import constants as ovn_const
@@ -1182,6 +1185,196 @@ class TestIsRouterPortChanged(test_mech_driver.OVNMechanismDriverTestCase):
             self.db_router_port, self.lrport_nets))
 
 
+@mock.patch.object(ovn_plugin.OVNL3RouterPlugin, '_sb_ovn', mock.Mock())
+class TestOvnNbSyncIncremental(test_mech_driver.OVNMechanismDriverTestCase):
+
+    l3_plugin = 'ovn-router'
+
+    def setUp(self):
+        super().setUp()
+        cfg.CONF.set_override('neutron_sync_type', 'incremental',
+                              group='ovn')
+        self.synchronizer = ovn_db_sync.OvnNbSynchronizer(
+            self.plugin, self.mech_driver.nb_ovn, self.mech_driver.sb_ovn,
+            'repair', self.mech_driver)
+        self.ovn_api = self.synchronizer.ovn_api
+        self.full_sync_methods = [
+            'sync_port_groups', 'sync_networks_ports_and_dhcp_opts',
+            'sync_port_dns_records', 'sync_acls', 'sync_routers_and_rports',
+            'sync_port_qos_policies', 'sync_fip_qos_policies']
+        for method in self.full_sync_methods + ['sync_incremental']:
+            mock.patch.object(self.synchronizer, method).start()
+
+    def _set_checkpoint(self, value, full_value=None):
+        self.ovn_api.nb_global.external_ids = {}
+        if value:
+            self.ovn_api.nb_global.external_ids[
+                ovn_const.OVN_DB_SYNC_CHECKPOINT_KEY] = value
+        if full_value:
+            self.ovn_api.nb_global.external_ids[
+                ovn_const.OVN_DB_FULL_SYNC_CHECKPOINT_KEY] = full_value
+
+    def test_do_sync_without_checkpoint(self):
+        self._set_checkpoint(None)
+        self.synchronizer.do_sync()
+        for method in self.full_sync_methods:
+            getattr(self.synchronizer, method).assert_called_once_with(
+                mock.ANY)
+        self.synchronizer.sync_incremental.assert_not_called()
+        self.ovn_api.db_set.assert_called_once_with(
+            'NB_Global', '.',
+            external_ids={ovn_const.OVN_DB_SYNC_CHECKPOINT_KEY: mock.ANY,
+                          ovn_const.OVN_DB_FULL_SYNC_CHECKPOINT_KEY:
+                              mock.ANY})
+
+    def test_do_sync_with_checkpoint(self):
+        self._set_checkpoint('2024-11-05T10:20:30',
+                             full_value=timeutils.utcnow().isoformat())
+        self.synchronizer.do_sync()
+        for method in self.full_sync_methods:
+            getattr(self.synchronizer, method).assert_not_called()
+        self.synchronizer.sync_incremental.assert_called_once_with(
+            mock.ANY, datetime.datetime(2024, 11, 5, 10, 20, 30))
+        self.ovn_api.db_set.assert_called_once_with(
+            'NB_Global', '.',
+            external_ids={ovn_const.OVN_DB_SYNC_CHECKPOINT_KEY: mock.ANY})
+
+    def test_do_sync_full_sync_due(self):
+        self._set_checkpoint('2024-11-05T10:20:30',
+                             full_value='2024-11-01T10:20:30')
+        self.synchronizer.do_sync()
+        sync_networks = self.synchronizer.sync_networks_ports_and_dhcp_opts
+        sync_networks.assert_called_once_with(mock.ANY)
+        self.synchronizer.sync_incremental.assert_not_called()
+
+    def test_do_sync_full_sync_disabled(self):
+        cfg.CONF.set_override('neutron_sync_full_interval', 0, group='ovn')
+        self._set_checkpoint('2024-11-05T10:20:30')
+        self.synchronizer.do_sync()
+        self.synchronizer.sync_incremental.assert_called_once_with(
+            mock.ANY, mock.ANY)
+
+    def test_do_sync_invalid_checkpoint(self):
+        self._set_checkpoint('not a date')
+        self.synchronizer.do_sync()
+        sync_networks = self.synchronizer.sync_networks_ports_and_dhcp_opts
+        sync_networks.assert_called_once_with(mock.ANY)
+        self.synchronizer.sync_incremental.assert_not_called()
+
+    def test_do_sync_log_mode_no_checkpoint_update(self):
+        self.synchronizer.mode = ovn_db_sync.SYNC_MODE_LOG
+        self._set_checkpoint('2024-11-05T10:20:30',
+                             full_value=timeutils.utcnow().isoformat())
+        self.synchronizer.do_sync()
+        self.synchronizer.sync_incremental.assert_called_once_with(
+            mock.ANY, mock.ANY)
+        self.ovn_api.db_set.assert_not_called()
+
+    def test__iter_changed_resources(self):
+        cfg.CONF.set_override('neutron_sync_chunk_size', 2,
+                              group='ovn')
+        rows = [mock.Mock(resource_uuid='uuid%d' % idx) for idx in range(3)]
+        with mock.patch.object(
+                ovn_db_sync.revision_numbers_db,
+                'get_resources_changed_since',
+                side_effect=[rows[:2], rows[2:]]) as mock_get:
+            chunks = list(self.synchronizer._iter_changed_resources(
+                mock.sentinel.ctx, ovn_const.TYPE_PORTS, mock.sentinel.since))
+        self.assertEqual([rows[:2], rows[2:]], chunks)
+        mock_get.assert_has_calls([
+            mock.call(mock.sentinel.ctx, ovn_const.TYPE_PORTS,
+                      mock.sentinel.since, limit=2, marker=None),
+            mock.call(mock.sentinel.ctx, ovn_const.TYPE_PORTS,
+                      mock.sentinel.since, limit=2, marker='uuid1')])
+
+    def _test__sync_resource(self, ovn_obj, rev_row_number=1,
+                             resource_type=ovn_const.TYPE_NETWORKS):
+        res_map = {'ovn_get': mock.Mock(return_value=ovn_obj),
+                   'ovn_create': mock.Mock(),
+                   'ovn_update': mock.Mock()}
+        n_obj = {'id': 'res-id', 'revision_number': 2}
+        rev_row = mock.Mock(revision_number=rev_row_number)
+        with mock.patch.object(ovn_db_sync.revision_numbers_db,
+                               'bump_revision') as mock_bump:
+            self.synchronizer._sync_resource(
+                mock.sentinel.ctx, res_map, resource_type, n_obj, rev_row)
+        return res_map, n_obj, mock_bump
+
+    def test__sync_resource_missing(self):
+        res_map, n_obj, mock_bump = self._test__sync_resource(None)
+        res_map['ovn_create'].assert_called_once_with(mock.sentinel.ctx,
+                                                      n_obj)
+        res_map['ovn_update'].assert_not_called()
+        mock_bump.assert_not_called()
+
+    def test__sync_resource_outdated(self):
+        ovn_obj = fakes.FakeOvsdbRow.create_one_ovsdb_row(
+            attrs={'external_ids': {ovn_const.OVN_REV_NUM_EXT_ID_KEY: '1'}})
+        res_map, n_obj, mock_bump = self._test__sync_resource(ovn_obj)
+        res_map['ovn_update'].assert_called_once_with(mock.sentinel.ctx,
+                                                      n_obj)
+        res_map['ovn_create'].assert_not_called()
+        mock_bump.assert_not_called()
+
+    def test__sync_resource_revision_row_outdated(self):
+        ovn_obj = fakes.FakeOvsdbRow.create_one_ovsdb_row(
+            attrs={'external_ids': {ovn_const.OVN_REV_NUM_EXT_ID_KEY: '2'}})
+        res_map, n_obj, mock_bump = self._test__sync_resource(ovn_obj)
+        res_map['ovn_create'].assert_not_called()
+        res_map['ovn_update'].assert_not_called()
+        mock_bump.assert_called_once_with(mock.sentinel.ctx, n_obj,
+                                          ovn_const.TYPE_NETWORKS)
+
+    def test__sync_resource_in_sync(self):
+        ovn_obj = fakes.FakeOvsdbRow.create_one_ovsdb_row(
+            attrs={'external_ids': {ovn_const.OVN_REV_NUM_EXT_ID_KEY: '2'}})
+        res_map, n_obj, mock_bump = self._test__sync_resource(
+            ovn_obj, rev_row_number=2)
+        res_map['ovn_create'].assert_not_called()
+        res_map['ovn_update'].assert_not_called()
+        mock_bump.assert_not_called()
+
+    def test__sync_resource_log_mode(self):
+        self.synchronizer.mode = ovn_db_sync.SYNC_MODE_LOG
+        res_map, n_obj, mock_bump = self._test__sync_resource(None)
+        res_map['ovn_create'].assert_not_called()
+        mock_bump.assert_not_called()
+
+    def test__sync_resource_new_subnet(self):
+        res_map, n_obj, mock_bump = self._test__sync_resource(
+            None, rev_row_number=ovn_const.INITIAL_REV_NUM,
+            resource_type=ovn_const.TYPE_SUBNETS)
+        res_map['ovn_create'].assert_called_once_with(mock.sentinel.ctx,
+                                                      n_obj)
+        res_map['ovn_get'].assert_not_called()
+
+    def test__sync_deleted_resources_security_group_rule(self):
+        acls = [fakes.FakeOvsdbRow.create_one_ovsdb_row(
+                    attrs={'external_ids': {
+                               ovn_const.OVN_SG_RULE_EXT_ID_KEY: rule_id},
+                           'direction': 'to-lport', 'priority': 1002,
+                           'match': 'match-%s' % rule_id})
+                for rule_id in ('rule1', 'rule2')]
+        pg = fakes.FakeOvsdbRow.create_one_ovsdb_row(
+            attrs={'name': 'pg1', 'acls': acls})
+        self.ovn_api._tables = {'Port_Group': mock.Mock(rows={'pg1': pg})}
+        rows = [mock.Mock(resource_uuid=rule_id,
+                          resource_type=ovn_const.TYPE_SECURITY_GROUP_RULES)
+                for rule_id in ('rule1', 'rule3')]
+        with mock.patch.object(
+                ovn_db_sync.revision_numbers_db, 'get_deleted_resources',
+                return_value=rows), \
+                mock.patch.object(ovn_db_sync.revision_numbers_db,
+                                  'delete_revision') as mock_delete:
+            self.synchronizer._sync_deleted_resources(mock.sentinel.ctx, {})
+        self.ovn_api.pg_acl_del.assert_called_once_with(
+            'pg1', 'to-lport', 1002, 'match-rule1', if_exists=True)
+        mock_delete.assert_has_calls([
+            mock.call(mock.sentinel.ctx, rule_id,
+                      ovn_const.TYPE_SECURITY_GROUP_RULES)
+            for rule_id in ('rule1', 'rule3')])
+
+
 class TestOvnSbSyncML2(test_mech_driver.OVNMechanismDriverTestCase):
 
     def test_ovn_sb_sync(self):
@@ -2312,6 +2312,43 @@ class TestOVNMechanismDriver(TestOVNMechanismDriverBase):
         mock_create_port.assert_called_once_with(mock.ANY, passed_fake_port)
         mock_notify_dhcp.assert_called_once_with(fake_port['id'])
 
+    @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
+    @mock.patch.object(ovn_client.OVNClient, 'create_ports')
+    def test_create_port_postcommit_bulk(self, mock_create_ports,
+                                         mock_notify_dhcp):
+        fake_ports = [fakes.FakePort.create_one_port(
+            attrs={'status': const.PORT_STATUS_DOWN}).info()
+            for _i in range(3)]
+        fake_ctxs = [mock.Mock(current=port) for port in fake_ports]
+        self.mech_driver.create_port_postcommit_bulk(fake_ctxs)
+        passed_fake_ports = []
+        for port, ctx in zip(fake_ports, fake_ctxs):
+            passed_fake_port = copy.deepcopy(port)
+            passed_fake_port['network'] = ctx.network.current
+            passed_fake_ports.append(passed_fake_port)
+        mock_create_ports.assert_called_once_with(
+            fake_ctxs[0].plugin_context, passed_fake_ports)
+        mock_notify_dhcp.assert_has_calls(
+            [mock.call(port['id']) for port in fake_ports])
+
+    def test_create_ports_single_transaction(self):
+        with self.network() as net, self.subnet(network=net):
+            ports_in = {'ports': [{'port': {
+                'network_id': net['network']['id'],
+                'project_id': self._tenant_id,
+                'admin_state_up': True,
+                'device_id': '',
+                'device_owner': '',
+                'fixed_ips': const.ATTR_NOT_SPECIFIED,
+                'name': '',
+                'security_groups': const.ATTR_NOT_SPECIFIED}}
+                for _i in range(3)]}
+            self.nb_ovn.transaction.reset_mock()
+            self.nb_ovn.create_lswitch_port.reset_mock()
+            self.plugin.create_port_bulk(self.context, ports_in)
+        self.assertEqual(3, self.nb_ovn.create_lswitch_port.call_count)
+        self.nb_ovn.transaction.assert_called_once_with(check_error=True)
+
     @mock.patch.object(mech_driver.OVNMechanismDriver,
                        '_is_port_provisioning_required', lambda *_: True)
     @mock.patch.object(mech_driver.OVNMechanismDriver, '_notify_dhcp_updated')
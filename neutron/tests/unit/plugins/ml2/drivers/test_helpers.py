@@ -13,14 +13,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 from unittest import mock
 
 from neutron_lib import context
+from neutron_lib.db import api as db_api
 from neutron_lib.plugins import utils as plugin_utils
 from oslo_config import cfg
 from oslo_db import exception as exc
+from oslo_utils import timeutils
 from sqlalchemy.orm import query
 
+from neutron.db.models.plugins.ml2 import segmentallocationshard as shard_model
+from neutron.plugins.ml2.drivers import helpers
 from neutron.plugins.ml2.drivers import type_vlan
 from neutron.tests.unit import testlib_api
 
@@ -46,6 +51,9 @@ class HelpersTest(testlib_api.SqlTestCase):
         self.driver.network_vlan_ranges = NETWORK_VLAN_RANGES
         self.driver._sync_vlan_allocations()
         self.context = context.get_admin_context()
+        mock.patch.object(helpers.SegmentShardPool, 'shard_claim',
+                          helpers.SegmentShardClaim()).start()
+        mock.patch.object(helpers.random, 'shuffle').start()
 
     def check_raw_segment(self, expected, observed):
         for key, value in expected.items():
@@ -139,6 +147,147 @@ class HelpersTest(testlib_api.SqlTestCase):
                 self.context, **expected)
             self.check_raw_segment(expected, observed)
 
+    def test_allocate_partial_segment_from_shard(self):
+        cfg.CONF.set_override('segment_allocation_shards', 4, group='ml2')
+        # The shard 0 holds the VLAN IDs 200, 204 and 208
+        vlan_ids = [self.driver.allocate_partially_specified_segment(
+                    self.context, physical_network=TENANT_NET).vlan_id
+                    for _i in range(4)]
+        self.assertEqual({VLAN_MIN, VLAN_MIN + 4, VLAN_MIN + 8},
+                         set(vlan_ids[:3]))
+        # The shard is exhausted, the next segment is taken from the pool
+        self.assertIn(vlan_ids[3], set(range(VLAN_MIN, VLAN_MAX + 1)) -
+                      set(vlan_ids[:3]))
+
+    def test_allocate_partial_segment_from_shard_concurrently_allocated(self):
+        cfg.CONF.set_override('segment_allocation_shards', 4, group='ml2')
+        self.driver.allocate_partially_specified_segment(
+            self.context, physical_network=TENANT_NET)
+        # The segments of the shard are allocated by another worker
+        for vlan_id in (VLAN_MIN + 4, VLAN_MIN + 8):
+            self.driver.allocate_fully_specified_segment(
+                self.context, physical_network=TENANT_NET, vlan_id=vlan_id)
+        observed = self.driver.allocate_partially_specified_segment(
+            self.context, physical_network=TENANT_NET)
+        self.assertNotIn(observed.vlan_id, (VLAN_MIN + 4, VLAN_MIN + 8))
+
+
+class SegmentShardClaimTest(testlib_api.SqlTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.context = context.get_admin_context()
+        self.claim = helpers.SegmentShardClaim()
+        mock.patch.object(helpers.SegmentShardClaim, '_get_owner',
+                          return_value='host:6').start()
+        mock.patch.object(helpers.random, 'shuffle').start()
+
+    def _get_claims(self):
+        return {claim.shard: claim.owner for claim in
+                self.context.session.query(
+                    shard_model.SegmentAllocationShard)}
+
+    def _add_claim(self, shard, owner, claimed_at):
+        with db_api.CONTEXT_WRITER.using(self.context):
+            self.context.session.add(shard_model.SegmentAllocationShard(
+                shard=shard, owner=owner, claimed_at=claimed_at))
+
+    def test_get(self):
+        self._add_claim(0, 'other:1', timeutils.utcnow())
+        self.assertEqual(1, self.claim.get(self.context, 4))
+        self.assertEqual({0: 'other:1', 1: 'host:6'}, self._get_claims())
+
+    def test_get_workers(self):
+        shards = []
+        for pid in (6, 7, 8):
+            with mock.patch.object(helpers.SegmentShardClaim, '_get_owner',
+                                   return_value='host:%s' % pid):
+                shards.append(
+                    helpers.SegmentShardClaim().get(self.context, 4))
+        self.assertEqual([0, 1, 2], shards)
+
+    def test_get_no_free_shard(self):
+        for shard in range(2):
+            self._add_claim(shard, 'other:%s' % shard, timeutils.utcnow())
+        self.assertIsNone(self.claim.get(self.context, 2))
+
+    def test_get_expired_claim(self):
+        claimed_at = timeutils.utcnow() - datetime.timedelta(
+            seconds=helpers.SEGMENT_SHARD_CLAIM_TIMEOUT + 1)
+        self._add_claim(0, 'other:1', claimed_at)
+        self.assertEqual(0, self.claim.get(self.context, 1))
+        self.assertEqual({0: 'host:6'}, self._get_claims())
+
+    def test_get_renewed(self):
+        self.assertEqual(0, self.claim.get(self.context, 4))
+        renewal = timeutils.utcnow() + datetime.timedelta(
+            seconds=helpers.SEGMENT_SHARD_CLAIM_RENEWAL + 1)
+        with mock.patch.object(timeutils, 'utcnow', return_value=renewal):
+            self.assertEqual(0, self.claim.get(self.context, 4))
+        claim = self.context.session.query(
+            shard_model.SegmentAllocationShard).one()
+        self.assertEqual(renewal, claim.claimed_at)
+
+    def test_get_claim_taken_over(self):
+        self.assertEqual(0, self.claim.get(self.context, 4))
+        with db_api.CONTEXT_WRITER.using(self.context):
+            self.context.session.query(
+                shard_model.SegmentAllocationShard).update(
+                    {'owner': 'other:1'})
+        renewal = timeutils.utcnow() + datetime.timedelta(
+            seconds=helpers.SEGMENT_SHARD_CLAIM_RENEWAL + 1)
+        with mock.patch.object(timeutils, 'utcnow', return_value=renewal):
+            self.assertEqual(1, self.claim.get(self.context, 4))
+
+
+class SegmentShardPoolTest(testlib_api.SqlTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.driver = type_vlan.VlanTypeDriver()
+        self.driver.network_vlan_ranges = NETWORK_VLAN_RANGES
+        self.driver._sync_vlan_allocations()
+        self.context = context.get_admin_context()
+        mock.patch.object(helpers.SegmentShardPool, 'shard_claim',
+                          helpers.SegmentShardClaim()).start()
+        mock.patch.object(helpers.random, 'shuffle').start()
+
+    def test_get(self):
+        pool = self.driver.shard_pool
+        segments = []
+        for _i in range(4):
+            segment = pool.get(self.context, 4, physical_network=TENANT_NET)
+            segments.append(segment)
+            if segment:
+                self.driver.segmentation_obj.allocate(self.context,
+                                                      **segment)
+        self.assertEqual(
+            [{'physical_network': TENANT_NET, 'vlan_id': vlan_id}
+             for vlan_id in (VLAN_MIN, VLAN_MIN + 4, VLAN_MIN + 8)],
+            sorted(segments[:3], key=lambda segment: segment['vlan_id']))
+        self.assertIsNone(segments[3])
+        self.assertIsNone(pool.get(self.context, 4,
+                                   physical_network='other_phys_net'))
+
+    def test_get_no_shard(self):
+        with mock.patch.object(helpers.SegmentShardClaim, 'get',
+                               return_value=None):
+            self.assertIsNone(self.driver.shard_pool.get(
+                self.context, 4, physical_network=TENANT_NET))
+
+    def test_get_other_shard(self):
+        pool = self.driver.shard_pool
+        pool.get(self.context, 4, physical_network=TENANT_NET)
+        # The claim was taken over, the segments of the new shard are used
+        with mock.patch.object(helpers.SegmentShardClaim, 'get',
+                               return_value=1):
+            segments = [pool.get(self.context, 4,
+                                 physical_network=TENANT_NET)
+                        for _i in range(3)]
+        self.assertEqual(
+            {VLAN_MIN + 1, VLAN_MIN + 5, VLAN_MIN + 9},
+            {segment['vlan_id'] for segment in segments})
+
 
 class HelpersTestWithNetworkSegmentRange(HelpersTest):
 
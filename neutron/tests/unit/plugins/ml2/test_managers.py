@@ -208,6 +208,62 @@ class TestMechManager(base.BaseTestCase):
     def test_port_precommit(self):
         self._check_resource('port')
 
+    def test_create_port_bulk_fallback_to_single_calls(self):
+        contexts = [mock.Mock(current={'id': 'port1'}),
+                    mock.Mock(current={'id': 'port2'})]
+        with mock.patch.object(mechanism_test.TestMechanismDriver,
+                               'create_port_precommit') as m_pre, \
+                mock.patch.object(mechanism_test.TestMechanismDriver,
+                                  'create_port_postcommit') as m_post:
+            self._manager.create_port_precommit_bulk(contexts)
+            self._manager.create_port_postcommit_bulk(contexts)
+        m_pre.assert_has_calls([mock.call(ctx) for ctx in contexts])
+        m_post.assert_has_calls([mock.call(ctx) for ctx in contexts])
+
+    def test_create_port_bulk_driver_bulk_method(self):
+        contexts = [mock.Mock(current={'id': 'port1'}),
+                    mock.Mock(current={'id': 'port2'})]
+        with mock.patch.object(mechanism_test.TestMechanismDriver,
+                               'create_port_postcommit_bulk',
+                               create=True) as m_bulk, \
+                mock.patch.object(mechanism_test.TestMechanismDriver,
+                                  'create_port_postcommit') as m_post:
+            errors = self._manager.create_port_postcommit_bulk(contexts)
+        m_bulk.assert_called_once_with(contexts)
+        m_post.assert_not_called()
+        self.assertEqual({}, errors)
+
+    def test_create_port_postcommit_bulk_errors(self):
+        contexts = [mock.Mock(current={'id': 'port1'}),
+                    mock.Mock(current={'id': 'port2'})]
+        error = RuntimeError()
+        with mock.patch.object(mechanism_test.TestMechanismDriver,
+                               'create_port_postcommit_bulk',
+                               create=True,
+                               side_effect=RuntimeError()) as m_bulk, \
+                mock.patch.object(mechanism_test.TestMechanismDriver,
+                                  'create_port_postcommit',
+                                  side_effect=[None, error]) as m_post:
+            errors = self._manager.create_port_postcommit_bulk(contexts)
+        m_bulk.assert_called_once_with(contexts)
+        m_post.assert_has_calls([mock.call(ctx) for ctx in contexts])
+        self.assertEqual({'port2': error}, errors)
+
+    def test_create_port_precommit_bulk_errors(self):
+        contexts = [mock.Mock()]
+        with mock.patch.object(mechanism_test.TestMechanismDriver,
+                               'create_port_precommit',
+                               side_effect=db_exc.DBDeadlock()):
+            self.assertRaises(db_exc.DBDeadlock,
+                              self._manager.create_port_precommit_bulk,
+                              contexts)
+        with mock.patch.object(mechanism_test.TestMechanismDriver,
+                               'create_port_precommit',
+                               side_effect=RuntimeError()):
+            self.assertRaises(ml2_exc.MechanismDriverError,
+                              self._manager.create_port_precommit_bulk,
+                              contexts)
+
 
 class TypeManagerTestCase(base.BaseTestCase):
 
@@ -1291,6 +1291,27 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                 plugin.update_port_status(ctx, short_id, 'UP')
                 mock_gbl.assert_called_once_with(mock.ANY, port_id, mock.ANY)
 
+    def test_ports_bound_to_host(self):
+        ctx = context.get_admin_context()
+        plugin = directory.get_plugin()
+        with self.port(is_admin=True, arg_list=(portbindings.HOST_ID,),
+                       **{portbindings.HOST_ID: 'host1'}) as port1, \
+                self.port() as port2:
+            port1_id = port1['port']['id']
+            port2_id = port2['port']['id']
+            short_id = port2_id[:11]
+            result = plugin.ports_bound_to_host(
+                ctx, [port1_id, short_id, 'unknown'], 'host1')
+            self.assertEqual({port1_id, short_id}, set(result))
+            self.assertEqual(port1_id, result[port1_id][0].id)
+            self.assertTrue(result[port1_id][1])
+            self.assertEqual(port2_id, result[short_id][0].id)
+            self.assertFalse(result[short_id][1])
+            result = plugin.ports_bound_to_host(ctx, [port1_id], 'host2')
+            self.assertFalse(result[port1_id][1])
+            result = plugin.ports_bound_to_host(ctx, [port1_id], None)
+            self.assertFalse(result[port1_id][1])
+
     def test_update_port_with_empty_data(self):
         ctx = context.get_admin_context()
         plugin = directory.get_plugin()
@@ -1783,6 +1804,90 @@ class TestMl2PortsV2(test_plugin.TestPortsV2, Ml2PluginV2TestCase):
                     # "IpamAllocation" registers
                     self.assertEqual([], allocations)
 
+    def _get_bulk_ports_request(self, net_id, num_ports, **kwargs):
+        port = {'network_id': net_id,
+                'project_id': self._tenant_id,
+                'admin_state_up': True,
+                'device_id': '',
+                'device_owner': '',
+                'fixed_ips': constants.ATTR_NOT_SPECIFIED,
+                'name': '',
+                'security_groups': constants.ATTR_NOT_SPECIFIED}
+        port.update(kwargs)
+        return {'ports': [{'port': dict(port)} for _i in range(num_ports)]}
+
+    def test_create_ports_bulk_duplicated_mac_address(self):
+        ctx = context.get_admin_context()
+        with self.network() as net:
+            ports_in = self._get_bulk_ports_request(
+                net['network']['id'], 2, mac_address='fa:16:3e:00:00:01')
+            self.assertRaises(exc.MacAddressInUse,
+                              self.plugin.create_port_bulk, ctx, ports_in)
+            self.assertEqual([], self.plugin.get_ports(
+                ctx, filters={'network_id': [net['network']['id']]}))
+
+    def test_create_ports_bulk_mac_address_in_use(self):
+        ctx = context.get_admin_context()
+        with self.network() as net, self.subnet(network=net) as subnet, \
+                self.port(subnet=subnet) as port:
+            ports_in = self._get_bulk_ports_request(net['network']['id'], 1)
+            ports_in['ports'].append({'port': dict(
+                ports_in['ports'][0]['port'],
+                mac_address=port['port']['mac_address'])})
+            with mock.patch.object(self.plugin, '_get_macs_in_use',
+                                   wraps=self.plugin._get_macs_in_use) as m:
+                self.assertRaises(exc.MacAddressInUse,
+                                  self.plugin.create_port_bulk, ctx, ports_in)
+            # Only the requested MAC addresses are checked, in one query.
+            m.assert_called_once_with(ctx, net['network']['id'],
+                                      {port['port']['mac_address']})
+
+    def test_create_ports_bulk_mechanism_drivers_called_once(self):
+        ctx = context.get_admin_context()
+        mech_manager = self.plugin.mechanism_manager
+        with self.network() as net, self.subnet(network=net), \
+                mock.patch.object(
+                    mech_manager, 'create_port_precommit_bulk',
+                    wraps=mech_manager.create_port_precommit_bulk) as m_pre, \
+                mock.patch.object(
+                    mech_manager, 'create_port_postcommit_bulk',
+                    wraps=mech_manager.create_port_postcommit_bulk) as m_post,\
+                mock.patch.object(mech_manager,
+                                  'create_port_postcommit') as m_single:
+            ports_in = self._get_bulk_ports_request(net['network']['id'], 3)
+            ports_out = self.plugin.create_port_bulk(ctx, ports_in)
+
+        self.assertEqual(3, len(ports_out))
+        self.assertEqual(3, len({p['fixed_ips'][0]['ip_address']
+                                 for p in ports_out}))
+        m_pre.assert_called_once()
+        m_post.assert_called_once()
+        m_single.assert_not_called()
+        self.assertEqual([p['id'] for p in ports_out],
+                         [c.current['id'] for c in m_post.call_args[0][0]])
+
+    def test_create_ports_bulk_postcommit_failure_deletes_failed_ports(self):
+        ctx = context.get_admin_context()
+        failed = []
+
+        def _postcommit_bulk(contexts):
+            failed.append(contexts[0].current['id'])
+            return {failed[0]: ml2_exc.MechanismDriverError(
+                method='create_port_postcommit')}
+
+        with self.network() as net, self.subnet(network=net), \
+                mock.patch.object(
+                    self.plugin.mechanism_manager,
+                    'create_port_postcommit_bulk',
+                    side_effect=_postcommit_bulk):
+            ports_in = self._get_bulk_ports_request(net['network']['id'], 2)
+            self.assertRaises(ml2_exc.MechanismDriverError,
+                              self.plugin.create_port_bulk, ctx, ports_in)
+            ports = self.plugin.get_ports(
+                ctx, filters={'network_id': [net['network']['id']]})
+            self.assertEqual(1, len(ports))
+            self.assertNotEqual(failed[0], ports[0]['id'])
+
     def test_registry_publish_before_after_port_binding(self):
         plugin = directory.get_plugin()
         ctx = context.get_admin_context()
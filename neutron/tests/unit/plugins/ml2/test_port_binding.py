@@ -146,6 +146,49 @@ class PortBindingTestCase(test_plugin.NeutronDbPluginV2TestCase):
                                                cached_networks=cached_networks)
             self.assertFalse(self.plugin.get_network.called)
 
+    def test_get_bound_port_context_cache_miss(self):
+        ctx = context.get_admin_context()
+        with self.network() as network, \
+                self.port(network=network) as port1, \
+                self.port(network=network) as port2:
+            network_id = network['network']['id']
+            cached_networks = {}
+            with mock.patch.object(self.plugin, 'get_network',
+                                   wraps=self.plugin.get_network) as get_net:
+                port_context1 = self.plugin.get_bound_port_context(
+                    ctx, port1['port']['id'], cached_networks=cached_networks)
+                port_context2 = self.plugin.get_bound_port_context(
+                    ctx, port2['port']['id'], cached_networks=cached_networks)
+            get_net.assert_called_once_with(ctx, network_id)
+            self.assertIs(cached_networks[network_id], port_context1.network)
+            self.assertIs(port_context1.network, port_context2.network)
+
+    def test_get_bound_ports_contexts(self):
+        ctx = context.get_admin_context()
+        with self.network() as network1, self.network() as network2, \
+                self.port(network=network1) as port1, \
+                self.port(network=network1) as port2, \
+                self.port(network=network2) as port3:
+            port_ids = [port['port']['id'] for port in (port1, port2, port3)]
+            with mock.patch.object(
+                    self.plugin, 'get_network_contexts',
+                    wraps=self.plugin.get_network_contexts) as get_net_ctxs:
+                port_contexts = self.plugin.get_bound_ports_contexts(
+                    ctx, port_ids + ['unknown'])
+            get_net_ctxs.assert_called_once_with(
+                ctx, {network1['network']['id'], network2['network']['id']})
+            self.assertIsNone(port_contexts['unknown'])
+            for port_id in port_ids:
+                self.assertEqual(port_id, port_contexts[port_id].current['id'])
+            self.assertIs(port_contexts[port_ids[0]].network,
+                          port_contexts[port_ids[1]].network)
+            network = port_contexts[port_ids[2]].network
+            self.assertEqual(network2['network']['id'],
+                             network.current['id'])
+            self.assertEqual(1, len(network.network_segments))
+            self.assertEqual(network.network_segments[0]['network_type'],
+                             network.current['provider:network_type'])
+
     def _test_update_port_binding(self, host, new_host=None):
         with mock.patch.object(self.plugin,
                                '_notify_port_updated') as notify_mock:
@@ -281,51 +281,187 @@ class RpcCallbacksTestCase(base.BaseTestCase):
                          self.callbacks.update_device_down(
                              mock.Mock(), device='fake_device'))
 
-    def _test_update_device_list(self, devices_up_side_effect,
-                                 devices_down_side_effect, expected):
-        devices_up = [1, 2, 3]
-        devices_down = [4, 5]
-        kwargs = {'host': 'fake_host', 'agent_id': 'fake_agent_id'}
-        with mock.patch.object(self.callbacks, 'update_device_up',
-                               side_effect=devices_up_side_effect) as f_up, \
-            mock.patch.object(self.callbacks, 'update_device_down',
-                              side_effect=devices_down_side_effect) as f_down:
+    def _mock_port(self, port_id, device_owner='compute:nova'):
+        return mock.Mock(id=port_id + '-full', device_owner=device_owner)
+
+    def _test_update_device_list(self, ports, devices_up=(),
+                                 devices_down=(), host='fake_host',
+                                 failing_port_id=None, error=Exception,
+                                 failed_provisioning=()):
+        def update_port_statuses(context, statuses, host):
+            if failing_port_id in statuses:
+                raise error()
+            return {full_id: full_id for full_id in statuses}
+
+        self.plugin._device_to_port_id.side_effect = (
+            lambda context, device, pci_slot=None: device)
+        self.plugin.ports_bound_to_host.return_value = ports
+        self.plugin.update_port_statuses.side_effect = update_port_statuses
+        self.plugin.mechanism_manager.mech_drivers = {}
+        with mock.patch.object(provisioning_blocks,
+                               'provisioning_complete_bulk',
+                               return_value=set(failed_provisioning)) as pc, \
+                mock.patch.object(self.callbacks,
+                                  '_notify_l2pop_ports_wiring',
+                                  return_value=set()) as l2pop:
             res = self.callbacks.update_device_list(
-                'fake_context', devices_up=devices_up,
-                devices_down=devices_down, **kwargs)
-            self.assertEqual(expected, res)
-            self.assertEqual(len(devices_up), f_up.call_count)
-            self.assertEqual(len(devices_down), f_down.call_count)
+                'fake_context', devices_up=list(devices_up),
+                devices_down=list(devices_down), host=host,
+                agent_id='fake_agent_id')
+        return res, pc, l2pop
 
     def test_update_device_list_no_failure(self):
-        devices_up_side_effect = [1, 2, 3]
-        devices_down_side_effect = [
-             {'device': 4, 'exists': True},
-             {'device': 5, 'exists': True}]
-        expected = {'devices_up': devices_up_side_effect,
-                    'failed_devices_up': [],
-                    'devices_down':
-                        [{'device': 4, 'exists': True},
-                         {'device': 5, 'exists': True}],
-                    'failed_devices_down': []}
-        self._test_update_device_list(devices_up_side_effect,
-                                      devices_down_side_effect,
-                                      expected)
+        ports = {'1': (self._mock_port('1'), True),
+                 '2': (self._mock_port('2'), True),
+                 '3': (self._mock_port('3'), True)}
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_up=['1', '2'], devices_down=['3'])
+        self.assertEqual({'devices_up': ['1', '2'],
+                          'failed_devices_up': [],
+                          'devices_down': [{'device': '3', 'exists': True}],
+                          'failed_devices_down': []}, res)
+        self.plugin.ports_bound_to_host.assert_called_once_with(
+            'fake_context', {'1', '2', '3'}, 'fake_host')
+        self.assertCountEqual(['1-full', '2-full'], pc.call_args[0][1])
+        self.plugin.update_port_statuses.assert_called_once_with(
+            'fake_context', {'3-full': constants.PORT_STATUS_DOWN},
+            'fake_host')
+        l2pop.assert_has_calls([
+            mock.call('fake_context', {'1', '2'},
+                      constants.PORT_STATUS_ACTIVE, 'fake_host', False),
+            mock.call('fake_context', {'3'}, constants.PORT_STATUS_DOWN,
+                      'fake_host')])
+
+    def test_update_device_list_port_not_found_no_host(self):
+        ports = {'1': (self._mock_port('1'), False)}
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_up=['2'], devices_down=['1', '3'], host=None)
+        self.assertEqual({'devices_up': ['2'],
+                          'failed_devices_up': [],
+                          'devices_down': [{'device': '1', 'exists': True},
+                                           {'device': '3', 'exists': False}],
+                          'failed_devices_down': []}, res)
+        self.assertEqual([], pc.call_args[0][1])
+        self.plugin.update_port_statuses.assert_called_once_with(
+            'fake_context', {'1-full': constants.PORT_STATUS_DOWN}, None)
+
+    def test_update_device_list_get_ports_failure(self):
+        self.plugin.ports_bound_to_host.side_effect = Exception()
+        res, pc, l2pop = self._test_update_device_list(
+            {}, devices_up=['1', '2'], devices_down=['3'])
+        self.assertEqual({'devices_up': [],
+                          'failed_devices_up': ['1', '2'],
+                          'devices_down': [],
+                          'failed_devices_down': ['3']}, res)
+        pc.assert_not_called()
+        l2pop.assert_not_called()
 
     def test_update_device_list_failed_devices(self):
-
-        devices_up_side_effect = [1, Exception('testdevice'), 3]
-        devices_down_side_effect = [{'device': 4, 'exists': True},
-                                    Exception('testdevice')]
-        expected = {'devices_up': [1, 3],
-                    'failed_devices_up': [2],
-                    'devices_down':
-                        [{'device': 4, 'exists': True}],
-                    'failed_devices_down': [5]}
-
-        self._test_update_device_list(devices_up_side_effect,
-                                      devices_down_side_effect,
-                                      expected)
+        ports = {'1': (self._mock_port('1'), True),
+                 '2': (self._mock_port('2'), True),
+                 '3': (self._mock_port('3'), True),
+                 '4': (self._mock_port('4'), True),
+                 '5': (self._mock_port('5'), True)}
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_up=['1', '2', '3'], devices_down=['4', '5'],
+            failing_port_id='5-full')
+        self.assertEqual({'devices_up': ['1', '2', '3'],
+                          'failed_devices_up': [],
+                          'devices_down': [{'device': '4', 'exists': True}],
+                          'failed_devices_down': ['5']}, res)
+
+    def test_update_device_list_provisioning_failure(self):
+        ports = {'1': (self._mock_port('1'), True),
+                 '2': (self._mock_port('2'), True)}
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_up=['1', '2'], failed_provisioning=['2-full'])
+        self.assertEqual(['1'], res['devices_up'])
+        self.assertEqual(['2'], res['failed_devices_up'])
+
+    def test_update_device_list_not_bound_to_host(self):
+        ports = {'1': (self._mock_port('1'), False),
+                 '2': (self._mock_port('2', device_owner='network:dhcp'),
+                       False),
+                 '3': (self._mock_port('3'), False)}
+        cfg.CONF.set_override('notify_nova_on_port_status_changes', True)
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_up=['1', '2'], devices_down=['3'])
+        self.assertEqual(['1', '2'], res['devices_up'])
+        self.assertEqual([{'device': '3', 'exists': True}],
+                         res['devices_down'])
+        self.plugin.nova_notifier.notify_port_active_direct.\
+            assert_called_once_with(ports['1'][0])
+        self.assertEqual([], pc.call_args[0][1])
+        self.plugin.update_port_statuses.assert_called_once_with(
+            'fake_context', {}, 'fake_host')
+        l2pop.assert_has_calls([
+            mock.call('fake_context', {'2'}, constants.PORT_STATUS_ACTIVE,
+                      'fake_host', False),
+            mock.call('fake_context', {'3'}, constants.PORT_STATUS_DOWN,
+                      'fake_host')])
+
+    def test_update_device_list_dvr_port(self):
+        ports = {'1': (self._mock_port(
+            '1', device_owner=constants.DEVICE_OWNER_DVR_INTERFACE), True)}
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_up=['1'])
+        self.assertEqual(['1'], res['devices_up'])
+        self.plugin.update_port_status.assert_called_once_with(
+            'fake_context', '1-full', constants.PORT_STATUS_ACTIVE,
+            'fake_host')
+        self.assertEqual([], pc.call_args[0][1])
+
+    def test_update_device_list_down_stale_data(self):
+        ports = {'1': (self._mock_port('1'), True),
+                 '2': (self._mock_port('2'), True)}
+        res, pc, l2pop = self._test_update_device_list(
+            ports, devices_down=['1', '2'], failing_port_id='2-full',
+            error=exc.StaleDataError)
+        self.assertEqual({'devices_up': [],
+                          'failed_devices_up': [],
+                          'devices_down': [{'device': '1', 'exists': True},
+                                           {'device': '2', 'exists': False}],
+                          'failed_devices_down': []}, res)
+
+    def test_notify_l2pop_ports_wiring(self):
+        l2pop_driver = mock.Mock()
+        self.plugin.mechanism_manager.mech_drivers = {
+            'l2population': l2pop_driver}
+        contexts = {}
+        for port_id, network_id in (('1', 'net2'), ('2', 'net1'),
+                                    ('3', 'net2')):
+            contexts[port_id] = mock.Mock(current={
+                'id': port_id, 'network_id': network_id,
+                'device_owner': 'compute:nova',
+                portbindings.HOST_ID: 'fake_host'})
+        contexts['4'] = None
+        contexts['3'].current['device_owner'] = 'fail'
+        self.plugin.get_bound_ports_contexts.return_value = contexts
+
+        def update_port_up(port_context, refresh_tunnels):
+            if port_context.current['device_owner'] == 'fail':
+                raise Exception()
+
+        l2pop_driver.obj.update_port_up.side_effect = update_port_up
+        with mock.patch.object(plugin_rpc.l3_hamode_db,
+                               'is_ha_router_port', return_value=False):
+            failed = self.callbacks._notify_l2pop_ports_wiring(
+                'fake_context', {'1', '2', '3', '4'},
+                constants.PORT_STATUS_ACTIVE, 'fake_host')
+        self.assertEqual({'3'}, failed)
+        # The ports are notified network by network
+        self.assertEqual(
+            ['net1', 'net2', 'net2'],
+            [c[0][0].current['network_id'] for c in
+             l2pop_driver.obj.update_port_up.call_args_list])
+
+    def test_notify_l2pop_ports_wiring_get_contexts_failure(self):
+        self.plugin.mechanism_manager.mech_drivers = {
+            'l2population': mock.Mock()}
+        self.plugin.get_bound_ports_contexts.side_effect = Exception()
+        self.assertEqual({'1', '2'}, self.callbacks._notify_l2pop_ports_wiring(
+            'fake_context', {'1', '2'}, constants.PORT_STATUS_DOWN,
+            'fake_host'))
 
     def test_update_device_list_empty_devices(self):
 
@@ -13,12 +13,15 @@
 #    under the License.
 
 import errno
+import socket
 from unittest import mock
 
 import pyroute2
 from pyroute2 import iproute
 from pyroute2 import netlink
 from pyroute2.netlink import exceptions as netlink_exceptions
+from pyroute2.netlink import rtnl
+from pyroute2.netlink.rtnl import ndmsg
 
 from neutron.privileged.agent.linux import ip_lib as priv_lib
 from neutron.tests import base
@@ -244,6 +247,99 @@ class IpLibTestCase(base.BaseTestCase):
     def _clean(self, client_mode):
         priv_lib.privileged.link_cmd.client_mode = client_mode
 
+    def _clean_default(self, client_mode):
+        priv_lib.privileged.default.client_mode = client_mode
+
+    def _apply_ip_operations(self, operations):
+        client_mode = priv_lib.privileged.default.client_mode
+        priv_lib.privileged.default.client_mode = False
+        self.addCleanup(self._clean_default, client_mode)
+        return priv_lib.apply_ip_operations('namespace', operations)
+
+    @mock.patch.object(priv_lib, 'get_iproute')
+    def test_apply_ip_operations(self, mock_iproute):
+        mock_ip = mock_iproute.return_value.__enter__.return_value
+        mock_ip.link_lookup.side_effect = lambda ifname: {
+            'eth0': [2], 'eth1': [3]}.get(ifname, [])
+        mock_ip.addr.side_effect = [
+            None, netlink_exceptions.NetlinkError(code=errno.EADDRNOTAVAIL),
+            netlink_exceptions.NetlinkError(code=errno.EEXIST)]
+        operations = [
+            {'type': 'address', 'command': 'add',
+             'args': {'device': 'eth0', 'ip_version': 4,
+                      'address': '192.168.0.1', 'prefixlen': 32,
+                      'scope': 'global', 'broadcast': None}},
+            {'type': 'address', 'command': 'delete',
+             'args': {'device': 'eth0', 'ip_version': 4,
+                      'address': '192.168.0.2', 'prefixlen': 32}},
+            {'type': 'address', 'command': 'add',
+             'args': {'device': 'eth0', 'ip_version': 4,
+                      'address': '192.168.0.3', 'prefixlen': 32}},
+            {'type': 'route', 'command': 'add',
+             'args': {'cidr': '10.0.0.0/24', 'ip_version': 4,
+                      'via': '192.168.0.254'}},
+            {'type': 'neigh', 'command': 'add',
+             'args': {'device': 'eth1', 'ip_version': 4,
+                      'ip_address': '10.0.0.1',
+                      'mac_address': 'fa:16:3e:00:00:01',
+                      'nud_state': 'permanent'}},
+            {'type': 'neigh', 'command': 'delete',
+             'args': {'device': 'eth2', 'ip_version': 4,
+                      'ip_address': '10.0.0.2',
+                      'mac_address': 'fa:16:3e:00:00:02'}},
+        ]
+
+        errors = self._apply_ip_operations(operations)
+
+        self.assertEqual([2, 5], [index for index, _error in errors])
+        self.assertIn('192.168.0.3', errors[0][1])
+        self.assertIn('eth2', errors[1][1])
+        # A single socket is opened, and each device is looked up once
+        mock_iproute.assert_called_once_with('namespace')
+        mock_ip.link_lookup.assert_has_calls([
+            mock.call(ifname='eth0'), mock.call(ifname='eth1'),
+            mock.call(ifname='eth2')])
+        self.assertEqual(3, mock_ip.link_lookup.call_count)
+        mock_ip.addr.assert_has_calls([
+            mock.call('add', index=2, address='192.168.0.1', mask=32,
+                      family=socket.AF_INET, broadcast=None, scope=0),
+            mock.call('delete', index=2, address='192.168.0.2', mask=32,
+                      family=socket.AF_INET)])
+        mock_ip.route.assert_called_once_with(
+            'replace', family=socket.AF_INET, dst='10.0.0.0/24',
+            proto=rtnl.rt_proto['static'], gateway='192.168.0.254')
+        mock_ip.neigh.assert_called_once_with(
+            'replace', ifindex=3, dst='10.0.0.1',
+            lladdr='fa:16:3e:00:00:01', family=socket.AF_INET,
+            state=ndmsg.states['permanent'])
+
+    @mock.patch.object(priv_lib, 'get_iproute')
+    def test_apply_ip_operations_ignored_errors(self, mock_iproute):
+        mock_ip = mock_iproute.return_value.__enter__.return_value
+        mock_ip.link_lookup.return_value = [2]
+        mock_ip.route.side_effect = netlink_exceptions.NetlinkError(
+            code=errno.ESRCH)
+        mock_ip.neigh.side_effect = netlink_exceptions.NetlinkError(
+            code=errno.ENOENT)
+        operations = [
+            {'type': 'route', 'command': 'delete',
+             'args': {'cidr': '10.0.0.0/24', 'ip_version': 4,
+                      'via': '192.168.0.254'}},
+            {'type': 'neigh', 'command': 'delete',
+             'args': {'device': 'eth0', 'ip_version': 4,
+                      'ip_address': '10.0.0.2',
+                      'mac_address': 'fa:16:3e:00:00:02'}},
+        ]
+
+        self.assertEqual([], self._apply_ip_operations(operations))
+
+    @mock.patch.object(priv_lib, 'get_iproute')
+    def test_apply_ip_operations_namespace_not_exists(self, mock_iproute):
+        mock_iproute.side_effect = OSError(errno.ENOENT,
+                                           "Test no netns exception")
+        self.assertRaises(priv_lib.NetworkNamespaceNotFound,
+                          self._apply_ip_operations, [])
+
     def test_get_link_vfs(self):
         # NOTE(ralonsoh): there should be a functional test checking this
         # method, but this is not possible due to the lack of SR-IOV capable
@@ -180,6 +180,31 @@ class L3SchedulerBaseTestCase(base.BaseTestCase):
         self.assertFalse(plugin.get_l3_agent_candidates.called)
 
 
+class L3AgentsLoadTestCase(base.BaseTestCase):
+
+    def test_get_least_loaded(self):
+        agents_load = l3_agent_scheduler.L3AgentsLoad(
+            ['a1', 'a2', 'a3'], {'a1': 2, 'a3': 1, 'a4': 5})
+        self.assertEqual(0, agents_load.get_router_count('a2'))
+        self.assertEqual(['a2'], agents_load.get_least_loaded(
+            ['a1', 'a2', 'a3']))
+        self.assertEqual(['a3', 'a1'], agents_load.get_least_loaded(
+            ['a1', 'a3'], number=2))
+        self.assertEqual([], agents_load.get_least_loaded(['a4']))
+
+    def test_add_router(self):
+        agents_load = l3_agent_scheduler.L3AgentsLoad(
+            ['a1', 'a2'], {'a1': 1})
+        agents_load.add_router('a2')
+        agents_load.add_router('a2')
+        self.assertEqual(2, agents_load.get_router_count('a2'))
+        self.assertEqual(['a1'], agents_load.get_least_loaded(['a1', 'a2']))
+        agents_load.add_router('a1')
+        agents_load.add_router('a1')
+        self.assertEqual(['a2', 'a1'], agents_load.get_least_loaded(
+            ['a1', 'a2'], number=3))
+
+
 class L3SchedulerBaseMixin:
 
     def _register_l3_agents(self, plugin=None):
@@ -764,6 +789,104 @@ class L3AgentLeastRoutersSchedulerTestCase(L3SchedulerTestCaseMixin,
 
                         self.assertNotEqual(agent_id1, agent_id3)
 
+    def _create_unscheduled_routers(self, count):
+        self._set_l3_agent_admin_state(self.adminContext,
+                                       self.agent_id1, False)
+        self._set_l3_agent_admin_state(self.adminContext,
+                                       self.agent_id2, False)
+        router_ids = [
+            self._make_router(self.fmt,
+                              uuidutils.generate_uuid())['router']['id']
+            for _i in range(count)]
+        self._set_l3_agent_admin_state(self.adminContext,
+                                       self.agent_id1, True)
+        self._set_l3_agent_admin_state(self.adminContext,
+                                       self.agent_id2, True)
+        return router_ids
+
+    def test_schedule_routers(self):
+        router_ids = self._create_unscheduled_routers(4)
+        scheduler = self.plugin.router_scheduler
+        scheduler.bind_router(self.plugin, self.adminContext,
+                              router_ids[0], self.agent_id1)
+
+        with mock.patch.object(self.plugin,
+                               'get_l3_agent_with_min_routers') as min_mock:
+            chosen_agents = scheduler.schedule_routers(
+                self.plugin, self.adminContext, router_ids)
+
+        self.assertFalse(min_mock.called)
+        self.assertEqual(set(router_ids[1:]), set(chosen_agents))
+        self.assertEqual(
+            self.agent_id2, chosen_agents[router_ids[1]]['id'])
+        self.assertEqual(
+            {self.agent_id1: 2, self.agent_id2: 2},
+            rb_obj.RouterL3AgentBinding.get_router_count_by_l3_agent_ids(
+                self.adminContext, [self.agent_id1, self.agent_id2]))
+
+    def test_schedule_routers_bound_to_disabled_agent(self):
+        router_ids = self._create_unscheduled_routers(2)
+        scheduler = self.plugin.router_scheduler
+        # the first router is only bound to a disabled agent, with a binding
+        # index left free for a new binding
+        rb_obj.RouterL3AgentBinding(
+            self.adminContext, l3_agent_id=self.agent_id1,
+            router_id=router_ids[0], binding_index=2).create()
+        # the second router is hosted by an enabled agent
+        scheduler.bind_router(self.plugin, self.adminContext,
+                              router_ids[1], self.agent_id2)
+        self._set_l3_agent_admin_state(self.adminContext,
+                                       self.agent_id1, False)
+
+        chosen_agents = scheduler.schedule_routers(
+            self.plugin, self.adminContext, router_ids)
+
+        self.assertEqual([router_ids[0]], list(chosen_agents))
+        self.assertEqual(self.agent_id2, chosen_agents[router_ids[0]]['id'])
+        bindings = rb_obj.RouterL3AgentBinding.get_objects(
+            self.adminContext, router_id=router_ids)
+        self.assertEqual(
+            {(router_ids[0], self.agent_id1), (router_ids[0], self.agent_id2),
+             (router_ids[1], self.agent_id2)},
+            {(binding.router_id, binding.l3_agent_id)
+             for binding in bindings})
+
+    def test_schedule_routers_in_batches(self):
+        router_ids = self._create_unscheduled_routers(5)
+        scheduler = self.plugin.router_scheduler
+
+        with mock.patch.object(l3_agent_scheduler,
+                               'BIND_ROUTERS_BATCH_SIZE', 2), \
+                mock.patch.object(scheduler, '_bind_routers',
+                                  wraps=scheduler._bind_routers) as bind:
+            chosen_agents = scheduler.schedule_routers(
+                self.plugin, self.adminContext, router_ids)
+
+        self.assertEqual(3, bind.call_count)
+        self.assertEqual(set(router_ids), set(chosen_agents))
+        self.assertEqual(
+            5, len(rb_obj.RouterL3AgentBinding.get_objects(
+                self.adminContext, router_id=router_ids)))
+
+    def test__bind_routers_conflict(self):
+        router_ids = self._create_unscheduled_routers(2)
+        scheduler = self.plugin.router_scheduler
+        # the first router is concurrently scheduled to another agent
+        scheduler.bind_router(self.plugin, self.adminContext,
+                              router_ids[0], self.agent_id2)
+
+        bound_router_ids = scheduler._bind_routers(
+            self.plugin, self.adminContext,
+            [(router_id, self.agent_id1) for router_id in router_ids])
+
+        self.assertEqual({router_ids[1]}, bound_router_ids)
+        bindings = rb_obj.RouterL3AgentBinding.get_objects(
+            self.adminContext, router_id=router_ids)
+        self.assertEqual(
+            {(router_ids[0], self.agent_id2), (router_ids[1], self.agent_id1)},
+            {(binding.router_id, binding.l3_agent_id)
+             for binding in bindings})
+
 
 class L3DvrScheduler(l3_db.L3_NAT_db_mixin,
                      l3_dvrscheduler_db.L3_DVRsch_db_mixin):
@@ -1716,12 +1839,13 @@ class L3AgentSchedulerDbMixinTestCase(L3HATestCaseMixin):
         return router, agents
 
     def test_reschedule_ha_routers_from_down_agents(self):
-        agents = self._setup_ha_router()[1]
+        router, agents = self._setup_ha_router()
         self.assertEqual(2, len(agents))
         self._set_l3_agent_dead(self.agent_id1)
-        with mock.patch.object(self.plugin, 'reschedule_router') as reschedule:
+        with mock.patch.object(self.plugin,
+                               'reschedule_routers') as reschedule:
             self.plugin.reschedule_routers_from_down_agents()
-            self.assertTrue(reschedule.called)
+            reschedule.assert_called_once_with(mock.ANY, [router['id']])
 
     def test_list_l3_agents_hosting_ha_router(self):
         router = self._create_ha_router()
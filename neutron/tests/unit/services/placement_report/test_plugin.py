@@ -16,6 +16,7 @@ from unittest import mock
 
 from keystoneauth1 import exceptions as ks_exc
 from neutron_lib.agent import constants as agent_const
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from neutron.services.placement_report import plugin
@@ -330,6 +331,134 @@ class PlacementReportPluginTestCases(test_plugin.Ml2PluginV2TestCase):
                 client=mock.ANY)
             mock_state.deferred_sync.assert_called_once()
 
+    def _agent(self, bandwidth=1000):
+        return {
+            'agent_type': 'test_mechanism_driver_agent',
+            'configurations': {
+                'resource_provider_bandwidths': {
+                    'eth0': {'egress': bandwidth, 'ingress': bandwidth}},
+                'resource_provider_inventory_defaults': {},
+                'resource_provider_hypervisors': {'eth0': 'hypervisor0'},
+            },
+            'host': 'fake host',
+        }
+
+    def _sync(self, agent, agent_db, hypervisor_uuid='fake uuid',
+              failing_method=None):
+        client = self.service_plugin._placement_client
+        methods = ('update_trait', 'ensure_resource_provider',
+                   'update_resource_provider_traits',
+                   'update_resource_provider_inventories')
+        with mock.patch.object(self.service_plugin._batch_notifier,
+                               'queue_event') as mock_queue_event, \
+            mock.patch.object(
+                client, 'list_resource_providers',
+                return_value={'resource_providers': [
+                    {'uuid': hypervisor_uuid}]}), \
+            mock.patch.multiple(client, autospec=True,
+                                **{m: mock.DEFAULT for m in methods}) as \
+                mock_methods:
+
+            if failing_method:
+                mock_methods[failing_method].side_effect = ks_exc.HttpError
+            self.service_plugin._sync_placement_state(agent, agent_db)
+            self.service_plugin._execute_deferred(
+                [c[0][0] for c in mock_queue_event.call_args_list])
+
+        return {m: mock_methods[m].call_count for m in methods}
+
+    def test__sync_placement_state_delta(self):
+        agent_db = mock.Mock()
+        calls = self._sync(self._agent(), agent_db)
+        self.assertEqual({'update_trait': 2,
+                          'ensure_resource_provider': 2,
+                          'update_resource_provider_traits': 2,
+                          'update_resource_provider_inventories': 1},
+                         calls)
+        self.assertTrue(agent_db.resources_synced)
+
+        # Nothing changed
+        calls = self._sync(self._agent(), agent_db)
+        self.assertEqual(0, sum(calls.values()))
+        self.assertTrue(agent_db.resources_synced)
+
+        # Only the inventory changed
+        calls = self._sync(self._agent(bandwidth=2000), agent_db)
+        self.assertEqual({'update_trait': 0,
+                          'ensure_resource_provider': 0,
+                          'update_resource_provider_traits': 0,
+                          'update_resource_provider_inventories': 1},
+                         calls)
+
+    def test__sync_placement_state_hypervisor_rp_changed(self):
+        agent_db = mock.Mock()
+        self._sync(self._agent(), agent_db)
+        calls = self._sync(self._agent(), agent_db,
+                           hypervisor_uuid='other uuid')
+        self.assertEqual(7, sum(calls.values()))
+
+    def test__sync_placement_state_failed_calls_retried(self):
+        agent_db = mock.Mock()
+        self._sync(self._agent(), agent_db,
+                   failing_method='update_resource_provider_inventories')
+        self.assertFalse(agent_db.resources_synced)
+
+        calls = self._sync(self._agent(), agent_db)
+        self.assertEqual({'update_trait': 0,
+                          'ensure_resource_provider': 0,
+                          'update_resource_provider_traits': 0,
+                          'update_resource_provider_inventories': 1},
+                         calls)
+        self.assertTrue(agent_db.resources_synced)
+
+    def test_full_sync_if_agent_is_new(self):
+        agent = self._agent()
+        self._sync(agent, mock.Mock())
+        payload = mock.Mock(desired_state=agent,
+                            metadata={'status': agent_const.AGENT_NEW})
+        with mock.patch.object(self.service_plugin._core_plugin,
+                               '_get_agent_by_type_and_host'), \
+            mock.patch.object(self.service_plugin,
+                              '_sync_placement_state'):
+            self.service_plugin.handle_placement_config(
+                mock.ANY, mock.ANY, mock.ANY, payload)
+
+        calls = self._sync(agent, mock.Mock())
+        self.assertEqual(7, sum(calls.values()))
+
+    def test__execute_deferred_latest_sync_per_agent(self):
+        first_sync = mock.Mock()
+        last_sync = mock.Mock()
+        other_sync = mock.Mock()
+        self.service_plugin._pending_syncs[('type', 'host1')] = first_sync
+        self.service_plugin._pending_syncs[('type', 'host1')] = last_sync
+        self.service_plugin._pending_syncs[('type', 'host2')] = other_sync
+
+        self.service_plugin._execute_deferred(
+            [('type', 'host1'), ('type', 'host2'), ('type', 'host1')])
+
+        first_sync.assert_not_called()
+        last_sync.assert_called_once_with()
+        other_sync.assert_called_once_with()
+        self.assertEqual({}, self.service_plugin._pending_syncs)
+
+    def test__rate_limit(self):
+        cfg.CONF.set_override('sync_rate_limit', 10, group='placement')
+        with mock.patch.object(plugin.eventlet, 'sleep') as mock_sleep, \
+                mock.patch.object(plugin.time, 'monotonic',
+                                  return_value=0):
+            for _i in range(3):
+                self.service_plugin._rate_limit()
+
+        mock_sleep.assert_has_calls([mock.call(0.1), mock.call(0.2)])
+        self.assertEqual(2, mock_sleep.call_count)
+
+    def test__rate_limit_disabled(self):
+        with mock.patch.object(plugin.eventlet, 'sleep') as mock_sleep:
+            for _i in range(3):
+                self.service_plugin._rate_limit()
+        mock_sleep.assert_not_called()
+
 
 class PlacementReporterAgentsTestCases(test_plugin.Ml2PluginV2TestCase):
 
@@ -754,6 +754,78 @@ class NeutronPolicyTestCase(base.BaseTestCase):
     def test_enforce_tenant_id_check_invalid_parent_resource_raises(self):
         self._test_enforce_tenant_id_raises('tenant_id:%(foobaz_tenant_id)s')
 
+    def test_check_items(self):
+        targets = [{'tenant_id': 'fake'}, {'tenant_id': 'other'},
+                   {'tenant_id': 'fake'}, {'tenant_id': 'other'},
+                   {'tenant_id': 'fake'}]
+        with mock.patch.object(policy._ENFORCER, 'enforce',
+                               wraps=policy._ENFORCER.enforce) as enforce:
+            results = policy.check_items(self.context, 'get_port', targets)
+        expected = [True, False, True, False, True]
+        self.assertEqual(expected, results)
+        # The rule is evaluated once per distinct tenant_id
+        self.assertEqual(2, enforce.call_count)
+
+    def test_check_items_same_as_check(self):
+        targets = [{'tenant_id': 'fake', 'shared': True},
+                   {'tenant_id': 'other', 'shared': True},
+                   {'tenant_id': 'other', 'shared': False},
+                   {'tenant_id': 'other'}]
+        self.assertEqual(
+            [policy.check(self.context, 'get_network', target)
+             for target in targets],
+            policy.check_items(self.context, 'get_network', targets))
+
+    def test_check_items_cache_stats(self):
+        stats = policy.get_check_cache_stats()
+        policy.check_items(self.context, 'get_port',
+                           [{'tenant_id': 'fake'}] * 4)
+        new_stats = policy.get_check_cache_stats()
+        self.assertEqual(3, new_stats['hits'] - stats['hits'])
+        self.assertEqual(1, new_stats['misses'] - stats['misses'])
+        self.assertGreater(new_stats['hit_rate'], 0)
+
+    def test_check_items_rules_changed(self):
+        target = {'tenant_id': 'other'}
+        self.assertEqual([False], policy.check_items(self.context,
+                                                     'get_port', [target]))
+        self.rules['admin_or_owner'] = oslo_policy.RuleCheck(
+            'rule', 'regular_user')
+        policy._ENFORCER.set_rules(oslo_policy.Rules(self.rules))
+        self.assertEqual([True], policy.check_items(self.context,
+                                                    'get_port', [target]))
+
+    def test_check_items_unhashable_field(self):
+        self._set_rules(get_port='tenant_id:%(tenant_id)s')
+        policy.refresh()
+        targets = [{'tenant_id': ['fake']}, {'tenant_id': ['fake']}]
+        results = policy.check_items(self.context, 'get_port', targets)
+        self.assertFalse(any(results))
+        self.assertEqual(2, len(results))
+
+    def test_check_items_create_action(self):
+        with mock.patch.object(policy, 'check',
+                               return_value=True) as mock_check:
+            results = policy.check_items(self.context, 'create_port',
+                                         [{'tenant_id': 'fake'}] * 2)
+        self.assertTrue(all(results))
+        self.assertEqual(2, len(results))
+        self.assertEqual(2, mock_check.call_count)
+
+    def test_check_items_admin(self):
+        cfg.CONF.set_override('enforce_new_defaults', False, 'oslo_policy')
+        admin_context = context.get_admin_context()
+        with mock.patch.object(policy._ENFORCER, 'enforce') as enforce:
+            results = policy.check_items(admin_context, 'get_port',
+                                         [{'tenant_id': 'other'}])
+        self.assertEqual([True], results)
+        enforce.assert_not_called()
+
+    def test__get_compiled_rule_target_fields(self):
+        _match_rule, fields = policy._get_compiled_rule('get_port')
+        self.assertIn('tenant_id', fields)
+        self.assertIsNone(policy._get_compiled_rule('create_port'))
+
     def test_process_rules(self):
         action = "create_" + FAKE_RESOURCE_NAME
         # Construct RuleChecks for an action, attribute and subattribute
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Measure the port creation rate of the ML2 plugin.
+
+The ports are created with a single "create_port_bulk" call and, for
+comparison, with one "create_port" call per port. The ML2 plugin is loaded
+with the unit test framework (in memory SQLite database, "logger" and "test"
+mechanism drivers), so the numbers measure the Neutron server code path and
+are only meaningful when compared between them or between code versions.
+
+Usage (from the repository root, in the unit tests virtual environment):
+
+    python tools/benchmark_create_port_bulk.py --ports 500
+"""
+
+import argparse
+import sys
+import time
+import unittest
+
+from neutron_lib import constants
+
+from neutron.tests.unit.plugins.ml2 import test_plugin  # noqa: N343
+
+
+ARGS = None
+
+
+def _port_request(network_id, project_id):
+    return {'port': {'network_id': network_id,
+                     'project_id': project_id,
+                     'admin_state_up': True,
+                     'device_id': '',
+                     'device_owner': '',
+                     'fixed_ips': constants.ATTR_NOT_SPECIFIED,
+                     'name': '',
+                     'security_groups': constants.ATTR_NOT_SPECIFIED}}
+
+
+class CreatePortBulkBenchmark(test_plugin.Ml2PluginV2TestCase):
+
+    def _make_network_with_subnet(self):
+        network = self._make_network(self.fmt, 'net', True)['network']
+        self._make_subnet(self.fmt, {'network': network}, '10.0.0.1',
+                          '10.0.0.0/16')
+        return network['id']
+
+    def _run(self, name, create):
+        network_id = self._make_network_with_subnet()
+        ports = [_port_request(network_id, self._tenant_id)
+                 for _i in range(ARGS.ports)]
+        start = time.perf_counter()
+        created = create(ports)
+        elapsed = time.perf_counter() - start
+        assert len(created) == ARGS.ports
+        print('%-12s %6d ports in %8.3f s: %8.1f ports/s' %
+              (name, ARGS.ports, elapsed, ARGS.ports / elapsed))
+
+    def test_benchmark(self):
+        plugin = self.driver
+        self._run('create_port', lambda ports: [
+            plugin.create_port(self.context, port) for port in ports])
+        self._run('bulk', lambda ports: plugin.create_port_bulk(
+            self.context, {'ports': ports}))
+
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ports', type=int, default=500,
+                        help='Number of ports to create in each run.')
+    ARGS = parser.parse_args()
+    suite = unittest.TestSuite([CreatePortBulkBenchmark('test_benchmark')])
+    result = unittest.TextTestRunner(verbosity=0).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
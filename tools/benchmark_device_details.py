@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Measure the device details RPC latency of the ML2 plugin.
+
+The ports are spread over the networks and bound to a host, then their
+details are requested as an L2 agent does, with the
+"get_devices_details_list_and_failed_devices" RPC callback and, for
+comparison, with "get_devices_details_list". The ML2 plugin is loaded with
+the unit test framework (in memory SQLite database, "logger" and "test"
+mechanism drivers), so the numbers measure the Neutron server code path and
+are only meaningful when compared between them or between code versions.
+
+Usage (from the repository root, in the unit tests virtual environment):
+
+    python tools/benchmark_device_details.py --ports 100 500 1000 \
+        --networks 20
+"""
+
+import argparse
+import sys
+import time
+import unittest
+
+from neutron_lib.agent import topics
+from neutron_lib.api.definitions import portbindings
+from neutron_lib import constants
+
+from neutron.plugins.ml2 import rpc as plugin_rpc
+from neutron.tests.unit.plugins.ml2 import test_plugin  # noqa: N343
+
+
+ARGS = None
+HOST = 'host-ovs-no_filter'
+
+
+def _port_request(network_id, project_id):
+    return {'port': {'network_id': network_id,
+                     'project_id': project_id,
+                     'admin_state_up': True,
+                     'device_id': '',
+                     'device_owner': '',
+                     'fixed_ips': constants.ATTR_NOT_SPECIFIED,
+                     'name': '',
+                     'security_groups': constants.ATTR_NOT_SPECIFIED,
+                     portbindings.HOST_ID: HOST}}
+
+
+class DeviceDetailsBenchmark(test_plugin.Ml2PluginV2TestCase):
+
+    def _make_network_with_subnet(self, index):
+        network = self._make_network(self.fmt, 'net%d' % index,
+                                     True)['network']
+        self._make_subnet(self.fmt, {'network': network}, '10.0.0.1',
+                          '10.0.0.0/16')
+        return network['id']
+
+    def _create_ports(self, network_ids, count):
+        ports = [_port_request(network_ids[i % len(network_ids)],
+                               self._tenant_id)
+                 for i in range(count)]
+        return [port['id'] for port in self.driver.create_port_bulk(
+            self.context, {'ports': ports})]
+
+    def _run(self, name, port_ids, get_details):
+        start = time.perf_counter()
+        details = get_details(port_ids)
+        elapsed = time.perf_counter() - start
+        assert len(details) == len(port_ids)
+        print('%-32s %6d ports in %8.3f s: %8.3f ms/port' %
+              (name, len(port_ids), elapsed,
+               elapsed * 1000 / len(port_ids)))
+
+    def test_benchmark(self):
+        callbacks = plugin_rpc.RpcCallbacks(
+            plugin_rpc.AgentNotifierApi(topics.AGENT),
+            self.driver.type_manager)
+        network_ids = [self._make_network_with_subnet(i)
+                       for i in range(ARGS.networks)]
+        port_ids = self._create_ports(network_ids, max(ARGS.ports))
+        for count in sorted(ARGS.ports):
+            self._run(
+                'details_list_and_failed_devices', port_ids[:count],
+                lambda devices: callbacks.
+                get_devices_details_list_and_failed_devices(
+                    self.context, devices=devices, agent_id='agent',
+                    host=HOST)['devices'])
+            self._run(
+                'details_list', port_ids[:count],
+                lambda devices: callbacks.get_devices_details_list(
+                    self.context, devices=devices, agent_id='agent',
+                    host=HOST))
+
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ports', type=int, nargs='+',
+                        default=[100, 500, 1000],
+                        help='Numbers of ports to request the details of.')
+    parser.add_argument('--networks', type=int, default=20,
+                        help='Number of networks the ports are spread over.')
+    ARGS = parser.parse_args()
+    suite = unittest.TestSuite([DeviceDetailsBenchmark('test_benchmark')])
+    result = unittest.TextTestRunner(verbosity=0).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
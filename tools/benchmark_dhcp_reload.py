@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Measure the dnsmasq configuration reload latency per network size.
+
+For each network size, a network with a dual stack subnet pair and the given
+number of ports is created, its dnsmasq configuration files are written once,
+then ports are added one at a time. For each port, a new Dnsmasq driver
+instance writes the configuration files, as the DHCP agent does on every port
+event. The files are written to a temporary directory; dnsmasq is not
+started and the RPC calls to the Neutron server are not done.
+
+Usage (from the repository root):
+
+    python tools/benchmark_dhcp_reload.py --ports 1000 4000 8000
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from neutron_lib import constants
+
+from neutron.agent.linux import dhcp
+from neutron.conf.agent import common as agent_config
+from neutron.conf.agent import dhcp as dhcp_config
+from neutron.conf import common as base_config
+
+
+NETWORK_ID = 'cccccccc-cccc-cccc-cccc-cccccccccccc'
+V4_SUBNET_ID = 'dddddddd-dddd-dddd-dddd-dddddddddddd'
+V6_SUBNET_ID = 'ffffffff-ffff-ffff-ffff-ffffffffffff'
+
+
+def _make_conf(confs_dir):
+    conf = agent_config.setup_conf()
+    conf.register_opts(base_config.core_opts)
+    dhcp_config.register_agent_dhcp_opts(conf)
+    agent_config.register_external_process_opts(conf)
+    agent_config.register_interface_driver_opts_helper(conf)
+    conf([])
+    conf.set_override('dhcp_confs', confs_dir)
+    conf.set_override('enable_isolated_metadata', False)
+    return conf
+
+
+def _make_subnets():
+    return [
+        dhcp.DictModel(id=V4_SUBNET_ID, ip_version=constants.IP_VERSION_4,
+                       cidr='10.0.0.0/16', gateway_ip='10.0.0.1',
+                       enable_dhcp=True, dns_nameservers=[], host_routes=[],
+                       ipv6_address_mode=None),
+        dhcp.DictModel(id=V6_SUBNET_ID, ip_version=constants.IP_VERSION_6,
+                       cidr='fd00::/64', gateway_ip='fd00::1',
+                       enable_dhcp=True, dns_nameservers=[], host_routes=[],
+                       ipv6_address_mode=constants.DHCPV6_STATEFUL)]
+
+
+def _make_port(index):
+    ipv4 = '10.0.%d.%d' % (index >> 8 & 255, index & 255)
+    ipv6 = 'fd00::%x' % (index + 2)
+    return dhcp.DictModel(
+        id='%08x-0000-0000-0000-000000000000' % index,
+        network_id=NETWORK_ID,
+        mac_address='fa:16:3e:%02x:%02x:%02x' % (
+            index >> 16 & 255, index >> 8 & 255, index & 255),
+        device_owner='compute:nova',
+        revision_number=1,
+        fixed_ips=[{'subnet_id': V4_SUBNET_ID, 'ip_address': ipv4},
+                   {'subnet_id': V6_SUBNET_ID, 'ip_address': ipv6}],
+        extra_dhcp_opts=[],
+        dns_assignment=[
+            {'ip_address': ipv4, 'hostname': 'vm-%d' % index,
+             'fqdn': 'vm-%d.openstacklocal.' % index},
+            {'ip_address': ipv6, 'hostname': 'vm-%d' % index,
+             'fqdn': 'vm-%d.openstacklocal.' % index}])
+
+
+def _run(conf, num_ports, updates):
+    network = dhcp.NetModel(id=NETWORK_ID, subnets=_make_subnets(),
+                            non_local_subnets=[],
+                            ports=[_make_port(idx)
+                                   for idx in range(num_ports)])
+
+    def output_config_files():
+        driver = dhcp.Dnsmasq(conf, network, mock.Mock())
+        driver.device_manager.plugin.get_ports.return_value = []
+        driver._output_config_files()
+
+    output_config_files()
+    start = time.perf_counter()
+    for idx in range(num_ports, num_ports + updates):
+        network.ports.append(_make_port(idx))
+        output_config_files()
+    elapsed = time.perf_counter() - start
+    print('%6d ports: %7.2f ms/reload' %
+          (num_ports, elapsed * 1000 / updates))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ports', type=int, nargs='+',
+                        default=[1000, 4000, 8000],
+                        help='Number of ports of the network.')
+    parser.add_argument('--updates', type=int, default=20,
+                        help='Number of ports added, one reload each.')
+    args = parser.parse_args()
+    confs_dir = tempfile.mkdtemp()
+    try:
+        conf = _make_conf(confs_dir)
+        with mock.patch.object(dhcp, 'DeviceManager'), \
+                mock.patch.object(dhcp.Dnsmasq,
+                                  '_is_dnsmasq_host_tag_supported',
+                                  return_value=True):
+            for num_ports in args.ports:
+                _run(conf, num_ports, args.updates)
+    finally:
+        shutil.rmtree(confs_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
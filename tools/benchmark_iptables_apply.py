@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Compare the full and the incremental IptablesManager apply.
+
+A router with a number of floating IPs is configured, then floating IPs are
+added one at a time, with one IptablesManager.apply call per floating IP, as
+the L3 agent does. The iptables-save and iptables-restore commands are not
+executed: an in-memory model of the kernel tables replays the commands sent
+to iptables-restore and dumps them for iptables-save. The numbers measure
+the Neutron side of the apply and count the commands it executes.
+
+Usage (from the repository root):
+
+    python tools/benchmark_iptables_apply.py --floating-ips 2000
+"""
+
+import argparse
+import collections
+import sys
+import time
+from unittest import mock
+
+from oslo_config import cfg
+
+from neutron.agent.linux import iptables_manager
+from neutron.agent.linux import utils as linux_utils
+
+
+BUILTIN_CHAINS = {
+    'filter': ('INPUT', 'FORWARD', 'OUTPUT'),
+    'mangle': ('PREROUTING', 'INPUT', 'FORWARD', 'OUTPUT', 'POSTROUTING'),
+    'nat': ('PREROUTING', 'OUTPUT', 'POSTROUTING'),
+    'raw': ('PREROUTING', 'OUTPUT'),
+}
+
+
+class FakeIptables:
+    """Replay iptables-restore commands on in-memory tables."""
+
+    def __init__(self):
+        self.tables = {
+            table: collections.OrderedDict((chain, []) for chain in chains)
+            for table, chains in BUILTIN_CHAINS.items()}
+        self.calls = collections.Counter()
+        self.saved_lines = 0
+
+    def execute(self, args, process_input=None, **kwargs):
+        command = args[0]
+        self.calls[command] += 1
+        if command == 'iptables-save':
+            return self.save(args[2] if '-t' in args else None)
+        self.restore(process_input)
+        return ''
+
+    def save(self, table_name=None):
+        lines = []
+        for table, chains in self.tables.items():
+            if table_name and table != table_name:
+                continue
+            lines.append('*%s' % table)
+            lines += [':%s - [0:0]' % chain for chain in chains]
+            for rules in chains.values():
+                lines += rules
+            lines.append('COMMIT')
+        self.saved_lines += len(lines)
+        return '\n'.join(lines)
+
+    def restore(self, commands):
+        chains = None
+        for line in commands.split('\n'):
+            if not line or line.startswith('#') or line == 'COMMIT':
+                continue
+            if line.startswith('*'):
+                chains = self.tables[line[1:]]
+            elif line.startswith(':'):
+                chains.setdefault(line[1:].split(' ', 1)[0], [])
+            else:
+                action, chain, rest = (line.split(' ', 2) + [''])[:3]
+                if action == '-X':
+                    del chains[chain]
+                    continue
+                index, _sep, rule = rest.partition(' ')
+                if action == '-I':
+                    chains[chain].insert(
+                        int(index) - 1,
+                        ('-A %s %s' % (chain, rule)).strip())
+                elif action == '-D':
+                    del chains[chain][int(index) - 1]
+
+
+def _add_floating_ip(manager, index):
+    fixed_ip = '10.%d.%d.%d' % (index >> 16 & 255, index >> 8 & 255,
+                                index & 255)
+    floating_ip = '172.%d.%d.%d' % (16 + (index >> 16 & 15),
+                                    index >> 8 & 255, index & 255)
+    nat = manager.ipv4['nat']
+    nat.add_rule('PREROUTING', '-d %s/32 -j DNAT --to-destination %s' %
+                 (floating_ip, fixed_ip))
+    nat.add_rule('OUTPUT', '-d %s/32 -j DNAT --to-destination %s' %
+                 (floating_ip, fixed_ip))
+    nat.add_rule('float-snat', '-s %s/32 -j SNAT --to-source %s' %
+                 (fixed_ip, floating_ip))
+
+
+def _run(incremental, floating_ips, updates):
+    cfg.CONF.set_override('iptables_incremental_apply', incremental,
+                          'AGENT')
+    fake = FakeIptables()
+    with mock.patch.object(linux_utils, 'execute', side_effect=fake.execute):
+        manager = iptables_manager.IptablesManager(external_lock=False)
+        for index in range(floating_ips):
+            _add_floating_ip(manager, index)
+        manager.apply()
+        fake.calls.clear()
+        fake.saved_lines = 0
+        start = time.perf_counter()
+        for index in range(floating_ips, floating_ips + updates):
+            _add_floating_ip(manager, index)
+            manager.apply()
+        elapsed = time.perf_counter() - start
+    print('%-12s %6d applies in %7.3f s: %7.2f ms/apply, %4d save '
+          '(%d lines read), %4d restore' %
+          ('incremental' if incremental else 'full', updates, elapsed,
+           elapsed * 1000 / updates, fake.calls['iptables-save'],
+           fake.saved_lines, fake.calls['iptables-restore']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--floating-ips', type=int, default=2000,
+                        help='Number of floating IPs initially configured.')
+    parser.add_argument('--updates', type=int, default=50,
+                        help='Number of floating IPs added afterwards, one '
+                             'apply each.')
+    args = parser.parse_args()
+    cfg.CONF([], project='neutron')
+    cfg.CONF.set_override('comment_iptables_rules', False, 'AGENT')
+    for incremental in (False, True):
+        _run(incremental, args.floating_ips, args.updates)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
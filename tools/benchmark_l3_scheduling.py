@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Measure the router scheduling rate of the LeastRoutersScheduler.
+
+N L3 agents are registered and M routers are created without being
+scheduled, then the routers are scheduled with a single "schedule_routers"
+call and, for comparison, with one "schedule" call per router, as done
+before the bulk API existed. The L3 plugin is loaded with the unit test
+framework (in memory SQLite database), so the numbers measure the Neutron
+server code path and are only meaningful when compared between them or
+between code versions.
+
+Usage (from the repository root, in the unit tests virtual environment):
+
+    python tools/benchmark_l3_scheduling.py --agents 20 --routers 2000
+"""
+
+import argparse
+import sys
+import time
+import unittest
+
+from neutron.objects import l3agent as rb_obj
+from neutron.tests.common import helpers
+from neutron.tests.unit.scheduler import test_l3_agent_scheduler  # noqa: N343
+
+
+ARGS = None
+
+
+class L3SchedulingBenchmark(
+        test_l3_agent_scheduler.L3AgentLeastRoutersSchedulerTestCase):
+
+    def _create_unscheduled_routers(self):
+        scheduler = self.plugin.router_scheduler
+        self.plugin.router_scheduler = None
+        try:
+            return [self._make_router(self.fmt,
+                                      self._tenant_id)['router']['id']
+                    for _i in range(ARGS.routers)]
+        finally:
+            self.plugin.router_scheduler = scheduler
+
+    def _run(self, name, schedule):
+        router_ids = self._create_unscheduled_routers()
+        start = time.perf_counter()
+        schedule(router_ids)
+        elapsed = time.perf_counter() - start
+        counts = rb_obj.RouterL3AgentBinding.get_router_count_by_l3_agent_ids(
+            self.adminContext, self.agent_ids)
+        print('%-16s %6d routers on %4d agents in %8.3f s: %8.1f routers/s '
+              '(%d to %d routers per agent)' %
+              (name, ARGS.routers, len(self.agent_ids), elapsed,
+               ARGS.routers / elapsed, min(counts.values(), default=0),
+               max(counts.values(), default=0)))
+
+    def test_benchmark(self):
+        # 4 agents are already registered by the test case
+        for index in range(max(ARGS.agents - 4, 0)):
+            helpers.register_l3_agent(host='bench-host-%d' % index)
+        self.agent_ids = [agent['id'] for agent in
+                          self.plugin.get_l3_agents(self.adminContext)]
+        scheduler = self.plugin.router_scheduler
+        self._run('schedule', lambda router_ids: [
+            scheduler.schedule(self.plugin, self.adminContext, router_id)
+            for router_id in router_ids])
+        self._run('schedule_routers', lambda router_ids:
+                  scheduler.schedule_routers(self.plugin, self.adminContext,
+                                             router_ids))
+
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agents', type=int, default=20,
+                        help='Number of L3 agents (at least 4).')
+    parser.add_argument('--routers', type=int, default=2000,
+                        help='Number of routers to schedule in each run.')
+    ARGS = parser.parse_args()
+    suite = unittest.TestSuite([L3SchedulingBenchmark('test_benchmark')])
+    result = unittest.TextTestRunner(verbosity=0).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Measure the placement sync of the agents resources after their restart.
+
+The placement report service plugin syncs the resources of the agents as
+they report their state after a restart, first for all the agents (nothing
+synced yet), then again for all the agents with their configuration
+unchanged, and with the bandwidth of one device changed on every tenth
+agent. A fake placement client, answering each request after --latency
+milliseconds, counts the requests sent to placement.
+
+Usage (from the repository root, in the unit tests virtual environment):
+
+    python tools/benchmark_placement_sync.py --agents 1000 --devices 2 \
+        --workers 1 4 16
+"""
+
+import argparse
+import collections
+import sys
+import time
+import uuid
+
+import eventlet
+from neutron_lib.plugins import constants as plugin_constants
+from neutron_lib.plugins import directory
+from oslo_config import cfg
+
+from neutron.conf import common as common_config
+from neutron.conf.plugins.ml2 import config as ml2_config
+from neutron.services.placement_report import plugin
+
+
+ARGS = None
+AGENT_TYPE = 'Benchmark agent'
+
+
+class FakePlacementClient:
+
+    def __init__(self):
+        self.requests = collections.Counter()
+
+    def _request(self, method):
+        self.requests[method] += 1
+        eventlet.sleep(ARGS.latency / 1000.0)
+
+    def list_resource_providers(self, name):
+        self._request('list_resource_providers')
+        return {'resource_providers': [
+            {'uuid': str(uuid.uuid5(uuid.NAMESPACE_DNS, name))}]}
+
+    def update_trait(self, name):
+        self._request('update_trait')
+
+    def ensure_resource_provider(self, resource_provider):
+        self._request('ensure_resource_provider')
+
+    def update_resource_provider_traits(self, resource_provider_uuid,
+                                        traits):
+        self._request('update_resource_provider_traits')
+
+    def update_resource_provider_inventories(self, resource_provider_uuid,
+                                             inventories):
+        self._request('update_resource_provider_inventories')
+
+
+class FakeMechanismDriver:
+
+    agent_type = AGENT_TYPE
+    resource_provider_uuid5_namespace = uuid.UUID(
+        'b9a8c3c6-0a4e-4c5e-8f8b-6c3a1d1c7b1e')
+    supported_vnic_types = ['normal', 'direct']
+
+    def get_standard_device_mappings(self, agent):
+        return {'physnet%d' % i: ['dev%d' % i] for i in range(ARGS.devices)}
+
+
+class FakeAgentDb:
+
+    resources_synced = None
+
+    def update(self):
+        pass
+
+
+class FakeCorePlugin:
+
+    def __init__(self):
+        driver = collections.namedtuple('Driver', 'obj')(FakeMechanismDriver())
+        self.mechanism_manager = collections.namedtuple(
+            'MechanismManager', 'ordered_mech_drivers')([driver])
+
+
+def _agent(index, changed):
+    bandwidth = 20000 if changed and index % 10 == 0 else 10000
+    devices = ['dev%d' % i for i in range(ARGS.devices)]
+    return {
+        'agent_type': AGENT_TYPE,
+        'host': 'host%d' % index,
+        'configurations': {
+            'resource_provider_bandwidths': {
+                device: {'egress': bandwidth, 'ingress': bandwidth}
+                for device in devices},
+            'resource_provider_inventory_defaults': {},
+            'resource_provider_hypervisors': {
+                device: 'host%d' % index for device in devices},
+        },
+    }
+
+
+def _run(report_plugin, name, changed=False):
+    client = report_plugin._placement_client = FakePlacementClient()
+    agent_dbs = [FakeAgentDb() for _i in range(ARGS.agents)]
+    start = time.perf_counter()
+    for index, agent_db in enumerate(agent_dbs):
+        report_plugin._sync_placement_state(_agent(index, changed), agent_db)
+    report_plugin._execute_deferred(list(report_plugin._pending_syncs))
+    elapsed = time.perf_counter() - start
+    assert all(agent_db.resources_synced for agent_db in agent_dbs)
+    print('%-10s %6d agents in %8.3f s: %8d placement requests (%s)' %
+          (name, ARGS.agents, elapsed, sum(client.requests.values()),
+           ', '.join('%s: %d' % request
+                     for request in sorted(client.requests.items()))))
+
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--agents', type=int, default=1000,
+                        help='Number of agents.')
+    parser.add_argument('--devices', type=int, default=2,
+                        help='Number of devices with bandwidth per agent.')
+    parser.add_argument('--latency', type=float, default=5,
+                        help='Latency of the placement requests in ms.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16],
+                        help='Numbers of agents synced concurrently.')
+    ARGS = parser.parse_args()
+
+    common_config.register_core_common_config_opts()
+    common_config.register_placement_opts()
+    ml2_config.register_ml2_plugin_opts()
+    cfg.CONF([], project='neutron')
+    directory.add_plugin(plugin_constants.CORE, FakeCorePlugin())
+    for workers in ARGS.workers:
+        cfg.CONF.set_override('sync_workers', workers, group='placement')
+        print('%d workers' % workers)
+        report_plugin = plugin.PlacementReportPlugin()
+        _run(report_plugin, 'initial')
+        _run(report_plugin, 'restart')
+        _run(report_plugin, 'changed', changed=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())